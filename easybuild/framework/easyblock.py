@@ -58,6 +58,7 @@ import shutil
 import stat
 import sys
 import tempfile
+import threading
 import time
 import traceback
 from concurrent.futures import ThreadPoolExecutor
@@ -77,11 +78,13 @@ from easybuild.framework.easyconfig.parser import fetch_parameters_from_easyconf
 from easybuild.framework.easyconfig.style import MAX_LINE_LENGTH
 from easybuild.framework.easyconfig.tools import dump_env_easyblock, get_paths_for
 from easybuild.framework.easyconfig.templates import TEMPLATE_NAMES_EASYBLOCK_RUN_STEP, template_constant_dict
-from easybuild.framework.extension import Extension, resolve_exts_filter_template
-from easybuild.tools import LooseVersion, config
-from easybuild.tools.build_details import get_build_stats
+from easybuild.framework.extension import Extension, resolve_exts_filter_template, run_batched_import_check
+from easybuild.tools import LooseVersion, config, version_sort_key
+from easybuild.tools.binary_cache import add_to_binary_cache, det_install_input_hash, det_install_inputs
+from easybuild.tools.binary_cache import find_in_binary_cache, restore_from_binary_cache, write_install_input_hash
+from easybuild.tools.build_details import estimate_extension_durations, get_build_stats, record_build
 from easybuild.tools.build_log import EasyBuildError, EasyBuildExit, dry_run_msg, dry_run_warning, dry_run_set_dirs
-from easybuild.tools.build_log import print_error, print_msg, print_warning
+from easybuild.tools.build_log import collect_output, print_collected_output, print_error, print_msg, print_warning
 from easybuild.tools.config import CHECKSUM_PRIORITY_JSON, DEFAULT_ENVVAR_USERS_MODULES
 from easybuild.tools.config import EASYBUILD_SOURCES_URL, EBPYTHONPREFIXES  # noqa
 from easybuild.tools.config import FORCE_DOWNLOAD_ALL, FORCE_DOWNLOAD_PATCHES, FORCE_DOWNLOAD_SOURCES
@@ -95,7 +98,7 @@ from easybuild.tools.filetools import CHECKSUM_TYPE_SHA256
 from easybuild.tools.filetools import adjust_permissions, apply_patch, back_up_file, change_dir, check_lock, clean_dir
 from easybuild.tools.filetools import compute_checksum, convert_name, copy_dir, copy_file, create_lock
 from easybuild.tools.filetools import create_non_existing_paths, create_patch_info, derive_alt_pypi_url, diff_files
-from easybuild.tools.filetools import download_file, encode_class_name, extract_file
+from easybuild.tools.filetools import download_file, encode_class_name, extract_file, extract_files
 from easybuild.tools.filetools import find_backup_name_candidate, get_cwd, get_source_tarball_from_git, is_alt_pypi_url
 from easybuild.tools.filetools import is_binary, is_parent_path, is_sha256_checksum, mkdir, move_file, move_logs
 from easybuild.tools.filetools import read_file, remove_dir, remove_file, remove_lock, symlink, verify_checksum
@@ -117,7 +120,11 @@ from easybuild.tools.output import PROGRESS_BAR_DOWNLOAD_ALL, PROGRESS_BAR_EASYC
 from easybuild.tools.output import show_progress_bars, start_progress_bar, stop_progress_bar, update_progress_bar
 from easybuild.tools.package.utilities import package
 from easybuild.tools.repository.repository import init_repository
-from easybuild.tools.systemtools import check_linked_shared_libs, det_parallelism
+from easybuild.tools.profiling import profile_phase
+from easybuild.tools.resource_usage import RESOURCE_USAGE_CAT_EXTENSION, RESOURCE_USAGE_CAT_STEP
+from easybuild.tools.resource_usage import ResourceUsageRecorder, record_resource_usage, resource_usage_file_paths
+from easybuild.tools.resource_usage import set_resource_usage_recorder
+from easybuild.tools.systemtools import check_linked_shared_libs, det_parallelism, get_avail_core_count
 from easybuild.tools.systemtools import get_cuda_architectures
 from easybuild.tools.systemtools import get_linked_libs_raw, get_shared_lib_ext, pick_system_specific_value, use_group
 from easybuild.tools.utilities import INDENT_4SPACES, get_class_for, nub, quote_str
@@ -154,6 +161,62 @@ def _obtain_file_update_progress_bar_on_return(func):
     return wrapper
 
 
+# locks to serialize downloading of files to a particular path across threads (see fetch_files_and_compute_checksums),
+# indexed by target path, with number of threads that are using the lock
+_DOWNLOAD_LOCKS = {}
+_DOWNLOAD_LOCKS_LOCK = threading.Lock()
+
+
+@contextmanager
+def _download_lock(path):
+    """Context manager to ensure that only one thread at a time downloads a file to specified path."""
+    with _DOWNLOAD_LOCKS_LOCK:
+        lock, users = _DOWNLOAD_LOCKS.get(path, (None, 0))
+        if lock is None:
+            lock = threading.Lock()
+        _DOWNLOAD_LOCKS[path] = (lock, users + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        # clean up lock when it's no longer being used
+        with _DOWNLOAD_LOCKS_LOCK:
+            lock, users = _DOWNLOAD_LOCKS[path]
+            if users > 1:
+                _DOWNLOAD_LOCKS[path] = (lock, users - 1)
+            else:
+                del _DOWNLOAD_LOCKS[path]
+
+
+def _download_file_once(filename, url, path, force_download=False):
+    """
+    Download file from specified URL to specified path, unless the file was already downloaded to that path
+    by another thread; the file is first downloaded to a temporary location, and then moved into place,
+    so a partially downloaded file is never picked up.
+
+    :return: True if file is available at specified path, False otherwise
+    """
+    with _download_lock(path):
+        if os.path.isfile(path) and not force_download:
+            _log.info("File %s was downloaded to %s in the meantime", filename, path)
+            return True
+
+        target_dir = os.path.dirname(path)
+        mkdir(target_dir, parents=True)
+        tmpdir = tempfile.mkdtemp(prefix='.eb-download-', dir=target_dir)
+        try:
+            tmp_path = os.path.join(tmpdir, os.path.basename(path))
+            downloaded = download_file(filename, url, tmp_path)
+            if downloaded:
+                if os.path.exists(path):
+                    back_up_file(path)
+                move_file(tmp_path, path)
+        finally:
+            remove_dir(tmpdir)
+
+    return bool(downloaded)
+
+
 class EasyBlock:
     """Generic support for building and installing software, base class for actual easyblocks."""
 
@@ -202,6 +265,18 @@ class EasyBlock:
         self.installdir = None  # software or data
         self.installdir_mod = None  # module file
 
+        # binary cache of installations (see easybuild.tools.binary_cache)
+        self.binary_cache_hit = False
+        self.install_inputs = None
+        self.install_input_hash = None
+
+        # recorder of resource usage during installation (only used with --record-resource-usage)
+        self.resource_usage = None
+
+        # duration (in seconds) of installation steps and extensions (recorded in build history, see --build-history-db)
+        self.step_timings = {}
+        self.ext_timings = {}
+
         # extensions
         self.exts = []
         self.exts_all = None
@@ -898,7 +973,7 @@ class EasyBlock:
                         self.log.info("Found file %s at %s, no need to download it", filename, filepath)
                         return fullpath
 
-                if download_file(filename, url, fullpath):
+                if _download_file_once(filename, url, fullpath, force_download=force_download):
                     return fullpath
 
             except IOError as err:
@@ -1058,7 +1133,7 @@ class EasyBlock:
                     self.log.debug("Trying to download file %s from %s to %s ..." % (filename, fullurl, targetpath))
                     downloaded = False
                     try:
-                        if download_file(filename, fullurl, targetpath):
+                        if _download_file_once(filename, fullurl, targetpath, force_download=force_download):
                             downloaded = True
 
                     except IOError as err:
@@ -2147,14 +2222,16 @@ class EasyBlock:
                                           rpath_include_dirs=self.rpath_include_dirs,
                                           rpath_wrappers_dir=self.rpath_wrappers_dir)
                     try:
-                        ext.install_extension_substep("pre_install_extension")
-                        with self.module_generator.start_module_creation():
-                            txt = ext.install_extension_substep("install_extension")
-                        if txt:
-                            self.module_extra_extensions += txt
-                        ext.install_extension_substep("post_install_extension")
+                        with record_resource_usage(ext.name, RESOURCE_USAGE_CAT_EXTENSION):
+                            ext.install_extension_substep("pre_install_extension")
+                            with self.module_generator.start_module_creation():
+                                txt = ext.install_extension_substep("install_extension")
+                            if txt:
+                                self.module_extra_extensions += txt
+                            ext.install_extension_substep("post_install_extension")
                     finally:
                         ext_duration = datetime.now() - start_time
+                        self.ext_timings[ext.name] = ext_duration.total_seconds()
                         if ext_duration.total_seconds() >= 1:
                             print_msg("\t... (took %s)", time2str(ext_duration), log=self.log, silent=self.silent)
                         elif self.logdebug or build_option('trace'):
@@ -2187,6 +2264,16 @@ class EasyBlock:
         exts_cnt = len(all_ext_names)
         exts_queue = self.ext_instances[:]
 
+        # if required dependencies are known for all extensions, start installation of extensions
+        # that took longest in previous builds first (see --build-history-db), to reduce overall installation time
+        ext_durations = estimate_extension_durations(self.name, det_full_ec_version(self.cfg))
+        if ext_durations and all(ext.required_deps is not None for ext in exts_queue):
+            self.log.info("Ordering extensions by estimated installation time: %s", ext_durations)
+            exts_queue.sort(key=lambda ext: -ext_durations.get(ext.name, 0))
+
+        # start time of extension installations that are running
+        ext_start_times = {}
+
         def update_exts_progress_bar_helper(running_exts, progress_size):
             """Helper function to update extensions progress bar."""
             running_exts_cnt = len(running_exts)
@@ -2222,6 +2309,9 @@ class EasyBlock:
                             change_dir(cwd)
                             running_exts.remove(ext)
                             installed_ext_names.append(ext.name)
+                            if not self.dry_run:
+                                ext_duration = datetime.now() - ext_start_times[ext.name]
+                                self.ext_timings[ext.name] = ext_duration.total_seconds()
                             update_exts_progress_bar_helper(running_exts, 1)
                         else:
                             raise_run_shell_cmd_error(res)
@@ -2310,6 +2400,7 @@ class EasyBlock:
                                                   rpath_include_dirs=self.rpath_include_dirs,
                                                   rpath_wrappers_dir=self.rpath_wrappers_dir)
                             ext.install_extension_substep("pre_install_extension")
+                            ext_start_times[ext.name] = datetime.now()
                             ext.async_cmd_task = ext.install_extension_substep("install_extension_async", thread_pool)
                             running_exts.append(ext)
                             self.log.info(f"Started installation of extension {ext.name} in the background...")
@@ -2870,6 +2961,17 @@ class EasyBlock:
         """
         Unpack the source files.
         """
+        # extract multiple sources concurrently, if possible
+        # (not when cache of extracted sources is used, see extract_file)
+        concurrent = len(self.src) > 1 and not build_option('extracted_sources_cache_dir')
+        if concurrent and not self.cfg['unpack_options'] and not any(src.get('cmd') for src in self.src):
+            srcdirs = extract_files([src['path'] for src in self.src], self.builddir, max_workers=self.cfg.parallel)
+            if srcdirs:
+                for src, srcdir in zip(self.src, srcdirs):
+                    src['finalpath'] = srcdir
+                change_dir(srcdirs[-1])
+                return
+
         for src in self.src:
             self.log.info("Unpacking source %s" % src['name'])
             srcdir = extract_file(src['path'], self.builddir, cmd=src['cmd'],
@@ -3224,6 +3326,53 @@ class EasyBlock:
 
         stop_progress_bar(PROGRESS_BAR_EXTENSIONS, visible=False)
 
+    def get_install_input_hash(self):
+        """Determine (and cache) hash of all inputs of this installation (see det_install_inputs)."""
+        if self.install_input_hash is None:
+            self.install_inputs = det_install_inputs(self)
+            self.install_input_hash = det_install_input_hash(self.install_inputs)
+            self.log.info("Hash of inputs of installation: %s", self.install_input_hash)
+        return self.install_input_hash
+
+    def binary_cache_restore(self):
+        """
+        Restore installation from binary cache, if a matching entry is available;
+        the remaining steps are then performed like for a module-only installation.
+        """
+        cache_dir = build_option('binary_cache_dir')
+        if not cache_dir or self.dry_run or self.skip or self.cfg['stop'] or self.cfg['module_only']:
+            return
+        if build_option('rebuild') or build_option('sanity_check_only'):
+            self.log.info("Not considering binary cache, since a rebuild or only a sanity check was requested")
+            return
+
+        tarball = find_in_binary_cache(cache_dir, self.get_install_input_hash(), self.installdir)
+        if tarball:
+            print_msg("restoring installation from binary cache %s..." % cache_dir, log=self.log, silent=self.silent)
+            self.make_installdir()
+            restore_from_binary_cache(tarball, self.installdir)
+            write_install_input_hash(self.installdir, self.install_input_hash)
+            self.binary_cache_hit = True
+            self.cfg['module_only'] = True
+
+    def binary_cache_record_input_hash(self):
+        """Record hash of inputs of installation in installation directory, if binary cache is used."""
+        if build_option('binary_cache_dir') and not self.dry_run and not self.binary_cache_hit:
+            write_install_input_hash(self.installdir, self.get_install_input_hash())
+
+    def binary_cache_add(self):
+        """Add installation to binary cache, if it was enabled and the full installation procedure was performed."""
+        cache_dir = build_option('binary_cache_dir')
+        if not cache_dir or self.dry_run or self.binary_cache_hit:
+            return
+
+        skip_opts = ['module_only', 'sanity_check_only', 'skip_extensions', 'skip_sanity_check']
+        if self.skip or self.cfg['module_only'] or any(build_option(opt) for opt in skip_opts):
+            self.log.info("Not adding installation to binary cache, since not all steps were performed")
+        else:
+            add_to_binary_cache(cache_dir, self.get_install_input_hash(), self.install_inputs, self.installdir,
+                                self.mod_filepath)
+
     def package_step(self):
         """Package installed software (e.g., into an RPM), if requested, using selected package tool."""
 
@@ -3576,7 +3725,7 @@ class EasyBlock:
                         fail_msg = f"Mismatch between cuda_compute_capabilities and device code in {path}. "
                         # Count and log for summary report
                         files_additional_devcode.append(os.path.relpath(path, self.installdir))
-                        additional_devcode_str = ', '.join(sorted(additional_devcodes, key=LooseVersion))
+                        additional_devcode_str = ', '.join(sorted(additional_devcodes, key=version_sort_key))
                         fail_msg += "Additional compute capabilities: %s. " % additional_devcode_str
                         if strict_cc_check:
                             # cuda-sanity-check-strict, so no additional compute capabilities allowed
@@ -3597,7 +3746,7 @@ class EasyBlock:
                         # not found in the binary
                         fail_msg = f"Mismatch between cuda_compute_capabilities and device code in {path}. "
                         # Count and log for summary report
-                        missing_devcodes_str = ', '.join(sorted(missing_devcodes, key=LooseVersion))
+                        missing_devcodes_str = ', '.join(sorted(missing_devcodes, key=version_sort_key))
                         fail_msg += "Missing compute capabilities: %s. " % missing_devcodes_str
                         # If accept_ptx_as_devcode, this might not be a failure IF there is suitable PTX
                         # code to JIT compile from that supports the CCs in missing_devcodes
@@ -3644,7 +3793,7 @@ class EasyBlock:
 
                 # Check whether there is ptx code for the highest CC in cfg_ccs
                 # Make sure to use LooseVersion so that e.g. 9.0 < 9.0a < 9.2 < 9.10
-                highest_cc = [sorted(cfg_ccs, key=LooseVersion)[-1]]
+                highest_cc = [sorted(cfg_ccs, key=version_sort_key)[-1]]
                 missing_ptx_ccs = list(set(highest_cc) - set(found_ptx_ccs))
 
                 if missing_ptx_ccs:
@@ -4224,6 +4373,36 @@ class EasyBlock:
         else:
             self.log.debug("Skipping RPATH sanity check")
 
+    def _sanity_check_step_extensions_batched(self):
+        """
+        Batched sanity check for extensions that support it (see Extension.sanity_check_import_batch):
+        import checks are done for all those extensions in a single interpreter session.
+
+        :return: set of indices of extensions (in self.ext_instances) that passed the batched sanity check
+        """
+        batches = {}
+        for idx, ext in enumerate(self.ext_instances):
+            batch_spec = ext.sanity_check_import_batch()
+            if batch_spec:
+                python_cmd, modname = batch_spec
+                batches.setdefault(python_cmd, []).append((idx, modname))
+
+        passed_ext_ids = set()
+        for python_cmd, batch in batches.items():
+            # no point in batching a single import check
+            if len(batch) < 2:
+                continue
+
+            work_dir = self.installdir if os.path.isdir(self.installdir) else None
+            import_results = run_batched_import_check(python_cmd, nub(modname for _, modname in batch),
+                                                      work_dir=work_dir)
+            passed_ext_ids.update(idx for (idx, modname) in batch if import_results.get(modname))
+
+            ok_cnt = len([idx for (idx, _) in batch if idx in passed_ext_ids])
+            trace_msg(f"batched import check with '{python_cmd}' for {len(batch)} extensions: {ok_cnt} OK")
+
+        return passed_ext_ids
+
     def _sanity_check_step_extensions(self):
         """Sanity check on extensions (if any)."""
         failed_exts = []
@@ -4234,7 +4413,18 @@ class EasyBlock:
             self.prepare_for_extensions()
             self.init_ext_instances()
 
-        for ext in self.ext_instances:
+        # extensions for which batched sanity check failed (or which were not included in a batch)
+        # are checked individually, which also yields the usual error messages
+        if self.dry_run:
+            passed_ext_ids = set()
+        else:
+            passed_ext_ids = self._sanity_check_step_extensions_batched()
+
+        for idx, ext in enumerate(self.ext_instances):
+            if idx in passed_ext_ids:
+                self.log.info("Sanity check for '%s' extension passed (batched import check)!", ext.name)
+                continue
+
             success, fail_msg = None, None
             res = ext.sanity_check_step()
             # if result is a tuple, we expect a (<bool (success)>, <custom_message>) format
@@ -4364,12 +4554,36 @@ class EasyBlock:
         # using the build or installation directory can produce false positives and polute them with files
         sanity_check_work_dir = tempfile.mkdtemp(prefix='eb-sanity-check-')
 
-        # run sanity check commands
-        for cmd in commands:
+        # run sanity check commands, concurrently if requested via 'sanity_check_commands_parallel';
+        # each command then gets a dedicated work directory to avoid that commands running concurrently interfere,
+        # and results are processed in the original order;
+        # by default, commands are run one after the other in a shared work directory,
+        # since sanity check commands may rely on each other (for example on files created by a previous command)
+        if self.cfg['sanity_check_commands_parallel']:
+            parallel = min(self.cfg.parallel, len(commands))
+        else:
+            parallel = 1
+        if parallel > 1:
+            self.log.info(f"Running {len(commands)} sanity check commands concurrently (max. {parallel} at once)")
+            with ThreadPoolExecutor(max_workers=parallel) as thread_pool:
+                cmd_results = []
+                for idx, cmd in enumerate(commands):
+                    trace_msg(f"running command '{cmd}' ...")
+                    work_dir = os.path.join(sanity_check_work_dir, str(idx))
+                    mkdir(work_dir)
+                    cmd_results.append(thread_pool.submit(run_shell_cmd, cmd, work_dir=work_dir, fail_on_error=False,
+                                                          hidden=True, asynchronous=True, task_id=idx))
+        else:
+            cmd_results = [None] * len(commands)
+
+        for cmd, cmd_result in zip(commands, cmd_results):
 
-            trace_msg(f"running command '{cmd}' ...")
+            if cmd_result is None:
+                trace_msg(f"running command '{cmd}' ...")
+                res = run_shell_cmd(cmd, work_dir=sanity_check_work_dir, fail_on_error=False, hidden=True)
+            else:
+                res = cmd_result.result()
 
-            res = run_shell_cmd(cmd, work_dir=sanity_check_work_dir, fail_on_error=False, hidden=True)
             if res.exit_code != EasyBuildExit.SUCCESS:
                 fail_msg = f"sanity check command {cmd} failed with exit code {res.exit_code} (output: {res.output})"
                 self.sanity_check_fail_msgs.append(fail_msg)
@@ -4696,6 +4910,11 @@ class EasyBlock:
         # skip step when only generating module file
         # * still run sanity check without use of force
         # * always run ready & prepare step to set up toolchain + deps
+        # installation restored from binary cache is treated like a module-only installation,
+        # except that permissions are still adjusted as configured
+        elif self.binary_cache_hit and step == PERMISSIONS_STEP:
+            self.log.info("Not skipping %s step (installation restored from binary cache)", step)
+
         elif module_only and step not in MODULE_ONLY_STEPS:
             self.log.info("Skipping %s step (only generating module)", step)
             skip = True
@@ -4815,7 +5034,7 @@ class EasyBlock:
         # part 1: pre-iteration + first iteration
         steps_part1 = [
             (FETCH_STEP, "fetching files and verifying checksums",
-             [lambda x: x.fetch_step, lambda x: x.checksum_step], False),
+             [lambda x: x.fetch_step, lambda x: x.checksum_step, lambda x: x.binary_cache_restore], False),
             ready_step_spec(True),
             extract_step_spec,
             patch_step_spec,
@@ -4843,12 +5062,13 @@ class EasyBlock:
         # part 3: post-iteration part
         steps_part3 = [
             (POSTITER_STEP, 'restore after iterating', [lambda x: x.post_iter_step], False),
-            (POSTPROC_STEP, 'postprocessing', [lambda x: x.post_processing_step], True),
+            (POSTPROC_STEP, 'postprocessing',
+             [lambda x: x.post_processing_step, lambda x: x.binary_cache_record_input_hash], True),
             (SANITYCHECK_STEP, 'sanity checking', [lambda x: x.sanity_check_step], True),
             (CLEANUP_STEP, 'cleaning up', [lambda x: x.cleanup_step], False),
             (MODULE_STEP, 'creating module', [lambda x: x.make_module_step], False),
             (PERMISSIONS_STEP, 'permissions', [lambda x: x.permissions_step], False),
-            (PACKAGE_STEP, 'packaging', [lambda x: x.package_step], False),
+            (PACKAGE_STEP, 'packaging', [lambda x: x.package_step, lambda x: x.binary_cache_add], False),
         ]
 
         # full list of steps, included iterated steps
@@ -4887,6 +5107,10 @@ class EasyBlock:
 
         ignore_locks = build_option('ignore_locks')
 
+        if build_option('record_resource_usage') and not self.dry_run:
+            self.resource_usage = ResourceUsageRecorder()
+        prev_resource_usage_recorder = set_resource_usage_recorder(self.resource_usage)
+
         lock_created = False
         try:
             if ignore_locks:
@@ -4919,7 +5143,9 @@ class EasyBlock:
                     self.current_step = step_name
                     start_time = datetime.now()
                     try:
-                        self.run_step(step_name, step_methods)
+                        with record_resource_usage(step_name, RESOURCE_USAGE_CAT_STEP):
+                            with profile_phase('%s_%s_step' % (self.cfg.full_mod_name, step_name)):
+                                self.run_step(step_name, step_methods)
                     except RunShellCmdError as err:
                         err.print()
                         error_msg = (
@@ -4934,6 +5160,8 @@ class EasyBlock:
                     finally:
                         if not self.dry_run:
                             step_duration = datetime.now() - start_time
+                            self.step_timings[step_name] = (self.step_timings.get(step_name, 0) +
+                                                            step_duration.total_seconds())
                             if step_duration.total_seconds() >= 1:
                                 print_msg("... (took %s)", time2str(step_duration), log=self.log, silent=self.silent)
                             elif self.logdebug or build_option('trace'):
@@ -4948,6 +5176,8 @@ class EasyBlock:
             if lock_created:
                 remove_lock(lock_name)
 
+            set_resource_usage_recorder(prev_resource_usage_recorder)
+
             stop_progress_bar(PROGRESS_BAR_EASYCONFIG)
 
         # return True for successfull build (or stopped build)
@@ -5141,6 +5371,11 @@ def build_and_install_one(ecdict, init_env):
 
     application_log = app.logfile
 
+    # export recorded resource usage (if any) next to log file
+    resource_usage_paths = []
+    if app.resource_usage is not None:
+        resource_usage_paths = app.resource_usage.export(application_log)
+
     # successful (non-dry-run) build
     if result and not dry_run:
         def ensure_writable_log_dir(log_dir):
@@ -5225,6 +5460,12 @@ def build_and_install_one(ecdict, init_env):
             except EasyBuildError as err:
                 _log.warning("Unable to commit easyconfig to repository: %s", err)
 
+            if build_option('build_history_db'):
+                try:
+                    record_build(app, buildstats)
+                except EasyBuildError as err:
+                    print_warning("Failed to record build in build history database: %s", err, log=_log)
+
         # cleanup logs
         app.close_log()
 
@@ -5246,6 +5487,10 @@ def build_and_install_one(ecdict, init_env):
                     copy_file(patch_path, target)
                     _log.debug("Copied patch %s to %s", patch_path, target)
 
+                # move files with recorded resource usage along with log file
+                for path, target in zip(resource_usage_paths, resource_usage_file_paths(application_log)):
+                    move_file(path, target)
+
                 if build_option('read_only_installdir') and not app.cfg['stop']:
                     # take away user write permissions (again)
                     perms = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
@@ -5455,65 +5700,147 @@ class StopException(Exception):
     """Exception thrown to stop running steps"""
 
 
-def inject_checksums_to_json(ecs, checksum_type):
+def _fetch_files_for_checksums(ec, checksum_type, hash_pool, checksum_futures, lock, output):
     """
-    Inject checksums of given type in corresponding json files
-
-    :param ecs: list of EasyConfig instances to calculate checksums and inject them into checksums.json
-    :param checksum_type: type of checksum to use
+    Fetch sources & patches (incl. those for extensions) for specified easyconfig,
+    and schedule computing checksums of specified type for them in given pool of threads.
+
+    :param ec: EasyConfig instance
+    :param checksum_type: type of checksum to compute
+    :param hash_pool: pool of threads to compute checksums in
+    :param checksum_futures: dict with futures for checksums, shared across easyconfigs (indexed by file path)
+    :param lock: lock to use when updating checksum_futures
+    :param output: list to collect output in (rather than printing it, see collect_output)
+    :return: tuple with EasyBlock instance and dict with futures for checksums of files for this easyconfig
     """
-    for ec in ecs:
-        ec_fn = os.path.basename(ec['spec'])
-        ec_dir = os.path.dirname(ec['spec'])
-        print_msg("injecting %s checksums for %s in checksums.json" % (checksum_type, ec['spec']), log=_log)
-
-        # get easyblock instance and make sure all sources/patches are available by running fetch_step
-        print_msg("fetching sources & patches for %s..." % ec_fn, log=_log)
+    # output is collected (and progress bars are not shown), since fetching is done concurrently for easyconfigs
+    with collect_output(output):
         app = get_easyblock_instance(ec)
         app.update_config_template_run_step()
         app.fetch_step(skip_checksums=True)
 
-        # compute & inject checksums for sources/patches
-        print_msg("computing %s checksums for sources & patches for %s..." % (checksum_type, ec_fn), log=_log)
-        checksums = {}
-        for entry in app.src + app.patches:
-            checksum = compute_checksum(entry['path'], checksum_type)
-            print_msg("* %s: %s" % (os.path.basename(entry['path']), checksum), log=_log)
-            checksums[os.path.basename(entry['path'])] = checksum
+    paths = [entry['path'] for entry in app.src + app.patches]
+    for ext in app.exts:
+        if 'src' in ext:
+            paths.append(ext['src'])
+        paths.extend(ext_patch['path'] for ext_patch in ext.get('patches', []))
 
-        # compute & inject checksums for extension sources/patches
-        if app.exts:
-            print_msg("computing %s checksums for extensions for %s..." % (checksum_type, ec_fn), log=_log)
+    # files that are shared across easyconfigs (like patches) are only hashed once
+    with lock:
+        for path in paths:
+            if path not in checksum_futures:
+                checksum_futures[path] = hash_pool.submit(compute_checksum, path, checksum_type)
+        futures = {path: checksum_futures[path] for path in paths}
 
-            for ext in app.exts:
-                # compute checksums for extension sources & patches
-                if 'src' in ext:
-                    src_fn = os.path.basename(ext['src'])
-                    checksum = compute_checksum(ext['src'], checksum_type)
-                    print_msg(" * %s: %s" % (src_fn, checksum), log=_log)
-                    checksums[src_fn] = checksum
-                for ext_patch in ext.get('patches', []):
-                    patch_fn = os.path.basename(ext_patch['path'])
-                    checksum = compute_checksum(ext_patch['path'], checksum_type)
-                    print_msg(" * %s: %s" % (patch_fn, checksum), log=_log)
-                    checksums[patch_fn] = checksum
-
-        # actually inject new checksums or overwrite existing ones (if --force)
-        existing_checksums = app.get_checksums_from_json(always_read=True)
-        for filename, checksum in checksums.items():
-            if filename not in existing_checksums:
-                existing_checksums[filename] = checksum
-            # don't do anything if the checksum already exist and is the same
-            elif checksum != existing_checksums[filename]:
-                if build_option('force'):
-                    print_warning("Found existing checksums for %s, overwriting them (due to --force)..." % ec_fn)
+    return app, futures
+
+
+@contextmanager
+def fetch_files_and_compute_checksums(ecs, checksum_type):
+    """
+    Fetch sources & patches for specified easyconfigs and compute checksums of specified type for them,
+    concurrently across easyconfigs and files (see also --parallel).
+
+    Yields a function that takes the index of an easyconfig, waits until its files are fetched and hashed,
+    prints the output that was produced while fetching the files,
+    and returns a tuple with EasyBlock instance and dict with checksums (indexed by file path);
+    errors that occurred for an easyconfig are raised when its result is requested,
+    so results can be processed serially, in a deterministic order.
+
+    :param ecs: list of EasyConfig instances
+    :param checksum_type: type of checksum to compute
+    """
+    max_workers = max(1, min(len(ecs), build_option('parallel') or get_avail_core_count()))
+    _log.info("Fetching files and computing %s checksums for %d easyconfigs (max. %d at once)",
+              checksum_type, len(ecs), max_workers)
+
+    checksum_futures = {}
+    lock = threading.Lock()
+    outputs = [[] for _ in ecs]
+
+    # fetching of files must be completed before pool of threads to compute checksums is shut down
+    with ThreadPoolExecutor(max_workers=build_option('parallel') or get_avail_core_count()) as hash_pool:
+        with ThreadPoolExecutor(max_workers=max_workers) as fetch_pool:
+            fetch_futures = [fetch_pool.submit(_fetch_files_for_checksums, ec, checksum_type, hash_pool,
+                                               checksum_futures, lock, output) for ec, output in zip(ecs, outputs)]
+
+            def get_result(idx):
+                """Wait for files for easyconfig with specified index to be fetched and hashed."""
+                try:
+                    app, futures = fetch_futures[idx].result()
+                finally:
+                    print_collected_output(outputs[idx])
+                return app, {path: future.result() for path, future in futures.items()}
+
+            try:
+                yield get_result
+            finally:
+                # don't bother fetching/hashing files that were not looked at (for example due to an error)
+                for future in fetch_futures:
+                    future.cancel()
+                with lock:
+                    for future in checksum_futures.values():
+                        future.cancel()
+
+
+def inject_checksums_to_json(ecs, checksum_type):
+    """
+    Inject checksums of given type in corresponding json files
+
+    :param ecs: list of EasyConfig instances to calculate checksums and inject them into checksums.json
+    :param checksum_type: type of checksum to use
+    """
+    with fetch_files_and_compute_checksums(ecs, checksum_type) as get_fetch_result:
+        for idx, ec in enumerate(ecs):
+            ec_fn = os.path.basename(ec['spec'])
+            ec_dir = os.path.dirname(ec['spec'])
+            print_msg("injecting %s checksums for %s in checksums.json" % (checksum_type, ec['spec']), log=_log)
+
+            # wait until all sources/patches are available and hashed (which is done concurrently for all easyconfigs)
+            print_msg("fetching sources & patches for %s..." % ec_fn, log=_log)
+            app, checksums_by_path = get_fetch_result(idx)
+
+            # compute & inject checksums for sources/patches
+            print_msg("computing %s checksums for sources & patches for %s..." % (checksum_type, ec_fn), log=_log)
+            checksums = {}
+            for entry in app.src + app.patches:
+                checksum = checksums_by_path[entry['path']]
+                print_msg("* %s: %s" % (os.path.basename(entry['path']), checksum), log=_log)
+                checksums[os.path.basename(entry['path'])] = checksum
+
+            # compute & inject checksums for extension sources/patches
+            if app.exts:
+                print_msg("computing %s checksums for extensions for %s..." % (checksum_type, ec_fn), log=_log)
+
+                for ext in app.exts:
+                    # compute checksums for extension sources & patches
+                    if 'src' in ext:
+                        src_fn = os.path.basename(ext['src'])
+                        checksum = checksums_by_path[ext['src']]
+                        print_msg(" * %s: %s" % (src_fn, checksum), log=_log)
+                        checksums[src_fn] = checksum
+                    for ext_patch in ext.get('patches', []):
+                        patch_fn = os.path.basename(ext_patch['path'])
+                        checksum = checksums_by_path[ext_patch['path']]
+                        print_msg(" * %s: %s" % (patch_fn, checksum), log=_log)
+                        checksums[patch_fn] = checksum
+
+            # actually inject new checksums or overwrite existing ones (if --force)
+            existing_checksums = app.get_checksums_from_json(always_read=True)
+            for filename, checksum in checksums.items():
+                if filename not in existing_checksums:
                     existing_checksums[filename] = checksum
-                else:
-                    raise EasyBuildError("Found existing checksum for %s, use --force to overwrite them" % filename)
+                # don't do anything if the checksum already exist and is the same
+                elif checksum != existing_checksums[filename]:
+                    if build_option('force'):
+                        print_warning("Found existing checksums for %s, overwriting them (due to --force)..." % ec_fn)
+                        existing_checksums[filename] = checksum
+                    else:
+                        raise EasyBuildError("Found existing checksum for %s, use --force to overwrite them" % filename)
 
-        # actually write the checksums
-        with open(os.path.join(ec_dir, CHECKSUMS_JSON), 'w') as outfile:
-            json.dump(existing_checksums, outfile, indent=2, sort_keys=True)
+            # actually write the checksums
+            with open(os.path.join(ec_dir, CHECKSUMS_JSON), 'w') as outfile:
+                json.dump(existing_checksums, outfile, indent=2, sort_keys=True)
 
 
 def inject_checksums(ecs, checksum_type):
@@ -5549,155 +5876,154 @@ def inject_checksums(ecs, checksum_type):
                 checksum_lines.append(checksum_line)
         return checksum_lines
 
-    for ec in ecs:
-        ec_fn = os.path.basename(ec['spec'])
-        ectxt = read_file(ec['spec'])
-        print_msg("injecting %s checksums in %s" % (checksum_type, ec['spec']), log=_log)
+    with fetch_files_and_compute_checksums(ecs, checksum_type) as get_fetch_result:
+        for idx, ec in enumerate(ecs):
+            ec_fn = os.path.basename(ec['spec'])
+            ectxt = read_file(ec['spec'])
+            print_msg("injecting %s checksums in %s" % (checksum_type, ec['spec']), log=_log)
 
-        # get easyblock instance and make sure all sources/patches are available by running fetch_step
-        print_msg("fetching sources & patches for %s..." % ec_fn, log=_log)
-        app = get_easyblock_instance(ec)
-        app.update_config_template_run_step()
-        app.fetch_step(skip_checksums=True)
+            # wait until all sources/patches are available and hashed (which is done concurrently for all easyconfigs)
+            print_msg("fetching sources & patches for %s..." % ec_fn, log=_log)
+            app, checksums_by_path = get_fetch_result(idx)
 
-        # check for any existing checksums, require --force to overwrite them
-        found_checksums = bool(app.cfg['checksums'])
-        for ext in app.exts:
-            found_checksums |= bool(ext.get('checksums'))
-        if found_checksums:
-            if build_option('force'):
-                print_warning("Found existing checksums in %s, overwriting them (due to use of --force)..." % ec_fn)
-            else:
-                raise EasyBuildError("Found existing checksums, use --force to overwrite them")
-
-        # back up easyconfig file before injecting checksums
-        ec_backup = back_up_file(ec['spec'])
-        print_msg("backup of easyconfig file saved to %s" % ec_backup, log=_log)
-
-        # compute & inject checksums for sources/patches
-        print_msg("injecting %s checksums for sources & patches in %s..." % (checksum_type, ec_fn), log=_log)
-        checksums = []
-        for entry in app.src + app.patches:
-            checksum = compute_checksum(entry['path'], checksum_type)
-            print_msg("* %s: %s" % (os.path.basename(entry['path']), checksum), log=_log)
-            checksums.append((os.path.basename(entry['path']), checksum))
-
-        if len(checksums) == 1:
-            checksum_lines = ["checksums = ['%s']\n" % checksums[0][1]]
-        else:
-            checksum_lines = ['checksums = [']
-            checksum_lines.extend(make_checksum_lines(checksums, indent_level=1))
-            checksum_lines.append(']\n')
-
-        checksums_txt = '\n'.join(checksum_lines)
-
-        # if 'checksums' is specified in easyconfig file, get rid of it (even if it's just an empty list)
-        checksums_regex = re.compile(r'^checksums(?:.|\n)+?\]\s*$', re.M)
-        if checksums_regex.search(ectxt):
-            _log.debug("Removing existing 'checksums' easyconfig parameter definition...")
-            ectxt = checksums_regex.sub('', ectxt)
-
-        # it is possible no sources (and hence patches) are listed, e.g. for 'bundle' easyconfigs
-        if app.src:
-            placeholder = '# PLACEHOLDER FOR SOURCES/PATCHES WITH CHECKSUMS'
-
-            # grab raw lines for source_urls, sources, data_sources, patches
-            keys = ['data_sources', 'patches', 'source_urls', 'sources']
-            raw = {}
-            for key in keys:
-                regex = re.compile(r'^(%s(?:.|\n)*?\])\s*$' % key, re.M)
-                res = regex.search(ectxt)
-                if res:
-                    raw[key] = res.group(0).strip() + '\n'
-                    ectxt = regex.sub(placeholder, ectxt)
-
-            _log.debug("Raw lines for %s easyconfig parameters: %s", '/'.join(keys), raw)
-
-            # inject combination of source_urls/sources/patches/checksums into easyconfig
-            # by replacing first occurence of placeholder that was put in place
-            sources_raw = raw.get('sources', '')
-            data_sources_raw = raw.get('data_sources', '')
-            source_urls_raw = raw.get('source_urls', '')
-            patches_raw = raw.get('patches', '')
-            regex = re.compile(placeholder + '\n', re.M)
-            ectxt = regex.sub(source_urls_raw + sources_raw + data_sources_raw + patches_raw + checksums_txt + '\n',
-                              ectxt, count=1)
-
-            # get rid of potential remaining placeholders
-            ectxt = regex.sub('', ectxt)
-
-        # compute & inject checksums for extension sources/patches
-        if app.exts:
-            print_msg("injecting %s checksums for extensions in %s..." % (checksum_type, ec_fn), log=_log)
-
-            exts_list_lines = ['exts_list = [']
+            # check for any existing checksums, require --force to overwrite them
+            found_checksums = bool(app.cfg['checksums'])
             for ext in app.exts:
-                if ext['name'] == app.name:
-                    ext_name = 'name'
-                else:
-                    ext_name = "'%s'" % ext['name']
-
-                # for some extensions, only a name if specified (so no sources/patches)
-                if list(ext.keys()) == ['name']:
-                    exts_list_lines.append("%s%s," % (INDENT_4SPACES, ext_name))
+                found_checksums |= bool(ext.get('checksums'))
+            if found_checksums:
+                if build_option('force'):
+                    print_warning("Found existing checksums in %s, overwriting them (due to use of --force)..." % ec_fn)
                 else:
-                    if ext['version'] == app.version:
-                        ext_version = 'version'
+                    raise EasyBuildError("Found existing checksums, use --force to overwrite them")
+
+            # back up easyconfig file before injecting checksums
+            ec_backup = back_up_file(ec['spec'])
+            print_msg("backup of easyconfig file saved to %s" % ec_backup, log=_log)
+
+            # compute & inject checksums for sources/patches
+            print_msg("injecting %s checksums for sources & patches in %s..." % (checksum_type, ec_fn), log=_log)
+            checksums = []
+            for entry in app.src + app.patches:
+                checksum = checksums_by_path[entry['path']]
+                print_msg("* %s: %s" % (os.path.basename(entry['path']), checksum), log=_log)
+                checksums.append((os.path.basename(entry['path']), checksum))
+
+            if len(checksums) == 1:
+                checksum_lines = ["checksums = ['%s']\n" % checksums[0][1]]
+            else:
+                checksum_lines = ['checksums = [']
+                checksum_lines.extend(make_checksum_lines(checksums, indent_level=1))
+                checksum_lines.append(']\n')
+
+            checksums_txt = '\n'.join(checksum_lines)
+
+            # if 'checksums' is specified in easyconfig file, get rid of it (even if it's just an empty list)
+            checksums_regex = re.compile(r'^checksums(?:.|\n)+?\]\s*$', re.M)
+            if checksums_regex.search(ectxt):
+                _log.debug("Removing existing 'checksums' easyconfig parameter definition...")
+                ectxt = checksums_regex.sub('', ectxt)
+
+            # it is possible no sources (and hence patches) are listed, e.g. for 'bundle' easyconfigs
+            if app.src:
+                placeholder = '# PLACEHOLDER FOR SOURCES/PATCHES WITH CHECKSUMS'
+
+                # grab raw lines for source_urls, sources, data_sources, patches
+                keys = ['data_sources', 'patches', 'source_urls', 'sources']
+                raw = {}
+                for key in keys:
+                    regex = re.compile(r'^(%s(?:.|\n)*?\])\s*$' % key, re.M)
+                    res = regex.search(ectxt)
+                    if res:
+                        raw[key] = res.group(0).strip() + '\n'
+                        ectxt = regex.sub(placeholder, ectxt)
+
+                _log.debug("Raw lines for %s easyconfig parameters: %s", '/'.join(keys), raw)
+
+                # inject combination of source_urls/sources/patches/checksums into easyconfig
+                # by replacing first occurence of placeholder that was put in place
+                sources_raw = raw.get('sources', '')
+                data_sources_raw = raw.get('data_sources', '')
+                source_urls_raw = raw.get('source_urls', '')
+                patches_raw = raw.get('patches', '')
+                regex = re.compile(placeholder + '\n', re.M)
+                ectxt = regex.sub(source_urls_raw + sources_raw + data_sources_raw + patches_raw + checksums_txt + '\n',
+                                  ectxt, count=1)
+
+                # get rid of potential remaining placeholders
+                ectxt = regex.sub('', ectxt)
+
+            # compute & inject checksums for extension sources/patches
+            if app.exts:
+                print_msg("injecting %s checksums for extensions in %s..." % (checksum_type, ec_fn), log=_log)
+
+                exts_list_lines = ['exts_list = [']
+                for ext in app.exts:
+                    if ext['name'] == app.name:
+                        ext_name = 'name'
                     else:
-                        ext_version = "'%s'" % ext['version']
-
-                    ext_options = ext.get('options', {})
+                        ext_name = "'%s'" % ext['name']
 
-                    # compute checksums for extension sources & patches
-                    ext_checksums = []
-                    if 'src' in ext:
-                        src_fn = os.path.basename(ext['src'])
-                        checksum = compute_checksum(ext['src'], checksum_type)
-                        print_msg(" * %s: %s" % (src_fn, checksum), log=_log)
-                        ext_checksums.append((src_fn, checksum))
-                    for ext_patch in ext.get('patches', []):
-                        patch_fn = os.path.basename(ext_patch['path'])
-                        checksum = compute_checksum(ext_patch['path'], checksum_type)
-                        print_msg(" * %s: %s" % (patch_fn, checksum), log=_log)
-                        ext_checksums.append((patch_fn, checksum))
-
-                    exts_list_lines.append("%s(%s, %s," % (INDENT_4SPACES, ext_name, ext_version))
-                    if ext_options or ext_checksums:
-                        exts_list_lines[-1] += ' {'
+                    # for some extensions, only a name if specified (so no sources/patches)
+                    if list(ext.keys()) == ['name']:
+                        exts_list_lines.append("%s%s," % (INDENT_4SPACES, ext_name))
+                    else:
+                        if ext['version'] == app.version:
+                            ext_version = 'version'
+                        else:
+                            ext_version = "'%s'" % ext['version']
+
+                        ext_options = ext.get('options', {})
+
+                        # compute checksums for extension sources & patches
+                        ext_checksums = []
+                        if 'src' in ext:
+                            src_fn = os.path.basename(ext['src'])
+                            checksum = checksums_by_path[ext['src']]
+                            print_msg(" * %s: %s" % (src_fn, checksum), log=_log)
+                            ext_checksums.append((src_fn, checksum))
+                        for ext_patch in ext.get('patches', []):
+                            patch_fn = os.path.basename(ext_patch['path'])
+                            checksum = checksums_by_path[ext_patch['path']]
+                            print_msg(" * %s: %s" % (patch_fn, checksum), log=_log)
+                            ext_checksums.append((patch_fn, checksum))
+
+                        exts_list_lines.append("%s(%s, %s," % (INDENT_4SPACES, ext_name, ext_version))
+                        if ext_options or ext_checksums:
+                            exts_list_lines[-1] += ' {'
+
+                        # make sure we grab *raw* dict of default options for extension,
+                        # since it may use template values like %(name)s & %(version)s
+                        exts_default_options = app.cfg.get_ref('exts_default_options')
+
+                        for key, val in sorted(ext_options.items()):
+                            if key != 'checksums' and val != exts_default_options.get(key):
+                                strval = quote_str(val, prefer_single_quotes=True)
+                                line = "%s'%s': %s," % (INDENT_4SPACES * 2, key, strval)
+                                # fix long lines for list-type values (e.g. patches)
+                                if isinstance(val, list) and len(val) > 1:
+                                    exts_list_lines.append("%s'%s': [" % (INDENT_4SPACES * 2, key))
+                                    exts_list_lines.extend(make_list_lines(val, indent_level=3))
+                                    exts_list_lines.append(INDENT_4SPACES * 2 + '],',)
+                                else:
+                                    exts_list_lines.append(line)
 
-                    # make sure we grab *raw* dict of default options for extension,
-                    # since it may use template values like %(name)s & %(version)s
-                    exts_default_options = app.cfg.get_ref('exts_default_options')
-
-                    for key, val in sorted(ext_options.items()):
-                        if key != 'checksums' and val != exts_default_options.get(key):
-                            strval = quote_str(val, prefer_single_quotes=True)
-                            line = "%s'%s': %s," % (INDENT_4SPACES * 2, key, strval)
-                            # fix long lines for list-type values (e.g. patches)
-                            if isinstance(val, list) and len(val) > 1:
-                                exts_list_lines.append("%s'%s': [" % (INDENT_4SPACES * 2, key))
-                                exts_list_lines.extend(make_list_lines(val, indent_level=3))
-                                exts_list_lines.append(INDENT_4SPACES * 2 + '],',)
+                        # if any checksums were collected, inject them for this extension
+                        if ext_checksums:
+                            if len(ext_checksums) == 1:
+                                exts_list_lines.append("%s'checksums': ['%s']," % (INDENT_4SPACES * 2, checksum))
                             else:
-                                exts_list_lines.append(line)
+                                exts_list_lines.append("%s'checksums': [" % (INDENT_4SPACES * 2))
+                                exts_list_lines.extend(make_checksum_lines(ext_checksums, indent_level=3))
+                                exts_list_lines.append("%s]," % (INDENT_4SPACES * 2))
 
-                    # if any checksums were collected, inject them for this extension
-                    if ext_checksums:
-                        if len(ext_checksums) == 1:
-                            exts_list_lines.append("%s'checksums': ['%s']," % (INDENT_4SPACES * 2, checksum))
+                        if ext_options or ext_checksums:
+                            exts_list_lines.append("%s})," % INDENT_4SPACES)
                         else:
-                            exts_list_lines.append("%s'checksums': [" % (INDENT_4SPACES * 2))
-                            exts_list_lines.extend(make_checksum_lines(ext_checksums, indent_level=3))
-                            exts_list_lines.append("%s]," % (INDENT_4SPACES * 2))
-
-                    if ext_options or ext_checksums:
-                        exts_list_lines.append("%s})," % INDENT_4SPACES)
-                    else:
-                        exts_list_lines[-1] += '),'
+                            exts_list_lines[-1] += '),'
 
-            exts_list_lines.append(']\n')
+                exts_list_lines.append(']\n')
 
-            regex = re.compile(r'^exts_list(.|\n)*?\n\]\s*$', re.M)
-            ectxt = regex.sub('\n'.join(exts_list_lines), ectxt)
+                regex = re.compile(r'^exts_list(.|\n)*?\n\]\s*$', re.M)
+                ectxt = regex.sub('\n'.join(exts_list_lines), ectxt)
 
-        write_file(ec['spec'], ectxt)
+            write_file(ec['spec'], ectxt)
@@ -133,6 +133,8 @@ DEFAULT_CONFIG = {
                                      "that this is ok / reasonable (e.g. binary installations)", BUILD],
     'sanity_check_commands': [[], ("format: [(name, options)] e.g. [('gzip','-h')]. "
                                    "Using a non-tuple is equivalent to (name, '-h')"), BUILD],
+    'sanity_check_commands_parallel': [False, "Run sanity check commands concurrently (up to 'parallel' at once), "
+                                              "each in a dedicated working directory", BUILD],
     'sanity_check_paths': [{}, ("List of files and directories to check "
                                 "(format: {'files':<list>, 'dirs':<list>})"), BUILD],
     'skip': [False, "Skip existing software", BUILD],
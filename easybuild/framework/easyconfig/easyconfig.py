@@ -64,6 +64,7 @@ from easybuild.framework.easyconfig.parser import REPLACED_PARAMETERS, EasyConfi
 from easybuild.framework.easyconfig.parser import fetch_parameters_from_easyconfig
 from easybuild.framework.easyconfig.templates import ALTERNATIVE_EASYCONFIG_TEMPLATES, DEPRECATED_EASYCONFIG_TEMPLATES
 from easybuild.framework.easyconfig.templates import TEMPLATE_CONSTANTS, TEMPLATE_NAMES_DYNAMIC, template_constant_dict
+from easybuild.framework.easyconfig.types import as_hashable
 from easybuild.tools import LooseVersion
 from easybuild.tools.build_log import EasyBuildError, EasyBuildExit, print_warning, print_msg
 from easybuild.tools.config import GENERIC_EASYBLOCK_PKG, LOCAL_VAR_NAMING_CHECK_ERROR, LOCAL_VAR_NAMING_CHECK_LOG
@@ -2737,6 +2738,82 @@ class ActiveMNS(BaseActiveMNS):
             raise EasyBuildError("Selected module naming scheme %s could not be found in %s",
                                  sel_mns, avail_mnss.keys())
 
+        # cache for results of det_full_module_name, det_short_module_name and det_module_subdir
+        self._cache = {}
+        self._cache_mns = (sel_mns, self.mns)
+        self.cache_stats = {'hits': 0, 'misses': 0}
+
+    def clear_cache(self):
+        """Clear cache of determined module names/subdirectories."""
+        self._cache.clear()
+        self.cache_stats.update({'hits': 0, 'misses': 0})
+
+    def _det_cache_key(self, ec):
+        """
+        Determine canonical hashable key for specified easyconfig,
+        only taking into account the easyconfig parameters that are relevant for the active module naming scheme.
+
+        :return: tuple that can be used as a cache key, or None if no cache key could be determined
+        """
+        if self.mns.REQUIRED_KEYS is None:
+            return None
+
+        # parameters used to find easyconfig file if the module naming scheme requires a full easyconfig
+        relevant_keys = ['name', 'versionprefix', 'version', 'versionsuffix', 'toolchain', 'hidden', 'modaltsoftname']
+        relevant_keys.extend(key for key in self.mns.REQUIRED_KEYS if key not in relevant_keys)
+
+        is_full_ec = isinstance(ec, EasyConfig)
+        key = [is_full_ec, getattr(ec, 'hidden', None)]
+        for param in relevant_keys:
+            if param in ec:
+                value = ec[param]
+                if isinstance(value, dict):
+                    value = as_hashable(value)
+                elif isinstance(value, list):
+                    value = tuple(value)
+                key.append((param, value))
+
+        if not is_full_ec and self.requires_full_easyconfig(ec.keys()):
+            # result depends on which easyconfig file is found for this spec
+            key.append(tuple(build_option('robot_path') or []))
+
+        key = tuple(key)
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+
+        return key
+
+    def _memoized(self, method_name, ec, *args):
+        """
+        Call specified method, using cached result if available.
+
+        :param method_name: name of method to call
+        :param ec: easyconfig parameter specifications to pass to method
+        :param args: additional arguments to pass to method (also taken into account in cache key)
+        """
+        # invalidate cache if active module naming scheme was changed
+        sel_mns = get_module_naming_scheme()
+        if self._cache_mns != (sel_mns, self.mns):
+            self.log.debug("Active module naming scheme changed from %s to %s, clearing cache",
+                           self._cache_mns[0], sel_mns)
+            self.clear_cache()
+            self._cache_mns = (sel_mns, self.mns)
+
+        ec_key = self._det_cache_key(ec)
+        if ec_key is None:
+            return getattr(self, '_' + method_name)(ec, *args)
+
+        key = (method_name, ec_key, args)
+        if key in self._cache:
+            self.cache_stats['hits'] += 1
+        else:
+            self.cache_stats['misses'] += 1
+            self._cache[key] = getattr(self, '_' + method_name)(ec, *args)
+
+        return self._cache[key]
+
     def requires_full_easyconfig(self, keys):
         """Check whether specified list of easyconfig parameters is sufficient for active module naming scheme."""
         return self.mns.requires_toolchain_details() or not self.mns.is_sufficient(keys)
@@ -2816,15 +2893,20 @@ class ActiveMNS(BaseActiveMNS):
 
     def det_full_module_name(self, ec, force_visible=False, require_result=True):
         """Determine full module name by selected module naming scheme, based on supplied easyconfig."""
-        self.log.debug("Determining full module name for %s (force_visible: %s)" % (ec, force_visible))
         if ec.get('external_module', False):
             # external modules have the module name readily available, and may lack the info required by the MNS
             mod_name = ec['full_mod_name']
             self.log.debug("Full module name for external module: %s", mod_name)
         else:
-            mod_name = self._det_module_name_with(self.mns.det_full_module_name, ec, force_visible=force_visible,
-                                                  require_result=require_result)
-            self.log.debug("Obtained valid full module name %s", mod_name)
+            mod_name = self._memoized('det_full_module_name', ec, force_visible, require_result)
+        return mod_name
+
+    def _det_full_module_name(self, ec, force_visible, require_result):
+        """Determine full module name (uncached)."""
+        self.log.debug("Determining full module name for %s (force_visible: %s)", ec, force_visible)
+        mod_name = self._det_module_name_with(self.mns.det_full_module_name, ec, force_visible=force_visible,
+                                              require_result=require_result)
+        self.log.debug("Obtained valid full module name %s", mod_name)
         return mod_name
 
     def det_install_subdir(self, ec):
@@ -2845,7 +2927,11 @@ class ActiveMNS(BaseActiveMNS):
 
     def det_short_module_name(self, ec, force_visible=False):
         """Determine short module name according to module naming scheme."""
-        self.log.debug("Determining short module name for %s (force_visible: %s)" % (ec, force_visible))
+        return self._memoized('det_short_module_name', ec, force_visible)
+
+    def _det_short_module_name(self, ec, force_visible):
+        """Determine short module name (uncached)."""
+        self.log.debug("Determining short module name for %s (force_visible: %s)", ec, force_visible)
         mod_name = self._det_module_name_with(self.mns.det_short_module_name, ec, force_visible=force_visible)
         self.log.debug("Obtained valid short module name %s" % mod_name)
 
@@ -2857,9 +2943,13 @@ class ActiveMNS(BaseActiveMNS):
 
     def det_module_subdir(self, ec):
         """Determine module subdirectory according to module naming scheme."""
-        self.log.debug("Determining module subdir for %s" % ec)
+        return self._memoized('det_module_subdir', ec)
+
+    def _det_module_subdir(self, ec):
+        """Determine module subdirectory (uncached)."""
+        self.log.debug("Determining module subdir for %s", ec)
         mod_subdir = self.mns.det_module_subdir(self.check_ec_type(ec))
-        self.log.debug("Obtained subdir %s" % mod_subdir)
+        self.log.debug("Obtained subdir %s", mod_subdir)
         return mod_subdir
 
     def det_module_symlink_paths(self, ec):
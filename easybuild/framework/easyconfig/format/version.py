@@ -62,7 +62,7 @@ class EasyVersion(LooseVersion):
 
     def __hash__(self):
         """Return hash for this object."""
-        return hash(tuple(self.version))
+        return hash(self.sort_key)
 
 
 class VersionOperator:
@@ -56,7 +56,7 @@ from easybuild.framework.easyconfig.parser import fetch_parameters_from_easyconf
 from easybuild.framework.easyconfig.tools import alt_easyconfig_paths
 from easybuild.toolchains.compiler.systemcompiler import TC_CONSTANT_SYSTEM
 from easybuild.toolchains.gcccore import GCCcore
-from easybuild.tools import LooseVersion
+from easybuild.tools import LooseVersion, version_sort_key
 from easybuild.tools.build_log import EasyBuildError, print_warning
 from easybuild.tools.config import build_option
 from easybuild.tools.filetools import read_file, write_file
@@ -446,10 +446,10 @@ def pick_version(req_ver, avail_vers):
         else:
             retained_vers = [v for v in avail_vers if LooseVersion(v) <= LooseVersion(ver)]
             if retained_vers:
-                selected_ver = sorted(retained_vers, key=LooseVersion)[-1]
+                selected_ver = sorted(retained_vers, key=version_sort_key)[-1]
             else:
                 # if no versions are available that are less recent, take the least recent version
-                selected_ver = sorted(avail_vers, key=LooseVersion)[0]
+                selected_ver = sorted(avail_vers, key=version_sort_key)[0]
     else:
         # if no desired version is specified, just use last version
         ver = avail_vers[-1]
@@ -594,7 +594,7 @@ def select_or_generate_ec(fp, paths, specs):
 
     # TOOLCHAIN VERSION
     tcvers = unique([x[0]['toolchain']['version'] for x in ecs_and_files if x[0]['toolchain']['version']],
-                    sortkey=LooseVersion)
+                    sortkey=version_sort_key)
     _log.debug("Found %d unique toolchain versions: %s" % (len(tcvers), tcvers))
 
     tcver = specs.pop('toolchain_version', None)
@@ -617,7 +617,7 @@ def select_or_generate_ec(fp, paths, specs):
 
     # SOFTWARE VERSION
 
-    vers = unique([x[0]['version'] for x in ecs_and_files if x[0]['version']], sortkey=LooseVersion)
+    vers = unique([x[0]['version'] for x in ecs_and_files if x[0]['version']], sortkey=version_sort_key)
 
     _log.debug("Found %d unique software versions: %s" % (len(vers), vers))
 
@@ -37,6 +37,7 @@ Authors:
 """
 import copy
 import os
+import re
 
 from easybuild.framework.easyconfig.easyconfig import resolve_template
 from easybuild.framework.easyconfig.templates import TEMPLATE_NAMES_EASYBLOCK_RUN_STEP, template_constant_dict
@@ -45,6 +46,26 @@ from easybuild.tools.filetools import change_dir
 from easybuild.tools.run import run_shell_cmd
 from easybuild.tools.utilities import trace_msg
 
+BATCHED_IMPORT_CHECK_FAIL = 'EB_IMPORT_CHECK_FAIL'
+BATCHED_IMPORT_CHECK_OK = 'EB_IMPORT_CHECK_OK'
+
+BATCHED_IMPORT_CHECK_SCRIPT = '''
+import importlib, sys, traceback
+for modname in %(modnames)s:
+    try:
+        importlib.import_module(modname)
+        print("%(ok)s " + modname)
+    except BaseException:
+        traceback.print_exc(file=sys.stdout)
+        print("%(fail)s " + modname)
+    sys.stdout.flush()
+'''
+
+# (resolved) exts_filter command that only checks whether a Python module can be imported,
+# like "python -c 'import %(ext_name)s'"
+PYTHON_IMPORT_CHECK_REGEX = re.compile(r"""^(?P<python_cmd>\S*python[0-9.]*)\s+-c\s+(?P<quote>['"])"""
+                                       r"""\s*import\s+(?P<modname>[A-Za-z_][\w.]*)\s*(?P=quote)$""")
+
 
 def resolve_exts_filter_template(exts_filter, ext):
     """
@@ -83,6 +104,32 @@ def resolve_exts_filter_template(exts_filter, ext):
     return cmd, cmdinput
 
 
+def run_batched_import_check(python_cmd, modnames, work_dir=None):
+    """
+    Check whether specified Python modules can be imported, using a single Python interpreter session.
+
+    :param python_cmd: command to start Python interpreter with
+    :param modnames: list of names of Python modules to check
+    :param work_dir: working directory to run import check in
+    :return: dict with result of import check (True/False) for each module that was checked;
+             modules for which no result was reported (for example because the interpreter crashed) are not included
+    """
+    script = BATCHED_IMPORT_CHECK_SCRIPT % {
+        'fail': BATCHED_IMPORT_CHECK_FAIL,
+        'modnames': list(modnames),
+        'ok': BATCHED_IMPORT_CHECK_OK,
+    }
+    res = run_shell_cmd(f"{python_cmd} -", stdin=script, work_dir=work_dir, fail_on_error=False, hidden=True)
+
+    import_results = {}
+    for line in res.output.splitlines():
+        words = line.split()
+        if len(words) == 2 and words[0] in (BATCHED_IMPORT_CHECK_OK, BATCHED_IMPORT_CHECK_FAIL):
+            import_results[words[1]] = words[0] == BATCHED_IMPORT_CHECK_OK
+
+    return import_results
+
+
 class Extension:
     """
     Support for installing extensions.
@@ -290,6 +337,40 @@ class Extension:
         """
         return self.master.toolchain
 
+    def sanity_check_import_batch(self):
+        """
+        Determine whether sanity check for this extension can be batched with other extensions,
+        by checking whether a Python module can be imported in a Python session shared with other extensions.
+
+        Should only be implemented by extension classes for which a successful import check is equivalent
+        to a successful sanity check (see also sanity_check_step).
+
+        Supported by default if the sanity check for this extension is not customised (see sanity_check_step),
+        and the extension filter only checks whether a Python module can be imported
+        (like "python -c 'import %(ext_name)s'").
+
+        :return: (<Python command>, <module name>) tuple, or None if batched sanity check is not supported
+        """
+        if type(self).sanity_check_step is Extension.sanity_check_step:
+            return self._det_python_import_check()
+        return None
+
+    def _det_python_import_check(self):
+        """
+        Determine Python command and name of Python module to import, if extension filter is a Python import check.
+
+        :return: (<Python command>, <module name>) tuple, or None if extension filter is not a Python import check
+        """
+        exts_filter = self.cfg.get_ref('exts_filter')
+        if not exts_filter or self.options.get('modulename') is False:
+            return None
+
+        cmd, stdin = resolve_exts_filter_template(exts_filter, self)
+        res = PYTHON_IMPORT_CHECK_REGEX.match(cmd)
+        if res and not stdin:
+            return (res.group('python_cmd'), res.group('modname'))
+        return None
+
     def sanity_check_step(self):
         """
         Sanity check to run after installing extension
@@ -207,6 +207,16 @@ class ExtensionEasyBlock(EasyBlock, Extension):
 
         return (sanity_check_ok, '; '.join(self.sanity_check_fail_msgs))
 
+    def sanity_check_import_batch(self):
+        """
+        Determine whether sanity check for this extension can be batched with other extensions
+        (see Extension.sanity_check_import_batch).
+        Only supported for extensions that use the default sanity check of ExtensionEasyBlock.
+        """
+        if self.is_extension and type(self).sanity_check_step is ExtensionEasyBlock.sanity_check_step:
+            return self._det_python_import_check()
+        return None
+
     def make_module_extra(self, *args, **kwargs):
         """Add custom entries to module."""
 
@@ -55,7 +55,6 @@ from easybuild.tools.build_log import EasyBuildExit
 from easybuild.framework.easyblock import build_and_install_one, inject_checksums, inject_checksums_to_json
 from easybuild.framework.easyconfig import EASYCONFIGS_PKG_SUBDIR
 from easybuild.framework.easyconfig import easyconfig
-from easybuild.framework.easystack import parse_easystack
 from easybuild.framework.easyconfig.easyconfig import clean_up_easyconfigs
 from easybuild.framework.easyconfig.easyconfig import fix_deprecated_easyconfigs, verify_easyconfig_filename
 from easybuild.framework.easyconfig.style import cmdline_easyconfigs_style_check
@@ -63,8 +62,8 @@ from easybuild.framework.easyconfig.tools import categorize_files_by_type, dep_g
 from easybuild.framework.easyconfig.tools import det_easyconfig_paths, dump_env_script, get_paths_for
 from easybuild.framework.easyconfig.tools import parse_easyconfigs, review_pr, run_contrib_checks, skip_available
 from easybuild.framework.easyconfig.tweak import obtain_ec_for, tweak
+from easybuild.tools.build_details import build_history_report
 from easybuild.tools.config import find_last_log, get_repository, get_repositorypath, build_option
-from easybuild.tools.containers.common import containerize
 from easybuild.tools.docs import list_software
 from easybuild.tools.environment import restore_env
 from easybuild.tools.filetools import adjust_permissions, cleanup, copy_files, dump_index, load_index
@@ -81,7 +80,9 @@ from easybuild.tools.output import COLOR_GREEN, COLOR_RED, STATUS_BAR, colorize,
 from easybuild.tools.output import start_progress_bar, stop_progress_bar, update_progress_bar
 from easybuild.tools.robot import check_conflicts, dry_run, missing_deps, resolve_dependencies, search_easyconfigs
 from easybuild.tools.package.utilities import check_pkg_support
-from easybuild.tools.parallelbuild import submit_jobs
+from easybuild.tools.profiling import PROFILE_PHASE_OPTION_PARSING, finish_profile_phase, get_profile_dir
+from easybuild.tools.profiling import init_framework_profiling, profile_phase, profiling_requested
+from easybuild.tools.profiling import start_profile_phase
 from easybuild.tools.repository.repository import init_repository
 from easybuild.tools.systemtools import check_easybuild_deps
 from easybuild.tools.testing import create_test_report, overall_test_report, regtest, session_state
@@ -279,6 +280,9 @@ def process_easystack(easystack_path, args, logfile, testing, init_session_state
     :param init_session_state: initial session state, to use in test reports
     :param do_build: whether or not to actually perform the build
     """
+    # only import easystack support (and hence PyYAML) when an easystack file is actually used
+    from easybuild.framework.easystack import parse_easystack
+
     easystack = parse_easystack(easystack_path)
 
     # keep copy of original environment, so we can restore it for every easystack entry
@@ -445,7 +449,8 @@ def process_eb_args(eb_args, eb_go, cfg_settings, modtool, testing, init_session
     # read easyconfig files
     try:
         validate = not options.inject_checksums and not options.inject_checksums_to_json
-        easyconfigs, generated_ecs = parse_easyconfigs(paths, validate=validate)
+        with profile_phase('parse_easyconfigs'):
+            easyconfigs, generated_ecs = parse_easyconfigs(paths, validate=validate)
     except Exception as err:
         # Catch any exception in easyconfig parsing, so we can generate a test report if required
         if options.dump_test_report or options.upload_test_report:
@@ -478,6 +483,7 @@ def process_eb_args(eb_args, eb_go, cfg_settings, modtool, testing, init_session
 
     if options.containerize:
         # if --containerize/-C create a container recipe (and optionally container image), and stop
+        from easybuild.tools.containers.common import containerize
         containerize(easyconfigs)
         return True
 
@@ -508,7 +514,8 @@ def process_eb_args(eb_args, eb_go, cfg_settings, modtool, testing, init_session
         # one exception: deps *are* resolved with --new-pr or --update-pr when dry run mode is enabled
         if options.robot and (not dry_run_mode or any_pr_option_set):
             print_msg("resolving dependencies ...", log=_log, silent=testing)
-            ordered_ecs = resolve_dependencies(easyconfigs, modtool)
+            with profile_phase('resolve_dependencies'):
+                ordered_ecs = resolve_dependencies(easyconfigs, modtool)
         else:
             ordered_ecs = easyconfigs
     elif any_pr_option_set:
@@ -559,7 +566,9 @@ def process_eb_args(eb_args, eb_go, cfg_settings, modtool, testing, init_session
         print_msg(txt, log=_log, silent=testing, prefix=False)
 
     elif options.check_conflicts:
-        if check_conflicts(easyconfigs, modtool):
+        with profile_phase('check_conflicts'):
+            conflicts = check_conflicts(easyconfigs, modtool)
+        if conflicts:
             print_error("One or more conflicts detected!")
             sys.exit(1)
         else:
@@ -596,6 +605,7 @@ def process_eb_args(eb_args, eb_go, cfg_settings, modtool, testing, init_session
 
     # submit build as job(s), clean up and exit
     if options.job:
+        from easybuild.tools.parallelbuild import submit_jobs
         submit_jobs(ordered_ecs, eb_go.generate_cmd_line(), testing=testing, tweak_map=tweak_map)
         if not testing:
             print_msg("Submitted parallel build jobs, exiting now")
@@ -644,6 +654,52 @@ def process_eb_args(eb_args, eb_go, cfg_settings, modtool, testing, init_session
     return overall_success
 
 
+def opts_requiring_modtool(options):
+    """
+    Return list of values for options that require the modules tool (or other heavy machinery) to be initialised,
+    and that take precedence over informative options like --search and --create-index.
+    """
+    return [
+        options.add_pr_labels,
+        options.build_history,
+        options.check_eb_deps,
+        options.check_github,
+        options.close_pr,
+        options.install_github_token,
+        options.last_log,
+        options.list_installed_software,
+        options.list_prs,
+        options.list_software,
+        options.merge_pr,
+        options.package,
+        options.review_pr,
+    ]
+
+
+def handle_modtool_free_options(options, search_query):
+    """
+    Handle informative options that do not require the modules tool: --search* and --create-index
+
+    :param options: parsed EasyBuild configuration options
+    :param search_query: search query (if any)
+    :return: exit code to use
+    """
+    exit_code = EasyBuildExit.SUCCESS
+
+    if search_query:
+        if not search_easyconfigs(search_query, short=options.search_short, filename_only=options.search_filename,
+                                  terse=options.terse):
+            exit_code = EasyBuildExit.MISSING_EASYCONFIG
+
+    elif options.create_index:
+        print_msg("Creating index for %s..." % options.create_index, prefix=False)
+        index_fp = dump_index(options.create_index, max_age_sec=options.index_max_age)
+        index = load_index(options.create_index)
+        print_msg("Index created at %s (%d files)" % (index_fp, len(index)), prefix=False)
+
+    return exit_code
+
+
 def main(args=None, logfile=None, do_build=None, testing=False, modtool=None, prepared_cfg_data=None) -> EasyBuildExit:
     """
     Main function: parse command line options, and act accordingly.
@@ -680,6 +736,12 @@ def main(args=None, logfile=None, do_build=None, testing=False, modtool=None, pr
 
     run_hook(START, hooks)
 
+    # informative options that do not require the modules tool are handled right away,
+    # since initialising it involves running the modules tool command & checking the loaded modules
+    if (search_query or options.create_index) and not any(opts_requiring_modtool(options)):
+        silent_exit_code = handle_modtool_free_options(options, search_query)
+        clean_exit(logfile, eb_tmpdir, testing, silent=True, exit_code=silent_exit_code)
+
     if modtool is None:
         modtool = modules_tool(testing=testing)
 
@@ -730,23 +792,19 @@ def main(args=None, logfile=None, do_build=None, testing=False, modtool=None, pr
         detailed = options.list_installed_software == 'detailed'
         print(list_software(output_format=options.output_format, detailed=detailed, only_installed=True))
 
+    elif options.build_history:
+        print(build_history_report(limit=options.build_history))
+
     elif options.list_software:
         print(list_software(output_format=options.output_format, detailed=options.list_software == 'detailed'))
 
-    elif search_query:
-        if not search_easyconfigs(search_query, short=options.search_short, filename_only=options.search_filename,
-                                  terse=options.terse):
-            silent_exit_code = EasyBuildExit.MISSING_EASYCONFIG
-
-    elif options.create_index:
-        print_msg("Creating index for %s..." % options.create_index, prefix=False)
-        index_fp = dump_index(options.create_index, max_age_sec=options.index_max_age)
-        index = load_index(options.create_index)
-        print_msg("Index created at %s (%d files)" % (index_fp, len(index)), prefix=False)
+    elif search_query or options.create_index:
+        silent_exit_code = handle_modtool_free_options(options, search_query)
 
     # non-verbose cleanup after handling GitHub integration stuff or printing terse info
     early_stop_options = [
         options.add_pr_labels,
+        options.build_history,
         options.check_eb_deps,
         options.check_github,
         options.create_index,
@@ -795,6 +853,10 @@ def main(args=None, logfile=None, do_build=None, testing=False, modtool=None, pr
         is_successful = process_eb_args(orig_paths, eb_go, cfg_settings, modtool, testing, init_session_state,
                                         hooks, do_build)
 
+    if get_profile_dir():
+        print_msg("profiling reports for EasyBuild framework available in %s" % get_profile_dir(), log=_log,
+                  silent=testing)
+
     # stop logging and cleanup tmp log file, unless one build failed (individual logs are located in eb_tmpdir)
     stop_logging(logfile, logtostdout=options.logtostdout)
     if is_successful:
@@ -826,7 +888,24 @@ def prepare_main(args=None, logfile=None, testing=None):
 
     # purposely session state very early, to avoid modules loaded by EasyBuild meddling in
     init_session_state = session_state()
-    eb_go, cfg_settings = set_up_configuration(args=args, logfile=logfile, testing=testing)
+
+    # profiling of option parsing must be started before configuration is set up,
+    # so we can only take into account whether it was requested via command line or environment
+    option_parsing_phase = None
+    if profiling_requested(args):
+        option_parsing_phase = start_profile_phase(PROFILE_PHASE_OPTION_PARSING, cpu=True, memory=True)
+
+    try:
+        eb_go, cfg_settings = set_up_configuration(args=args, logfile=logfile, testing=testing)
+    except EasyBuildError:
+        if option_parsing_phase is not None:
+            init_framework_profiling(None, None)
+            finish_profile_phase(option_parsing_phase)
+        raise
+
+    init_framework_profiling(eb_go.options.profile_framework, cfg_settings[2])
+    if option_parsing_phase is not None:
+        finish_profile_phase(option_parsing_phase)
 
     return init_session_state, eb_go, cfg_settings
 
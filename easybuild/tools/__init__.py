@@ -37,4 +37,4 @@ Authors:
 __path__ = __import__('pkgutil').extend_path(__path__, __name__)
 
 
-from easybuild.tools.loose_version import LooseVersion  # noqa(F401)
+from easybuild.tools.loose_version import LooseVersion, version_sort_key  # noqa(F401)
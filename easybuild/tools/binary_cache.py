@@ -0,0 +1,304 @@
+# Copyright 2025 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of Ghent University (http://ugent.be/hpc/en),
+# with support of Ghent University (http://ugent.be/hpc),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+# https://github.com/easybuilders/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Binary cache of installations, keyed by a hash of all inputs of an installation
+(easyconfig, easyblocks, sources & patches, dependencies, relevant configuration options, system).
+
+Each entry in the binary cache consists of a reproducible tarball of the installation directory
+(see make_archive) and a JSON file with metadata, incl. the inputs that were used to determine the hash
+and a copy of the module file that was generated for the installation.
+"""
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+
+from easybuild.base import fancylogger
+from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.config import SOFTWARE, build_option, install_path
+from easybuild.tools.filetools import CHECKSUM_TYPE_SHA256, compute_checksum, extract_archive, make_archive
+from easybuild.tools.filetools import mkdir, move_file, read_file, remove_dir, remove_file, write_file
+from easybuild.tools.systemtools import get_cpu_architecture, get_cpu_family, get_cpu_model, get_glibc_version
+from easybuild.tools.systemtools import get_os_name, get_os_version
+from easybuild.tools.utilities import nub
+from easybuild.tools.version import FRAMEWORK_VERSION
+
+
+_log = fancylogger.getLogger('tools.binary_cache', fname=False)
+
+# name of file in 'easybuild' subdirectory of installation directory that records hash of inputs of installation
+INSTALL_INPUT_HASH_FILENAME = 'install-input-hash.json'
+
+# configuration options that affect the result of an installation
+BINARY_CACHE_BUILD_OPTIONS = [
+    'amdgcn_capabilities',
+    'cuda_compute_capabilities',
+    'filter_deps',
+    'filter_env_vars',
+    'minimal_build_env',
+    'optarch',
+    'rpath',
+    'rpath_filter',
+    'rpath_override_dirs',
+    'search_path_cpp_headers',
+    'search_path_linker',
+    'sysroot',
+]
+
+
+def det_dep_install_input_hash(dep):
+    """
+    Determine hash of inputs of installation of specified dependency (see write_install_input_hash);
+    if it is not available, the full module name of the dependency is used instead.
+    """
+    res = None
+    if not dep.get('external_module'):
+        # avoid circular import
+        from easybuild.framework.easyconfig.easyconfig import ActiveMNS
+        try:
+            installdir = os.path.join(install_path(SOFTWARE), ActiveMNS().det_install_subdir(dep))
+            res = read_install_input_hash(installdir)
+        except EasyBuildError as err:
+            _log.debug("Failed to determine installation directory for dependency %s: %s", dep['name'], err)
+
+    if res is None:
+        _log.info("No hash of inputs available for installation of dependency %s, using module name instead",
+                  dep['full_mod_name'])
+        res = dep['full_mod_name']
+
+    return res
+
+
+def det_install_inputs(app):
+    """
+    Determine all inputs of installation performed by specified EasyBlock instance
+    that are relevant for the binary cache.
+
+    Sources and patches (incl. those for extensions) must have been fetched already (see fetch_step).
+    """
+    easyblocks = {}
+    for cls in inspect.getmro(type(app)):
+        if cls.__module__.startswith('easybuild.easyblocks'):
+            path = inspect.getsourcefile(cls)
+            easyblocks[cls.__module__] = compute_checksum(path, checksum_type=CHECKSUM_TYPE_SHA256)
+
+    paths = [src['path'] for src in app.src] + [patch['path'] for patch in app.patches]
+    for ext in app.exts:
+        if ext.get('src'):
+            paths.append(ext['src'])
+        paths.extend(patch['path'] for patch in ext.get('patches', []))
+    checksums = [(os.path.basename(path), compute_checksum(path, checksum_type=CHECKSUM_TYPE_SHA256))
+                 for path in paths if path]
+
+    deps = [(dep['full_mod_name'], det_dep_install_input_hash(dep)) for dep in app.cfg.all_dependencies]
+
+    inputs = {
+        'easybuild-framework_version': str(FRAMEWORK_VERSION),
+        'easyconfig': app.cfg.rawtxt,
+        'easyblocks': easyblocks,
+        'checksums': checksums,
+        'dependencies': sorted(deps),
+        'build_options': {opt: build_option(opt) for opt in BINARY_CACHE_BUILD_OPTIONS},
+        'system': {
+            'cpu_arch': get_cpu_architecture(),
+            'cpu_family': get_cpu_family(),
+            'glibc_version': get_glibc_version(),
+            'os_name': get_os_name(),
+            'os_version': get_os_version(),
+        },
+    }
+    # without --optarch, software is optimized for the CPU of the build host
+    if not build_option('optarch'):
+        inputs['system']['cpu_model'] = get_cpu_model()
+
+    return inputs
+
+
+def det_install_input_hash(inputs):
+    """Determine hash for specified inputs of an installation (see det_install_inputs)."""
+    inputs_json = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(inputs_json.encode('utf-8')).hexdigest()
+
+
+def read_install_input_hash(installdir):
+    """Read hash of inputs of installation in specified installation directory (None if not available)."""
+    res = None
+    path = os.path.join(installdir, 'easybuild', INSTALL_INPUT_HASH_FILENAME)
+    if os.path.isfile(path):
+        try:
+            res = json.loads(read_file(path))['input_hash']
+        except (KeyError, ValueError) as err:
+            _log.warning("Failed to read hash of inputs of installation from %s: %s", path, err)
+    return res
+
+
+def write_install_input_hash(installdir, input_hash):
+    """Record hash of inputs of installation in specified installation directory."""
+    path = os.path.join(installdir, 'easybuild', INSTALL_INPUT_HASH_FILENAME)
+    write_file(path, json.dumps({'input_hash': input_hash, 'installdir': installdir}, indent=4))
+
+
+def find_prefix_references(installdir, prefixes=None):
+    """
+    Find files in specified installation directory that contain a reference to one of the specified prefixes,
+    which make the installation non-relocatable; the 'easybuild' subdirectory (with logs, etc.) is not considered.
+
+    :param installdir: installation directory
+    :param prefixes: list of prefixes to look for (default: installation directory itself)
+    :return: path to first file that was found that includes a reference to one of the prefixes, or None
+    """
+    if prefixes is None:
+        prefixes = [installdir]
+    prefixes_bytes = [prefix.encode('utf-8') for prefix in prefixes]
+    tail_len = max(len(prefix) for prefix in prefixes_bytes)
+    chunk_size = 1024 * 1024
+
+    for dirpath, dirnames, filenames in os.walk(installdir):
+        if dirpath == installdir and 'easybuild' in dirnames:
+            dirnames.remove('easybuild')
+        for name in sorted(dirnames + filenames):
+            path = os.path.join(dirpath, name)
+            if os.path.islink(path):
+                if os.readlink(path).startswith(tuple(prefixes)):
+                    return path
+            elif name in filenames and os.path.isfile(path):
+                with open(path, 'rb') as fh:
+                    # retain tail of previous chunk, to catch references that span two chunks
+                    tail = b''
+                    chunk = fh.read(chunk_size)
+                    while chunk:
+                        data = tail + chunk
+                        if any(prefix in data for prefix in prefixes_bytes):
+                            return path
+                        tail = chunk[-tail_len:]
+                        chunk = fh.read(chunk_size)
+
+    return None
+
+
+def binary_cache_paths(cache_dir, input_hash):
+    """Return paths to tarball and metadata file of entry in binary cache for specified hash."""
+    base_path = os.path.join(cache_dir, input_hash[:2], input_hash)
+    return base_path + '.tar.xz', base_path + '.json'
+
+
+def find_in_binary_cache(cache_dir, input_hash, installdir):
+    """
+    Find entry in binary cache for specified hash of installation inputs,
+    which can be restored in specified installation directory.
+
+    :return: path to tarball of installation directory, or None
+    """
+    tarball, meta_path = binary_cache_paths(cache_dir, input_hash)
+
+    res = None
+    if os.path.isfile(tarball) and os.path.isfile(meta_path):
+        meta = json.loads(read_file(meta_path))
+        if meta['installdir'] == installdir:
+            res = tarball
+        elif meta['relocatable']:
+            _log.info("Relocating cached installation from %s to %s", meta['installdir'], installdir)
+            res = tarball
+        else:
+            _log.info("Found matching entry in binary cache, but it can not be relocated from %s to %s (%s)",
+                      meta['installdir'], installdir, meta['prefix_reference'])
+    else:
+        _log.info("No entry found in binary cache %s for hash %s", cache_dir, input_hash)
+
+    return res
+
+
+def restore_from_binary_cache(tarball, installdir):
+    """Restore installation directory from specified tarball in binary cache (see add_to_binary_cache)."""
+    _log.info("Restoring %s from binary cache: %s", installdir, tarball)
+
+    # extract next to installation directory, so moving into place is cheap
+    parent_dir = os.path.dirname(installdir)
+    mkdir(parent_dir, parents=True)
+    tmpdir = tempfile.mkdtemp(prefix='.eb-binary-cache-', dir=parent_dir)
+    try:
+        extract_archive(tarball, tmpdir)
+        # tarball contains a single top-level directory, which may not match name of installation directory
+        entries = os.listdir(tmpdir)
+        if len(entries) != 1:
+            raise EasyBuildError("Expected single top-level directory in %s, found: %s", tarball, entries)
+        top_dir = os.path.join(tmpdir, entries[0])
+        mkdir(installdir, parents=True)
+        for entry in os.listdir(top_dir):
+            target = os.path.join(installdir, entry)
+            if os.path.isdir(target) and not os.path.islink(target):
+                remove_dir(target)
+            elif os.path.lexists(target):
+                remove_file(target)
+            move_file(os.path.join(top_dir, entry), target)
+    finally:
+        remove_dir(tmpdir)
+
+
+def add_to_binary_cache(cache_dir, input_hash, inputs, installdir, mod_filepath):
+    """
+    Add installation in specified directory to binary cache, as a reproducible tarball + metadata file.
+
+    :param cache_dir: location of binary cache
+    :param input_hash: hash of installation inputs (see det_install_input_hash)
+    :param inputs: installation inputs (see det_install_inputs)
+    :param installdir: installation directory
+    :param mod_filepath: path to module file for installation
+    """
+    tarball, meta_path = binary_cache_paths(cache_dir, input_hash)
+    if os.path.exists(tarball):
+        _log.info("Installation %s is already available in binary cache: %s", installdir, tarball)
+        return
+
+    # references to installation prefix (not only to installation directory itself) make installation
+    # non-relocatable, since they include references to installation directories of dependencies
+    # (for example in RPATH section of binaries, pkg-config files, shebangs, etc.)
+    install_prefix = install_path(SOFTWARE)
+    prefix_reference = find_prefix_references(installdir, prefixes=nub([installdir, install_prefix]))
+    meta = {
+        'input_hash': input_hash,
+        'inputs': inputs,
+        'installdir': installdir,
+        'install_prefix': install_prefix,
+        'relocatable': prefix_reference is None,
+        'prefix_reference': prefix_reference,
+        'module_file': read_file(mod_filepath) if os.path.isfile(mod_filepath) else None,
+        'timestamp': int(time.time()),
+    }
+
+    # create tarball in temporary location in binary cache first, to avoid that partial entries are picked up
+    mkdir(os.path.dirname(tarball), parents=True)
+    tmpdir = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.dirname(tarball))
+    try:
+        tmp_tarball = make_archive(installdir, archive_file=os.path.basename(tarball), archive_dir=tmpdir)
+        write_file(meta_path, json.dumps(meta, indent=4, sort_keys=True, default=str))
+        os.rename(tmp_tarball, tarball)
+    except OSError as err:
+        raise EasyBuildError("Failed to add %s to binary cache %s: %s", installdir, cache_dir, err)
+    finally:
+        remove_dir(tmpdir)
+
+    _log.info("Added installation %s to binary cache: %s", installdir, tarball)
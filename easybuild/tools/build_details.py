@@ -25,17 +25,70 @@
 All required to provide details of build environment
 and allow for reproducable builds
 
+Build statistics can also be recorded in a (local) SQLite database with the build history
+(see --build-history-db), which can be queried for estimates of the duration of installations,
+installation steps and extensions.
+
 Authors:
 
 * Kenneth Hoste (Ghent University)
 * Stijn De Weirdt (Ghent University)
 """
+import datetime
+import os
+import statistics
 import time
 from collections import OrderedDict
-from easybuild.tools.filetools import det_size
+
+from easybuild.base import fancylogger
+from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.config import build_option
+from easybuild.tools.filetools import det_size, mkdir
 from easybuild.tools.systemtools import get_system_info
+from easybuild.tools.utilities import time2str
 from easybuild.tools.version import EASYBLOCKS_VERSION, FRAMEWORK_VERSION
 
+_log = fancylogger.getLogger('build_details', fname=False)
+
+try:
+    import sqlite3
+    HAVE_SQLITE3 = True
+except ImportError as err:
+    _log.warning("Failed to import 'sqlite3' Python module: %s", err)
+    HAVE_SQLITE3 = False
+
+# host facts that are recorded in build history (see get_system_info)
+BUILD_HISTORY_HOST_FACTS = ['hostname', 'cpu_arch', 'cpu_model', 'core_count', 'total_memory', 'os_name', 'os_version']
+
+BUILD_HISTORY_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS builds (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        version TEXT NOT NULL,
+        full_mod_name TEXT,
+        timestamp INTEGER,
+        build_time REAL,
+        cores INTEGER,
+        peak_memory INTEGER,
+        install_size INTEGER,
+        hostname TEXT,
+        cpu_arch TEXT,
+        cpu_model TEXT,
+        core_count INTEGER,
+        total_memory INTEGER,
+        os_name TEXT,
+        os_version TEXT,
+        framework_version TEXT,
+        easyblocks_version TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS builds_name_version ON builds (name, version)",
+    "CREATE TABLE IF NOT EXISTS steps (build_id INTEGER REFERENCES builds(id), step TEXT, duration REAL)",
+    "CREATE TABLE IF NOT EXISTS extensions (build_id INTEGER REFERENCES builds(id), name TEXT, duration REAL)",
+]
+
+# number of most recent builds to take into account for estimates
+BUILD_HISTORY_ESTIMATE_BUILDS = 5
+
 
 def get_build_stats(app, start_time, command_line):
     """
@@ -58,3 +111,214 @@ def get_build_stats(app, start_time, command_line):
         buildstats.update({key: val})
 
     return buildstats
+
+
+def open_build_history_db(path=None):
+    """
+    Open SQLite database with build history, and make sure the required tables are there.
+
+    :param path: path to database (if None, value for --build-history-db configuration option is used)
+    :return: sqlite3 connection to database
+    """
+    if not HAVE_SQLITE3:
+        raise EasyBuildError("Required 'sqlite3' Python module is not available, can't use build history database")
+
+    if path is None:
+        path = build_option('build_history_db')
+    if not path:
+        raise EasyBuildError("No build history database specified, use --build-history-db")
+
+    mkdir(os.path.dirname(os.path.abspath(path)), parents=True)
+    try:
+        # allow for multiple EasyBuild sessions writing to the same database concurrently
+        conn = sqlite3.connect(path, timeout=60)
+        conn.row_factory = sqlite3.Row
+        with conn:
+            for stmt in BUILD_HISTORY_SCHEMA:
+                conn.execute(stmt)
+    except sqlite3.Error as err:
+        raise EasyBuildError("Failed to open build history database %s: %s", path, err)
+
+    return conn
+
+
+def record_build(app, buildstats, path=None):
+    """
+    Record build in build history database.
+
+    :param app: EasyBlock instance for installation
+    :param buildstats: build statistics for installation (see get_build_stats)
+    :param path: path to database (if None, value for --build-history-db configuration option is used)
+    :return: ID of build in database
+    """
+    # avoid circular import
+    from easybuild.tools.module_naming_scheme.utilities import det_full_ec_version
+
+    peak_memory = None
+    if app.resource_usage is not None and app.resource_usage.events:
+        peak_memory = max(event['max_rss'] for event in app.resource_usage.events)
+
+    build = OrderedDict([
+        ('name', app.name),
+        ('version', det_full_ec_version(app.cfg)),
+        ('full_mod_name', app.full_mod_name),
+        ('timestamp', buildstats['timestamp']),
+        ('build_time', buildstats['build_time']),
+        ('cores', app.cfg.parallel),
+        ('peak_memory', peak_memory),
+        ('install_size', buildstats['install_size']),
+    ])
+    for key in BUILD_HISTORY_HOST_FACTS:
+        build[key] = buildstats.get(key)
+    build['framework_version'] = buildstats['easybuild-framework_version']
+    build['easyblocks_version'] = buildstats['easybuild-easyblocks_version']
+
+    conn = open_build_history_db(path=path)
+    try:
+        with conn:
+            sql = "INSERT INTO builds (%s) VALUES (%s)" % (', '.join(build), ', '.join('?' * len(build)))
+            build_id = conn.execute(sql, list(build.values())).lastrowid
+            conn.executemany("INSERT INTO steps (build_id, step, duration) VALUES (?, ?, ?)",
+                             [(build_id, step, duration) for step, duration in app.step_timings.items()])
+            conn.executemany("INSERT INTO extensions (build_id, name, duration) VALUES (?, ?, ?)",
+                             [(build_id, ext, duration) for ext, duration in app.ext_timings.items()])
+    except sqlite3.Error as err:
+        raise EasyBuildError("Failed to record build of %s in build history database: %s", app.full_mod_name, err)
+    finally:
+        conn.close()
+
+    _log.info("Recorded build of %s in build history database (build ID: %s)", app.full_mod_name, build_id)
+    return build_id
+
+
+def get_build_history(name=None, version=None, limit=None, path=None):
+    """
+    Get build history (most recent builds first), optionally only for specified software name/version.
+
+    :param name: software name
+    :param version: full software version (see det_full_ec_version)
+    :param limit: maximum number of builds to return
+    :param path: path to database (if None, value for --build-history-db configuration option is used)
+    :return: list of dicts with build info, incl. timing of steps ('steps') and extensions ('extensions')
+    """
+    conds, params = [], []
+    for key, value in [('name', name), ('version', version)]:
+        if value is not None:
+            conds.append('%s = ?' % key)
+            params.append(value)
+
+    sql = "SELECT * FROM builds"
+    if conds:
+        sql += " WHERE " + ' AND '.join(conds)
+    sql += " ORDER BY timestamp DESC, id DESC"
+    if limit:
+        sql += " LIMIT %d" % limit
+
+    conn = open_build_history_db(path=path)
+    try:
+        builds = []
+        for row in conn.execute(sql, params):
+            build = OrderedDict((key, row[key]) for key in row.keys())
+            build['steps'] = OrderedDict(conn.execute("SELECT step, duration FROM steps WHERE build_id = ?",
+                                                      (build['id'],)).fetchall())
+            build['extensions'] = OrderedDict(conn.execute("SELECT name, duration FROM extensions WHERE build_id = ?",
+                                                           (build['id'],)).fetchall())
+            builds.append(build)
+    except sqlite3.Error as err:
+        raise EasyBuildError("Failed to query build history database: %s", err)
+    finally:
+        conn.close()
+
+    return builds
+
+
+def _recent_builds(name, version, path):
+    """
+    Return most recent builds for specified software name/version in build history database;
+    builds for other versions are considered if there are no builds for the specified version.
+    No builds are returned if no build history database is available.
+    """
+    if path is None:
+        path = build_option('build_history_db')
+    if not path or not os.path.exists(path):
+        return []
+
+    builds = get_build_history(name=name, version=version, limit=BUILD_HISTORY_ESTIMATE_BUILDS, path=path)
+    if not builds and version is not None:
+        builds = get_build_history(name=name, limit=BUILD_HISTORY_ESTIMATE_BUILDS, path=path)
+    return builds
+
+
+def estimate_build_duration(name, version=None, path=None):
+    """
+    Estimate duration (in seconds) of installation of specified software name/version,
+    based on (median of) most recent builds in build history database.
+
+    :return: estimated duration, or None if no estimate can be made
+    """
+    build_times = [build['build_time'] for build in _recent_builds(name, version, path)]
+    return statistics.median(build_times) if build_times else None
+
+
+def estimate_step_durations(name, version=None, path=None):
+    """
+    Estimate duration (in seconds) of installation steps for specified software name/version,
+    based on (median of) most recent builds in build history database.
+
+    :return: dict with estimated duration per installation step
+    """
+    return _estimate_durations(name, version, path, 'steps')
+
+
+def estimate_extension_durations(name, version=None, path=None):
+    """
+    Estimate duration (in seconds) of installation of extensions for specified software name/version,
+    based on (median of) most recent builds in build history database.
+
+    :return: dict with estimated duration per extension
+    """
+    return _estimate_durations(name, version, path, 'extensions')
+
+
+def _estimate_durations(name, version, path, key):
+    """Estimate durations for specified key ('steps' or 'extensions') based on most recent builds."""
+    durations = OrderedDict()
+    for build in _recent_builds(name, version, path):
+        for entry, duration in build[key].items():
+            durations.setdefault(entry, []).append(duration)
+    return OrderedDict((entry, statistics.median(values)) for entry, values in durations.items())
+
+
+def build_history_report(limit=None, path=None):
+    """
+    Create report on build history: one line per build, most recent builds first.
+
+    :param limit: maximum number of builds to include
+    :param path: path to database (if None, value for --build-history-db configuration option is used)
+    """
+    builds = get_build_history(limit=limit, path=path)
+    if not builds:
+        return "(no builds recorded in build history)"
+
+    titles = ['date', 'module', 'build time', 'cores', 'peak memory', 'install size', 'host']
+
+    def size_str(size):
+        """Format size in bytes as MiB."""
+        return '-' if size is None else '%.1f MiB' % (size / 1024.0 ** 2)
+
+    lines = []
+    for build in builds:
+        lines.append([
+            datetime.datetime.fromtimestamp(build['timestamp']).strftime('%Y-%m-%d %H:%M:%S'),
+            build['full_mod_name'] or '%s/%s' % (build['name'], build['version']),
+            time2str(datetime.timedelta(seconds=build['build_time'])),
+            '-' if build['cores'] is None else str(build['cores']),
+            size_str(build['peak_memory']),
+            size_str(build['install_size']),
+            build['hostname'] or '-',
+        ])
+
+    widths = [max(len(line[idx]) for line in [titles] + lines) for idx in range(len(titles))]
+    res = ['  '.join(value.ljust(width) for value, width in zip(line, widths)).rstrip() for line in [titles] + lines]
+    res.insert(1, '  '.join('-' * width for width in widths))
+    return '\n'.join(res)
@@ -39,6 +39,8 @@ import os
 import re
 import sys
 import tempfile
+import threading
+from contextlib import contextmanager
 from copy import copy
 from datetime import datetime
 from enum import IntEnum
@@ -68,6 +70,9 @@ CWD_NOTFOUND_ERROR = (
 )
 
 
+# output that is collected rather than printed for the current thread (see collect_output)
+_collected_output = threading.local()
+
 DEVEL_LOG_LEVEL = logging.DEBUG - 1
 logging.addLevelName(DEVEL_LOG_LEVEL, 'DEVEL')
 
@@ -304,6 +309,44 @@ def stop_logging(logfile, logtostdout=False):
         fancylogger.logToFile(logfile, enable=False)
 
 
+@contextmanager
+def collect_output(messages):
+    """
+    Context manager to collect output that is produced via print_msg/print_warning in the current thread,
+    rather than printing it (for example to avoid that output produced by worker threads gets interleaved);
+    collected output can be printed via print_collected_output.
+
+    :param messages: list to add collected messages to, as tuples with message and whether to print to stderr
+    """
+    prev_messages = getattr(_collected_output, 'messages', None)
+    _collected_output.messages = messages
+    try:
+        yield messages
+    finally:
+        _collected_output.messages = prev_messages
+
+
+def output_collected():
+    """Determine whether output is being collected (rather than printed) in the current thread."""
+    return getattr(_collected_output, 'messages', None) is not None
+
+
+def print_collected_output(messages):
+    """Print output that was collected via collect_output."""
+    for msg, stderr in messages:
+        _write_output(msg, stderr=stderr)
+
+
+def _write_output(msg, stderr=False):
+    """Write message to stdout (or stderr), or collect it if output is being collected in the current thread."""
+    if output_collected():
+        _collected_output.messages.append((msg, stderr))
+    elif stderr:
+        sys.stderr.write(msg)
+    else:
+        sys.stdout.write(msg)
+
+
 def print_msg(msg, *args, **kwargs):
     """
     Print a message.
@@ -334,10 +377,7 @@ def print_msg(msg, *args, **kwargs):
         if newline:
             msg += '\n'
 
-        if stderr:
-            sys.stderr.write(msg)
-        else:
-            sys.stdout.write(msg)
+        _write_output(msg, stderr=stderr)
 
 
 def dry_run_set_dirs(prefix, builddir, software_installdir, module_installdir):
@@ -439,7 +479,7 @@ def print_warning(msg, *args, **kwargs):
     if log:
         log.warning(msg)
     if not silent:
-        sys.stderr.write("\nWARNING: %s\n\n" % msg)
+        _write_output("\nWARNING: %s\n\n" % msg, stderr=True)
 
 
 def time_str_since(start_time):
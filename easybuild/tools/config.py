@@ -132,6 +132,7 @@ DEFAULT_PREFIX = os.path.join(os.path.expanduser('~'), ".local", "easybuild")
 DEFAULT_REPOSITORY = 'FileRepository'
 EASYBUILD_SOURCES_URL = 'https://sources.easybuild.io'
 DEFAULT_EXTRA_SOURCE_URLS = (EASYBUILD_SOURCES_URL,)
+DEFAULT_EXTRACTED_SOURCES_CACHE_MAXSIZE = 20 * 1024  # 20 GiB (in MiB)
 # Filter these CUDA libraries by default from the RPATH sanity check.
 # These are the only four libraries for which the CUDA toolkit ships stubs. By design, one is supposed to build
 # against the stub versions, but use the libraries that come with the CUDA driver at runtime. That means they should
@@ -160,6 +161,12 @@ CHECKSUM_PRIORITY_EASYCONFIG = "easyconfig"
 CHECKSUM_PRIORITY_CHOICES = [CHECKSUM_PRIORITY_JSON, CHECKSUM_PRIORITY_EASYCONFIG]
 DEFAULT_CHECKSUM_PRIORITY = CHECKSUM_PRIORITY_EASYCONFIG
 
+PROFILE_FRAMEWORK_ALL = 'all'
+PROFILE_FRAMEWORK_CPU = 'cpu'
+PROFILE_FRAMEWORK_MEMORY = 'memory'
+PROFILE_FRAMEWORK_CHOICES = [PROFILE_FRAMEWORK_ALL, PROFILE_FRAMEWORK_CPU, PROFILE_FRAMEWORK_MEMORY]
+DEFAULT_PROFILE_FRAMEWORK = PROFILE_FRAMEWORK_CPU
+
 # package name for generic easyblocks
 GENERIC_EASYBLOCK_PKG = 'generic'
 
@@ -231,6 +238,8 @@ BUILD_OPTIONS_CMDLINE = {
         'amdgcn_capabilities',
         'backup_modules',
         'banned_linked_shared_libs',
+        'binary_cache_dir',
+        'build_history_db',
         'checksum_priority',
         'container_config',
         'container_image_format',
@@ -244,12 +253,14 @@ BUILD_OPTIONS_CMDLINE = {
         'easyblock',
         'envvars_user_modules',
         'extra_modules',
+        'extracted_sources_cache_dir',
         'filter_deps',
         'filter_ecs',
         'filter_env_vars',
         'filter_rpath_sanity_libs',
         'force_download',
         'from_commit',
+        'git_mirror_cache_dir',
         'git_working_dirs_path',
         'github_user',
         'github_org',
@@ -267,8 +278,10 @@ BUILD_OPTIONS_CMDLINE = {
         'job_max_jobs',
         'job_max_walltime',
         'job_output_dir',
+        'job_pack_walltime',
         'job_polling_interval',
         'job_target_resource',
+        'list_software_cache_dir',
         'locks_dir',
         'module_cache_suffix',
         'modules_footer',
@@ -278,11 +291,13 @@ BUILD_OPTIONS_CMDLINE = {
         'optarch',
         'package_tool_options',
         'parallel',
+        'patch_index_dir',
         'pr_branch_name',
         'pr_commit_msg',
         'pr_descr',
         'pr_target_repo',
         'pr_title',
+        'profile_framework',
         'regtest_output_dir',
         'rpath_filter',
         'rpath_override_dirs',
@@ -293,6 +308,7 @@ BUILD_OPTIONS_CMDLINE = {
         'software_commit',
         'stop',
         'subdir_user_modules',
+        'sysinfo_cache_dir',
         'sysroot',
         'test_report_env_filter',
         'testoutput',
@@ -317,9 +333,11 @@ BUILD_OPTIONS_CMDLINE = {
         'enforce_checksums',
         'experimental',
         'extended_dry_run',
+        'extract_in_process',
         'fail_on_mod_files_gcccore',
         'force',
         'generate_devel_module',
+        'git_shallow_clone',
         'group_writable_installdir',
         'hidden',
         'ignore_checksums',
@@ -327,6 +345,7 @@ BUILD_OPTIONS_CMDLINE = {
         'ignore_locks',
         'ignore_test_failure',
         'install_latest_eb_release',
+        'job_array',
         'keep_debug_symbols',
         'keep_going',
         'logtostdout',
@@ -336,6 +355,7 @@ BUILD_OPTIONS_CMDLINE = {
         'parallel_extensions_install',
         'read_only_installdir',
         'rebuild',
+        'record_resource_usage',
         'remove_ghost_install_dirs',
         'rpath',
         'sanity_check_only',
@@ -441,6 +461,9 @@ BUILD_OPTIONS_CMDLINE = {
     DEFAULT_EXTRA_SOURCE_URLS: [
         'extra_source_urls',
     ],
+    DEFAULT_EXTRACTED_SOURCES_CACHE_MAXSIZE: [
+        'extracted_sources_cache_maxsize',
+    ],
     DEFAULT_ALLOW_LOADED_MODULES: [
         'allow_loaded_modules',
     ],
@@ -673,6 +696,16 @@ def init_build_options(build_options=None, cmdline_options=None):
     return BuildOptions(bo)
 
 
+def build_options_initialized():
+    """
+    Determine whether build options are initialized (see init_build_options).
+
+    build_option should not be used before build options are initialized,
+    since that would initialize the BuildOptions singleton without any build options.
+    """
+    return BuildOptions in Singleton._instances
+
+
 def build_option(key, **kwargs):
     """Obtain value specified build option."""
 
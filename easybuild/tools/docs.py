@@ -39,9 +39,11 @@ Authors:
 import copy
 import inspect
 import json
+import multiprocessing
 import os
 from collections import OrderedDict
-from easybuild.tools import LooseVersion
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from easybuild.tools import version_sort_key
 from string import ascii_lowercase
 
 from easybuild.base import fancylogger
@@ -59,13 +61,15 @@ from easybuild.framework.easyconfig.tools import avail_easyblocks
 from easybuild.framework.easyconfig.tweak import find_matching_easyconfigs
 from easybuild.framework.extension import Extension
 from easybuild.tools.build_log import EasyBuildError, print_msg
-from easybuild.tools.config import build_option
-from easybuild.tools.filetools import read_file
+from easybuild.tools.config import build_option, get_module_naming_scheme
+from easybuild.tools.filetools import read_file, write_file
 from easybuild.tools.modules import modules_tool
+from easybuild.tools.systemtools import get_avail_core_count
 from easybuild.tools.toolchain.toolchain import SYSTEM_TOOLCHAIN_NAME, is_system_toolchain
 from easybuild.tools.toolchain.utilities import search_toolchain
 from easybuild.tools.utilities import INDENT_2SPACES, INDENT_4SPACES
 from easybuild.tools.utilities import import_available_modules, mk_md_table, mk_rst_table, nub, quote_str
+from easybuild.tools.version import FRAMEWORK_VERSION
 
 
 _log = fancylogger.getLogger('tools.docs')
@@ -79,6 +83,8 @@ FORMAT_MD = 'md'
 FORMAT_RST = 'rst'
 FORMAT_TXT = 'txt'
 
+LIST_SOFTWARE_CACHE_FILENAME = 'list-software-cache.json'
+
 
 def generate_doc(name, params):
     """Generate documentation by calling function with specified name, using supplied parameters."""
@@ -760,6 +766,104 @@ def gen_list_easyblocks(list_easyblocks, format_strings):
     return '\n'.join(txt)
 
 
+def det_software_info(ec_path, only_installed=False):
+    """
+    Determine information on software for specified easyconfig file (see list_software)
+
+    :param ec_path: path to easyconfig file
+    :param only_installed: also determine module name (requires full parse of easyconfig file)
+    :return: tuple with software name and dictionary with information on software
+             (description, homepage, version, versionsuffix, toolchain and module name)
+    """
+    # full EasyConfig instance is only required when module name is needed
+    # this is significantly slower (5-10x) than a 'shallow' parse via EasyConfigParser
+    if only_installed:
+        ec = process_easyconfig(ec_path, validate=False, parse_only=True)[0]['ec']
+    else:
+        ec = EasyConfigParser(filename=ec_path).get_config_dict()
+
+    if is_system_toolchain(ec['toolchain']['name']):
+        toolchain = SYSTEM_TOOLCHAIN_NAME
+    else:
+        toolchain = '%s/%s' % (ec['toolchain']['name'], ec['toolchain']['version'])
+
+    keys = ['description', 'homepage', 'version', 'versionsuffix']
+
+    info = {'toolchain': toolchain}
+    for key in keys:
+        info[key] = ec.get(key, '')
+
+    # make sure values like homepage & versionsuffix get properly templated
+    if isinstance(ec, dict):
+        template_values = template_constant_dict(ec)
+        for key in keys:
+            if info[key] and '%(' in info[key]:
+                try:
+                    info[key] = info[key] % template_values
+                except (KeyError, TypeError, ValueError) as err:
+                    _log.debug("Ignoring failure to resolve templates: %s", err)
+
+    if only_installed:
+        info['mod_name'] = ec.full_mod_name
+
+    return ec['name'], info
+
+
+def _det_software_info_worker(ec_path, only_installed):
+    """
+    Determine information on software for specified easyconfig file in worker process (see det_software_info);
+    errors are returned (as message and exit code) rather than raised, since they can not be passed between processes.
+    """
+    try:
+        return det_software_info(ec_path, only_installed=only_installed), None
+    except EasyBuildError as err:
+        return None, (err.msg, err.exit_code)
+
+
+def load_list_software_cache(cache_path, cache_key):
+    """
+    Load cached information on software for easyconfig files (see list_software) from specified file.
+
+    :param cache_path: path to cache file
+    :param cache_key: key for cached information (depends on whether a full parse of easyconfig files is done)
+    :return: dictionary with paths to easyconfig files as keys,
+             and lists with modification time, size, software name and information on software as values
+    """
+    res = {}
+    if os.path.isfile(cache_path):
+        try:
+            cache = json.loads(read_file(cache_path))
+            if cache['easybuild_version'] == str(FRAMEWORK_VERSION):
+                res = cache['entries'].get(cache_key, {})
+            else:
+                _log.info("Ignoring cache %s created with different EasyBuild version", cache_path)
+        except (KeyError, TypeError, ValueError) as err:
+            _log.warning("Ignoring cache %s that failed to load: %s", cache_path, err)
+    return res
+
+
+def save_list_software_cache(cache_path, cache_key, entries):
+    """
+    Save cached information on software for easyconfig files (see list_software) to specified file.
+
+    :param cache_path: path to cache file
+    :param cache_key: key for cached information (depends on whether a full parse of easyconfig files is done)
+    :param entries: cached information (see load_list_software_cache)
+    """
+    cache = {'easybuild_version': str(FRAMEWORK_VERSION), 'entries': {}}
+    if os.path.isfile(cache_path):
+        try:
+            prev_cache = json.loads(read_file(cache_path))
+            if prev_cache['easybuild_version'] == cache['easybuild_version']:
+                cache['entries'] = prev_cache['entries']
+        except (KeyError, TypeError, ValueError) as err:
+            _log.warning("Ignoring cache %s that failed to load: %s", cache_path, err)
+
+    cache['entries'][cache_key] = entries
+    write_file(cache_path, json.dumps(cache))
+    _log.info("Cached information on software for %d easyconfig files in %s", len(entries), cache_path)
+
+
 def list_software(output_format=FORMAT_TXT, detailed=False, only_installed=False):
     """
     Show list of supported software
@@ -772,49 +876,62 @@ def list_software(output_format=FORMAT_TXT, detailed=False, only_installed=False
     silent = build_option('silent')
 
     ec_paths = find_matching_easyconfigs('*', '*', build_option('robot_path') or [])
-    ecs = []
     cnt = len(ec_paths)
-    for idx, ec_path in enumerate(ec_paths):
-        # full EasyConfig instance is only required when module name is needed
-        # this is significantly slower (5-10x) than a 'shallow' parse via EasyConfigParser
-        if only_installed:
-            ec = process_easyconfig(ec_path, validate=False, parse_only=True)[0]['ec']
-        else:
-            ec = EasyConfigParser(filename=ec_path).get_config_dict()
 
-        ecs.append(ec)
-        print_msg('\r', prefix=False, newline=False, silent=silent)
-        print_msg("Processed %d/%d easyconfigs..." % (idx + 1, cnt), newline=False, silent=silent)
-    print_msg('', prefix=False, silent=silent)
-
-    software = {}
-    for ec in ecs:
-        software.setdefault(ec['name'], [])
-        if is_system_toolchain(ec['toolchain']['name']):
-            toolchain = SYSTEM_TOOLCHAIN_NAME
+    # information on software for easyconfig files that were not changed since last time can be reused
+    cache_path, cache = None, {}
+    if only_installed:
+        # module names depend on active module naming scheme
+        cache_key = 'installed:%s' % get_module_naming_scheme()
+    else:
+        cache_key = 'all'
+    cache_dir = build_option('list_software_cache_dir')
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, LIST_SOFTWARE_CACHE_FILENAME)
+        cache = load_list_software_cache(cache_path, cache_key)
+
+    ec_infos, todo = {}, []
+    for ec_path in ec_paths:
+        ec_stat = os.stat(ec_path)
+        entry = cache.get(ec_path)
+        if entry and entry[:2] == [ec_stat.st_mtime_ns, ec_stat.st_size]:
+            ec_infos[ec_path] = entry
         else:
-            toolchain = '%s/%s' % (ec['toolchain']['name'], ec['toolchain']['version'])
+            todo.append((ec_path, [ec_stat.st_mtime_ns, ec_stat.st_size]))
 
-        keys = ['description', 'homepage', 'version', 'versionsuffix']
+    _log.info("Reusing cached information on software for %d easyconfig files, parsing %d easyconfig files",
+              len(ec_infos), len(todo))
 
-        info = {'toolchain': toolchain}
-        for key in keys:
-            info[key] = ec.get(key, '')
-
-        # make sure values like homepage & versionsuffix get properly templated
-        if isinstance(ec, dict):
-            template_values = template_constant_dict(ec)
-            for key in keys:
-                if info[key] and '%(' in info[key]:
-                    try:
-                        info[key] = info[key] % template_values
-                    except (KeyError, TypeError, ValueError) as err:
-                        _log.debug("Ignoring failure to resolve templates: %s", err)
+    def processed(ec_path, stamp, res):
+        """Register information on software for specified easyconfig file."""
+        ec_infos[ec_path] = stamp + list(res)
+        print_msg('\r', prefix=False, newline=False, silent=silent)
+        print_msg("Processed %d/%d easyconfigs..." % (len(ec_infos), cnt), newline=False, silent=silent)
+
+    # parse easyconfig files in worker processes (parsing is CPU-bound), if processes can be forked
+    max_workers = min(len(todo), build_option('parallel') or get_avail_core_count())
+    if max_workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as pool:
+            futures = {pool.submit(_det_software_info_worker, ec_path, only_installed): (ec_path, stamp)
+                       for ec_path, stamp in todo}
+            for future in as_completed(futures):
+                res, err = future.result()
+                if err is not None:
+                    raise EasyBuildError(err[0], exit_code=err[1])
+                processed(*futures[future], res)
+    else:
+        for ec_path, stamp in todo:
+            processed(ec_path, stamp, det_software_info(ec_path, only_installed=only_installed))
+    print_msg('', prefix=False, silent=silent)
 
-        software[ec['name']].append(info)
+    if cache_path and todo:
+        save_list_software_cache(cache_path, cache_key, ec_infos)
 
-        if only_installed:
-            software[ec['name']][-1].update({'mod_name': ec.full_mod_name})
+    software = {}
+    for ec_path in ec_paths:
+        name, info = ec_infos[ec_path][2:]
+        software.setdefault(name, []).append(info)
 
     print_msg("Found %d different software packages" % len(software), silent=silent)
 
@@ -883,7 +1000,6 @@ def list_software_md(software, detailed=True):
             table_values = [[], []]
 
             # first determine unique pairs of version/versionsuffix
-            # we can't use LooseVersion yet here, since nub uses set and LooseVersion instances are not hashable
             pairs = nub((x['version'], x['versionsuffix']) for x in software[key])
 
             # check whether any non-empty versionsuffixes are in play
@@ -893,9 +1009,9 @@ def list_software_md(software, detailed=True):
                 table_values.insert(1, [])
 
             # sort pairs by version (and then by versionsuffix);
-            # we sort by LooseVersion to obtain chronological version ordering,
+            # we sort by version key (cfr. LooseVersion) to obtain chronological version ordering,
             # but we also need to retain original string version for filtering-by-version done below
-            sorted_pairs = sorted((LooseVersion(v), vs, v) for v, vs in pairs)
+            sorted_pairs = sorted((version_sort_key(v), vs, v) for v, vs in pairs)
 
             for _, vsuff, ver in sorted_pairs:
                 table_values[0].append('``%s``' % ver)
@@ -987,7 +1103,6 @@ def list_software_rst(software, detailed=False):
             table_values = [[], []]
 
             # first determine unique pairs of version/versionsuffix
-            # we can't use LooseVersion yet here, since nub uses set and LooseVersion instances are not hashable
             pairs = nub((x['version'], x['versionsuffix']) for x in software[key])
 
             # check whether any non-empty versionsuffixes are in play
@@ -997,9 +1112,9 @@ def list_software_rst(software, detailed=False):
                 table_values.insert(1, [])
 
             # sort pairs by version (and then by versionsuffix);
-            # we sort by LooseVersion to obtain chronological version ordering,
+            # we sort by version key (cfr. LooseVersion) to obtain chronological version ordering,
             # but we also need to retain original string version for filtering-by-version done below
-            sorted_pairs = sorted((LooseVersion(v), vs, v) for v, vs in pairs)
+            sorted_pairs = sorted((version_sort_key(v), vs, v) for v, vs in pairs)
 
             for _, vsuff, ver in sorted_pairs:
                 table_values[0].append('``%s``' % ver)
@@ -1051,13 +1166,12 @@ def list_software_txt(software, detailed=False):
             ])
 
             # first determine unique pairs of version/versionsuffix
-            # we can't use LooseVersion yet here, since nub uses set and LooseVersion instances are not hashable
             pairs = nub((x['version'], x['versionsuffix']) for x in software[key])
 
             # sort pairs by version (and then by versionsuffix);
-            # we sort by LooseVersion to obtain chronological version ordering,
+            # we sort by version key (cfr. LooseVersion) to obtain chronological version ordering,
             # but we also need to retain original string version for filtering-by-version done below
-            sorted_pairs = sorted((LooseVersion(v), vs, v) for v, vs in pairs)
+            sorted_pairs = sorted((version_sort_key(v), vs, v) for v, vs in pairs)
 
             for _, vsuff, ver in sorted_pairs:
                 tcs = [x['toolchain'] for x in software[key] if x['version'] == ver and x['versionsuffix'] == vsuff]
@@ -40,6 +40,7 @@ Authors:
 * Damian Alvarez (Forschungszentrum Juelich GmbH)
 * Maxime Boissonneault (Compute Canada)
 """
+import ctypes
 import datetime
 import difflib
 import filecmp
@@ -47,19 +48,28 @@ import glob
 import hashlib
 import inspect
 import itertools
+import json
 import os
 import pathlib
 import platform
+import queue
 import re
+import select
 import shutil
 import signal
+import socket
 import stat
 import ssl
+import subprocess
 import sys
 import tarfile
 import tempfile
+import threading
 import time
+import zipfile
 import zlib
+from concurrent.futures import ThreadPoolExecutor
+from ctypes.util import find_library
 from functools import partial
 from html.parser import HTMLParser
 import urllib.request as std_urllib
@@ -82,6 +92,12 @@ try:
 except ImportError:
     HAVE_REQUESTS = False
 
+try:
+    import lzma
+    HAVE_LZMA = True
+except ImportError:
+    HAVE_LZMA = False
+
 _log = fancylogger.getLogger('filetools', fname=False)
 
 # easyblock class prefix
@@ -180,15 +196,61 @@ EXTRACT_CMDS = {
     '.iso': "7z x %(filepath)s",
     # tar.Z: using compress (LZW), but can be handled with gzip so use 'z'
     '.tar.z': "tar xzf %(filepath)s",
+    # zstd-compressed tarball
+    '.tar.zst': "unset TAPE; zstd -dc %(filepath)s | tar x",
+    '.tzst': "unset TAPE; zstd -dc %(filepath)s | tar x",
     # shell scripts don't need to be unpacked, just copy there
     '.sh': "cp -dR %(filepath)s .",
 }
 
 ZIPPED_PATCH_EXTS = ('.bz2', '.gz', '.xz')
 
+# file types that are supported by in-process extraction engine (see extract_archive), and compression being used
+IN_PROCESS_EXTRACT_FORMATS = {
+    '.gtgz': 'gz',
+    '.tar': None,
+    '.tar.bz2': 'bz2',
+    '.tar.gz': 'gz',
+    '.tar.xz': 'xz',
+    '.tar.zst': 'zst',
+    '.tb2': 'bz2',
+    '.tbz': 'bz2',
+    '.tbz2': 'bz2',
+    '.tgz': 'gz',
+    '.txz': 'xz',
+    '.tzst': 'zst',
+    '.zip': 'zip',
+}
+
+# parallel decompressors that are used by in-process extraction engine when available
+# (compressed data is passed via stdin, decompressed data is expected in stdout)
+PARALLEL_DECOMPRESS_CMDS = {
+    'bz2': [['lbzip2', '-dc'], ['pbzip2', '-dc']],
+    'gz': [['pigz', '-dc']],
+    'xz': [['pixz', '-d']],
+    'zst': [['zstd', '-T0', '-dc']],
+}
+
+# layout of entries in cache of extracted sources (see extract_file_cached)
+EXTRACTED_SOURCES_CACHE_META = 'meta.json'
+EXTRACTED_SOURCES_CACHE_TREE = 'tree'
+
 # global set of names of locks that were created in this session
 global_lock_names = set()
 
+# name of file in lock directory that records who owns the lock
+LOCK_OWNER_FILENAME = 'owner.json'
+# name of subdirectory that is created in a stale lock by the process that reclaims it
+LOCK_RECLAIM_DIRNAME = 'reclaim'
+# interval (in seconds) for checking whether a lock was released while waiting for it,
+# in case release is not signalled via inotify (not available, or lock removed from another host)
+LOCK_POLL_INTERVAL = 0.5
+
+# inotify constants, see /usr/include/linux/inotify.h
+INOTIFY_IN_DELETE_SELF = 0x00000400
+INOTIFY_IN_MOVE_SELF = 0x00000800
+INOTIFY_IN_CLOEXEC = 0o2000000
+
 
 class ZlibChecksum:
     """
@@ -537,10 +599,29 @@ def extract_file(fn, dest, cmd=None, extra_options=None, overwrite=False, forced
     if extra_options:
         cmd = f"{cmd} {extra_options}"
 
-    run_shell_cmd(cmd, in_dry_run=forced, hidden=not trace)
+    base_dir = None
+    # use in-process extraction engine if enabled, and if extract command was not customized
+    in_process = use_in_process_extract(fn) and cmd == extract_cmd(fn, overwrite=overwrite) and not extra_options
+    cache_dir = build_option('extracted_sources_cache_dir')
+    if cache_dir and not build_option('extended_dry_run'):
+        extract_file_cached(fn, abs_dest, cmd, cache_dir, maxsize=build_option('extracted_sources_cache_maxsize'),
+                            in_process=in_process, trace=trace)
+    elif in_process:
+        if trace:
+            trace_msg(f"extracting {fn} (in-process) ...")
+
+        # base directory can be derived directly from list of extracted paths if target directory was empty
+        dest_was_empty = not list_local_dirs_purged(abs_dest)
+        extracted_paths = extract_archive(fn, abs_dest)
+        if dest_was_empty:
+            base_dir = det_base_dir(abs_dest, [extracted_paths])[0]
+            change_dir(base_dir)
+    else:
+        run_shell_cmd(cmd, in_dry_run=forced, hidden=not trace)
 
-    # note: find_base_dir also changes into the base dir!
-    base_dir = find_base_dir()
+    if base_dir is None:
+        # note: find_base_dir also changes into the base dir!
+        base_dir = find_base_dir()
 
     # if changing into obtained directory is not desired,
     # change back to where we came from (unless that was a non-existing directory)
@@ -553,6 +634,474 @@ def extract_file(fn, dest, cmd=None, extra_options=None, overwrite=False, forced
     return base_dir
 
 
+def use_in_process_extract(fn):
+    """
+    Determine whether in-process extraction engine should be used to extract specified file
+    (see also extract_archive).
+    """
+    res = False
+    if build_option('extract_in_process') and not build_option('extended_dry_run'):
+        try:
+            ext = find_extension(os.path.basename(fn)).lower()
+        except EasyBuildError:
+            ext = None
+        if ext in IN_PROCESS_EXTRACT_FORMATS:
+            # there's no support for zstd in Python, so zstd command is required
+            res = IN_PROCESS_EXTRACT_FORMATS[ext] != 'zst' or bool(which('zstd', on_error=IGNORE, log_ok=False))
+
+    return res
+
+
+def _check_extract_path(dest, name, what, checked_dirs):
+    """
+    Check whether specified path of archive member is safe to extract to specified (absolute) target directory,
+    and return normalized relative path.
+
+    :param checked_dirs: set of relative paths to directories that were already checked
+    """
+    # strip leading slashes, like 'tar' does
+    rel_path = os.path.normpath(name.lstrip('/'))
+    if rel_path == os.curdir:
+        rel_path = ''
+    elif rel_path == os.pardir or rel_path.startswith(os.pardir + os.path.sep):
+        raise EasyBuildError("Refusing to extract %s %s, since it is located outside of %s", what, name, dest)
+    elif os.path.dirname(rel_path) not in checked_dirs:
+        # make sure that path does not end up outside of target directory via symbolic links
+        real_dest = os.path.realpath(dest)
+        parent_dir = os.path.realpath(os.path.join(dest, os.path.dirname(rel_path)))
+        if parent_dir != real_dest and not parent_dir.startswith(real_dest + os.path.sep):
+            raise EasyBuildError("Refusing to extract %s %s, since it is located outside of %s", what, name, dest)
+        checked_dirs.add(os.path.dirname(rel_path))
+
+    return rel_path
+
+
+def _extract_tar(tar, dest, umask):
+    """Extract (streamed) tar archive to specified directory, using a safe-path filter; return extracted paths."""
+    extracted_paths = []
+    checked_dirs = set()
+
+    def safe_members():
+        """Generator for members of tar archive that are safe to extract."""
+        for member in tar:
+            rel_path = _check_extract_path(dest, member.name, 'archive member', checked_dirs)
+            if member.islnk():
+                link_path = _check_extract_path(dest, member.linkname, 'target of hard link', checked_dirs)
+                # target of hard link may be a symbolic link that points outside of target directory
+                real_dest = os.path.realpath(dest)
+                if not os.path.realpath(os.path.join(dest, link_path)).startswith(real_dest + os.path.sep):
+                    raise EasyBuildError("Refusing to extract hard link %s, since its target %s is located "
+                                         "outside of %s", member.name, member.linkname, dest)
+            elif member.issym():
+                # directories that were checked before may be replaced by a symbolic link
+                checked_dirs.clear()
+            if member.isdev():
+                _log.info("Not extracting device file %s from %s", member.name, tar.name)
+                continue
+            # like 'tar' does, remove existing file or symbolic link first,
+            # to avoid writing through a symbolic link to a file outside of target directory
+            if rel_path:
+                target = os.path.join(dest, rel_path)
+                try:
+                    if not stat.S_ISDIR(os.lstat(target).st_mode):
+                        os.remove(target)
+                except FileNotFoundError:
+                    pass
+            # like 'tar' does for non-root users: don't retain setuid/setgid/sticky bits, and take into account umask
+            member.mode &= ~(stat.S_ISUID | stat.S_ISGID | stat.S_ISVTX | umask)
+            if rel_path:
+                extracted_paths.append(rel_path)
+            yield member
+
+    extract_kwargs = {}
+    if hasattr(tarfile, 'fully_trusted_filter'):
+        # members are filtered via safe_members already, so use 'fully_trusted' filter
+        # (to avoid that Python applies the 'data' filter, which blocks symbolic links to absolute paths)
+        extract_kwargs['filter'] = 'fully_trusted'
+    tar.extractall(dest, members=safe_members(), **extract_kwargs)
+
+    return extracted_paths
+
+
+def _extract_zip(path, dest, umask):
+    """Extract zip archive to specified directory, using a safe-path filter; return extracted paths."""
+    extracted_paths = []
+    checked_dirs = set()
+    with zipfile.ZipFile(path) as zip_file:
+        for info in zip_file.infolist():
+            rel_path = _check_extract_path(dest, info.filename, 'archive member', checked_dirs)
+            if not rel_path:
+                continue
+            target = os.path.join(dest, rel_path)
+            mode = info.external_attr >> 16
+            if info.is_dir():
+                mkdir(target, parents=True)
+            elif stat.S_ISLNK(mode):
+                mkdir(os.path.dirname(target), parents=True)
+                if os.path.lexists(target):
+                    os.remove(target)
+                os.symlink(zip_file.read(info).decode(), target)
+                checked_dirs.clear()
+            else:
+                mkdir(os.path.dirname(target), parents=True)
+                if os.path.islink(target):
+                    os.remove(target)
+                with zip_file.open(info) as src_fp, open(target, 'wb') as target_fp:
+                    shutil.copyfileobj(src_fp, target_fp)
+                # retain permissions (like 'unzip' does), but don't retain setuid/setgid/sticky bits
+                if mode:
+                    os.chmod(target, stat.S_IMODE(mode) & ~(stat.S_ISUID | stat.S_ISGID | stat.S_ISVTX | umask))
+                os.utime(target, (time.time(), time.mktime(info.date_time + (0, 0, -1))))
+            extracted_paths.append(rel_path)
+
+    return extracted_paths
+
+
+def extract_archive(path, dest, umask=None):
+    """
+    Extract archive (tarball or zip file) in-process to specified directory.
+
+    Tarballs are extracted in streaming mode, using a parallel decompressor
+    (like pigz, pixz, zstd -T0, see PARALLEL_DECOMPRESS_CMDS) when one is available.
+    A safe-path filter is used, so archive members can not end up outside of the target directory.
+
+    :param path: path to archive
+    :param dest: directory to extract archive in
+    :param umask: umask to take into account for permissions of extracted files (current umask if None)
+    :return: list of (normalized) relative paths for extracted files/directories, in order of extraction
+    """
+    ext = find_extension(os.path.basename(path)).lower()
+    compression = IN_PROCESS_EXTRACT_FORMATS[ext]
+    dest = os.path.abspath(dest)
+    mkdir(dest, parents=True)
+
+    if umask is None:
+        umask = os.umask(0)
+        os.umask(umask)
+
+    _log.info("Extracting %s in-process to %s", path, dest)
+    try:
+        if compression == 'zip':
+            extracted_paths = _extract_zip(path, dest, umask)
+        else:
+            decompress_cmd = None
+            for cand_cmd in PARALLEL_DECOMPRESS_CMDS.get(compression, []):
+                if which(cand_cmd[0], on_error=IGNORE, log_ok=False):
+                    decompress_cmd = cand_cmd
+                    break
+
+            if decompress_cmd:
+                _log.info("Using '%s' to decompress %s", ' '.join(decompress_cmd), path)
+                with open(path, 'rb') as in_fp, tempfile.TemporaryFile() as err_fp:
+                    proc = subprocess.Popen(decompress_cmd, stdin=in_fp, stdout=subprocess.PIPE, stderr=err_fp)
+                    try:
+                        with tarfile.open(fileobj=proc.stdout, mode='r|') as tar:
+                            extracted_paths = _extract_tar(tar, dest, umask)
+                        # consume any remaining output, to avoid that decompressor blocks
+                        while proc.stdout.read(1024 * 1024):
+                            pass
+                    finally:
+                        proc.stdout.close()
+                        exit_code = proc.wait()
+                    if exit_code:
+                        err_fp.seek(0)
+                        raise EasyBuildError("'%s' exited with exit code %s: %s", ' '.join(decompress_cmd),
+                                             exit_code, err_fp.read().decode(errors='replace').strip())
+            elif compression == 'zst':
+                raise EasyBuildError("zstd command is required to decompress %s", path)
+            else:
+                with tarfile.open(path, mode='r|' + (compression or '')) as tar:
+                    extracted_paths = _extract_tar(tar, dest, umask)
+
+    except (OSError, tarfile.TarError, zipfile.BadZipFile, EOFError) as err:
+        raise EasyBuildError("Failed to extract %s to %s: %s", path, dest, err)
+
+    return extracted_paths
+
+
+def list_local_dirs_purged(path):
+    """
+    List entries in specified directory, ignoring hidden entries and 'easybuild' subdirectory (see find_base_dir).
+    """
+    ignoredirs = ["easybuild"]
+    return [d for d in os.listdir(path) if not d.startswith('.') and d not in ignoredirs]
+
+
+def det_base_dir(path, lists_of_extracted_paths):
+    """
+    Determine base directories for archives that were extracted one after another in the specified directory,
+    based on lists of extracted paths (one list per archive), without scanning the directory;
+    the result is the same as find_base_dir after extracting each archive.
+
+    :param path: (absolute) path to directory in which archives were extracted (which was empty before)
+    :param lists_of_extracted_paths: list of lists of relative extracted paths (see extract_archive)
+    :return: list of base directories (one per archive)
+    """
+    ignoredirs = ["easybuild"]
+
+    base_dirs = []
+    extracted_paths = set()
+    for paths in lists_of_extracted_paths:
+        extracted_paths.update(tuple(p.split(os.path.sep)) for p in paths)
+
+        prefix = ()
+        new_dir = path
+        while True:
+            entries = set(p[len(prefix)] for p in extracted_paths if len(p) > len(prefix) and p[:len(prefix)] == prefix)
+            entries = [e for e in entries if not e.startswith('.') and e not in ignoredirs]
+            if len(entries) != 1:
+                break
+            prefix += (entries[0],)
+            new_dir = os.path.join(path, *prefix)
+            if not os.path.isdir(new_dir):
+                break
+
+        # make sure it's a directory, and not a (single) file that was in a tarball for example
+        while not os.path.isdir(new_dir):
+            new_dir = os.path.dirname(new_dir)
+
+        base_dirs.append(new_dir)
+
+    return base_dirs
+
+
+def _merge_dir(src, dest):
+    """Move contents of src directory into dest directory, overwriting existing files."""
+    for entry in os.listdir(src):
+        src_path, dest_path = os.path.join(src, entry), os.path.join(dest, entry)
+        if os.path.isdir(dest_path) and not os.path.islink(dest_path):
+            if os.path.isdir(src_path) and not os.path.islink(src_path):
+                _merge_dir(src_path, dest_path)
+                continue
+            shutil.rmtree(dest_path)
+        elif os.path.lexists(dest_path):
+            os.remove(dest_path)
+        os.rename(src_path, dest_path)
+    os.rmdir(src)
+
+
+def extract_files(paths, dest, max_workers=None, trace=True):
+    """
+    Extract multiple archives concurrently in the specified directory, using the in-process extraction engine.
+
+    Each archive is first extracted in a dedicated hidden subdirectory, after which the extracted files are moved
+    into place in the order in which the archives were specified, so the end result is the same as extracting
+    the archives one after another.
+
+    :param paths: list of paths to archives to extract
+    :param dest: directory to extract archives in
+    :param max_workers: maximum number of archives to extract at once
+    :param trace: produce trace output
+    :return: list of base directories (one per archive, see find_base_dir),
+             or None if archives can not be extracted concurrently in specified directory
+    """
+    if not all(use_in_process_extract(path) for path in paths):
+        _log.info("Not all files can be extracted in-process, so can't extract them concurrently: %s", paths)
+        return None
+
+    mkdir(dest, parents=True)
+    abs_dest = os.path.abspath(dest)
+    if list_local_dirs_purged(abs_dest):
+        _log.info("Target directory %s is not empty, so can't extract files concurrently: %s", abs_dest, paths)
+        return None
+
+    umask = os.umask(0)
+    os.umask(umask)
+
+    tmp_dests = [os.path.join(abs_dest, '.eb-extract-%d' % idx) for idx in range(len(paths))]
+    for path in paths:
+        if trace:
+            trace_msg(f"extracting {path} (in-process, concurrently) ...")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as thread_pool:
+        lists_of_extracted_paths = list(thread_pool.map(partial(extract_archive, umask=umask), paths, tmp_dests))
+
+    try:
+        for tmp_dest in tmp_dests:
+            _merge_dir(tmp_dest, abs_dest)
+    except OSError as err:
+        raise EasyBuildError("Failed to move extracted files into %s: %s", abs_dest, err)
+
+    return det_base_dir(abs_dest, lists_of_extracted_paths)
+
+
+def det_extracted_source_cache_key(fn, cmd, in_process=False):
+    """
+    Determine key for entry in cache of extracted sources for specified file,
+    based on checksum of the file and the command used to extract it.
+
+    :param fn: path to file to extract
+    :param cmd: (completed) command used to extract file
+    :param in_process: whether file is extracted with the in-process extraction engine
+    """
+    checksum = compute_checksum(fn, checksum_type=CHECKSUM_TYPE_SHA256)
+    # location of file being extracted should not matter
+    cmd_template = cmd.replace(fn, '%(filepath)s')
+    key_data = '\n'.join([checksum, cmd_template, str(in_process)])
+    return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+
+def _copy_tree_parallel(src, dest, max_workers=None):
+    """
+    Copy contents of src directory into dest directory, copying files concurrently;
+    symbolic links are copied as symbolic links.
+    """
+    files = []
+    dirs = []
+    for dirpath, dirnames, filenames in os.walk(src):
+        target_dir = os.path.normpath(os.path.join(dest, os.path.relpath(dirpath, src)))
+        os.makedirs(target_dir, exist_ok=True)
+        dirs.append((dirpath, target_dir))
+        for name in dirnames + filenames:
+            path, target = os.path.join(dirpath, name), os.path.join(target_dir, name)
+            if os.path.islink(path):
+                if os.path.lexists(target):
+                    os.remove(target)
+                os.symlink(os.readlink(path), target)
+            elif name in filenames:
+                files.append((path, target))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as thread_pool:
+        list(thread_pool.map(lambda x: shutil.copy2(*x), files))
+
+    # copy permissions & timestamps of directories last (bottom-up), since they change when copying files
+    for dirpath, target_dir in reversed(dirs):
+        shutil.copystat(dirpath, target_dir)
+
+
+def materialize_tree(src, dest, max_workers=None):
+    """
+    Materialize contents of src directory into dest directory,
+    using a reflink copy (copy-on-write) if supported by the filesystem, or a concurrent copy otherwise.
+
+    :param src: directory to copy contents of
+    :param dest: directory to copy contents into
+    :param max_workers: maximum number of files to copy at once (in case reflink copy is not supported)
+    :return: True if reflink copy was used, False otherwise
+    """
+    mkdir(dest, parents=True)
+
+    reflink = False
+    if which('cp', on_error=IGNORE, log_ok=False):
+        cmd = ['cp', '-a', '--reflink=always', os.path.join(src, '.'), dest + os.path.sep]
+        res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, check=False)
+        reflink = res.returncode == 0
+        if not reflink:
+            _log.debug("Reflink copy of %s into %s not supported: %s", src, dest, res.stdout)
+
+    if not reflink:
+        try:
+            _copy_tree_parallel(src, dest, max_workers=max_workers)
+        except OSError as err:
+            raise EasyBuildError("Failed to copy %s into %s: %s", src, dest, err)
+
+    return reflink
+
+
+def evict_extracted_sources_cache(cache_dir, maxsize, keep=None):
+    """
+    Remove least recently used entries from cache of extracted sources until total size is below specified limit.
+
+    :param cache_dir: location of cache of extracted sources
+    :param maxsize: maximum total size of cache (in bytes)
+    :param keep: key of cache entry that should not be removed
+    :return: list of keys of removed cache entries
+    """
+    entries = []
+    for key in os.listdir(cache_dir):
+        meta_path = os.path.join(cache_dir, key, EXTRACTED_SOURCES_CACHE_META)
+        if key.startswith('.') or not os.path.isfile(meta_path):
+            continue
+        try:
+            size = json.loads(read_file(meta_path))['size']
+            entries.append((os.path.getmtime(meta_path), key, size))
+        except (OSError, ValueError, KeyError) as err:
+            _log.warning("Ignoring corrupt entry %s in cache of extracted sources: %s", key, err)
+
+    total_size = sum(size for (_, _, size) in entries)
+    removed = []
+    for _, key, size in sorted(entries):
+        if total_size <= maxsize:
+            break
+        if key != keep:
+            _log.info("Removing least recently used entry %s from cache of extracted sources", key)
+            remove_dir(os.path.join(cache_dir, key))
+            total_size -= size
+            removed.append(key)
+
+    return removed
+
+
+def extract_file_cached(fn, dest, cmd, cache_dir, maxsize=None, in_process=False, trace=True):
+    """
+    Extract file at given path to specified directory via cache of pristine extracted source trees:
+    if file was not extracted before with the same command, it is extracted in a new cache entry first;
+    the (cached) extracted source tree is then materialized into the target directory (see materialize_tree).
+
+    :param fn: path to file to extract
+    :param dest: (absolute) path to directory to extract file in
+    :param cmd: (completed) command to use to extract file
+    :param cache_dir: location of cache of extracted sources
+    :param maxsize: maximum total size of cache (in MiB)
+    :param in_process: use in-process extraction engine (see extract_archive) rather than running extract command
+    :param trace: produce trace output
+    :return: True in case of a cache hit, False otherwise
+    """
+    mkdir(cache_dir, parents=True)
+
+    key = det_extracted_source_cache_key(fn, cmd, in_process=in_process)
+    entry = os.path.join(cache_dir, key)
+    meta_path = os.path.join(entry, EXTRACTED_SOURCES_CACHE_META)
+
+    hit = os.path.isfile(meta_path)
+    if hit:
+        _log.info("Found %s in cache of extracted sources: %s", fn, entry)
+        if trace:
+            trace_msg(f"extracting {fn} (from cache of extracted sources) ...")
+        # update timestamp of cache entry, which is used to determine least recently used entries
+        os.utime(meta_path)
+    else:
+        if trace:
+            trace_msg(f"extracting {fn} (into cache of extracted sources) ...")
+
+        # extract in a temporary location in the cache first, and move it into place when done,
+        # so concurrent EasyBuild sessions never see a partially extracted source tree
+        tmp_entry = tempfile.mkdtemp(prefix='.tmp-', dir=cache_dir)
+        try:
+            tree = os.path.join(tmp_entry, EXTRACTED_SOURCES_CACHE_TREE)
+            mkdir(tree)
+            if in_process:
+                extract_archive(fn, tree)
+            else:
+                run_shell_cmd(cmd, work_dir=tree, hidden=not trace)
+
+            meta = {
+                'source': os.path.basename(fn),
+                'cmd': cmd.replace(fn, '%(filepath)s'),
+                'size': det_size(tree),
+            }
+            write_file(os.path.join(tmp_entry, EXTRACTED_SOURCES_CACHE_META), json.dumps(meta, indent=4))
+        except BaseException:
+            # don't leave partially extracted source tree behind in cache, since it would never be cleaned up
+            remove_dir(tmp_entry)
+            raise
+
+        try:
+            os.rename(tmp_entry, entry)
+            _log.info("Added %s to cache of extracted sources: %s", fn, entry)
+        except OSError as err:
+            # another EasyBuild session may have added the same entry in the meantime
+            _log.info("Failed to add %s to cache of extracted sources (%s), using existing entry", fn, err)
+            remove_dir(tmp_entry)
+
+    materialize_tree(os.path.join(entry, EXTRACTED_SOURCES_CACHE_TREE), dest)
+
+    if maxsize is not None and not hit:
+        evict_extracted_sources_cache(cache_dir, maxsize * 1024 * 1024, keep=key)
+
+    return hit
+
+
 def which(cmd, retain_all=False, check_perms=True, log_ok=True, on_error=WARN):
     """
     Return (first) path in $PATH for specified command, or None if command is not found
@@ -2094,10 +2643,235 @@ def det_lock_path(lock_name):
     return os.path.join(locks_dir, lock_name + '.lock')
 
 
+def det_process_start_time(pid):
+    """
+    Determine start time of process with specified PID, as reported by /proc (in clock ticks since boot),
+    which allows to detect whether a PID was reused; returns None if start time can not be determined.
+    """
+    res = None
+    try:
+        with open(os.path.join('/proc', str(pid), 'stat')) as fh:
+            stat_txt = fh.read()
+        # process name (2nd field) may include spaces, so only consider fields after it;
+        # start time is 22nd field (see 'man proc')
+        res = int(stat_txt.rsplit(')', 1)[1].split()[19])
+    except (IndexError, OSError, ValueError) as err:
+        _log.debug("Failed to determine start time of process %s: %s", pid, err)
+    return res
+
+
+def det_boot_id():
+    """Determine ID of current boot of the system (None if it can not be determined)."""
+    res = None
+    try:
+        with open('/proc/sys/kernel/random/boot_id') as fh:
+            res = fh.read().strip() or None
+    except OSError as err:
+        _log.debug("Failed to determine boot ID: %s", err)
+    return res
+
+
+def det_pid_namespace():
+    """Determine PID namespace of current process, via inode of /proc/self/ns/pid (None if it can not be determined)."""
+    res = None
+    try:
+        res = os.stat('/proc/self/ns/pid').st_ino
+    except OSError as err:
+        _log.debug("Failed to determine PID namespace: %s", err)
+    return res
+
+
+def det_lock_owner():
+    """
+    Determine information on owner of locks created in this session:
+    host, boot ID, PID namespace, PID and start time of process.
+    """
+    pid = os.getpid()
+    return {
+        'host': socket.gethostname(),
+        'boot_id': det_boot_id(),
+        'pid_ns': det_pid_namespace(),
+        'pid': pid,
+        'start_time': det_process_start_time(pid),
+        'lock_time': time.time(),
+    }
+
+
+def read_lock_owner(lock_path):
+    """Read information on owner of specified lock (None if not available)."""
+    res = None
+    owner_path = os.path.join(lock_path, LOCK_OWNER_FILENAME)
+    try:
+        with open(owner_path) as fh:
+            res = json.load(fh)
+    except (OSError, ValueError) as err:
+        _log.debug("No (valid) information on owner of lock %s available: %s", lock_path, err)
+    return res
+
+
+def is_stale_lock(lock_path):
+    """
+    Determine whether specified lock is stale, i.e. whether it was created by a process on this host
+    that is no longer running.
+
+    Only locks created in the same boot of the system and in the same PID namespace as the current process
+    can be considered stale, since processes can only be checked in that case (different containers may share
+    the same hostname, for example); locks without (complete) information on their owner are never considered
+    to be stale.
+    """
+    owner = read_lock_owner(lock_path)
+    if not isinstance(owner, dict) or owner.get('host') != socket.gethostname():
+        return False
+
+    boot_id, pid_ns = det_boot_id(), det_pid_namespace()
+    if boot_id is None or pid_ns is None or owner.get('boot_id') != boot_id or owner.get('pid_ns') != pid_ns:
+        _log.debug("Lock %s was created by a process that can not be checked (owner: %s)", lock_path, owner)
+        return False
+
+    pid = owner.get('pid')
+    if not isinstance(pid, int):
+        return False
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        _log.info("Process %s that created lock %s is no longer running", pid, lock_path)
+        return True
+    except OSError:
+        # process is running, but owned by another user (EPERM)
+        pass
+
+    # check whether PID was reused by another process
+    start_time = owner.get('start_time')
+    if start_time is not None and det_process_start_time(pid) not in (start_time, None):
+        _log.info("Process %s that created lock %s is no longer running (PID was reused)", pid, lock_path)
+        return True
+
+    return False
+
+
+def _record_lock_owner(lock_path):
+    """
+    Record owner of specified lock (the current process) in it, so stale locks can be detected (see is_stale_lock).
+
+    :return: information on owner of lock
+    """
+    owner = det_lock_owner()
+    try:
+        with open(os.path.join(lock_path, LOCK_OWNER_FILENAME), 'w') as fh:
+            json.dump(owner, fh)
+    except OSError as err:
+        _log.warning("Failed to record owner of lock %s: %s", lock_path, err)
+    return owner
+
+
+def reclaim_stale_lock(lock_path):
+    """
+    Reclaim specified stale lock (see is_stale_lock), by replacing it with a lock owned by the current process.
+
+    To make sure that only a single process reclaims a particular stale lock, a subdirectory is created in it first
+    (which is atomic), after which is verified whether the lock is still stale. The stale lock is then removed,
+    and the new lock is created right away; if that fails because another process created it in the meantime,
+    an error is raised.
+
+    :return: True if lock was reclaimed (and is now owned by the current process), False otherwise
+    """
+    try:
+        os.mkdir(os.path.join(lock_path, LOCK_RECLAIM_DIRNAME))
+    except OSError as err:
+        _log.info("Not reclaiming stale lock %s (already being reclaimed?): %s", lock_path, err)
+        return False
+
+    owner = read_lock_owner(lock_path)
+    if not is_stale_lock(lock_path):
+        # lock was reclaimed and recreated by another process in the meantime
+        _log.info("Lock %s is no longer stale, not reclaiming it", lock_path)
+        try:
+            os.rmdir(os.path.join(lock_path, LOCK_RECLAIM_DIRNAME))
+        except OSError as err:
+            _log.debug("Failed to clean up %s in lock %s: %s", LOCK_RECLAIM_DIRNAME, lock_path, err)
+        return False
+
+    print_warning("Reclaiming stale lock %s (created by process %s on %s, which is no longer running)",
+                  lock_path, owner['pid'], owner['host'], silent=build_option('silent'))
+    remove_dir(lock_path)
+
+    try:
+        os.mkdir(lock_path)
+    except OSError as err:
+        raise EasyBuildError("Failed to create lock %s after reclaiming stale lock: %s", lock_path, err)
+    owner = _record_lock_owner(lock_path)
+    _log.info("Lock created: %s (owner: %s)", lock_path, owner)
+
+    return True
+
+
+def _get_libc_inotify():
+    """Return C library that provides inotify functions, or None if inotify is not available."""
+    libc = None
+    libc_path = find_library('c')
+    if libc_path:
+        try:
+            libc = ctypes.CDLL(libc_path, use_errno=True)
+            for func in ('inotify_init1', 'inotify_add_watch'):
+                getattr(libc, func)
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        except (AttributeError, OSError) as err:
+            _log.debug("inotify not available: %s", err)
+            libc = None
+    return libc
+
+
+def wait_for_lock_release(lock_path, timeout):
+    """
+    Wait until specified lock is released, or until timeout (in seconds) is reached.
+
+    Release of the lock is detected immediately via inotify when it is removed on this host (if available),
+    and by checking periodically (see LOCK_POLL_INTERVAL) otherwise.
+
+    :return: True if lock was released, False if timeout was reached
+    """
+    deadline = time.monotonic() + timeout
+
+    inotify_fd = None
+    libc = _get_libc_inotify() if sys.platform.startswith('linux') else None
+    if libc is not None:
+        fd = libc.inotify_init1(INOTIFY_IN_CLOEXEC)
+        if fd >= 0:
+            if libc.inotify_add_watch(fd, lock_path.encode(), INOTIFY_IN_DELETE_SELF | INOTIFY_IN_MOVE_SELF) >= 0:
+                inotify_fd = fd
+            else:
+                _log.debug("Failed to watch lock %s via inotify (errno %s)", lock_path, ctypes.get_errno())
+                os.close(fd)
+        else:
+            _log.debug("Failed to initialize inotify (errno %s)", ctypes.get_errno())
+
+    try:
+        # (re)check existence of lock after inotify watch is in place, to not miss a release in the meantime
+        while os.path.exists(lock_path):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            timeout = min(remaining, LOCK_POLL_INTERVAL)
+            if inotify_fd is None:
+                time.sleep(timeout)
+            elif select.select([inotify_fd], [], [], timeout)[0]:
+                os.read(inotify_fd, 4096)
+    finally:
+        if inotify_fd is not None:
+            os.close(inotify_fd)
+
+    return True
+
+
 def create_lock(lock_name):
     """Create lock with specified name."""
 
     lock_path = det_lock_path(lock_name)
+    if lock_name in global_lock_names and os.path.exists(lock_path):
+        _log.info("Lock %s was already created in this session (by reclaiming stale lock)", lock_path)
+        return
+
     _log.info("Creating lock at %s...", lock_path)
     try:
         # we use a directory as a lock, since that's atomically created
@@ -2107,7 +2881,9 @@ def create_lock(lock_name):
         # clean up the error message a bit, get rid of the "Failed to create directory" part + quotes
         stripped_err = str(err).split(':', 1)[1].strip().replace("'", '').replace('"', '')
         raise EasyBuildError("Failed to create lock %s: %s", lock_path, stripped_err)
-    _log.info("Lock created: %s", lock_path)
+
+    owner = _record_lock_owner(lock_path)
+    _log.info("Lock created: %s (owner: %s)", lock_path, owner)
 
 
 def check_lock(lock_name):
@@ -2116,26 +2892,40 @@ def check_lock(lock_name):
 
     If it exists, either wait until it's released, or raise an error
     (depending on --wait-on-lock-* configuration option).
+    Stale locks, which were created by a process on this host that is no longer running, are reclaimed;
+    the lock is then owned by the current process (so create_lock doesn't need to create it anymore).
     """
     lock_path = det_lock_path(lock_name)
+    if os.path.exists(lock_path) and is_stale_lock(lock_path) and reclaim_stale_lock(lock_path):
+        global_lock_names.add(lock_name)
+        return
+
     if os.path.exists(lock_path):
-        _log.info("Lock %s exists!", lock_path)
+        _log.info("Lock %s exists (owner: %s)!", lock_path, read_lock_owner(lock_path))
 
         wait_interval = build_option('wait_on_lock_interval')
         wait_limit = build_option('wait_on_lock_limit')
 
         # wait limit could be zero (no waiting), -1 (no waiting limit) or non-zero value (waiting limit in seconds)
         if wait_limit != 0:
+            start_time = time.monotonic()
             wait_time = 0
             while os.path.exists(lock_path) and (wait_limit == -1 or wait_time < wait_limit):
                 print_msg("lock %s exists, waiting %d seconds..." % (lock_path, wait_interval),
                           silent=build_option('silent'))
-                time.sleep(wait_interval)
-                wait_time += wait_interval
+                timeout = wait_interval
+                if wait_limit != -1:
+                    timeout = min(timeout, wait_limit - (time.monotonic() - start_time))
+                # returns as soon as lock is released
+                if not wait_for_lock_release(lock_path, timeout) and is_stale_lock(lock_path):
+                    if reclaim_stale_lock(lock_path):
+                        global_lock_names.add(lock_name)
+                        return
+                wait_time = time.monotonic() - start_time
 
             if os.path.exists(lock_path) and wait_limit != -1 and wait_time >= wait_limit:
                 error_msg = "Maximum wait time for lock %s to be released reached: %s sec >= %s sec"
-                raise EasyBuildError(error_msg, lock_path, wait_time, wait_limit)
+                raise EasyBuildError(error_msg, lock_path, int(wait_time), wait_limit)
             else:
                 _log.info("Lock %s was released!", lock_path)
         else:
@@ -2767,6 +3557,45 @@ def copy(paths, target_path, force_in_dry_run=False, **kwargs):
             raise EasyBuildError("Specified path to copy is not an existing file or directory: %s", path)
 
 
+def update_git_mirror(url, mirror_cache_dir, git_cmd='git'):
+    """
+    Create or update bare mirror of git repository at specified URL in mirror cache directory.
+
+    :param url: URL of git repository
+    :param mirror_cache_dir: path to cache of bare mirrors of git repositories
+    :param git_cmd: base git command to use
+    :return: path to bare mirror of git repository
+    """
+    # name of mirror is based on URL, since repositories with same name may be hosted in different places
+    url_hash = hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+    mirror_name = '%s-%s.git' % (re.sub(r'\.git$', '', os.path.basename(url.rstrip('/'))), url_hash)
+    mirror_dir = os.path.join(mirror_cache_dir, mirror_name)
+
+    if os.path.isdir(mirror_dir):
+        _log.info("Updating mirror of git repository %s in %s", url, mirror_dir)
+        run_shell_cmd(f"{git_cmd} fetch --prune origin", work_dir=mirror_dir, hidden=True, verbose_dry_run=True)
+    else:
+        _log.info("Creating mirror of git repository %s in %s", url, mirror_dir)
+        mkdir(mirror_cache_dir, parents=True)
+        # clone into temporary location first, to avoid that a partial mirror is picked up
+        tmp_mirror_dir = tempfile.mkdtemp(prefix='.tmp-', dir=mirror_cache_dir)
+        run_shell_cmd(f"{git_cmd} clone --mirror {url} {tmp_mirror_dir}", hidden=True, verbose_dry_run=True)
+        if build_option('extended_dry_run'):
+            remove_dir(tmp_mirror_dir)
+        else:
+            try:
+                os.rename(tmp_mirror_dir, mirror_dir)
+            except OSError as err:
+                # mirror may have been created concurrently by another EasyBuild session
+                if os.path.isdir(mirror_dir):
+                    _log.info("Mirror %s was created concurrently, using it: %s", mirror_dir, err)
+                    remove_dir(tmp_mirror_dir)
+                else:
+                    raise EasyBuildError("Failed to move mirror of git repository %s into place: %s", url, err)
+
+    return mirror_dir
+
+
 def get_source_tarball_from_git(filename, target_dir, git_config):
     """
     Downloads a git repository, at a specific tag or commit, recursively or not, and make an archive with it
@@ -2816,12 +3645,30 @@ def get_source_tarball_from_git(filename, target_dir, git_config):
         git_cmd_params = [f"-c {param}" for param in extra_config_params]
         git_cmd += f" {' '.join(git_cmd_params)}"
 
+    url = f'{url}/{repo_name}.git'
+
+    # only fetch what is required to check out requested tag/commit, unless .git directory is retained
+    shallow = build_option('git_shallow_clone') and not keep_git_dir
+
     # compose 'git clone' command, and run it
     clone_cmd = [git_cmd, 'clone']
     # checkout is done separately below for specific commits
     clone_cmd.append('--no-checkout')
 
-    clone_cmd.append(f'{url}/{repo_name}.git')
+    if shallow:
+        if tag:
+            # only fetch commit that corresponds to tag
+            clone_cmd.extend(['--depth', '1', '--branch', tag])
+        else:
+            # a commit ID may be abbreviated, so fetch (only) history, file contents are fetched when checking out
+            clone_cmd.append('--filter=blob:none')
+
+    mirror_cache_dir = build_option('git_mirror_cache_dir')
+    if mirror_cache_dir:
+        mirror_dir = update_git_mirror(url, mirror_cache_dir, git_cmd=git_cmd)
+        clone_cmd.extend(['--reference-if-able', mirror_dir, '--dissociate'])
+
+    clone_cmd.append(url)
 
     if clone_into:
         clone_cmd.append(clone_into)
@@ -2850,6 +3697,9 @@ def get_source_tarball_from_git(filename, target_dir, git_config):
         submodule_cmd = [git_cmd, 'submodule', 'update', '--init']
         if recursive:
             submodule_cmd.append('--recursive')
+        if shallow:
+            # fetch submodules in parallel
+            submodule_cmd.append(f"--jobs {build_option('parallel') or os.cpu_count()}")
         if recurse_submodules:
             submodule_pathspec = [f"':{submod_path}'" for submod_path in recurse_submodules]
             submodule_cmd.extend(['--'] + submodule_pathspec)
@@ -2866,6 +3716,77 @@ def get_source_tarball_from_git(filename, target_dir, git_config):
     return archive_path
 
 
+class ThreadedXZWriter:
+    """
+    Write-only file object that compresses data in XZ format in a separate thread.
+
+    Output is identical to that of lzma.LZMAFile (which is used by tarfile for the 'w:xz' mode),
+    since the same (single-threaded) LZMA compressor is used, it just runs concurrently with the code producing data.
+    """
+    # size of chunks of data passed to compression thread
+    CHUNK_SIZE = 1024 * 1024
+    # maximum number of chunks that can be pending for compression
+    MAX_PENDING_CHUNKS = 8
+
+    def __init__(self, path, preset=None):
+        """
+        Constructor for ThreadedXZWriter.
+
+        :param path: path to compressed file to write
+        :param preset: LZMA compression preset (None for default preset)
+        """
+        self.name = path
+        self._fh = open(path, 'wb')
+        self._compressor = lzma.LZMACompressor(format=lzma.FORMAT_XZ, preset=preset)
+        self._queue = queue.Queue(maxsize=self.MAX_PENDING_CHUNKS)
+        self._buffer = bytearray()
+        self._pos = 0
+        self._error = None
+        self._thread = threading.Thread(target=self._compress, daemon=True)
+        self._thread.start()
+
+    def _compress(self):
+        """Compress chunks of data, until None is received."""
+        try:
+            chunk = self._queue.get()
+            while chunk is not None:
+                self._fh.write(self._compressor.compress(chunk))
+                chunk = self._queue.get()
+            self._fh.write(self._compressor.flush())
+        except (lzma.LZMAError, OSError) as err:
+            self._error = err
+            # keep consuming, so writer doesn't block on a full queue
+            while chunk is not None:
+                chunk = self._queue.get()
+
+    def write(self, data):
+        """Write data to compressed file."""
+        self._buffer.extend(data)
+        self._pos += len(data)
+        if len(self._buffer) >= self.CHUNK_SIZE:
+            self._queue.put(bytes(self._buffer))
+            self._buffer = bytearray()
+        return len(data)
+
+    def tell(self):
+        """Return current position in uncompressed data."""
+        return self._pos
+
+    def close(self):
+        """Flush remaining data, wait until compression is done and close compressed file."""
+        if self._thread is None:
+            return
+        if self._buffer:
+            self._queue.put(bytes(self._buffer))
+            self._buffer = bytearray()
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._fh.close()
+        if self._error is not None:
+            raise EasyBuildError("Failed to write compressed file %s: %s", self.name, self._error)
+
+
 def make_archive(source_dir, archive_file=None, archive_dir=None, reproducible=True):
     """
     Create an archive file of the given directory
@@ -2976,12 +3897,22 @@ def make_archive(source_dir, archive_file=None, archive_dir=None, reproducible=T
     source_files.extend([str(filepath) for filepath in pathlib.Path(source_dir).glob("**/*")])
     source_files.sort()  # independent of locale
 
-    with tarfile.open(**archive_specs) as tar_archive:
-        for filepath in source_files:
-            # archive with target directory in its top level, remove any prefix in path
-            file_name = os.path.relpath(filepath, start=os.path.dirname(source_dir))
-            tar_archive.add(filepath, arcname=file_name, recursive=False, filter=archive_filter)
-            _log.debug("File/folder added to archive '%s': %s", archive_file, filepath)
+    xz_writer = None
+    if compression == 'xz' and HAVE_LZMA:
+        # compress in a separate thread, while files are being added to the tarball
+        xz_writer = ThreadedXZWriter(archive_path, preset=archive_specs.pop('preset', None))
+        archive_specs.update({'name': None, 'mode': 'w', 'fileobj': xz_writer})
+
+    try:
+        with tarfile.open(**archive_specs) as tar_archive:
+            for filepath in source_files:
+                # archive with target directory in its top level, remove any prefix in path
+                file_name = os.path.relpath(filepath, start=os.path.dirname(source_dir))
+                tar_archive.add(filepath, arcname=file_name, recursive=False, filter=archive_filter)
+                _log.debug("File/folder added to archive '%s': %s", archive_file, filepath)
+    finally:
+        if xz_writer is not None:
+            xz_writer.close()
 
     _log.info("Archive '%s' created successfully", archive_file)
 
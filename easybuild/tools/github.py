@@ -35,7 +35,9 @@ import base64
 import getpass
 import glob
 import functools
+import hashlib
 import itertools
+import json
 import os
 import random
 import re
@@ -67,6 +69,9 @@ from easybuild.tools.version import FRAMEWORK_VERSION, different_major_versions
 
 _log = fancylogger.getLogger('github', fname=False)
 
+# in-memory indices of patch files, per directory with easyconfigs (see get_patch_index)
+_patch_indices = {}
+
 
 try:
     import keyring
@@ -115,6 +120,7 @@ HTTP_STATUS_OK = 200
 HTTP_STATUS_CREATED = 201
 HTTP_STATUS_NO_CONTENT = 204
 KEYRING_GITHUB_TOKEN = 'github_token'
+PATCH_INDEX_FILENAME_PREFIX = 'patch-index-'
 URL_SEPARATOR = '/'
 
 STATUS_PENDING = 'pending'
@@ -1401,6 +1407,122 @@ def det_patch_specs(patch_paths, file_info, ec_dirs):
     return patch_specs
 
 
+def det_patches_in_easyconfig(path):
+    """
+    Determine software name and names of patch files listed in specified easyconfig file, via a shallow parse
+    (the easyconfig file is not processed); only templates for software name and version are resolved.
+
+    :param path: path to easyconfig file
+    :return: tuple with software name and list of names of patch files (None and empty list if parsing failed)
+    """
+    try:
+        cfg = EasyConfigParser(filename=path).get_config_dict(validate=False)
+    except EasyBuildError as err:
+        _log.debug("Ignoring easyconfig %s that fails to parse: %s", path, err)
+        return None, []
+
+    name = cfg.get('name')
+    if not isinstance(name, str):
+        return None, []
+
+    def patch_names(patch_specs, templates):
+        """Determine names of patch files for specified patch specifications."""
+        res = []
+        for patch in patch_specs or []:
+            if isinstance(patch, (tuple, list)):
+                patch = patch[0]
+            elif isinstance(patch, dict):
+                patch = patch.get('name')
+            if isinstance(patch, str):
+                try:
+                    res.append(patch % templates)
+                except (KeyError, TypeError, ValueError):
+                    _log.debug("Failed to resolve templates in name of patch file %s in %s", patch, path)
+        return res
+
+    def all_patch_names(cfg, templates):
+        """Determine names of all patch files (incl. post-install patches) in specified (partial) easyconfig."""
+        res = []
+        for key in ('patches', 'postinstallpatches', 'post_install_patches'):
+            res.extend(patch_names(cfg.get(key), templates))
+        return res
+
+    patches = all_patch_names(cfg, {'name': name, 'namelower': name.lower(), 'version': cfg.get('version')})
+
+    # take into account both list of extensions (via exts_list) and components (cfr. Bundle easyblock)
+    for entry in itertools.chain(cfg.get('exts_list') or [], cfg.get('components') or []):
+        if isinstance(entry, (list, tuple)) and len(entry) == 3 and isinstance(entry[2], dict):
+            templates = {
+                'name': entry[0],
+                'namelower': entry[0].lower(),
+                'version': entry[1],
+            }
+            patches.extend(all_patch_names(entry[2], templates))
+
+    return name, patches
+
+
+def get_patch_index(ec_dir):
+    """
+    Get index of patch files that are listed in easyconfig files in specified directory.
+
+    The index is updated incrementally: only easyconfig files that were changed (according to their modification time)
+    are parsed again. It is retained in memory for the session,
+    and persisted in the directory specified via --patch-index-dir (if any).
+
+    :param ec_dir: directory with easyconfig files
+    :return: dictionary with paths to easyconfig files as keys,
+             and tuples with modification time, software name and list of names of patch files as values
+    """
+    ignore_dirs = build_option('ignore_dirs')
+    key = (os.path.realpath(ec_dir), sorted(ignore_dirs or []))
+    cache_key = json.dumps(key)
+
+    index = _patch_indices.get(cache_key)
+
+    index_path = None
+    index_dir = build_option('patch_index_dir')
+    if index_dir:
+        index_fn = PATCH_INDEX_FILENAME_PREFIX + hashlib.sha256(cache_key.encode('utf-8')).hexdigest()[:16] + '.json'
+        index_path = os.path.join(index_dir, index_fn)
+        if index is None and os.path.isfile(index_path):
+            try:
+                index = {path: tuple(entry) for path, entry in json.loads(read_file(index_path))['index'].items()}
+                _log.info("Loaded index of patch files for %s from %s", ec_dir, index_path)
+            except (KeyError, TypeError, ValueError) as err:
+                _log.warning("Ignoring index of patch files in %s that failed to load: %s", index_path, err)
+
+    if index is None:
+        index = {}
+
+    new_index = {}
+    for (dirpath, dirnames, filenames) in os.walk(ec_dir):
+        # Exclude ignored dirs
+        if ignore_dirs:
+            dirnames[:] = [i for i in dirnames if i not in ignore_dirs]
+        for fn in filenames:
+            # TODO: In EasyBuild 5.x only check for '*.eb' files
+            if fn != 'TEMPLATE.eb' and os.path.splitext(fn)[1] not in ('.py', '.patch'):
+                path = os.path.join(dirpath, fn)
+                mtime = os.stat(path).st_mtime_ns
+                entry = index.get(path)
+                if entry is None or entry[0] != mtime:
+                    if 'patches' in read_file(path):
+                        name, patches = det_patches_in_easyconfig(path)
+                    else:
+                        name, patches = None, []
+                    entry = (mtime, name, patches)
+                new_index[path] = entry
+
+    _patch_indices[cache_key] = new_index
+
+    if index_path and new_index != index:
+        write_file(index_path, json.dumps({'ec_dir': ec_dir, 'index': new_index}))
+        _log.info("Index of patch files for %s saved to %s", ec_dir, index_path)
+
+    return new_index
+
+
 def find_software_name_for_patch(patch_name, ec_dirs):
     """
     Scan all easyconfigs in the robot path(s) to determine which software a patch file belongs to
@@ -1412,21 +1534,6 @@ def find_software_name_for_patch(patch_name, ec_dirs):
 
     soft_name = None
 
-    ignore_dirs = build_option('ignore_dirs')
-    all_ecs = []
-    for ec_dir in ec_dirs:
-        for (dirpath, dirnames, filenames) in os.walk(ec_dir):
-            # Exclude ignored dirs
-            if ignore_dirs:
-                dirnames[:] = [i for i in dirnames if i not in ignore_dirs]
-            for fn in filenames:
-                # TODO: In EasyBuild 5.x only check for '*.eb' files
-                if fn != 'TEMPLATE.eb' and os.path.splitext(fn)[1] not in ('.py', '.patch'):
-                    path = os.path.join(dirpath, fn)
-                    rawtxt = read_file(path)
-                    if 'patches' in rawtxt:
-                        all_ecs.append(path)
-
     # Usual patch names are <software>-<version>_fix_foo.patch
     # So search those ECs first
     patch_stem = os.path.splitext(patch_name)[0]
@@ -1443,6 +1550,35 @@ def find_software_name_for_patch(patch_name, ec_dirs):
             not filename.startswith(possible_sw_name),
             filename
         )
+
+    # first try index of patch files (based on shallow parse of easyconfig files)
+    candidates = {}
+    for ec_dir in ec_dirs:
+        for path, (_, name, patches) in get_patch_index(ec_dir).items():
+            if name and patch_name in patches:
+                candidates[path] = name
+
+    if candidates:
+        soft_name = candidates[min(candidates, key=ec_key)]
+        _log.info("Found software name for patch %s via index of patch files: %s", patch_name, soft_name)
+        return soft_name
+
+    # fall back to processing all easyconfigs that list patches
+    ignore_dirs = build_option('ignore_dirs')
+    all_ecs = []
+    for ec_dir in ec_dirs:
+        for (dirpath, dirnames, filenames) in os.walk(ec_dir):
+            # Exclude ignored dirs
+            if ignore_dirs:
+                dirnames[:] = [i for i in dirnames if i not in ignore_dirs]
+            for fn in filenames:
+                # TODO: In EasyBuild 5.x only check for '*.eb' files
+                if fn != 'TEMPLATE.eb' and os.path.splitext(fn)[1] not in ('.py', '.patch'):
+                    path = os.path.join(dirpath, fn)
+                    rawtxt = read_file(path)
+                    if 'patches' in rawtxt:
+                        all_ecs.append(path)
+
     all_ecs.sort(key=ec_key)
 
     nr_of_ecs = len(all_ecs)
@@ -31,18 +31,33 @@ Authors:
 """
 import os
 import re
+import stat
+import tempfile
 
 from easybuild.base import fancylogger
 from easybuild.tools import LooseVersion
 from easybuild.tools.build_log import EasyBuildError, print_msg
 from easybuild.tools.config import JOB_DEPS_TYPE_ABORT_ON_ERROR, JOB_DEPS_TYPE_ALWAYS_RUN, build_option
 from easybuild.tools.job.backend import JobBackend
-from easybuild.tools.filetools import which
+from easybuild.tools.filetools import adjust_permissions, get_cwd, mkdir, which, write_file
 from easybuild.tools.run import run_shell_cmd
+from easybuild.tools.utilities import nub
 
 
 _log = fancylogger.getLogger('slurm', fname=False)
 
+# script used for the tasks of a job array:
+# the command to run is picked from the (tab-separated) task table, based on the index of the array task
+JOB_ARRAY_SCRIPT_TEMPLATE = """#!/bin/bash
+# job array for layer %(layer)d of dependency graph (%(task_cnt)d tasks), see %(task_table)s
+task_cmd=$(awk -F'\\t' -v task_id="$SLURM_ARRAY_TASK_ID" '$1 == task_id' %(task_table)s | cut -f3-)
+if [ -z "$task_cmd" ]; then
+    echo "No command found for task $SLURM_ARRAY_TASK_ID in %(task_table)s" >&2
+    exit 1
+fi
+eval "$task_cmd"
+"""
+
 
 class Slurm(JobBackend):
     """
@@ -52,6 +67,9 @@ class Slurm(JobBackend):
     # Oldest version tested, may also work with earlier releases
     REQ_VERSION = '16.05'
 
+    # maximum number of tasks per job array (default for MaxArraySize in Slurm is 1001)
+    MAX_ARRAY_SIZE = 1000
+
     def __init__(self, *args, **kwargs):
         """Constructor."""
 
@@ -92,30 +110,39 @@ class Slurm(JobBackend):
         Initialise the PySlurm job backend.
         """
         self._submitted = []
+        # jobs to submit in bulk via job arrays, as (job, dependencies) tuples
+        self._queued = []
+        # IDs of jobs (or job arrays) that were submitted with a hold in place
+        self._held_jobids = []
 
-    def queue(self, job, dependencies=frozenset()):
+        self.job_array = build_option('job_array')
+        if self.job_array:
+            self.log.info("Jobs will be submitted in bulk as job arrays (max. %d tasks per array)",
+                          self.MAX_ARRAY_SIZE)
+
+    def _sbatch(self, job_specs, script=None):
         """
-        Add a job to the queue.
+        Submit a job (array) with the given specifications via 'sbatch', and return the job ID.
 
-        :param dependencies: jobs on which this job depends.
+        :param job_specs: dict with job specifications, passed as --<key>=<value> to 'sbatch'
+        :param script: job script to submit (if None, a 'wrap' job specification must be provided)
         """
         submit_cmd = 'sbatch'
 
-        if dependencies:
-            job.job_specs['dependency'] = self.job_deps_type + ':' + ':'.join(str(d.jobid) for d in dependencies)
+        if job_specs.get('dependency'):
             # make sure job that has invalid dependencies doesn't remain queued indefinitely
             submit_cmd += " --kill-on-invalid-dep=yes"
 
-        # submit job with hold in place
-        job.job_specs['hold'] = True
-
-        self.log.info("Submitting job with following specs: %s", job.job_specs)
-        for key in sorted(job.job_specs):
+        self.log.info("Submitting job with following specs: %s", job_specs)
+        for key in sorted(job_specs):
             if key in ['hold']:
-                if job.job_specs[key]:
+                if job_specs[key]:
                     submit_cmd += " --%s" % key
             else:
-                submit_cmd += ' --%s "%s"' % (key, job.job_specs[key])
+                submit_cmd += ' --%s "%s"' % (key, job_specs[key])
+
+        if script:
+            submit_cmd += ' %s' % script
 
         cmd_res = run_shell_cmd(submit_cmd, hidden=True)
 
@@ -123,24 +150,151 @@ class Slurm(JobBackend):
 
         regex_res = jobid_regex.search(cmd_res.output)
         if regex_res:
-            job.jobid = regex_res.group('jobid')
-            self.log.info("Job submitted, got job ID %s", job.jobid)
+            jobid = regex_res.group('jobid')
+            self.log.info("Job submitted, got job ID %s", jobid)
         else:
             raise EasyBuildError("Failed to determine job ID from output of submission command: %s", cmd_res.output)
 
+        if job_specs.get('hold'):
+            self._held_jobids.append(jobid)
+
+        return jobid
+
+    def queue(self, job, dependencies=frozenset()):
+        """
+        Add a job to the queue.
+
+        :param dependencies: jobs on which this job depends.
+        """
+        if self.job_array:
+            # actual submission is done in bulk in complete()
+            self._queued.append((job, dependencies))
+            return
+
+        if dependencies:
+            job.job_specs['dependency'] = self.job_deps_type + ':' + ':'.join(str(d.jobid) for d in dependencies)
+
+        # submit job with hold in place
+        job.job_specs['hold'] = True
+
+        job.jobid = self._sbatch(job.job_specs)
+
         self._submitted.append(job)
 
+    def _det_job_layers(self):
+        """
+        Group queued jobs by layer in the dependency graph:
+        jobs without dependencies are in layer 0, other jobs are in the layer after the one of their last dependency.
+
+        :return: list of layers, each layer is a list of (job, dependencies) tuples
+        """
+        job_layer = {}
+        layers = []
+        for job, deps in self._queued:
+            # jobs are queued in topological order, so layer of dependencies is always known at this point
+            layer_idx = max([job_layer[dep] + 1 for dep in deps], default=0)
+            job_layer[job] = layer_idx
+            if layer_idx == len(layers):
+                layers.append([])
+            layers[layer_idx].append((job, deps))
+
+        return layers
+
+    def _det_array_dependency(self, tasks, task_index):
+        """
+        Determine dependency specification for job array with specified tasks.
+
+        When each task only depends on the corresponding task (same index) of a single previously submitted job array,
+        an 'aftercorr' dependency on that job array is used (for abort_on_error job dependency type);
+        otherwise, the job array depends on all individual array tasks that any of its tasks depend on.
+
+        :param tasks: list of (job, dependencies) tuples for tasks in job array
+        :param task_index: dict mapping submitted jobs to (job array ID, task index) tuples
+        """
+        all_deps = nub(dep for _, deps in tasks for dep in deps)
+        if not all_deps:
+            return None
+
+        if self.job_deps_type == 'afterok':
+            dep_arrays = nub(task_index[dep][0] for dep in all_deps)
+            corresponding = all(len(deps) == 1 and task_index[list(deps)[0]][1] == idx
+                                for idx, (_, deps) in enumerate(tasks))
+            if len(dep_arrays) == 1 and corresponding:
+                return 'aftercorr:%s' % dep_arrays[0]
+
+        return self.job_deps_type + ':' + ':'.join('%s_%d' % task_index[dep] for dep in all_deps)
+
+    def _submit_job_arrays(self):
+        """
+        Submit all queued jobs in bulk, using one job array per layer in the dependency graph.
+        """
+        output_dir = build_option('job_output_dir') or get_cwd()
+        mkdir(output_dir, parents=True)
+        # job array scripts and task tables must be accessible from the workernodes,
+        # so they are stored in the (shared) job output directory
+        array_dir = tempfile.mkdtemp(prefix='eb-job-arrays-', dir=output_dir)
+
+        # mapping of submitted jobs to (job array ID, task index) tuples
+        task_index = {}
+
+        for layer_idx, layer in enumerate(self._det_job_layers()):
+            for chunk_idx in range(0, len(layer), self.MAX_ARRAY_SIZE):
+                tasks = layer[chunk_idx:chunk_idx + self.MAX_ARRAY_SIZE]
+                label = 'layer%d-%d' % (layer_idx, chunk_idx // self.MAX_ARRAY_SIZE)
+
+                task_table_lines = []
+                for idx, (job, _) in enumerate(tasks):
+                    if '\n' in job.script:
+                        raise EasyBuildError("Multi-line job scripts are not supported in job arrays: %s", job.script)
+                    task_table_lines.append('\t'.join([str(idx), job.name, job.script]))
+
+                task_table = os.path.join(array_dir, '%s.tasks' % label)
+                write_file(task_table, '\n'.join(task_table_lines) + '\n')
+
+                script = os.path.join(array_dir, '%s.sh' % label)
+                write_file(script, JOB_ARRAY_SCRIPT_TEMPLATE % {
+                    'layer': layer_idx,
+                    'task_cnt': len(tasks),
+                    'task_table': task_table,
+                })
+                adjust_permissions(script, stat.S_IXUSR, add=True)
+
+                # resource specs are the same for all jobs, except for walltime (which is based on build stats)
+                first_specs = tasks[0][0].job_specs
+                job_specs = {key: first_specs[key] for key in ['export', 'nodes', 'ntasks'] if key in first_specs}
+                job_specs.update({
+                    'array': '0-%d' % (len(tasks) - 1),
+                    'hold': True,
+                    'job-name': 'eb-%s' % label,
+                    'output': os.path.join(output_dir, 'eb-%s-%%A_%%a.out' % label),
+                    'time': max(job.job_specs['time'] for job, _ in tasks),
+                })
+                dependency = self._det_array_dependency(tasks, task_index)
+                if dependency:
+                    job_specs['dependency'] = dependency
+
+                array_jobid = self._sbatch(job_specs, script=script)
+
+                for idx, (job, _) in enumerate(tasks):
+                    job.jobid = '%s_%d' % (array_jobid, idx)
+                    task_index[job] = (array_jobid, idx)
+                    self._submitted.append(job)
+
+        self._queued = []
+
     def complete(self):
         """
         Complete a bulk job submission.
 
-        Release all user holds on submitted jobs, and disconnect from server.
+        Submit queued job arrays (if any), release all user holds on submitted jobs, and disconnect from server.
         """
+        if self._queued:
+            self._submit_job_arrays()
+
         job_ids = []
-        for job in self._submitted:
-            if job.job_specs['hold']:
-                self.log.info("releasing user hold on job %s" % job.jobid)
-                job_ids.append(job.jobid)
+        for jobid in self._held_jobids:
+            self.log.info("releasing user hold on job %s" % jobid)
+            job_ids.append(jobid)
 
         if job_ids:
             run_shell_cmd("scontrol release %s" % ' '.join(job_ids), hidden=True)
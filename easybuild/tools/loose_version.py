@@ -9,12 +9,84 @@ In particular the following changes were made:
 - Always set self.vstring and self.version
 - Shorten the comparison operators as the NotImplemented case doesn't apply anymore
 - Changes to documentation and formatting
+- Version strings are parsed only once (parsed versions are cached), and can be mapped to a key that can be
+  compared directly (see version_sort_key), which is used to speed up comparisons and sorting
 """
 
 import re
+from functools import lru_cache
 from itertools import zip_longest
 
 
+COMPONENT_RE = re.compile(r'(\d+ | [a-z]+ | \.)', re.VERBOSE)
+
+# maximum number of parsed version strings (and corresponding keys) to retain in cache
+VERSION_CACHE_SIZE = 8192
+
+# classes of version components in keys (see _component_key):
+# non-numeric components starting with a character that sorts before digits (like '-' or '+'),
+# numeric components, and non-numeric components starting with a character that sorts after digits (like 'a')
+_COMPONENT_CLASS_LOW, _COMPONENT_CLASS_INT, _COMPONENT_CLASS_HIGH = 0, 1, 2
+
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def parse_version(vstring):
+    """
+    Parse version string into tuple of components, with numeric components converted to integers.
+    Results are cached, so each version string is only parsed once.
+    """
+    components = []
+    for component in COMPONENT_RE.split(vstring):
+        if component and component != '.':
+            try:
+                component = int(component)
+            except ValueError:
+                pass
+            components.append(component)
+    return tuple(components)
+
+
+def _component_key(component):
+    """
+    Return key for specified version component.
+
+    LooseVersion compares a numeric component with a non-numeric one as strings: since non-numeric components
+    never contain digits, the result only depends on whether the first character of the non-numeric component
+    sorts before or after digits.
+    """
+    if isinstance(component, int):
+        return (_COMPONENT_CLASS_INT, component)
+    elif component < '0':
+        return (_COMPONENT_CLASS_LOW, component)
+    else:
+        return (_COMPONENT_CLASS_HIGH, component)
+
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def _version_key(vstring):
+    """Return key for specified version string (see version_sort_key)."""
+    components = list(parse_version(vstring)) if vstring else []
+    # missing components are considered to be zero when compared to numeric components, so drop trailing zeros
+    while components and components[-1] == 0:
+        components.pop()
+    return tuple(_component_key(c) for c in components)
+
+
+def version_sort_key(version):
+    """
+    Return hashable key for specified version (string or LooseVersion instance), which can be compared directly
+    (without rich comparison methods), for example when sorting via sorted(..., key=version_sort_key).
+
+    Keys are ordered like the corresponding LooseVersion instances, except for the corner case of comparing a version
+    that has trailing zeros with a version that instead has a non-numeric component starting with a character
+    that sorts before digits at that position (for example '1.0' vs '1-1'), where comparing LooseVersion instances
+    is not transitive ('1' == '1.0' and '1' < '1-1', but '1.0' > '1-1'); keys always consider '1.0' to be lower.
+    """
+    if isinstance(version, LooseVersion):
+        version = version.vstring
+    return _version_key(version)
+
+
 class LooseVersion:
     """Version numbering for anarchists and software realists.
 
@@ -24,19 +96,12 @@ class LooseVersion:
     numerically, and the alphabetic components lexically.
     """
 
-    component_re = re.compile(r'(\d+ | [a-z]+ | \.)', re.VERBOSE)
+    component_re = COMPONENT_RE
 
     def __init__(self, vstring=None):
         self._vstring = vstring
         if vstring:
-            components = [x for x in self.component_re.split(vstring)
-                          if x and x != '.']
-            for i, obj in enumerate(components):
-                try:
-                    components[i] = int(obj)
-                except ValueError:
-                    pass
-            self._version = components
+            self._version = list(parse_version(vstring))
         else:
             self._version = None
 
@@ -72,14 +137,34 @@ class LooseVersion:
     def __repr__(self):
         return "LooseVersion ('%s')" % str(self)
 
+    def __hash__(self):
+        return hash(self.sort_key)
+
+    @property
+    def sort_key(self):
+        """Key for this version that can be compared directly (see version_sort_key)"""
+        return _version_key(self._vstring)
+
     def _cmp(self, other):
         """Rich comparison method used by the operators below"""
         if isinstance(other, str):
-            other = LooseVersion(other)
+            other_vstring = other
+        else:
+            other_vstring = other._vstring
+
+        # compare keys, which gives the correct result if they differ in a component that is present in both
+        key, other_key = _version_key(self._vstring), _version_key(other_vstring)
+        for i, j in zip(key, other_key):
+            if i != j:
+                return -1 if i < j else 1
+
+        # otherwise compare components one by one, taking into account missing components
+        version = parse_version(self._vstring) if self._vstring else None
+        other_version = parse_version(other_vstring) if other_vstring else None
 
         # Modified: Use string comparison for different types and fill with zeroes/empty strings
         # Based on https://bugs.python.org/issue14894
-        for i, j in zip_longest(self.version, other.version):
+        for i, j in zip_longest(version, other_version):
             if i is None:
                 i = 0 if isinstance(j, int) else ''
             elif j is None:
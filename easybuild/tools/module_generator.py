@@ -50,8 +50,8 @@ from easybuild.tools import LooseVersion
 from easybuild.tools.build_log import EasyBuildError, print_warning
 from easybuild.tools.config import build_option, get_module_syntax, install_path
 from easybuild.tools.filetools import convert_name, mkdir, read_file, remove_file, resolve_path, symlink, write_file
-from easybuild.tools.modules import (ROOT_ENV_VAR_NAME_PREFIX, EnvironmentModules,
-                                     EnvironmentModulesC, Lmod, modules_tool)
+from easybuild.tools.modules import (MODULE_FILE_PATH_CACHE, MODULE_LOADS_CACHE, ROOT_ENV_VAR_NAME_PREFIX,
+                                     EnvironmentModules, EnvironmentModulesC, Lmod, modules_tool)
 from easybuild.tools.utilities import get_subclasses, nub, quote_str
 
 _log = fancylogger.getLogger('module_generator', fname=False)
@@ -90,30 +90,78 @@ def module_load_regex(modfilepath):
     return re.compile(regex, re.M)
 
 
+def direct_dependencies_for(mod_name, modtool):
+    """
+    Obtain list of modules that are loaded directly by the given module.
+    Both the path to the module file and the list of loaded modules are cached for the session,
+    the latter is only determined again if the module file was changed.
+    """
+    key = (os.environ.get('MODULEPATH', ''), mod_name)
+    mod_filepath = MODULE_FILE_PATH_CACHE.get(key)
+    if mod_filepath is None or not os.path.exists(mod_filepath):
+        mod_filepath = modtool.modulefile_path(mod_name)
+        MODULE_FILE_PATH_CACHE[key] = mod_filepath
+
+    mod_file_stat = os.stat(mod_filepath)
+    stamp = (mod_file_stat.st_mtime_ns, mod_file_stat.st_size)
+
+    cached = MODULE_LOADS_CACHE.get(mod_filepath)
+    if cached is None or cached[0] != stamp:
+        loadregex = module_load_regex(mod_filepath)
+        cached = (stamp, loadregex.findall(read_file(mod_filepath)))
+        MODULE_LOADS_CACHE[mod_filepath] = cached
+
+    return cached[1][:]
+
+
 def dependencies_for(mod_name, modtool, depth=None):
     """
     Obtain a list of dependencies for the given module, determined recursively, up to a specified depth (optionally)
+    Each module is only visited once, and cyclic dependencies are ignored.
     :param depth: recursion depth (default is None, which corresponds to infinite recursion depth)
     """
-    mod_filepath = modtool.modulefile_path(mod_name)
-    modtxt = read_file(mod_filepath)
-    loadregex = module_load_regex(mod_filepath)
-    mods = loadregex.findall(modtxt)
+    return _dependencies_for(mod_name, modtool, depth, {}, set())[:]
+
+
+def _dependencies_for(mod_name, modtool, depth, visited, in_progress):
+    """
+    Helper function for dependencies_for.
+
+    :param visited: dictionary with result for already visited modules, with (module name, depth) tuples as keys
+    :param in_progress: set of names of modules for which dependencies are being determined (to detect cycles)
+    """
+    if (mod_name, depth) in visited:
+        return visited[(mod_name, depth)]
+
+    if mod_name in in_progress:
+        _log.warning("Cyclic dependency on module %s found, ignoring it", mod_name)
+        return []
+
+    in_progress.add(mod_name)
+
+    mods = direct_dependencies_for(mod_name, modtool)
 
     if depth is None or depth > 0:
         if depth and depth > 0:
-            depth = depth - 1
+            subdepth = depth - 1
+        else:
+            subdepth = depth
         # recursively determine dependencies for these dependency modules, until depth is non-positive
-        moddeps = [dependencies_for(mod, modtool, depth=depth) for mod in mods]
+        moddeps = [_dependencies_for(mod, modtool, subdepth, visited, in_progress) for mod in mods]
     else:
         # ignore any deeper dependencies
         moddeps = []
 
     # add dependencies of dependency modules only if they're not there yet
+    seen = set(mods)
     for moddepdeps in moddeps:
         for dep in moddepdeps:
-            if dep not in mods:
+            if dep not in seen:
                 mods.append(dep)
+                seen.add(dep)
+
+    in_progress.remove(mod_name)
+    visited[(mod_name, depth)] = mods
 
     return mods
 
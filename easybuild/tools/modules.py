@@ -127,6 +127,26 @@ OUTPUT_MATCHES = {
 MODULE_AVAIL_CACHE = {}
 MODULE_SHOW_CACHE = {}
 
+# cache for (raw) $MODULEPATH extensions in module files, which is reused across installations in a session
+# key: path to module file
+# value: tuple with (modification time, size) of module file and list of (syntax, raw path) tuples
+MODPATH_EXTS_CACHE = {}
+
+# caches for module file paths and modules loaded by module files (see dependencies_for in module_generator.py)
+# key: tuple with $MODULEPATH and module name; value: path to module file
+MODULE_FILE_PATH_CACHE = {}
+# key: path to module file; value: tuple with (modification time, size) of module file and list of loaded modules
+MODULE_LOADS_CACHE = {}
+
+# regex for $MODULEPATH extensions;
+# via 'module use ...' or 'prepend-path MODULEPATH' in Tcl modules,
+# or 'prepend_path("MODULEPATH", ...) in Lua modules
+MODPATH_EXT_REGEX = re.compile(r'|'.join([
+    r'^\s*module\s+use\s+(?P<tcl_use>.+)',                         # 'module use' in Tcl module files
+    r'^\s*prepend-path\s+MODULEPATH\s+(?P<tcl_prepend>.+)',        # prepend to $MODULEPATH in Tcl modules
+    r'^\s*prepend_path\(\"MODULEPATH\",\s*(?P<lua_prepend>.+)\)',  # prepend to $MODULEPATH in Lua modules
+]), re.M)
+
 # cache for modules tool version
 # cache key: module command
 # value: corresponding (validated) module version
@@ -592,6 +612,8 @@ class ModulesTool:
     VERSION_REGEXP = None
     # modules tool user cache directory
     USER_CACHE_DIR = None
+    # extensions of module files supported by this modules tool, in order of preference
+    MODULE_FILE_EXTENSIONS = ['']
 
     def __init__(self, mod_paths=None, testing=False):
         """
@@ -1343,6 +1365,35 @@ class ModulesTool:
 
         return loaded_modules
 
+    def loaded_module_files(self, mod_names):
+        """
+        Determine paths to module files for specified loaded modules, without running the modules tool:
+        $_LMFILES_ (which is set by both Lmod and Environment Modules) lists the paths to the module files
+        of the loaded modules, in the same order as the module names in $LOADEDMODULES.
+
+        :param mod_names: list of names of loaded modules
+        :return: dictionary with module names as keys and paths to module files as values,
+                 or None if not all module files could be determined
+        """
+        loaded_mod_names = [x for x in os.environ.get('LOADEDMODULES', '').split(os.pathsep) if x]
+        loaded_mod_files = [x for x in os.environ.get('_LMFILES_', '').split(os.pathsep) if x]
+
+        if len(loaded_mod_names) != len(loaded_mod_files):
+            self.log.debug("Mismatch between $LOADEDMODULES (%s) and $_LMFILES_ (%s)",
+                           loaded_mod_names, loaded_mod_files)
+            return None
+
+        modfiles = dict(zip(loaded_mod_names, loaded_mod_files))
+        res = {}
+        for mod_name in mod_names:
+            modfile = modfiles.get(mod_name)
+            if modfile is None or not os.path.isfile(modfile):
+                self.log.debug("Module file for loaded module %s could not be located via $_LMFILES_", mod_name)
+                return None
+            res[mod_name] = modfile
+
+        return res
+
     def check_loaded_modules(self):
         """
         Check whether any (EasyBuild-generated) modules are loaded already in the current session
@@ -1357,10 +1408,15 @@ class ModulesTool:
         if eb_module_keys:
             loaded_modules = self.loaded_modules()
 
-            # try to track down modules that define the $EBROOT* environment variables that were found
+            # try to track down modules that define the $EBROOT* environment variables that were found;
+            # scan module files of loaded modules directly if they can be located, use 'module show' otherwise
+            loaded_modfiles = self.loaded_module_files(loaded_modules)
             loaded_eb_modules = []
             for loaded_module in loaded_modules:
-                out = self.show(loaded_module)
+                if loaded_modfiles is None:
+                    out = self.show(loaded_module)
+                else:
+                    out = read_file(loaded_modfiles[loaded_module])
                 for key in eb_module_keys[:]:
                     if key in out:
                         loaded_eb_modules.append(loaded_module)
@@ -1471,6 +1527,86 @@ class ModulesTool:
 
         return res
 
+    def modpath_extensions_in_file(self, modfilepath):
+        """
+        Determine list of $MODULEPATH extensions in specified module file.
+        Raw $MODULEPATH extensions are cached (see MODPATH_EXTS_CACHE), and only determined again if the module file
+        was changed; they are interpreted every time, since they may depend on environment variables.
+
+        :param modfilepath: path to module file
+        """
+        modfile_stat = os.stat(modfilepath)
+        stamp = (modfile_stat.st_mtime_ns, modfile_stat.st_size)
+
+        cached = MODPATH_EXTS_CACHE.get(modfilepath)
+        if cached is not None and cached[0] == stamp:
+            raw_exts = cached[1]
+        else:
+            raw_exts = []
+            for modpath_ext in MODPATH_EXT_REGEX.finditer(read_file(modfilepath)):
+                raw_exts.extend((key, raw_ext) for key, raw_ext in modpath_ext.groupdict().items()
+                                if raw_ext is not None)
+            MODPATH_EXTS_CACHE[modfilepath] = (stamp, raw_exts)
+
+        exts = []
+        for key, raw_ext in raw_exts:
+            # need to expand environment variables and join paths, e.g. when --subdir-user-modules is used
+            if key in ['tcl_prepend', 'tcl_use']:
+                exts.append(self.interpret_raw_path_tcl(raw_ext))
+            else:
+                exts.append(self.interpret_raw_path_lua(raw_ext))
+
+        return exts
+
+    def find_module_file(self, mod_name, mod_paths):
+        """
+        Locate module file for specified module in given list of module paths, without using the modules tool.
+
+        :param mod_name: module name
+        :param mod_paths: list of module paths to consider, in order of priority
+        :return: tuple with module path and path to module file, or None if no module file was found
+        """
+        for mod_path in mod_paths:
+            for ext in self.MODULE_FILE_EXTENSIONS:
+                modfilepath = os.path.join(mod_path, mod_name + ext)
+                if os.path.isfile(modfilepath):
+                    return (mod_path, modfilepath)
+        return None
+
+    def modpath_extensions_graph(self, mod_names):
+        """
+        Statically determine $MODULEPATH extensions for specified modules, by locating and parsing module files directly
+        rather than loading modules and running 'module show'.
+        Modules are considered in order, and the $MODULEPATH extensions for a module are taken into account
+        when locating the module files for subsequent modules (as if the module was loaded).
+
+        :param mod_names: list of module names for which to determine the list of $MODULEPATH extensions
+        :return: dictionary with module names as keys and tuples with module path (in which the module file is located)
+                 and list of $MODULEPATH extensions as values, or None if not all module files could be located
+        """
+        mod_paths = curr_module_paths()
+
+        graph = {}
+        for mod_name in mod_names:
+            res = self.find_module_file(mod_name, mod_paths)
+            if res is None:
+                self.log.debug("Module file for %s not found in %s, can't determine $MODULEPATH extensions statically",
+                               mod_name, mod_paths)
+                return None
+
+            mod_path, modfilepath = res
+            exts = self.modpath_extensions_in_file(modfilepath)
+            self.log.debug("Found $MODULEPATH extensions for %s in %s: %s", mod_name, modfilepath, exts)
+            graph[mod_name] = (mod_path, exts)
+
+            # loading this module would prepend $MODULEPATH extensions, which may make other modules available
+            for ext in exts:
+                if ext in mod_paths:
+                    mod_paths.remove(ext)
+                mod_paths.insert(0, ext)
+
+        return graph
+
     def modpath_extensions_for(self, mod_names):
         """
         Determine dictionary with $MODULEPATH extensions for specified modules.
@@ -1483,33 +1619,18 @@ class ModulesTool:
         """
         self.log.debug("Determining $MODULEPATH extensions for modules %s" % mod_names)
 
-        # copy environment so we can restore it
-        env = os.environ.copy()
+        graph = self.modpath_extensions_graph(mod_names)
+        if graph is not None:
+            return {mod_name: exts for mod_name, (_, exts) in graph.items()}
 
-        # regex for $MODULEPATH extensions;
-        # via 'module use ...' or 'prepend-path MODULEPATH' in Tcl modules,
-        # or 'prepend_path("MODULEPATH", ...) in Lua modules
-        modpath_ext_regex = r'|'.join([
-            r'^\s*module\s+use\s+(?P<tcl_use>.+)',                         # 'module use' in Tcl module files
-            r'^\s*prepend-path\s+MODULEPATH\s+(?P<tcl_prepend>.+)',        # prepend to $MODULEPATH in Tcl modules
-            r'^\s*prepend_path\(\"MODULEPATH\",\s*(?P<lua_prepend>.+)\)',  # prepend to $MODULEPATH in Lua modules
-        ])
-        modpath_ext_regex = re.compile(modpath_ext_regex, re.M)
+        # fall back to locating module files via modules tool (e.g. for module files that are not in $MODULEPATH
+        # under their full name, like aliases), which requires loading modules to take $MODULEPATH extensions
+        # into account; copy environment so we can restore it
+        env = os.environ.copy()
 
         modpath_exts = {}
         for mod_name in mod_names:
-            modtxt = self.read_module_file(mod_name)
-
-            exts = []
-            for modpath_ext in modpath_ext_regex.finditer(modtxt):
-                for key, raw_ext in modpath_ext.groupdict().items():
-                    if raw_ext is not None:
-                        # need to expand environment variables and join paths, e.g. when --subdir-user-modules is used
-                        if key in ['tcl_prepend', 'tcl_use']:
-                            ext = self.interpret_raw_path_tcl(raw_ext)
-                        else:
-                            ext = self.interpret_raw_path_lua(raw_ext)
-                        exts.append(ext)
+            exts = self.modpath_extensions_in_file(self.modulefile_path(mod_name))
 
             self.log.debug("Found $MODULEPATH extensions for %s: %s", mod_name, exts)
             modpath_exts.update({mod_name: exts})
@@ -1524,7 +1645,8 @@ class ModulesTool:
 
         return modpath_exts
 
-    def path_to_top_of_module_tree(self, top_paths, mod_name, full_mod_subdir, deps, modpath_exts=None):
+    def path_to_top_of_module_tree(self, top_paths, mod_name, full_mod_subdir, deps, modpath_exts=None,
+                                   mod_subdirs=None):
         """
         Recursively determine path to the top of the module tree,
         for given module, module subdir and list of $MODULEPATH extensions per dependency module.
@@ -1554,10 +1676,8 @@ class ModulesTool:
         :param full_mod_subdir: absolute path to module subdirectory for starting point
         :param deps: list of dependency modules for module at starting point
         :param modpath_exts: list of module path extensions for each of the dependency modules
+        :param mod_subdirs: absolute path to module subdirectory for each of the dependency modules
         """
-        # copy environment so we can restore it
-        env = os.environ.copy()
-
         if path_matches(full_mod_subdir, top_paths):
             self.log.debug("Top of module tree reached with %s (module subdir: %s)" % (mod_name, full_mod_subdir))
             return []
@@ -1569,6 +1689,15 @@ class ModulesTool:
             modpath_exts = {k: v for k, v in self.modpath_extensions_for(deps).items() if v}
             self.log.debug("Non-empty lists of module path extensions for dependencies: %s" % modpath_exts)
 
+        if mod_subdirs is None:
+            # determine module subdirectories for dependencies via static $MODULEPATH extensions graph if possible
+            graph = self.modpath_extensions_graph(list(modpath_exts))
+            if graph is not None:
+                mod_subdirs = {dep: graph[dep][0] for dep in graph}
+
+        # copy environment so we can restore it
+        env = os.environ.copy()
+
         mods_to_top = []
         full_mod_subdirs = []
         for dep in modpath_exts:
@@ -1577,15 +1706,18 @@ class ModulesTool:
             full_modpath_exts = modpath_exts[dep]
             if path_matches(full_mod_subdir, full_modpath_exts):
 
-                # full path to module subdir of dependency is simply path to module file without (short) module name
-                dep_full_mod_subdir = self.modulefile_path(dep, strip_ext=True)[:-len(dep) - 1]
+                if mod_subdirs is None:
+                    # full path to module subdir of dependency is simply path to module file without module name
+                    dep_full_mod_subdir = self.modulefile_path(dep, strip_ext=True)[:-len(dep) - 1]
+                else:
+                    dep_full_mod_subdir = mod_subdirs[dep]
                 full_mod_subdirs.append(dep_full_mod_subdir)
 
                 mods_to_top.append(dep)
                 self.log.debug("Found module to top of module tree: %s (subdir: %s, modpath extensions %s)",
                                dep, dep_full_mod_subdir, full_modpath_exts)
 
-            if full_modpath_exts:
+            if full_modpath_exts and mod_subdirs is None:
                 # load module for this dependency, since it may extend $MODULEPATH to make dependencies available
                 # this is required to obtain the corresponding module file paths (via 'module show')
                 # don't reload module if it is already loaded, since that'll mess up the order in $MODULEPATH
@@ -1603,7 +1735,8 @@ class ModulesTool:
                            mod_name, mods_to_top)
             for mod_name, full_mod_subdir in zip(mods_to_top, full_mod_subdirs):
                 path.extend(self.path_to_top_of_module_tree(top_paths, mod_name, full_mod_subdir, None,
-                                                            modpath_exts=remaining_modpath_exts))
+                                                            modpath_exts=remaining_modpath_exts,
+                                                            mod_subdirs=mod_subdirs))
         else:
             self.log.debug("Path not extended, we must have reached the top of the module tree")
 
@@ -1918,6 +2051,8 @@ class Lmod(ModulesTool):
 
     SHOW_HIDDEN_OPTION = '--show-hidden'
 
+    MODULE_FILE_EXTENSIONS = ['.lua', '']
+
     def __init__(self, *args, **kwargs):
         """Constructor, set lmod-specific class variable values."""
         # $LMOD_QUIET needs to be set to avoid EasyBuild tripping over fiddly bits in output
@@ -2277,6 +2412,9 @@ def reset_module_caches():
     """Reset module caches."""
     MODULE_AVAIL_CACHE.clear()
     MODULE_SHOW_CACHE.clear()
+    MODPATH_EXTS_CACHE.clear()
+    MODULE_FILE_PATH_CACHE.clear()
+    MODULE_LOADS_CACHE.clear()
 
 
 def invalidate_module_caches_for(path):
@@ -2296,6 +2434,28 @@ def invalidate_module_caches_for(path):
                     del cache[key]
                     break
 
+    for modfilepath in list(MODPATH_EXTS_CACHE.keys()):
+        if modfilepath.startswith(os.path.join(path, '')):
+            _log.debug("Entry for '%s' in cache for $MODULEPATH extensions is evicted", modfilepath)
+            del MODPATH_EXTS_CACHE[modfilepath]
+
+    # paths to module files are evicted if they are located in specified path,
+    # or if specified path is part of the $MODULEPATH they were determined for (module file may be shadowed now)
+    evicted_modfilepaths = set()
+    for key in list(MODULE_FILE_PATH_CACHE.keys()):
+        modfilepath = MODULE_FILE_PATH_CACHE[key]
+        in_modulepath = any(path == p or (os.path.exists(p) and os.path.samefile(path, p))
+                            for p in key[0].split(os.pathsep) if p)
+        if in_modulepath or (modfilepath or '').startswith(os.path.join(path, '')):
+            _log.debug("Entry for '%s' in cache for module file paths is evicted: %s", key, modfilepath)
+            del MODULE_FILE_PATH_CACHE[key]
+            evicted_modfilepaths.add(modfilepath)
+
+    for modfilepath in list(MODULE_LOADS_CACHE.keys()):
+        if modfilepath in evicted_modfilepaths or modfilepath.startswith(os.path.join(path, '')):
+            _log.debug("Entry for '%s' in cache for modules loaded by module files is evicted", modfilepath)
+            del MODULE_LOADS_CACHE[modfilepath]
+
 
 class Modules(EnvironmentModulesC):
     """NO LONGER SUPPORTED: interface to modules tool, use modules_tool from easybuild.tools.modules instead"""
@@ -65,6 +65,7 @@ from easybuild.tools.config import CHECKSUM_PRIORITY_CHOICES, DEFAULT_CHECKSUM_P
 from easybuild.tools.config import CONT_IMAGE_FORMATS, CONT_TYPES, DEFAULT_CONT_TYPE, DEFAULT_ALLOW_LOADED_MODULES
 from easybuild.tools.config import DEFAULT_BRANCH, DEFAULT_DOWNLOAD_TIMEOUT
 from easybuild.tools.config import DEFAULT_ENV_FOR_SHEBANG, DEFAULT_ENVVAR_USERS_MODULES
+from easybuild.tools.config import DEFAULT_EXTRACTED_SOURCES_CACHE_MAXSIZE
 from easybuild.tools.config import DEFAULT_FORCE_DOWNLOAD, DEFAULT_INDEX_MAX_AGE, DEFAULT_JOB_BACKEND
 from easybuild.tools.config import DEFAULT_JOB_EB_CMD, DEFAULT_LOGFILE_FORMAT, DEFAULT_MAX_FAIL_RATIO_PERMS
 from easybuild.tools.config import DEFAULT_MAX_PARALLEL, DEFAULT_MINIMAL_BUILD_ENV, DEFAULT_MNS
@@ -77,6 +78,7 @@ from easybuild.tools.config import EBROOT_ENV_VAR_ACTIONS, ERROR, FORCE_DOWNLOAD
 from easybuild.tools.config import JOB_DEPS_TYPE_ABORT_ON_ERROR, JOB_DEPS_TYPE_ALWAYS_RUN, LOADED_MODULES_ACTIONS
 from easybuild.tools.config import LOCAL_VAR_NAMING_CHECK_WARN, LOCAL_VAR_NAMING_CHECKS, MOD_SEARCH_PATH_HEADERS
 from easybuild.tools.config import OUTPUT_STYLE_AUTO, OUTPUT_STYLES, WARN, build_option
+from easybuild.tools.config import DEFAULT_PROFILE_FRAMEWORK, PROFILE_FRAMEWORK_CHOICES
 from easybuild.tools.config import get_pretend_installpath, init, init_build_options, mk_full_default_path
 from easybuild.tools.config import BuildOptions, ConfigurationVariables
 from easybuild.tools.config import PYTHON_SEARCH_PATH_TYPES, PYTHONPATH
@@ -107,7 +109,7 @@ from easybuild.tools.toolchain.toolchain import DEFAULT_SEARCH_PATH_CPP_HEADERS,
 from easybuild.tools.toolchain.toolchain import SYSTEM_TOOLCHAIN_NAME
 from easybuild.tools.repository.repository import avail_repositories
 from easybuild.tools.systemtools import DARWIN, UNKNOWN, check_python_version, get_cpu_architecture, get_cpu_family
-from easybuild.tools.systemtools import get_cpu_features, get_gpu_info, get_os_type, get_system_info
+from easybuild.tools.systemtools import get_os_type, get_system_info, get_system_info_snapshot
 from easybuild.tools.utilities import flatten
 from easybuild.tools.version import this_is_easybuild
 
@@ -381,6 +383,14 @@ class EasyBuildOptions(GeneralOption):
             'banned-linked-shared-libs': ("Comma-separated list of shared libraries (names, file names, or paths) "
                                           "which are not allowed to be linked in any installed binary/library",
                                           'strlist', 'extend', None),
+            'binary-cache-dir': ("Path to binary cache of installations (keyed by hash of all inputs of the "
+                                 "installation), which is used to restore installations rather than building them, "
+                                 "and to which successful installations are added", str, 'store', None,
+                                 {'metavar': "PATH"}),
+            'build-history-db': ("Path to SQLite database in which build history is recorded (timings per "
+                                 "installation, step and extension, core count, peak memory usage, installation size, "
+                                 "host), which is used to estimate duration of installations", str, 'store', None,
+                                 {'metavar': "PATH"}),
             'check-ebroot-env-vars': ("Action to take when defined $EBROOT* environment variables are found "
                                       "for which there is no matching loaded module; "
                                       "supported values: %s" % ', '.join(EBROOT_ENV_VAR_ACTIONS), None, 'store', WARN),
@@ -456,6 +466,14 @@ class EasyBuildOptions(GeneralOption):
                                 DEFAULT_ENV_FOR_SHEBANG),
             'experimental': ("Allow experimental code (with behaviour that can be changed/removed at any given time).",
                              None, 'store_true', False),
+            'extract-in-process': ("Extract tarballs and zip files in-process (using a parallel decompressor when "
+                                   "available), and extract multiple sources concurrently", None, 'store_true', False),
+            'extracted-sources-cache-dir': ("Path to cache of pristine extracted source trees (keyed by source "
+                                            "checksum and extract command) to reuse when extracting sources",
+                                            str, 'store', None, {'metavar': "PATH"}),
+            'extracted-sources-cache-maxsize': ("Maximum size of the cache of extracted sources (in MiB); "
+                                                "least recently used entries are removed when it is exceeded",
+                                                int, 'store', DEFAULT_EXTRACTED_SOURCES_CACHE_MAXSIZE),
             'extra-modules': ("List of extra modules to load after setting up the build environment",
                               'strlist', 'extend', None),
             "extra-source-urls": ("Specify URLs to fetch sources from in addition to those in the easyconfig",
@@ -484,6 +502,13 @@ class EasyBuildOptions(GeneralOption):
                                'choice', 'store_or_None', DEFAULT_FORCE_DOWNLOAD, FORCE_DOWNLOAD_CHOICES),
             'generate-devel-module': ("Generate a develop module file, implies --force if disabled",
                                       None, 'store_true', True),
+            'git-mirror-cache-dir': ("Path to cache of bare mirrors of git repositories, which are reused (via "
+                                     "'git clone --reference --dissociate') when creating source tarballs from git "
+                                     "repositories", str, 'store', None, {'metavar': "PATH"}),
+            'git-shallow-clone': ("Only fetch the requested tag (shallow clone) or the history without file "
+                                  "contents for the requested commit (partial clone) when creating source tarballs "
+                                  "from git repositories, and update submodules in parallel",
+                                  None, 'store_true', False),
             'group': ("Group to be used for software installations (only verified, not set)", None, 'store', None),
             'group-writable-installdir': ("Enable group write permissions on installation directory after installation",
                                           None, 'store_true', False),
@@ -552,8 +577,16 @@ class EasyBuildOptions(GeneralOption):
                                           'choice', 'store_or_None', PYTHONPATH, PYTHON_SEARCH_PATH_TYPES),
             'pretend': (("Does the build/installation in a test directory located in $HOME/easybuildinstall"),
                         None, 'store_true', False, 'p'),
+            'profile-framework': ("Profile EasyBuild framework itself (CPU time via cProfile, memory allocations "
+                                  "via tracemalloc, or both) per phase (option parsing, parsing easyconfigs, "
+                                  "resolving dependencies, checking conflicts, each installation step), "
+                                  "and write reports to directory next to EasyBuild log file",
+                                  'choice', 'store_or_None', DEFAULT_PROFILE_FRAMEWORK, PROFILE_FRAMEWORK_CHOICES),
             'read-only-installdir': ("Set read-only permissions on installation directory after installation",
                                      None, 'store_true', False),
+            'record-resource-usage': ("Record resource usage (wall time, CPU time, peak memory, I/O) per step, "
+                                      "extension and shell command, and export it (in JSON and Chrome trace format) "
+                                      "next to the log file of each installation", None, 'store_true', False),
             'remove-ghost-install-dirs': ("Remove ghost installation directories when --force or --rebuild is used, "
                                           "rather than just warning about them",
                                           None, 'store_true', False),
@@ -587,6 +620,8 @@ class EasyBuildOptions(GeneralOption):
             'strict-rpath-sanity-check': ("Perform strict RPATH sanity check, which involves unsetting "
                                           "$LD_LIBRARY_PATH before checking whether all required libraries are found",
                                           None, 'store_true', False),
+            'sysinfo-cache-dir': ("Directory to persist information on the system in (like the inventory of "
+                                  "installed OS packages), for reuse across sessions", None, 'store_or_None', None),
             'sysroot': ("Location root directory of system, prefix for standard paths like /usr/lib and /usr/include",
                         None, 'store', None),
             'trace': ("Provide more information in output to stdout on progress", None, 'store_true', True, 'T'),
@@ -603,7 +638,8 @@ class EasyBuildOptions(GeneralOption):
                                      None, 'store_true', False),
             'verify-easyconfig-filenames': ("Verify whether filename of specified easyconfigs matches with contents",
                                             None, 'store_true', False),
-            'wait-on-lock-interval': ("Wait interval (in seconds) to use when waiting for existing lock to be removed",
+            'wait-on-lock-interval': ("Interval (in seconds) for reporting when waiting for existing lock to be "
+                                      "removed (waiting stops as soon as lock is released)",
                                       int, 'store', DEFAULT_WAIT_ON_LOCK_INTERVAL),
             'wait-on-lock-limit': ("Maximum amount of time (in seconds) to wait until lock is released (0 means no "
                                    "waiting at all, exit with error; -1 means no waiting limit, keep waiting)",
@@ -743,6 +779,9 @@ class EasyBuildOptions(GeneralOption):
                                            None, 'store_true', False),
             'avail-hooks': ("Show list of known hooks", None, 'store_true', False),
             'avail-toolchain-opts': ("Show options for toolchain", 'str', 'store', None),
+            'build-history': ("Print report on build history recorded in database specified via --build-history-db "
+                              "(most recent builds first, up to specified number of builds)",
+                              int, 'store_or_None', 20, {'metavar': 'N'}),
             'check-conflicts': ("Check for version conflicts in dependency graphs", None, 'store_true', False),
             'check-eb-deps': ("Check presence and version of (required and optional) EasyBuild dependencies",
                               None, 'store_true', False),
@@ -757,6 +796,10 @@ class EasyBuildOptions(GeneralOption):
                                         ['simple', 'detailed']),
             'list-software': ("Show list of supported software", 'choice', 'store_or_None', 'simple',
                               ['simple', 'detailed']),
+            'list-software-cache-dir': ("Directory to cache information on software extracted from easyconfig "
+                                        "files in, for reuse by --list-software and --list-installed-software "
+                                        "(only changed easyconfig files are parsed again)",
+                                        str, 'store', None, {'metavar': 'PATH'}),
             'list-toolchains': ("Show list of known toolchains",
                                 None, 'store_true', False),
             'search': ("Search for easyconfig files in the robot search path, print full paths",
@@ -817,6 +860,9 @@ class EasyBuildOptions(GeneralOption):
             'new-branch-github': ("Create new branch in GitHub in preparation for a PR", None, 'store_true', False),
             'new-pr': ("Open a new pull request", None, 'store_true', False),
             'new-pr-from-branch': ("Open a new pull request from branch in GitHub", str, 'store', None),
+            'patch-index-dir': ("Directory to persist index of patch files (patch file name to software name) in, "
+                                "which is used to determine to which software a patch file belongs",
+                                str, 'store', None, {'metavar': 'PATH'}),
             'pr-branch-name': ("Branch name to use for new PRs; '<timestamp>_new_pr_<name><version>' if unspecified",
                                str, 'store', None),
             'pr-commit-msg': ("Commit message for new/updated pull request created with --new-pr", str, 'store', None),
@@ -921,6 +967,8 @@ class EasyBuildOptions(GeneralOption):
         descr = ("Options for job backend", "Options for job backend (only relevant when --job is used)")
 
         opts = OrderedDict({
+            'array': ("Submit jobs in bulk as job arrays, one per layer of the dependency graph "
+                      "(only supported by Slurm job backend)", None, 'store_true', False),
             'backend-config': ("Configuration file for job backend", None, 'store', None),
             'cores': ("Number of cores to request per job", 'int', 'store', None),
             'deps-type': ("Type of dependency to set between jobs (default depends on job backend)",
@@ -929,6 +977,8 @@ class EasyBuildOptions(GeneralOption):
             'max-jobs': ("Maximum number of concurrent jobs (queued and running, 0 = unlimited)", 'int', 'store', 0),
             'max-walltime': ("Maximum walltime for jobs (in hours)", 'int', 'store', 24),
             'output-dir': ("Output directory for jobs (default: current directory)", None, 'store', get_cwd()),
+            'pack-walltime': ("Pack short builds together in jobs that fit in the specified walltime (in hours), "
+                              "based on estimated build times", float, 'store', None),
             'polling-interval': ("Interval between polls for status of jobs (in seconds)", float, 'store', 30.0),
             'target-resource': ("Target resource for jobs", None, 'store', None),
         })
@@ -1520,9 +1570,11 @@ class EasyBuildOptions(GeneralOption):
 
     def show_system_info(self):
         """Show system information."""
+        # probe all system facts at once (concurrently)
+        get_system_info_snapshot().probe()
         system_info = get_system_info()
-        cpu_features = get_cpu_features()
-        gpu_info = get_gpu_info()
+        cpu_features = get_system_info_snapshot().get('cpu_features')
+        gpu_info = get_system_info_snapshot().get('gpu_info')
         cpu_arch_name = system_info['cpu_arch_name']
         lines = [
             "System information (%s):" % system_info['hostname'],
@@ -35,7 +35,7 @@ import functools
 from collections import OrderedDict
 import sys
 
-from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.build_log import EasyBuildError, output_collected
 from easybuild.tools.config import OUTPUT_STYLE_RICH, build_option, get_output_style
 
 try:
@@ -281,6 +281,10 @@ def start_progress_bar(bar_type, size, label=None):
     :param label: label for progress bar
     :param size: total target size of progress bar
     """
+    # no progress bars in threads for which output is being collected (see collect_output)
+    if output_collected():
+        return
+
     pbar = get_progress_bar(bar_type, size=size)
     task_id = pbar.add_task('')
     _progress_bar_cache[bar_type] = (pbar, task_id)
@@ -303,7 +307,7 @@ def update_progress_bar(bar_type, label=None, progress_size=1, total=None):
     :param label: label for progress bar
     :param progress_size: amount of progress made
     """
-    if bar_type in _progress_bar_cache:
+    if bar_type in _progress_bar_cache and not output_collected():
         (pbar, task_id) = _progress_bar_cache[bar_type]
         if label:
             pbar.update(task_id, description=label)
@@ -317,7 +321,9 @@ def stop_progress_bar(bar_type, visible=False):
     """
     Stop progress bar of given type.
     """
-    if bar_type in _progress_bar_cache:
+    if output_collected():
+        return
+    elif bar_type in _progress_bar_cache:
         (pbar, task_id) = _progress_bar_cache[bar_type]
         pbar.stop_task(task_id)
         if not visible:
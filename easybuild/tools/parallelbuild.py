@@ -42,16 +42,33 @@ import re
 from easybuild.base import fancylogger
 from easybuild.framework.easyblock import get_easyblock_instance
 from easybuild.framework.easyconfig.easyconfig import ActiveMNS
+from easybuild.tools.build_details import estimate_build_duration
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.config import build_option, get_repository, get_repositorypath
 from easybuild.tools.filetools import get_cwd
 from easybuild.tools.module_naming_scheme.utilities import det_full_ec_version
 from easybuild.tools.job.backend import job_backend, JobBackend
 from easybuild.tools.repository.repository import init_repository
+from easybuild.tools.utilities import nub
 
 
 _log = fancylogger.getLogger('parallelbuild', fname=False)
 
+# rough estimates of build time (in seconds) for easyconfigs without build statistics, based on easyblock;
+# only used to determine which builds can be packed together in a single job
+BUILD_TIME_ESTIMATES = {
+    'BinariesTarball': 60,
+    'Binary': 60,
+    'ModuleRC': 10,
+    'PackedBinary': 60,
+    'PythonPackage': 300,
+    'Tarball': 60,
+    'Toolchain': 10,
+}
+
+# safety factor to apply to estimated build times, when determining walltime for jobs
+BUILD_TIME_SAFETY_FACTOR = 2
+
 
 def _to_key(dep):
     """Determine key for specified dependency."""
@@ -94,34 +111,55 @@ def build_easyconfigs_in_parallel(build_command, easyconfigs, output_dir='easybu
     # keep track of which job builds which module
     module_to_job = {}
 
-    for easyconfig in easyconfigs:
-        # this is very important, otherwise we might have race conditions
-        # e.g. GCC-4.5.3 finds cloog.tar.gz but it was incorrectly downloaded by GCC-4.6.3
-        # running this step here, prevents this
-        if prepare_first and not testing:
-            prepare_easyconfig(easyconfig)
-
-        # convert <tweaked easyconfig.eb> to <original-easyconfig.eb --try-xxx> to avoid needing a shared tmpdir
-        spec = easyconfig['spec']
-        if spec in (tweak_map or {}):
-            spec = tweak_map[spec] + try_opts
+    pack_walltime = build_option('job_pack_walltime')
+    if pack_walltime:
+        ec_groups, group_build_times = pack_easyconfigs(easyconfigs, pack_walltime)
+    else:
+        ec_groups = [[ec] for ec in easyconfigs]
+        group_build_times = [None] * len(ec_groups)
+
+    for ec_group, group_build_time in zip(ec_groups, group_build_times):
+        specs = []
+        for easyconfig in ec_group:
+            # this is very important, otherwise we might have race conditions
+            # e.g. GCC-4.5.3 finds cloog.tar.gz but it was incorrectly downloaded by GCC-4.6.3
+            # running this step here, prevents this
+            if prepare_first and not testing:
+                prepare_easyconfig(easyconfig)
+
+            # convert <tweaked easyconfig.eb> to <original-easyconfig.eb --try-xxx> to avoid needing a shared tmpdir
+            spec = easyconfig['spec']
+            if spec in (tweak_map or {}):
+                spec = tweak_map[spec] + try_opts
+            specs.append(spec)
 
         # the new job will only depend on already submitted jobs
-        _log.info("creating job for ec: %s using %s" % (os.path.basename(easyconfig['spec']), spec))
-        new_job = create_job(active_job_backend, build_command, easyconfig, output_dir=output_dir, spec=spec)
-
-        # filter out dependencies marked as external modules
-        deps = [d for d in easyconfig['ec'].all_dependencies if not d.get('external_module', False)]
-
-        dep_mod_names = map(ActiveMNS().det_full_module_name, deps)
-        job_deps = [module_to_job[dep] for dep in dep_mod_names if dep in module_to_job]
+        if len(ec_group) == 1:
+            _log.info("creating job for ec: %s using %s" % (os.path.basename(ec_group[0]['spec']), specs[0]))
+            new_job = create_job(active_job_backend, build_command, ec_group[0], output_dir=output_dir, spec=specs[0])
+        else:
+            _log.info("creating packed job for ecs: %s", [os.path.basename(ec['spec']) for ec in ec_group])
+            new_job = create_packed_job(active_job_backend, build_command, ec_group, output_dir=output_dir,
+                                        specs=specs, build_time=group_build_time)
+
+        group_mod_names = [ec['ec'].full_mod_name for ec in ec_group]
+
+        # filter out dependencies marked as external modules,
+        # and dependencies that are built in the same (packed) job
+        dep_mod_names = []
+        for easyconfig in ec_group:
+            deps = [d for d in easyconfig['ec'].all_dependencies if not d.get('external_module', False)]
+            dep_mod_names.extend(mod_name for mod_name in map(ActiveMNS().det_full_module_name, deps)
+                                 if mod_name not in group_mod_names)
+        job_deps = nub(module_to_job[dep] for dep in dep_mod_names if dep in module_to_job)
 
         # actually (try to) submit job
         active_job_backend.queue(new_job, job_deps)
         _log.info("job %s for module %s has been submitted", new_job, new_job.module)
 
         # update dictionary
-        module_to_job[new_job.module] = new_job
+        for mod_name in group_mod_names:
+            module_to_job[mod_name] = new_job
         jobs.append(new_job)
 
     active_job_backend.complete()
@@ -200,13 +238,12 @@ def create_job(job_backend, build_command, easyconfig, output_dir='easybuild-bui
         'spec': spec or easyconfig['spec'],
     }
 
-    # just use latest build stats
-    repo = init_repository(get_repository(), get_repositorypath())
-    buildstats = repo.get_buildstats(*ec_tuple)
+    # only use measured build time to determine walltime for job (not the rough estimate based on easyblock),
+    # to avoid that job gets killed before the installation is completed
     extra = {}
-    if buildstats:
-        previous_time = buildstats[-1]['build_time']
-        extra['hours'] = int(math.ceil(previous_time * 2 / 60))
+    build_time = det_measured_build_time(easyconfig)
+    if build_time is not None:
+        extra['hours'] = det_job_hours(build_time)
 
     if build_option('job_cores'):
         extra['cores'] = build_option('job_cores')
@@ -217,6 +254,187 @@ def create_job(job_backend, build_command, easyconfig, output_dir='easybuild-bui
     return job
 
 
+def det_job_hours(build_time):
+    """
+    Determine walltime (in hours) for job, based on estimated build time (taking into account a safety margin).
+
+    :param build_time: estimated build time (in seconds)
+    """
+    return max(1, int(math.ceil(build_time * BUILD_TIME_SAFETY_FACTOR / 3600)))
+
+
+def det_measured_build_time(easyconfig):
+    """
+    Determine build time (in seconds) for specified easyconfig based on measurements of previous installations,
+    i.e. build history (see --build-history-db) or build statistics.
+
+    :param easyconfig: easyconfig as processed by process_easyconfig
+    :return: build time in seconds, or None if no measurements are available
+    """
+    ec_tuple = (easyconfig['ec']['name'], det_full_ec_version(easyconfig['ec']))
+
+    # prefer estimate based on build history (median of most recent builds), if available
+    build_time = estimate_build_duration(*ec_tuple)
+    if build_time is not None:
+        _log.debug("Estimated build time for %s based on build history: %s sec", '-'.join(ec_tuple), build_time)
+    else:
+        # use build time of latest installation, if build stats are available
+        repo = init_repository(get_repository(), get_repositorypath())
+        buildstats = repo.get_buildstats(*ec_tuple)
+        if buildstats:
+            build_time = buildstats[-1]['build_time']
+            _log.debug("Estimated build time for %s based on build stats: %s sec", '-'.join(ec_tuple), build_time)
+
+    return build_time
+
+
+def estimate_build_time(easyconfig):
+    """
+    Estimate build time (in seconds) for specified easyconfig,
+    based on build history (see --build-history-db), build statistics for previous installations,
+    or on the easyblock being used.
+
+    :param easyconfig: easyconfig as processed by process_easyconfig
+    :return: estimated build time in seconds, or None if no estimate can be made
+    """
+    build_time = det_measured_build_time(easyconfig)
+
+    if build_time is None:
+        ec = easyconfig['ec']
+        ec_name = '-'.join([ec['name'], det_full_ec_version(ec)])
+        # easyconfigs that include extensions can take arbitrarily long
+        if ec['easyblock'] in BUILD_TIME_ESTIMATES and not ec['exts_list']:
+            build_time = BUILD_TIME_ESTIMATES[ec['easyblock']]
+            _log.debug("Estimated build time for %s based on easyblock %s: %s sec",
+                       ec_name, ec['easyblock'], build_time)
+        else:
+            _log.debug("No estimate for build time available for %s", ec_name)
+
+    return build_time
+
+
+def pack_easyconfigs(easyconfigs, walltime):
+    """
+    Group easyconfigs into packs that can be built sequentially in a single job,
+    based on estimated build times (taking into account a safety margin).
+
+    Easyconfigs without an estimated build time or for which the estimated build time doesn't fit
+    in the specified walltime are not packed (i.e., they end up in a group of their own).
+
+    An easyconfig is only added to an existing pack if all of its dependencies are either
+    included in that pack or in a group that was created before that pack, to avoid cyclic dependencies between jobs.
+    Packs that already include one of the dependencies of an easyconfig are preferred.
+
+    :param easyconfigs: list of easyconfigs, ordered such that dependencies come first
+    :param walltime: walltime for packed jobs (in hours)
+    :return: tuple with list of groups of easyconfigs (in an order that respects dependencies between groups),
+             and list with total estimated build time (in seconds, without safety margin) for each group
+             (None for groups that are not packs)
+    """
+    budget = walltime * 3600
+
+    groups = []
+    # estimated build time (in seconds, without safety margin) for each group, None for groups that are not packs
+    group_times = []
+    # index of group in which each module is built
+    mod_to_group = {}
+
+    for easyconfig in easyconfigs:
+        build_time = estimate_build_time(easyconfig)
+        fits = build_time is not None and build_time * BUILD_TIME_SAFETY_FACTOR <= budget
+
+        dep_groups = set()
+        for dep in easyconfig['ec'].all_dependencies:
+            dep_mod_name = ActiveMNS().det_full_module_name(dep)
+            if dep_mod_name in mod_to_group:
+                dep_groups.add(mod_to_group[dep_mod_name])
+
+        target_idx = None
+        if fits:
+            candidates = []
+            for idx, group_time in enumerate(group_times):
+                # easyconfig can only be added to a pack that has room for it,
+                # if all dependencies are built in that pack or in a group that is submitted before that pack
+                if group_time is not None and (group_time + build_time) * BUILD_TIME_SAFETY_FACTOR <= budget:
+                    if all(dep_idx <= idx for dep_idx in dep_groups):
+                        candidates.append(idx)
+
+            if candidates:
+                # prefer most recent pack that includes one of the dependencies
+                connected = [idx for idx in candidates if idx in dep_groups]
+                target_idx = (connected or candidates)[-1]
+
+        if target_idx is None:
+            groups.append([easyconfig])
+            group_times.append(build_time if fits else None)
+            target_idx = len(groups) - 1
+        else:
+            groups[target_idx].append(easyconfig)
+            group_times[target_idx] += build_time
+
+        mod_to_group[easyconfig['ec'].full_mod_name] = target_idx
+
+    _log.info("Packed %d easyconfigs in %d groups: %s", len(easyconfigs), len(groups),
+              [[os.path.basename(ec['spec']) for ec in group] for group in groups])
+
+    return groups, group_times
+
+
+def create_packed_job(job_backend, build_command, easyconfigs, output_dir='easybuild-build', specs=None,
+                      build_time=None):
+    """
+    Creates a job to build *multiple* easyconfigs, one after the other (in the specified order).
+
+    :param job_backend: A factory object for querying server parameters and creating actual job objects
+    :param build_command: format string for command, full path to an easyconfig file will be substituted in it
+    :param easyconfigs: list of easyconfigs as processed by process_easyconfig (dependencies first)
+    :param output_dir: optional output path; --regtest-output-dir will be used inside the job with this variable
+    :param specs: list of untweaked easyconfig names with optional --try-* options (one per easyconfig)
+    :param build_time: total estimated build time (in seconds) for easyconfigs (see pack_easyconfigs);
+                       if None, build time is estimated for each easyconfig
+
+    returns the job
+    """
+    if specs is None:
+        specs = [None] * len(easyconfigs)
+
+    if build_time is None:
+        build_time = sum(estimate_build_time(easyconfig) or 0 for easyconfig in easyconfigs)
+
+    names = []
+    commands = []
+    for easyconfig, spec in zip(easyconfigs, specs):
+        name = '-'.join((easyconfig['ec']['name'], det_full_ec_version(easyconfig['ec'])))
+        names.append(name)
+
+        add_opts = ''
+        if easyconfig['hidden']:
+            add_opts += ' --hidden'
+
+        command = build_command % {
+            'add_opts': add_opts,
+            'output_dir': os.path.join(os.path.abspath(output_dir), name),
+            'spec': spec or easyconfig['spec'],
+        }
+        # run commands in a subshell, since build command template may change working directory
+        commands.append('(%s)' % command)
+
+    # stop at first failing build, since later builds may depend on it
+    command = ' && '.join(commands)
+    name = '%s-pack-%d' % (names[0], len(names))
+
+    extra = {
+        'hours': det_job_hours(build_time),
+    }
+    if build_option('job_cores'):
+        extra['cores'] = build_option('job_cores')
+
+    job = job_backend.make_job(command, name, **extra)
+    job.module = ','.join(easyconfig['ec'].full_mod_name for easyconfig in easyconfigs)
+
+    return job
+
+
 def prepare_easyconfig(ec):
     """
     Prepare for building specified easyconfig (fetch sources)
@@ -0,0 +1,279 @@
+# Copyright 2025 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of Ghent University (http://ugent.be/hpc/en),
+# with support of Ghent University (http://ugent.be/hpc),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+# https://github.com/easybuilders/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Profiling of the EasyBuild framework itself, per phase (option parsing, parsing easyconfigs,
+resolving dependencies, checking for conflicts, each installation step, ...).
+
+CPU time is profiled via cProfile (one .pstats file per phase, which can be inspected via the pstats module
+or tools like snakeviz), memory allocations are traced via tracemalloc (one report with the top allocation
+sites per phase). Only the Python code of the framework is profiled, not the (shell) commands it runs.
+
+Hooks can profile additional phases via the profile_phase context manager, for example:
+
+    from easybuild.tools.profiling import profile_phase
+
+    def pre_configure_hook(self, *args, **kwargs):
+        with profile_phase('my_custom_phase'):
+            ...
+"""
+import cProfile
+import os
+import re
+import sys
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+
+from easybuild.base import fancylogger
+from easybuild.tools.config import PROFILE_FRAMEWORK_ALL, PROFILE_FRAMEWORK_CPU, PROFILE_FRAMEWORK_MEMORY
+from easybuild.tools.filetools import mkdir, write_file
+
+
+_log = fancylogger.getLogger('tools.profiling', fname=False)
+
+PROFILE_DIR_SUFFIX = '_profile'
+PROFILE_MEMORY_REPORT_SUFFIX = '_memory.txt'
+PROFILE_PSTATS_SUFFIX = '.pstats'
+
+PROFILE_PHASE_OPTION_PARSING = 'option_parsing'
+
+# number of allocation sites to include in memory report for a phase
+PROFILE_MEMORY_TOP_N = 25
+# number of frames to retain for each traced memory allocation
+PROFILE_MEMORY_NFRAMES = 10
+
+ENV_VAR_PROFILE_FRAMEWORK = 'EASYBUILD_PROFILE_FRAMEWORK'
+
+# state of framework profiling (see init_framework_profiling)
+_profiling = {
+    'mode': None,
+    'dir': None,
+    'count': 0,
+    # stack of phases that are being profiled (phases can be nested, e.g. when using profile_phase in hooks)
+    'phases': [],
+}
+
+
+class ProfiledPhase:
+    """Phase of the EasyBuild framework that is being profiled."""
+
+    def __init__(self, name, cpu=True, memory=False):
+        """
+        Constructor for ProfiledPhase.
+
+        :param name: name of phase
+        :param cpu: profile CPU time (via cProfile)
+        :param memory: trace memory allocations (via tracemalloc)
+        """
+        self.name = name
+        self.cpu_profile = cProfile.Profile() if cpu else None
+        self.memory = memory
+        self.snapshot_start = None
+        self.snapshot_end = None
+        self.started_tracemalloc = False
+
+    def start(self):
+        """Start profiling this phase."""
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(PROFILE_MEMORY_NFRAMES)
+                self.started_tracemalloc = True
+            self.snapshot_start = tracemalloc.take_snapshot()
+        if self.cpu_profile is not None:
+            self.cpu_profile.enable()
+
+    def stop(self):
+        """Stop profiling this phase."""
+        if self.cpu_profile is not None:
+            self.cpu_profile.disable()
+        if self.memory:
+            self.snapshot_end = tracemalloc.take_snapshot()
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+
+    def pause(self):
+        """Pause CPU profiling of this phase (only one cProfile profiler can be active at a time)."""
+        if self.cpu_profile is not None:
+            self.cpu_profile.disable()
+
+    def resume(self):
+        """Resume CPU profiling of this phase."""
+        if self.cpu_profile is not None:
+            self.cpu_profile.enable()
+
+    def memory_report(self, top_n=PROFILE_MEMORY_TOP_N):
+        """Return report with top allocation sites for this phase (None if memory allocations were not traced)."""
+        if self.snapshot_start is None or self.snapshot_end is None:
+            return None
+
+        # ignore memory allocations by tracemalloc itself and by profiling machinery
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        snapshot_start = self.snapshot_start.filter_traces(filters)
+        snapshot_end = self.snapshot_end.filter_traces(filters)
+        stats = snapshot_end.compare_to(snapshot_start, 'lineno')
+
+        total_diff = sum(stat.size_diff for stat in stats)
+        lines = [
+            "Memory allocations during phase '%s' (top %d allocation sites)" % (self.name, top_n),
+            "",
+            "Total memory allocated (and not freed) during phase: %d bytes" % total_diff,
+            "",
+        ]
+        lines.extend(str(stat) for stat in stats[:top_n])
+        return '\n'.join(lines) + '\n'
+
+    def write_reports(self, profile_dir, prefix=''):
+        """
+        Write reports for this phase into specified directory.
+
+        :param profile_dir: directory to write reports to
+        :param prefix: prefix for names of report files
+        :return: list of paths to reports
+        """
+        base_path = os.path.join(profile_dir, prefix + re.sub(r'[^A-Za-z0-9_.+-]', '_', self.name))
+        paths = []
+        if self.cpu_profile is not None:
+            pstats_path = base_path + PROFILE_PSTATS_SUFFIX
+            self.cpu_profile.dump_stats(pstats_path)
+            paths.append(pstats_path)
+
+        memory_report = self.memory_report()
+        if memory_report is not None:
+            memory_report_path = base_path + PROFILE_MEMORY_REPORT_SUFFIX
+            write_file(memory_report_path, memory_report)
+            paths.append(memory_report_path)
+
+        return paths
+
+
+def profiling_requested(args=None):
+    """
+    Determine whether profiling of the framework was requested, before the configuration is set up,
+    so option parsing can be profiled as well; only the command line and environment are taken into account.
+    """
+    if os.getenv(ENV_VAR_PROFILE_FRAMEWORK):
+        return True
+    if args is None:
+        args = sys.argv[1:]
+    return any(arg.startswith('--profile-framework') for arg in args)
+
+
+def profile_dir_for_logfile(logfile):
+    """Return path to directory for profiling reports that corresponds to specified log file."""
+    if logfile is None:
+        return tempfile.mkdtemp(prefix='easybuild-', suffix=PROFILE_DIR_SUFFIX)
+    else:
+        return '.'.join(logfile.split('.')[:-1]) + PROFILE_DIR_SUFFIX
+
+
+def init_framework_profiling(mode, logfile):
+    """
+    (Re)initialize profiling of the framework.
+
+    :param mode: what to profile (see PROFILE_FRAMEWORK_CHOICES), None to disable profiling
+    :param logfile: path to EasyBuild log file, reports are written to directory next to it
+    """
+    _profiling['mode'] = mode
+    _profiling['count'] = 0
+    _profiling['phases'] = []
+    if mode:
+        _profiling['dir'] = profile_dir_for_logfile(logfile)
+        mkdir(_profiling['dir'], parents=True)
+        _log.info("Profiling of framework enabled (%s), reports will be written to %s", mode, _profiling['dir'])
+    else:
+        _profiling['dir'] = None
+
+
+def framework_profiling_enabled():
+    """Return whether profiling of the framework is enabled."""
+    return bool(_profiling['mode'])
+
+
+def get_profile_dir():
+    """Return path to directory where profiling reports are written (None if profiling is not enabled)."""
+    return _profiling['dir']
+
+
+def start_profile_phase(name, cpu=True, memory=False):
+    """
+    Start profiling a phase, regardless of whether profiling of the framework is enabled;
+    see finish_profile_phase.
+    """
+    phases = _profiling['phases']
+    if phases:
+        phases[-1].pause()
+    phase = ProfiledPhase(name, cpu=cpu, memory=memory)
+    phases.append(phase)
+    phase.start()
+    return phase
+
+
+def finish_profile_phase(phase):
+    """
+    Stop profiling specified phase (see start_profile_phase), and write reports if profiling is enabled.
+
+    :return: list of paths to reports
+    """
+    phase.stop()
+
+    phases = _profiling['phases']
+    if phase in phases:
+        phases.remove(phase)
+
+    paths = []
+    mode = _profiling['mode']
+    if mode:
+        if mode == PROFILE_FRAMEWORK_MEMORY:
+            phase.cpu_profile = None
+        elif mode == PROFILE_FRAMEWORK_CPU:
+            phase.snapshot_start = None
+
+        # prefix with sequence number, to retain order of phases, and to avoid clashes for repeated phases
+        _profiling['count'] += 1
+        paths = phase.write_reports(_profiling['dir'], prefix='%03d_' % _profiling['count'])
+        _log.info("Reports for profiled phase '%s': %s", phase.name, ', '.join(paths))
+
+    # only resume profiling of enclosing phase after writing reports, to not include that in its profile
+    if phases:
+        phases[-1].resume()
+
+    return paths
+
+
+@contextmanager
+def profile_phase(name):
+    """
+    Profile code run in this context as a phase with the specified name, if profiling of the framework is enabled.
+    """
+    mode = _profiling['mode']
+    if mode:
+        cpu = mode in (PROFILE_FRAMEWORK_ALL, PROFILE_FRAMEWORK_CPU)
+        memory = mode in (PROFILE_FRAMEWORK_ALL, PROFILE_FRAMEWORK_MEMORY)
+        phase = start_profile_phase(name, cpu=cpu, memory=memory)
+        try:
+            yield
+        finally:
+            finish_profile_phase(phase)
+    else:
+        yield
@@ -0,0 +1,253 @@
+# Copyright 2025 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of Ghent University (http://ugent.be/hpc/en),
+# with support of Ghent University (http://ugent.be/hpc),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+# https://github.com/easybuilders/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Recording of resource usage (wall time, CPU time, peak memory usage, I/O) during an installation,
+per step, per extension and per shell command.
+
+Resource usage of processes started by EasyBuild is determined via resource.getrusage(RUSAGE_CHILDREN),
+which only covers child processes that have completed (and were waited for):
+CPU time and I/O for an event is the difference between the values at the start and at the end of the event.
+For shell commands that are running concurrently, the reported CPU time and I/O is therefore only approximate.
+
+The peak memory usage of a shell command is the largest resident set size of that command (and its descendants),
+as reported when it terminated (see _poll_rusage in easybuild.tools.run); the peak memory usage for a step
+or extension is the largest peak memory usage of the shell commands that were run for it.
+"""
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from easybuild.base import fancylogger
+
+
+_log = fancylogger.getLogger('tools.resource_usage', fname=False)
+
+RESOURCE_USAGE_CAT_EXTENSION = 'extension'
+RESOURCE_USAGE_CAT_SHELL_CMD = 'shell_cmd'
+RESOURCE_USAGE_CAT_STEP = 'step'
+
+# suffixes for files with resource usage, which are put next to the log file for an installation
+RESOURCE_USAGE_FILE_SUFFIX = '_resource_usage.json'
+RESOURCE_USAGE_TRACE_FILE_SUFFIX = '_trace.json'
+
+# ru_maxrss is expressed in bytes on macOS, in kilobytes elsewhere
+MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+# ru_inblock/ru_oublock are expressed in blocks of 512 bytes
+BLOCK_SIZE = 512
+
+# currently active recorder of resource usage (see set_resource_usage_recorder)
+_active_recorder = None
+
+
+def get_resource_usage():
+    """Return current (cumulative) resource usage of child processes of this process."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        'time': time.time(),
+        'cpu_user': usage.ru_utime,
+        'cpu_sys': usage.ru_stime,
+        'max_rss': usage.ru_maxrss * MAXRSS_UNIT,
+        'read_bytes': usage.ru_inblock * BLOCK_SIZE,
+        'write_bytes': usage.ru_oublock * BLOCK_SIZE,
+    }
+
+
+def resource_usage_file_paths(logfile):
+    """Return paths to files with (JSON) resource usage and (Chrome) trace that correspond to specified log file."""
+    base = '.'.join(logfile.split('.')[:-1])
+    return base + RESOURCE_USAGE_FILE_SUFFIX, base + RESOURCE_USAGE_TRACE_FILE_SUFFIX
+
+
+class ResourceUsageRecorder:
+    """Recorder of resource usage for events (steps, extensions, shell commands) during an installation."""
+
+    def __init__(self):
+        """Constructor for ResourceUsageRecorder."""
+        self.events = []
+        self.start_time = time.time()
+        self._lock = threading.Lock()
+        # peak memory usage of shell commands, for each event that is being recorded (see record_resource_usage)
+        self._open_events = []
+
+    def open_event(self):
+        """
+        Start keeping track of peak memory usage of shell commands for an event that is being recorded.
+
+        :return: dictionary in which peak memory usage (in bytes) is kept track of, see close_event
+        """
+        open_event = {'max_rss': 0}
+        with self._lock:
+            self._open_events.append(open_event)
+        return open_event
+
+    def close_event(self, open_event):
+        """
+        Stop keeping track of peak memory usage of shell commands for specified event (see open_event).
+
+        :return: peak memory usage of shell commands (in bytes) during event
+        """
+        with self._lock:
+            self._open_events.remove(open_event)
+        return open_event['max_rss']
+
+    def add_event(self, name, category, start_usage, end_usage, max_rss=None, **args):
+        """
+        Add event with resource usage.
+
+        :param name: name of event (name of step, extension, command)
+        :param category: category of event (step, extension, shell command)
+        :param start_usage: resource usage at start of event (see get_resource_usage)
+        :param end_usage: resource usage at end of event (see get_resource_usage)
+        :param max_rss: peak memory usage (in bytes) during event;
+                        if None, largest peak memory usage of any child process that completed so far is used
+        :param args: additional information on event
+        """
+        if max_rss is None:
+            max_rss = end_usage['max_rss']
+        event = OrderedDict([
+            ('name', name),
+            ('category', category),
+            ('start', start_usage['time'] - self.start_time),
+            ('wall_time', end_usage['time'] - start_usage['time']),
+            ('cpu_user', end_usage['cpu_user'] - start_usage['cpu_user']),
+            ('cpu_sys', end_usage['cpu_sys'] - start_usage['cpu_sys']),
+            ('max_rss', max_rss),
+            ('read_bytes', end_usage['read_bytes'] - start_usage['read_bytes']),
+            ('write_bytes', end_usage['write_bytes'] - start_usage['write_bytes']),
+            ('thread_id', threading.get_ident()),
+            ('args', args),
+        ])
+        with self._lock:
+            self.events.append(event)
+            if category == RESOURCE_USAGE_CAT_SHELL_CMD:
+                for open_event in self._open_events:
+                    open_event['max_rss'] = max(open_event['max_rss'], max_rss)
+
+    def summary(self, category=RESOURCE_USAGE_CAT_STEP):
+        """Return summary of resource usage for events of specified category, aggregated by name of event."""
+        res = OrderedDict()
+        for event in self.events:
+            if event['category'] == category:
+                aggregate_resource_usage(res, event['name'], event)
+        return res
+
+    def to_dict(self):
+        """Return recorded resource usage as a dictionary."""
+        return {
+            'start_time': self.start_time,
+            'events': self.events,
+            'steps': self.summary(RESOURCE_USAGE_CAT_STEP),
+        }
+
+    def to_chrome_trace(self):
+        """
+        Return recorded resource usage as a timeline of trace events in the Chrome trace event format,
+        which can be visualised using chrome://tracing or https://ui.perfetto.dev.
+        """
+        pid = os.getpid()
+        trace_events = []
+        for event in self.events:
+            args = {key: event[key] for key in ('cpu_user', 'cpu_sys', 'max_rss', 'read_bytes', 'write_bytes')}
+            args.update(event['args'])
+            trace_events.append({
+                'name': event['name'],
+                'cat': event['category'],
+                'ph': 'X',
+                # timestamps and durations are expressed in microseconds
+                'ts': int(event['start'] * 1e6),
+                'dur': int(event['wall_time'] * 1e6),
+                'pid': pid,
+                'tid': event['thread_id'],
+                'args': args,
+            })
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def export(self, logfile):
+        """
+        Export recorded resource usage to files next to specified log file, in JSON and Chrome trace format.
+
+        :return: list of paths to files that were created
+        """
+        # avoid circular import (filetools > run > resource_usage)
+        from easybuild.tools.filetools import write_file
+
+        json_path, trace_path = resource_usage_file_paths(logfile)
+        write_file(json_path, json.dumps(self.to_dict(), indent=4))
+        write_file(trace_path, json.dumps(self.to_chrome_trace()))
+        _log.info("Resource usage exported to %s and %s", json_path, trace_path)
+        return [json_path, trace_path]
+
+
+def aggregate_resource_usage(summary, name, usage):
+    """Aggregate resource usage for specified name in given summary (dictionary)."""
+    if name in summary:
+        entry = summary[name]
+        entry['count'] += usage.get('count', 1)
+        for key in ('wall_time', 'cpu_user', 'cpu_sys', 'read_bytes', 'write_bytes'):
+            entry[key] += usage[key]
+        entry['max_rss'] = max(entry['max_rss'], usage['max_rss'])
+    else:
+        summary[name] = OrderedDict([
+            ('count', usage.get('count', 1)),
+            ('wall_time', usage['wall_time']),
+            ('cpu_user', usage['cpu_user']),
+            ('cpu_sys', usage['cpu_sys']),
+            ('max_rss', usage['max_rss']),
+            ('read_bytes', usage['read_bytes']),
+            ('write_bytes', usage['write_bytes']),
+        ])
+
+
+def get_resource_usage_recorder():
+    """Return active recorder of resource usage (None if resource usage is not being recorded)."""
+    return _active_recorder
+
+
+def set_resource_usage_recorder(recorder):
+    """Set active recorder of resource usage (None to disable recording), return previously active recorder."""
+    global _active_recorder
+    prev_recorder = _active_recorder
+    _active_recorder = recorder
+    return prev_recorder
+
+
+@contextmanager
+def record_resource_usage(name, category, **args):
+    """Record resource usage for code run in this context, if a recorder is active (see set_resource_usage_recorder)."""
+    recorder = _active_recorder
+    if recorder is None:
+        yield
+    else:
+        start_usage = get_resource_usage()
+        open_event = recorder.open_event()
+        try:
+            yield
+        finally:
+            max_rss = recorder.close_event(open_event)
+            recorder.add_event(name, category, start_usage, get_resource_usage(), max_rss=max_rss, **args)
@@ -38,8 +38,10 @@ Authors:
 import functools
 import inspect
 import locale
+import logging
 import os
 import re
+import selectors
 import shlex
 import shutil
 import string
@@ -67,6 +69,8 @@ from easybuild.tools.build_log import dry_run_msg, time_str_since
 from easybuild.tools.config import build_option
 from easybuild.tools.hooks import RUN_SHELL_CMD, load_hooks, run_hook
 from easybuild.tools.output import COLOR_RED, COLOR_YELLOW, colorize, print_error
+from easybuild.tools.resource_usage import MAXRSS_UNIT, RESOURCE_USAGE_CAT_SHELL_CMD, get_resource_usage
+from easybuild.tools.resource_usage import get_resource_usage_recorder
 from easybuild.tools.utilities import trace_msg
 
 
@@ -84,6 +88,13 @@ CACHED_COMMANDS = (
     "ulimit -u",  # used in det_parallelism
 )
 
+# size of chunks in which output of shell commands is read when streaming output or running interactive commands
+RUN_SHELL_CMD_CHUNK_SIZE = 64 * 1024
+# size of tail of output of interactive shell commands that is retained to check question patterns against
+QA_TAIL_SIZE = 64 * 1024
+# interval for checking question patterns when no new output is produced by interactive shell commands
+QA_CHECK_INTERVAL_SECS = 0.1
+
 RunShellCmdResult = namedtuple('RunShellCmdResult', ('cmd', 'exit_code', 'output', 'stderr', 'work_dir',
                                                      'out_file', 'err_file', 'cmd_sh', 'thread_id', 'task_id'))
 RunShellCmdResult.__doc__ = """A namedtuple that represents the result of a call to run_shell_cmd,
@@ -359,6 +370,159 @@ def _answer_question(stdout, proc, qa_patterns, qa_wait_patterns):
     return match_found
 
 
+def _poll_rusage(proc):
+    """
+    Check whether process for shell command has terminated (like Popen.poll),
+    by waiting for it via os.wait4, so the resource usage of the process can be determined.
+
+    :param proc: subprocess.Popen instance for running shell command
+    :return: 2-tuple with exit code (None if process is still running) and resource usage (None if not available)
+    """
+    try:
+        (pid, status, rusage) = os.wait4(proc.pid, os.WNOHANG)
+    except ChildProcessError:
+        # process was already waited for, so resource usage is not available
+        _log.debug(f"Failed to wait for process {proc.pid} via os.wait4, falling back to Popen.poll")
+        return proc.poll(), None
+
+    if pid != proc.pid:
+        return None, None
+
+    # exit code is registered in Popen instance, so it doesn't try to wait for the process again
+    proc.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+    return proc.returncode, rusage
+
+
+def _stream_cmd_output(proc, out_fps, split_stderr, qa_patterns, qa_wait_patterns, qa_timeout,
+                       record_rusage=False):
+    """
+    Private helper function to collect output of a running shell command as it becomes available,
+    while answering questions raised by interactive shell commands (if qa_patterns is provided).
+
+    Output is read in chunks (when the output pipes are ready to be read) into a list of chunks,
+    and is written straight to the output files (if any) as it arrives.
+    Question patterns are only matched against a bounded tail of the output,
+    and only when new output became available since the last time they were checked.
+
+    :param proc: subprocess.Popen instance for running shell command (with non-blocking stdout/stderr/stdin)
+    :param out_fps: dict with file objects (opened in binary mode) to write output to, indexed by file descriptor
+    :param split_stderr: whether stderr output is collected separately from stdout
+    :param qa_patterns: list of 2-tuples with patterns for questions + corresponding answers
+    :param qa_wait_patterns: list of strings with patterns for non-questions
+    :param qa_timeout: amount of seconds to wait until more output is produced when there is no matching question
+    :param record_rusage: determine resource usage of process for shell command (see _poll_rusage)
+    :return: 3-tuple with stdout and stderr output (as byte sequences), and resource usage of process (or None)
+    """
+    chunks = {proc.stdout.fileno(): []}
+    if split_stderr:
+        chunks[proc.stderr.fileno()] = []
+    stdout_fd = proc.stdout.fileno()
+
+    log_debug = _log.isEnabledFor(logging.DEBUG)
+
+    # bounded tail of stdout output, to check question patterns against
+    qa_tail = bytearray()
+    # number of bytes of stdout output up to last non-whitespace character, both in total and when last answering
+    non_ws_len, answered_non_ws_len = 0, 0
+    stdout_len = 0
+    # state of last check for question patterns, to avoid re-checking when no new output is available
+    last_qa_check = None
+    match_found = False
+    last_match_time = time.monotonic()
+
+    def read_available(fds):
+        """Read available output from specified file descriptors, return whether new stdout output was read."""
+        nonlocal non_ws_len, stdout_len
+
+        new_stdout = False
+        for fd in fds:
+            while True:
+                try:
+                    chunk = os.read(fd, RUN_SHELL_CMD_CHUNK_SIZE)
+                except BlockingIOError:
+                    break
+                if not chunk:
+                    selector.unregister(fd)
+                    break
+
+                chunks[fd].append(chunk)
+                if fd in out_fps:
+                    out_fps[fd].write(chunk)
+                if log_debug:
+                    label = 'stdout' if fd == stdout_fd else 'stderr'
+                    _log.debug(f"Captured {label}: {chunk.decode(errors='ignore').rstrip()}")
+
+                # note: we assume that there won't be any questions in stderr output
+                if fd == stdout_fd:
+                    new_stdout = True
+                    stdout_len += len(chunk)
+                    if chunk.strip():
+                        non_ws_len = stdout_len - (len(chunk) - len(chunk.rstrip()))
+                    if qa_patterns:
+                        qa_tail.extend(chunk)
+                        if len(qa_tail) > QA_TAIL_SIZE:
+                            del qa_tail[:-QA_TAIL_SIZE]
+
+        return new_stdout
+
+    selector = selectors.DefaultSelector()
+    try:
+        for fd in chunks:
+            selector.register(fd, selectors.EVENT_READ)
+
+        exit_code = None
+        while exit_code is None:
+            ready = [key.fd for key, _ in selector.select(timeout=QA_CHECK_INTERVAL_SECS)] if selector.get_map() else []
+            if ready:
+                read_available(ready)
+            elif not selector.get_map():
+                # output pipes were closed, but process may still be running
+                time.sleep(QA_CHECK_INTERVAL_SECS)
+
+            if qa_patterns:
+                # only check for question patterns if additional output is available
+                # compared to last time a question was answered;
+                # use empty list of question patterns if no extra output (except for whitespace) is available
+                # we do always need to check for wait patterns though!
+                active_qa_patterns = qa_patterns if non_ws_len != answered_non_ws_len else []
+
+                # outcome of checking patterns can only change if new output is available,
+                # or if the set of active question patterns changed
+                qa_check = (stdout_len, bool(active_qa_patterns))
+                if qa_check != last_qa_check:
+                    match_found = _answer_question(bytes(qa_tail), proc, active_qa_patterns, qa_wait_patterns)
+                    last_qa_check = qa_check
+                    if match_found and active_qa_patterns:
+                        answered_non_ws_len = non_ws_len
+
+                if match_found:
+                    last_match_time = time.monotonic()
+                else:
+                    time_no_match = time.monotonic() - last_match_time
+                    if time_no_match > qa_timeout:
+                        tail = qa_tail.decode(errors='ignore')[-1000:]
+                        _log.info(f"Last output of interactive shell command before giving up: {tail}")
+                        error_msg = "No matching questions found for current command output, "
+                        error_msg += f"giving up after {qa_timeout} seconds!"
+                        raise EasyBuildError(error_msg)
+                    _log.debug(f"{time_no_match:0.1f} seconds without match in output of interactive shell command")
+
+            if record_rusage:
+                exit_code, rusage = _poll_rusage(proc)
+            else:
+                exit_code, rusage = proc.poll(), None
+
+        # collect last bit of output once processed has exited
+        read_available(list(selector.get_map()))
+    finally:
+        selector.close()
+
+    stdout = b''.join(chunks[stdout_fd])
+    stderr = b''.join(chunks[proc.stderr.fileno()]) if split_stderr else b''
+
+    return stdout, stderr, rusage
+
+
 @run_shell_cmd_cache
 def run_shell_cmd(cmd, fail_on_error=True, split_stderr=False, stdin=None, env=None,
                   hidden=False, in_dry_run=False, verbose_dry_run=False, work_dir=None, use_bash=True,
@@ -517,6 +681,9 @@ def run_shell_cmd(cmd, fail_on_error=True, split_stderr=False, stdin=None, env=N
         log_msg += f" (via thread with ID {thread_id})"
     _log.info(log_msg)
 
+    recorder = get_resource_usage_recorder()
+
+    start_usage = get_resource_usage()
     proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_handle, stdin=stdin_handle,
                             cwd=work_dir, env=env, shell=shell, executable=executable)
 
@@ -524,7 +691,11 @@ def run_shell_cmd(cmd, fail_on_error=True, split_stderr=False, stdin=None, env=N
     if stdin:
         stdin = stdin.encode()
 
-    if stream_output or qa_patterns:
+    output_spilled = False
+    rusage = None
+    # when resource usage is being recorded, output is also collected as it becomes available,
+    # since we need to wait for the process ourselves to determine its resource usage
+    if stream_output or qa_patterns or recorder is not None:
         # enable non-blocking access to stdout, stderr, stdin
         for channel in (proc.stdout, proc.stdin, proc.stderr):
             if channel is not None:
@@ -536,52 +707,24 @@ def run_shell_cmd(cmd, fail_on_error=True, split_stderr=False, stdin=None, env=N
             if not qa_patterns:
                 proc.stdin.close()
 
-        exit_code = None
-        stdout, stderr = b'', b''
-        check_interval_secs = 0.1
-        time_no_match = 0
-        prev_stdout = ''
-
-        while exit_code is None:
-            # collect output line by line, while checking for questions to answer (if qa_patterns is provided)
-            for line in iter(proc.stdout.readline, b''):
-                _log.debug(f"Captured stdout: {line.decode(errors='ignore').rstrip()}")
-                stdout += line
-
-            # note: we assume that there won't be any questions in stderr output
-            if split_stderr:
-                for line in iter(proc.stderr.readline, b''):
-                    stderr += line
-
-            if qa_patterns:
-                # only check for question patterns if additional output is available
-                # compared to last time a question was answered;
-                # use empty list of question patterns if no extra output (except for whitespace) is available
-                # we do always need to check for wait patterns though!
-                active_qa_patterns = qa_patterns if stdout.strip() != prev_stdout else []
-
-                if _answer_question(stdout, proc, active_qa_patterns, qa_wait_patterns):
-                    time_no_match = 0
-                    prev_stdout = stdout.strip()
-                else:
-                    # this will only run if the for loop above was *not* stopped by the break statement
-                    time_no_match += check_interval_secs
-                    if time_no_match > qa_timeout:
-                        error_msg = "No matching questions found for current command output, "
-                        error_msg += f"giving up after {qa_timeout} seconds!"
-                        raise EasyBuildError(error_msg)
-                    _log.debug(f"{time_no_match:0.1f} seconds without match in output of interactive shell command")
-
-            time.sleep(check_interval_secs)
-
-            exit_code = proc.poll()
+        # output is written straight to the output file(s) as it becomes available
+        out_fps = {}
+        if output_file:
+            try:
+                out_fps[proc.stdout.fileno()] = open(cmd_out_fp, 'wb')
+                if split_stderr:
+                    out_fps[proc.stderr.fileno()] = open(cmd_err_fp, 'wb')
+            except IOError as err:
+                raise EasyBuildError(f"Failed to open temporary file for command output: {err}")
+            output_spilled = True
 
-        # collect last bit of output once processed has exited
-        for line in iter(proc.stdout.readline, b''):
-            _log.debug(f"Captured stdout: {line.decode(errors='ignore').rstrip()}")
-            stdout += line
-        if split_stderr:
-            stderr += proc.stderr.read() or b''
+        try:
+            (stdout, stderr, rusage) = _stream_cmd_output(proc, out_fps, split_stderr, qa_patterns,
+                                                          qa_wait_patterns, qa_timeout,
+                                                          record_rusage=recorder is not None)
+        finally:
+            for out_fp in out_fps.values():
+                out_fp.close()
     else:
         (stdout, stderr) = proc.communicate(input=stdin)
 
@@ -592,8 +735,8 @@ def run_shell_cmd(cmd, fail_on_error=True, split_stderr=False, stdin=None, env=N
     output = stdout.decode(encoding, 'ignore')
     stderr = stderr.decode(encoding, 'ignore') if split_stderr else None
 
-    # store command output to temporary file(s)
-    if output_file:
+    # store command output to temporary file(s) (unless it was already written while streaming the output)
+    if output_file and not output_spilled:
         try:
             with open(cmd_out_fp, 'w') as fp:
                 fp.write(output)
@@ -607,6 +750,12 @@ def run_shell_cmd(cmd, fail_on_error=True, split_stderr=False, stdin=None, env=N
                             work_dir=work_dir, out_file=cmd_out_fp, err_file=cmd_err_fp, cmd_sh=cmd_sh,
                             thread_id=thread_id, task_id=task_id)
 
+    if recorder is not None:
+        # peak memory usage of this particular command (and its descendants)
+        max_rss = rusage.ru_maxrss * MAXRSS_UNIT if rusage else None
+        recorder.add_event(cmd_name, RESOURCE_USAGE_CAT_SHELL_CMD, start_usage, get_resource_usage(),
+                           max_rss=max_rss, cmd=cmd_str, exit_code=res.exit_code, work_dir=work_dir)
+
     if with_hooks:
         run_hook_kwargs = {
             'exit_code': res.exit_code,
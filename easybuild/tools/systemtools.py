@@ -40,6 +40,7 @@ import errno
 import fcntl
 import grp  # @UnresolvedImport
 import io
+import json
 import os
 import platform
 import pwd
@@ -48,8 +49,10 @@ import shutil
 import struct
 import sys
 import termios
+import threading
 import warnings
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from ctypes.util import find_library
 from socket import gethostname
 
@@ -77,10 +80,10 @@ except ImportError:
     pass
 
 from easybuild.base import fancylogger
-from easybuild.tools import LooseVersion
+from easybuild.tools import version_sort_key
 from easybuild.tools.build_log import EasyBuildError, EasyBuildExit, print_warning
-from easybuild.tools.config import IGNORE
-from easybuild.tools.filetools import is_readable, read_file, which
+from easybuild.tools.config import IGNORE, build_option, build_options_initialized
+from easybuild.tools.filetools import is_readable, mkdir, read_file, which, write_file
 from easybuild.tools.run import run_shell_cmd, subprocess_popen_text
 
 
@@ -190,6 +193,17 @@ RPM = 'rpm'
 DPKG = 'dpkg'
 ZYPPER = 'zypper'
 
+BOOT_ID_FP = '/proc/sys/kernel/random/boot_id'
+DPKG_STATUS_FP = '/var/lib/dpkg/status'
+RPMDB_PATHS = ['/var/lib/rpm', '/usr/lib/sysimage/rpm']
+
+# inventory of installed OS packages, per package manager (see get_os_pkgs_inventory)
+_os_pkgs_inventory = {}
+# results of check_os_dependency
+_os_dependency_cache = {}
+# snapshot of system information (see get_system_info_snapshot)
+_system_info_snapshot = None
+
 SYSTEM_TOOLS = {
     '7z': "extracting sources (.iso)",
     'bunzip2': "decompressing sources (.bz2, .tbz, .tbz2, ...)",
@@ -924,11 +938,160 @@ def get_os_version():
         return UNKNOWN
 
 
+def get_sysinfo_cache_dir():
+    """
+    Determine directory to persist information on the system in, as specified via --sysinfo-cache-dir;
+    returns None if not specified, or if the EasyBuild configuration is not set up (yet).
+    """
+    if build_options_initialized():
+        return build_option('sysinfo_cache_dir', default=None)
+    return None
+
+
+def det_os_pkgs_db_mtime(pkg_cmd):
+    """
+    Determine modification time of database of installed OS packages for specified package manager.
+
+    :param pkg_cmd: package manager command (RPM or DPKG)
+    :return: last modification time of package database, or None if it could not be determined
+    """
+    if pkg_cmd == DPKG:
+        db_paths = [DPKG_STATUS_FP]
+    elif pkg_cmd == RPM:
+        db_paths = []
+        for rpmdb_path in RPMDB_PATHS:
+            if os.path.isdir(rpmdb_path):
+                db_paths.extend(os.path.join(rpmdb_path, x) for x in os.listdir(rpmdb_path))
+    else:
+        db_paths = []
+
+    mtimes = []
+    for db_path in db_paths:
+        try:
+            mtimes.append(os.stat(db_path).st_mtime)
+        except OSError:
+            pass
+
+    return max(mtimes) if mtimes else None
+
+
+def parse_dpkg_status(txt):
+    """
+    Parse contents of dpkg status file, and determine names of installed packages.
+
+    Packages of which only configuration files are left are not considered to be installed.
+
+    :param txt: contents of dpkg status file
+    :return: set of names of installed packages (both with and without architecture qualifier)
+    """
+    pkgs = set()
+    for stanza in re.split(r'\n\s*\n', txt):
+        fields = {}
+        for line in stanza.splitlines():
+            if line and not line[0].isspace() and ':' in line:
+                key, value = line.split(':', 1)
+                fields[key] = value.strip()
+
+        status = fields.get('Status', '').split()
+        if 'Package' in fields and status and status[-1] not in ('config-files', 'not-installed'):
+            pkgs.add(fields['Package'])
+            if 'Architecture' in fields:
+                pkgs.add('%s:%s' % (fields['Package'], fields['Architecture']))
+
+    return pkgs
+
+
+def parse_rpm_inventory(txt):
+    """
+    Parse output of 'rpm -qa' (using query format '%{NAME} %{VERSION} %{RELEASE} %{ARCH}'),
+    and determine names of installed packages.
+
+    :param txt: output of 'rpm -qa' command
+    :return: set of names of installed packages, incl. variants that 'rpm -q' recognizes
+             (<name>-<version>, <name>-<version>-<release>, <name>.<arch>, ...)
+    """
+    pkgs = set()
+    for line in txt.splitlines():
+        fields = line.split()
+        if len(fields) == 4:
+            name, version, release, arch = fields
+            pkgs.update([
+                name,
+                '%s.%s' % (name, arch),
+                '%s-%s' % (name, version),
+                '%s-%s-%s' % (name, version, release),
+                '%s-%s-%s.%s' % (name, version, release, arch),
+            ])
+
+    return pkgs
+
+
+def get_os_pkgs_inventory(pkg_cmd):
+    """
+    Get inventory of installed OS packages for specified package manager.
+
+    The inventory is determined only once per session (via a single 'rpm -qa' command, or by parsing the dpkg status
+    file), and is persisted in the directory specified via --sysinfo-cache-dir (if any), for as long as the
+    package database is not modified.
+
+    :param pkg_cmd: package manager command (RPM or DPKG)
+    :return: set of names of installed packages, or None if inventory could not be determined
+    """
+    if pkg_cmd in _os_pkgs_inventory:
+        return _os_pkgs_inventory[pkg_cmd]
+
+    pkgs = None
+    db_mtime = det_os_pkgs_db_mtime(pkg_cmd)
+
+    cache_dir = get_sysinfo_cache_dir()
+    cache_fp = None
+    if cache_dir and db_mtime is not None:
+        cache_fp = os.path.join(cache_dir, 'os-pkgs-%s-%s.json' % (pkg_cmd, gethostname()))
+        if os.path.exists(cache_fp):
+            try:
+                cached = json.loads(read_file(cache_fp))
+                if cached.get('mtime') == db_mtime:
+                    pkgs = set(cached['packages'])
+                    _log.info("Loaded inventory of %d installed OS packages from %s", len(pkgs), cache_fp)
+            except (EasyBuildError, KeyError, TypeError, ValueError) as err:
+                _log.warning("Failed to load inventory of installed OS packages from %s: %s", cache_fp, err)
+
+    if pkgs is None:
+        if pkg_cmd == DPKG and is_readable(DPKG_STATUS_FP):
+            pkgs = parse_dpkg_status(read_file(DPKG_STATUS_FP))
+        elif pkg_cmd == RPM and which(RPM):
+            # unset $LD_LIBRARY_PATH to avoid broken rpm command due to loaded dependencies
+            # see https://github.com/easybuilders/easybuild-easyconfigs/pull/4179
+            cmd = "unset LD_LIBRARY_PATH && %s -qa --qf '%%{NAME} %%{VERSION} %%{RELEASE} %%{ARCH}\\n'" % RPM
+            res = run_shell_cmd(cmd, fail_on_error=False, in_dry_run=True, hidden=True,
+                                output_file=False, stream_output=False)
+            if res.exit_code == EasyBuildExit.SUCCESS:
+                pkgs = parse_rpm_inventory(res.output)
+
+        if pkgs:
+            _log.info("Determined inventory of %d installed OS packages using %s", len(pkgs), pkg_cmd)
+            if cache_fp:
+                try:
+                    mkdir(cache_dir, parents=True)
+                    write_file(cache_fp, json.dumps({'mtime': db_mtime, 'packages': sorted(pkgs)}))
+                except EasyBuildError as err:
+                    _log.warning("Failed to persist inventory of installed OS packages to %s: %s", cache_fp, err)
+        else:
+            # don't rely on empty inventory, fall back to querying package manager for each OS dependency
+            pkgs = None
+
+    _os_pkgs_inventory[pkg_cmd] = pkgs
+    return pkgs
+
+
 def check_os_dependency(dep):
     """
     Check if dependency is available from OS.
     """
-    # - uses rpm -q and dpkg -s --> can be run as non-root!!
+    if dep in _os_dependency_cache:
+        return _os_dependency_cache[dep]
+
+    # - uses inventory of installed packages, rpm -q and dpkg -s --> can be run as non-root!!
     # - fallback on which
     # - should be extended to files later?
     found = False
@@ -953,7 +1116,12 @@ def check_os_dependency(dep):
         pkg_cmds = [RPM, DPKG]
 
     for pkg_cmd in pkg_cmds:
-        if which(pkg_cmd):
+        pkgs = get_os_pkgs_inventory(pkg_cmd) if pkg_cmd in (DPKG, RPM) else None
+        if pkgs is not None:
+            found = dep in pkgs
+            if found:
+                break
+        elif which(pkg_cmd):
             cmd = ' '.join([
                 # unset $LD_LIBRARY_PATH to avoid broken rpm command due to loaded dependencies
                 # see https://github.com/easybuilders/easybuild-easyconfigs/pull/4179
@@ -983,6 +1151,7 @@ def check_os_dependency(dep):
                 # Returned something else than an int -> Error
                 found = False
 
+    _os_dependency_cache[dep] = found
     return found
 
 
@@ -1135,7 +1304,7 @@ def get_cuda_architectures(path, section_type):
         if code_matches:
             # convert match tuples into unique list of cuda compute capabilities
             # e.g. [('8', '6'), ('8', '6'), ('9', '0')] -> ['8.6', '9.0']
-            cc_archs = sorted(['.'.join(m) for m in set(code_matches)], key=LooseVersion)
+            cc_archs = sorted(['.'.join(m) for m in set(code_matches)], key=version_sort_key)
         else:
             # Try to be clear in the warning... did we not find elf/ptx code sections at all? or was the arch missing?
             section_regex = re.compile(f'Fatbin {section_type} code')
@@ -1320,28 +1489,160 @@ def find_library_path(lib_filename):
     return lib_abspath
 
 
+class SystemInfoSnapshot:
+    """
+    Snapshot of information on the system: each fact is only probed once (on first use),
+    except for volatile facts which are probed every time they are used.
+
+    Facts that can not change as long as the system is not rebooted can be persisted per host,
+    so they can be reused across EasyBuild sessions (see get_system_info_snapshot).
+    """
+
+    # facts included in system info (see get_system_info)
+    SYSTEM_INFO_KEYS = [
+        'core_count', 'total_memory', 'cpu_arch', 'cpu_arch_name', 'cpu_model', 'cpu_speed', 'cpu_vendor',
+        'gcc_version', 'hostname', 'glibc_version', 'os_name', 'os_type', 'os_version', 'platform_name',
+        'python_version', 'system_python_path', 'system_gcc_path',
+    ]
+
+    # facts that depend on the environment or on the active Python interpreter,
+    # which are never retained in a snapshot (and hence never persisted)
+    VOLATILE_KEYS = ['core_count', 'gcc_version', 'python_version', 'system_gcc_path', 'system_python_path']
+
+    def __init__(self, facts=None):
+        """
+        Constructor for SystemInfoSnapshot class
+
+        :param facts: dictionary with already known facts (for example loaded from a persisted snapshot)
+        """
+        # functions are looked up when a fact is probed, which allows mocking them in tests
+        self.probes = {
+            'core_count': lambda: get_avail_core_count(),
+            'cpu_arch': lambda: get_cpu_architecture(),
+            'cpu_arch_name': lambda: get_cpu_arch_name(),
+            'cpu_features': lambda: get_cpu_features(),
+            'cpu_model': lambda: get_cpu_model(),
+            'cpu_speed': lambda: get_cpu_speed(),
+            'cpu_vendor': lambda: get_cpu_vendor(),
+            'gcc_version': lambda: get_tool_version('gcc', version_option='-v'),
+            'glibc_version': lambda: get_glibc_version(),
+            'gpu_info': lambda: get_gpu_info(),
+            'hostname': lambda: gethostname(),
+            'os_name': lambda: get_os_name(),
+            'os_type': lambda: get_os_type(),
+            'os_version': lambda: get_os_version(),
+            'platform_name': lambda: get_platform_name(),
+            'python_version': lambda: '; '.join(sys.version.split('\n')),
+            'system_gcc_path': lambda: which('gcc'),
+            'system_python_path': lambda: which('python'),
+            'total_memory': lambda: get_total_memory(),
+        }
+        self.facts = {key: val for (key, val) in (facts or {}).items()
+                      if key in self.probes and key not in self.VOLATILE_KEYS}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Get value for specified fact, probe it if it's not known yet (or if it's a volatile fact)."""
+        if key not in self.facts:
+            if key not in self.probes:
+                raise EasyBuildError("Unknown system fact: %s", key)
+            value = self.probes[key]()
+            if key in self.VOLATILE_KEYS:
+                return value
+            with self.lock:
+                self.facts.setdefault(key, value)
+
+        return self.facts[key]
+
+    def probe(self, keys=None):
+        """
+        Probe specified facts (or all facts) that are not known yet (or that are volatile), concurrently.
+
+        :param keys: list of facts to probe (all facts if None)
+        :return: dictionary with value for each of the specified facts
+        """
+        if keys is None:
+            keys = sorted(self.probes)
+        todo = [key for key in keys if key not in self.facts]
+
+        if len(todo) > 1:
+            with ThreadPoolExecutor(max_workers=len(todo)) as thread_pool:
+                probed = dict(zip(todo, thread_pool.map(self.get, todo)))
+        else:
+            probed = {key: self.get(key) for key in todo}
+
+        return {key: probed[key] if key in probed else self.facts[key] for key in keys}
+
+    def persistent_facts(self):
+        """Return dictionary with facts that can be persisted across sessions."""
+        return dict(self.facts)
+
+
+def get_boot_id():
+    """Determine unique ID for current boot of system (None if it can not be determined)."""
+    boot_id = None
+    if is_readable(BOOT_ID_FP):
+        boot_id = read_file(BOOT_ID_FP).strip() or None
+    return boot_id
+
+
+def get_system_info_snapshot():
+    """
+    Get snapshot of system information, which is only created once per session.
+
+    If a directory is specified via --sysinfo-cache-dir, facts that can only change when the system is rebooted
+    are loaded from a snapshot that was persisted for this host, as long as the boot ID is unchanged.
+    """
+    global _system_info_snapshot
+
+    if _system_info_snapshot is None:
+        facts = {}
+        cache_fp = None
+        boot_id = get_boot_id()
+        cache_dir = get_sysinfo_cache_dir()
+        if cache_dir and boot_id:
+            cache_fp = os.path.join(cache_dir, 'sysinfo-%s.json' % gethostname())
+            if os.path.exists(cache_fp):
+                try:
+                    cached = json.loads(read_file(cache_fp))
+                    if cached.get('boot_id') == boot_id:
+                        facts = cached['facts']
+                        _log.info("Loaded %d facts on system from %s", len(facts), cache_fp)
+                except (EasyBuildError, KeyError, TypeError, ValueError) as err:
+                    _log.warning("Failed to load system information from %s: %s", cache_fp, err)
+
+        _system_info_snapshot = SystemInfoSnapshot(facts=facts)
+        _system_info_snapshot.cache_fp = cache_fp
+        _system_info_snapshot.boot_id = boot_id
+
+    return _system_info_snapshot
+
+
+def persist_system_info_snapshot():
+    """Persist facts in snapshot of system information, if a location to do so is available."""
+    snapshot = get_system_info_snapshot()
+    if snapshot.cache_fp:
+        try:
+            mkdir(os.path.dirname(snapshot.cache_fp), parents=True)
+            cached = {'boot_id': snapshot.boot_id, 'facts': snapshot.persistent_facts()}
+            write_file(snapshot.cache_fp, json.dumps(cached, sort_keys=True))
+        except (EasyBuildError, TypeError) as err:
+            _log.warning("Failed to persist system information to %s: %s", snapshot.cache_fp, err)
+
+
 def get_system_info():
     """Return a dictionary with system information."""
-    python_version = '; '.join(sys.version.split('\n'))
-    return {
-        'core_count': get_avail_core_count(),
-        'total_memory': get_total_memory(),
-        'cpu_arch': get_cpu_architecture(),
-        'cpu_arch_name': get_cpu_arch_name(),
-        'cpu_model': get_cpu_model(),
-        'cpu_speed': get_cpu_speed(),
-        'cpu_vendor': get_cpu_vendor(),
-        'gcc_version': get_tool_version('gcc', version_option='-v'),
-        'hostname': gethostname(),
-        'glibc_version': get_glibc_version(),
-        'os_name': get_os_name(),
-        'os_type': get_os_type(),
-        'os_version': get_os_version(),
-        'platform_name': get_platform_name(),
-        'python_version': python_version,
-        'system_python_path': which('python'),
-        'system_gcc_path': which('gcc'),
-    }
+    snapshot = get_system_info_snapshot()
+
+    keys = SystemInfoSnapshot.SYSTEM_INFO_KEYS
+    missing_keys = [key for key in keys if key not in snapshot.facts and key not in snapshot.VOLATILE_KEYS]
+
+    # volatile facts are probed again every time, since they depend on the environment (like $PATH)
+    system_info = snapshot.probe(keys)
+    if missing_keys:
+        persist_system_info_snapshot()
+
+    return system_info
 
 
 def use_group(group_name):
@@ -36,6 +36,7 @@ Authors:
 * Ward Poelmans (Ghent University)
 """
 import copy
+import json
 import os
 import re
 import sys
@@ -51,9 +52,9 @@ from easybuild.tools.config import build_option
 from easybuild.tools.filetools import find_easyconfigs, get_cwd, mkdir, read_file, write_file
 from easybuild.tools.github import GITHUB_EASYBLOCKS_REPO, GITHUB_EASYCONFIGS_REPO, create_gist, post_comment_in_issue
 from easybuild.tools.jenkins import aggregate_xml_in_dirs
-from easybuild.tools.parallelbuild import build_easyconfigs_in_parallel
+from easybuild.tools.resource_usage import aggregate_resource_usage, resource_usage_file_paths
 from easybuild.tools.robot import resolve_dependencies
-from easybuild.tools.systemtools import UNKNOWN, get_gpu_info, get_system_info
+from easybuild.tools.systemtools import UNKNOWN, get_system_info, get_system_info_snapshot
 from easybuild.tools.version import FRAMEWORK_VERSION, EASYBLOCKS_VERSION
 
 
@@ -160,6 +161,9 @@ def regtest(easyconfig_paths, modtool, build_specs=None):
     if build_option('sequential'):
         return build_easyconfigs(easyconfigs, output_dir, test_results)
     else:
+        # job backends are only needed when regression test is submitted as jobs
+        from easybuild.tools.parallelbuild import build_easyconfigs_in_parallel
+
         resolved = resolve_dependencies(easyconfigs, modtool)
 
         cmd = "eb %(spec)s --regtest --sequential -ld --testoutput=%(output_dir)s"
@@ -183,6 +187,37 @@ def session_state():
     }
 
 
+def resource_usage_overview(ecs_with_res):
+    """
+    Compose overview (in Markdown format) of resource usage per step, aggregated over all installations
+    for which resource usage was recorded (see --record-resource-usage).
+    """
+    summary = {}
+    for _, ec_res in ecs_with_res:
+        log_file = ec_res.get('log_file')
+        if log_file:
+            resource_usage_file = resource_usage_file_paths(log_file)[0]
+            if os.path.exists(resource_usage_file):
+                for step, usage in json.loads(read_file(resource_usage_file))['steps'].items():
+                    aggregate_resource_usage(summary, step, usage)
+
+    overview = []
+    if summary:
+        mib = 1024.0 * 1024
+        overview.extend([
+            "#### Resource usage per step",
+            "step | count | wall time (s) | CPU time (s) | peak RSS (MiB) | read (MiB) | written (MiB)",
+            "--- | ---: | ---: | ---: | ---: | ---: | ---:",
+        ])
+        for step, usage in summary.items():
+            overview.append("%s | %d | %.1f | %.1f | %.1f | %.1f | %.1f" % (
+                step, usage['count'], usage['wall_time'], usage['cpu_user'] + usage['cpu_sys'],
+                usage['max_rss'] / mib, usage['read_bytes'] / mib, usage['write_bytes'] / mib))
+        overview.append("")
+
+    return overview
+
+
 def create_test_report(msg, ecs_with_res, init_session_state, pr_nrs=None, gist_log=False, easyblock_pr_nrs=None,
                        ec_parse_error=None):
     """
@@ -281,6 +316,8 @@ def create_test_report(msg, ecs_with_res, init_session_state, pr_nrs=None, gist_
     end_time = strftime(time_format, end_time)
     test_report.extend(["#### Time info", " * start: %s" % start_time, " * end: %s" % end_time, ""])
 
+    test_report.extend(resource_usage_overview(ecs_with_res))
+
     eb_config = sorted(init_session_state['easybuild_configuration'])
     test_report.extend([
         "#### EasyBuild info",
@@ -369,7 +406,7 @@ def post_pr_test_report(pr_nrs, repo_type, test_report, msg, init_session_state,
         system_info['cpu_model'] += " (%s)" % system_info['cpu_arch_name']
 
     # add GPU info, if known
-    gpu_info = get_gpu_info()
+    gpu_info = get_system_info_snapshot().get('gpu_info')
     gpu_str = ""
     if gpu_info:
         for vendor, vendor_gpu in gpu_info.items():
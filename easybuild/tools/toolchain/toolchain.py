@@ -52,7 +52,10 @@ Authors:
 * Stijn De Weirdt (Ghent University)
 * Kenneth Hoste (Ghent University)
 """
+import bisect
 import copy
+import hashlib
+import json
 import os
 import stat
 import sys
@@ -61,8 +64,9 @@ import tempfile
 from easybuild.base import fancylogger
 from easybuild.tools.build_log import EasyBuildError, dry_run_msg, print_warning
 from easybuild.tools.config import build_option, install_path
-from easybuild.tools.environment import setvar
-from easybuild.tools.filetools import adjust_permissions, copy_file, find_eb_script, mkdir, read_file, which, write_file
+from easybuild.tools.environment import get_changes, setvar
+from easybuild.tools.filetools import adjust_permissions, copy_file, find_eb_script, mkdir, read_file, remove_dir, which
+from easybuild.tools.filetools import write_file
 from easybuild.tools.module_generator import dependencies_for
 from easybuild.tools.modules import get_software_root, get_software_root_env_var_name
 from easybuild.tools.modules import get_software_version, get_software_version_env_var_name
@@ -80,6 +84,10 @@ CCACHE = 'ccache'
 F90CACHE = 'f90cache'
 
 RPATH_WRAPPERS_SUBDIR = 'rpath_wrappers'
+# prefix for (reusable) directories with RPATH wrappers, which are keyed by a hash of the inputs for the wrappers
+RPATH_WRAPPERS_CACHE_DIR_PREFIX = 'eb-rpath-wrappers-'
+# file that marks that a directory with RPATH wrappers is complete (and can be reused)
+RPATH_WRAPPERS_COMPLETE_MARKER = '.complete'
 
 # available capabilities of toolchains
 # values match method names supported by Toolchain class (except for 'cuda')
@@ -201,6 +209,8 @@ class Toolchain:
         self.dependencies = []
         self.toolchain_dep_mods = []
         self.cached_compilers = set()
+        # index of entries in $*PATH environment variables relevant for header files (see _det_cpp_headers_path_index)
+        self.cpp_headers_path_index = None
 
         if name is None:
             name = self.NAME
@@ -1016,9 +1026,13 @@ class Toolchain:
         """
         Put RPATH wrapper script in place for compiler and linker commands
 
+        If no location for the RPATH wrappers is specified, they are created in a directory in the temporary
+        directory that is keyed by a hash of the inputs for the wrappers (original commands, RPATH filter,
+        RPATH include paths, Python command, ...), so they can be reused when preparing a toolchain again.
+
         :param rpath_filter_dirs: extra directories to include in RPATH filter (e.g. build dir, tmpdir, ...)
         :param rpath_include_dirs: extra directories to include in RPATH
-        :param rpath_wrappers_dir: directory in which to create RPATH wrappers (tmpdir is created if None)
+        :param rpath_wrappers_dir: directory in which to create RPATH wrappers (tmpdir is used if None)
         """
         if get_os_type() == LINUX:
             self.log.info("Putting RPATH wrappers in place...")
@@ -1041,20 +1055,12 @@ class Toolchain:
             if lib_stubs_pattern not in rpath_filter_dirs:
                 rpath_filter_dirs.append(lib_stubs_pattern)
 
-        # directory where all RPATH wrapper script will be placed;
-        if rpath_wrappers_dir is None:
-            wrappers_dir = tempfile.mkdtemp()
-        else:
-            wrappers_dir = rpath_wrappers_dir
+        if rpath_wrappers_dir is not None:
             # disable logging in RPATH wrapper scripts when they may be exported for use outside of EasyBuild
             enable_wrapper_log = False
             # copy rpath_args.py script to sit alongside RPATH wrapper scripts
             copy_rpath_args_py = True
 
-        # it's important to honor RPATH_WRAPPERS_SUBDIR, see is_rpath_wrapper method
-        wrappers_dir = os.path.join(wrappers_dir, RPATH_WRAPPERS_SUBDIR)
-        mkdir(wrappers_dir, parents=True)
-
         # must also wrap compilers commands, required e.g. for Clang ('gcc' on OS X)?
         c_comps, fortran_comps = self.compilers()
         linkers = self.linkers()
@@ -1063,15 +1069,16 @@ class Toolchain:
 
         # copy rpath_args.py script along RPATH wrappers, if desired
         if copy_rpath_args_py:
-            copy_file(rpath_args_py, wrappers_dir)
             # use path for %(rpath_args)s template value relative to location of the RPATH wrapper script,
             # to avoid that the RPATH wrapper scripts rely on a script that's located elsewhere;
             # that's mostly important when RPATH wrapper scripts are retained to be used outside of EasyBuild;
             # we assume that each RPATH wrapper script is created in a separate subdirectory (see wrapper_dir below);
             # ${TOPDIR} is defined in template for RPATH wrapper scripts, refers to parent dir of RPATH wrapper script
-            rpath_args_py = os.path.join('${TOPDIR}', '..', os.path.basename(rpath_args_py))
+            rpath_args_py_value = os.path.join('${TOPDIR}', '..', os.path.basename(rpath_args_py))
+        else:
+            rpath_args_py_value = rpath_args_py
 
-        rpath_wrapper_template = find_eb_script('rpath_wrapper_template.sh.in')
+        rpath_wrapper_template_txt = read_file(find_eb_script('rpath_wrapper_template.sh.in'))
 
         # figure out list of patterns to use in rpath filter
         rpath_filter = build_option('rpath_filter')
@@ -1084,7 +1091,8 @@ class Toolchain:
         rpath_include = ','.join(rpath_include_dirs or [])
         self.log.debug("Combined RPATH include paths: '%s'", rpath_include)
 
-        # create wrappers
+        # determine which commands to wrap
+        orig_cmds = []
         for cmd in nub(c_comps + fortran_comps + ['ld', 'ld.gold', 'ld.bfd'] + linkers):
             # Not all toolchains have fortran compilers (e.g. Clang), in which case they are 'None'
             if cmd is None:
@@ -1096,32 +1104,61 @@ class Toolchain:
                 # this may occur when building extensions
                 if self.is_rpath_wrapper(orig_cmd):
                     self.log.info("%s already seems to be an RPATH wrapper script, not wrapping it again!", orig_cmd)
-                    continue
+                else:
+                    orig_cmds.append((cmd, orig_cmd))
+            else:
+                self.log.debug("Not installing RPATH wrapper for non-existing command '%s'", cmd)
 
-                # determine location for this wrapper
-                # each wrapper is placed in its own subdirectory to enable $PATH filtering per wrapper separately
-                # avoid '+' character in directory name (for example with 'g++' command), which can cause trouble
-                # (see https://github.com/easybuilders/easybuild-easyconfigs/issues/7339)
-                wrapper_dir_name = '%s_wrapper' % cmd.replace('+', 'x')
-                wrapper_dir = os.path.join(wrappers_dir, wrapper_dir_name)
+        # directory where all RPATH wrapper script will be placed;
+        reuse_wrappers = False
+        if rpath_wrappers_dir is None:
+            key_data = [orig_cmds, rpath_filter, rpath_include, sys.executable, rpath_args_py,
+                        rpath_wrapper_template_txt, enable_wrapper_log]
+            key = hashlib.sha256(json.dumps(key_data).encode('utf-8')).hexdigest()
+            wrappers_topdir = os.path.join(tempfile.gettempdir(), RPATH_WRAPPERS_CACHE_DIR_PREFIX + key[:16])
+            if os.path.exists(os.path.join(wrappers_topdir, RPATH_WRAPPERS_COMPLETE_MARKER)):
+                self.log.info("Reusing existing RPATH wrappers in %s", wrappers_topdir)
+                reuse_wrappers = True
+            elif os.path.exists(wrappers_topdir):
+                # RPATH wrappers were only partially created, so start over
+                remove_dir(wrappers_topdir)
+        else:
+            wrappers_topdir = rpath_wrappers_dir
+
+        # it's important to honor RPATH_WRAPPERS_SUBDIR, see is_rpath_wrapper method
+        wrappers_dir = os.path.join(wrappers_topdir, RPATH_WRAPPERS_SUBDIR)
+        if not reuse_wrappers:
+            mkdir(wrappers_dir, parents=True)
+            if copy_rpath_args_py:
+                copy_file(rpath_args_py, wrappers_dir)
 
-                cmd_wrapper = os.path.join(wrapper_dir, cmd)
+        # create wrappers
+        for cmd, orig_cmd in orig_cmds:
+            # determine location for this wrapper
+            # each wrapper is placed in its own subdirectory to enable $PATH filtering per wrapper separately
+            # avoid '+' character in directory name (for example with 'g++' command), which can cause trouble
+            # (see https://github.com/easybuilders/easybuild-easyconfigs/issues/7339)
+            wrapper_dir_name = '%s_wrapper' % cmd.replace('+', 'x')
+            wrapper_dir = os.path.join(wrappers_dir, wrapper_dir_name)
+
+            cmd_wrapper = os.path.join(wrapper_dir, cmd)
+
+            # enable debug mode in wrapper script by specifying location for log file
+            if enable_wrapper_log:
+                rpath_wrapper_log = os.path.join(tempfile.gettempdir(), f'rpath_wrapper_{cmd}.log')
+            else:
+                rpath_wrapper_log = '/dev/null'
 
+            if not reuse_wrappers:
                 # make *very* sure we don't wrap around ourselves and create a fork bomb...
                 if os.path.exists(cmd_wrapper) and os.path.exists(orig_cmd) and os.path.samefile(orig_cmd, cmd_wrapper):
                     raise EasyBuildError("Refusing to create a fork bomb, which(%s) == %s", cmd, orig_cmd)
 
-                # enable debug mode in wrapper script by specifying location for log file
-                if enable_wrapper_log:
-                    rpath_wrapper_log = os.path.join(tempfile.gettempdir(), f'rpath_wrapper_{cmd}.log')
-                else:
-                    rpath_wrapper_log = '/dev/null'
-
                 # complete template script and put it in place
-                cmd_wrapper_txt = read_file(rpath_wrapper_template) % {
+                cmd_wrapper_txt = rpath_wrapper_template_txt % {
                     'orig_cmd': orig_cmd,
                     'python': sys.executable,
-                    'rpath_args_py': rpath_args_py,
+                    'rpath_args_py': rpath_args_py_value,
                     'rpath_filter': rpath_filter,
                     'rpath_include': rpath_include,
                     'rpath_wrapper_log': rpath_wrapper_log,
@@ -1138,12 +1175,14 @@ class Toolchain:
                     write_file(cmd_wrapper, cmd_wrapper_txt)
                 adjust_permissions(cmd_wrapper, stat.S_IXUSR)
 
-                # prepend location to this wrapper to $PATH
-                setvar('PATH', '%s:%s' % (wrapper_dir, os.getenv('PATH')))
+            # prepend location to this wrapper to $PATH (only once)
+            path = [p for p in os.getenv('PATH', '').split(os.pathsep) if p != wrapper_dir]
+            setvar('PATH', os.pathsep.join([wrapper_dir] + path))
 
-                self.log.info("RPATH wrapper script for %s: %s (log: %s)", orig_cmd, which(cmd), rpath_wrapper_log)
-            else:
-                self.log.debug("Not installing RPATH wrapper for non-existing command '%s'", cmd)
+            self.log.info("RPATH wrapper script for %s: %s (log: %s)", orig_cmd, cmd_wrapper, rpath_wrapper_log)
+
+        if rpath_wrappers_dir is None and not reuse_wrappers:
+            write_file(os.path.join(wrappers_topdir, RPATH_WRAPPERS_COMPLETE_MARKER), '')
 
     def handle_sysroot(self):
         """
@@ -1189,6 +1228,29 @@ class Toolchain:
             self._add_dependency_cpp_headers(dep_root, extra_dirs=cpp)
             self._add_dependency_linker_paths(dep_root, extra_dirs=ld)
 
+    def _det_cpp_headers_path_index(self):
+        """
+        Determine index of entries in $*PATH environment variables that are taken into account to determine
+        subdirectories with header files of dependencies (see _add_dependency_cpp_headers):
+        a sorted list of (path, index of environment variable, position in environment variable) tuples.
+
+        The index is only (re)created if any of the relevant environment variables changed.
+        """
+        keys = [y for x in SEARCH_PATH['cpp_headers'].values() for y in x if y.endswith('PATH')]
+        vals = tuple(os.getenv(key) for key in keys)
+
+        if self.cpp_headers_path_index is None or self.cpp_headers_path_index[0] != vals:
+            entries = []
+            for key_idx, (key, val) in enumerate(zip(keys, vals)):
+                if val:
+                    self.log.debug(f"${key} when determining subdirs of dependencies for header files: {val}")
+                    entries.extend((path, key_idx, pos) for pos, path in enumerate(val.split(':')))
+                else:
+                    self.log.debug(f"${key} not defined, not used to find subdirs of dependencies for header files")
+            self.cpp_headers_path_index = (vals, sorted(entries))
+
+        return self.cpp_headers_path_index[1]
+
     def _add_dependency_cpp_headers(self, dep_root, extra_dirs=None):
         """
         Append prepocessor paths for given dependency root directory
@@ -1196,24 +1258,23 @@ class Toolchain:
         if extra_dirs is None:
             extra_dirs = ()
 
-        for env_var in SEARCH_PATH['cpp_headers'][self.search_path['cpp_headers']]:
-            header_dirs = []
-            # take into account all $*PATH environment variables for dependencies
-            for key in [y for x in SEARCH_PATH['cpp_headers'].values() for y in x if y.endswith('PATH')]:
-                val = os.getenv(key)
-                if val:
-                    self.log.debug(f"${key} when determining subdirs of {dep_root} to retain for ${env_var}: {val}")
-                    paths = val.split(':')
-                    matching_paths = [p for p in paths if p.startswith(dep_root)]
-                    subdirs = [os.path.relpath(p, dep_root) for p in matching_paths]
-                    self.log.debug(f"Subdirectories of {dep_root} to add to ${env_var}: {subdirs}")
-                    header_dirs.extend(os.path.relpath(p, dep_root) for p in matching_paths)
-                else:
-                    self.log.debug(f"${key} not defined, not used to find subdirs of {dep_root} to use for ${env_var}")
+        # take into account all $*PATH environment variables for dependencies:
+        # entries that start with dependency root directory are next to each other in (sorted) index
+        index = self._det_cpp_headers_path_index()
+        matches = []
+        idx = bisect.bisect_left(index, (dep_root,))
+        while idx < len(index) and index[idx][0].startswith(dep_root):
+            matches.append(index[idx])
+            idx += 1
 
-            # take into account extra_dirs + only retain unique entries
-            header_dirs = unique_ordered_extend(header_dirs, extra_dirs)
+        # retain order in which paths are listed in $*PATH environment variables
+        subdirs = [os.path.relpath(path, dep_root) for (path, _, _) in sorted(matches, key=lambda x: x[1:])]
+        self.log.debug(f"Subdirectories of {dep_root} to add to header paths: {subdirs}")
 
+        # take into account extra_dirs + only retain unique entries
+        header_dirs = unique_ordered_extend(subdirs, extra_dirs)
+
+        for env_var in SEARCH_PATH['cpp_headers'][self.search_path['cpp_headers']]:
             self.log.info(f"Adding header paths to toolchain variable '{env_var}': {dep_root} (subdirs: {header_dirs})")
             self.variables.append_subdirs(env_var, dep_root, subdirs=header_dirs)
 
@@ -1245,19 +1306,28 @@ class Toolchain:
         elif isinstance(donotset, list):
             donotsetlist = donotset
 
+        env_changes = get_changes()
+
         for key, val in sorted(self.vars.items()):
             if key in donotsetlist:
                 self.log.debug("_setenv_variables: not setting environment variable %s (value: %s).", key, val)
                 continue
 
-            self.log.debug("_setenv_variables: setting environment variable %s to %s", key, val)
-            setvar(key, val, verbose=verbose)
-
             # also set unique named variables that can be used in Makefiles
             # - so you can have 'CFLAGS = $(EBVARCFLAGS)'
             # -- 'CLFLAGS = $(CFLAGS)' gives  '*** Recursive variable `CFLAGS'
             # references itself (eventually).  Stop' error
-            setvar("EBVAR%s" % key, val, verbose=False)
+            keys = [key, "EBVAR%s" % key]
+
+            # skip environment variables that were already set to this value (e.g. when preparing for extensions),
+            # except in dry run mode, where defining of environment variables is reported
+            if not self.dry_run and all(os.getenv(k) == val and env_changes.get(k) == val for k in keys):
+                self.log.debug("_setenv_variables: environment variable %s already set to %s", key, val)
+                continue
+
+            self.log.debug("_setenv_variables: setting environment variable %s to %s", key, val)
+            setvar(key, val, verbose=verbose)
+            setvar(keys[1], val, verbose=False)
 
     def get_flag(self, name):
         """Get compiler flag(s) for a certain option."""
@@ -31,6 +31,7 @@ import os
 import re
 import sys
 import tempfile
+import threading
 from datetime import datetime, timedelta
 from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered
 from unittest import TextTestRunner
@@ -38,8 +39,9 @@ from unittest import TextTestRunner
 from easybuild.base.fancylogger import getLogger, logToFile, setLogFormat
 from easybuild.framework.easyconfig.tweak import tweak_one
 from easybuild.tools.build_log import (
-    LOGGING_FORMAT, EasyBuildError, EasyBuildLog, dry_run_msg, dry_run_warning, init_logging, print_error, print_msg,
-    print_warning, stop_logging, time_str_since, raise_nosupport)
+    LOGGING_FORMAT, EasyBuildError, EasyBuildLog, collect_output, dry_run_msg, dry_run_warning, init_logging,
+    output_collected, print_collected_output, print_error, print_msg, print_warning, stop_logging, time_str_since,
+    raise_nosupport)
 from easybuild.tools.filetools import read_file, write_file
 
 
@@ -331,6 +333,38 @@ class BuildLogTest(EnhancedTestCase):
 
         self.assertErrorRegex(EasyBuildError, "Unknown named arguments", print_msg, 'foo', unknown_arg='bar')
 
+    def test_collect_output(self):
+        """Test collecting output produced via print_msg & co rather than printing it."""
+        messages = []
+        self.assertFalse(output_collected())
+        with self.mocked_stdout_stderr():
+            with collect_output(messages):
+                self.assertTrue(output_collected())
+                print_msg("testing, 1, 2, 3")
+                print_warning("this is a warning")
+                dry_run_msg("dry run")
+
+                # output is only collected for the current thread
+                thread = threading.Thread(target=print_msg, args=("in other thread",))
+                thread.start()
+                thread.join()
+
+            self.assertFalse(output_collected())
+            self.assertEqual(self.get_stdout(), "== in other thread\n")
+            self.assertEqual(self.get_stderr(), '')
+
+        expected = [
+            ("== testing, 1, 2, 3\n", False),
+            ("\nWARNING: this is a warning\n\n", True),
+            ("dry run\n", False),
+        ]
+        self.assertEqual(messages, expected)
+
+        with self.mocked_stdout_stderr():
+            print_collected_output(messages)
+            self.assertEqual(self.get_stdout(), "== testing, 1, 2, 3\ndry run\n")
+            self.assertEqual(self.get_stderr(), "\nWARNING: this is a warning\n\n")
+
     def test_time_str_since(self):
         """Test time_str_since"""
         self.assertEqual(time_str_since(datetime.now()), '< 1s')
@@ -40,8 +40,9 @@ from unittest import TextTestRunner
 import easybuild.tools.options as eboptions
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.config import ERROR, IGNORE, WARN, BuildOptions, ConfigurationVariables
-from easybuild.tools.config import build_option, build_path, get_build_log_path, get_log_filename, get_repositorypath
-from easybuild.tools.config import install_path, log_file_format, log_path, source_paths
+from easybuild.tools.config import build_option, build_options_initialized, build_path, get_build_log_path
+from easybuild.tools.config import get_log_filename, get_repositorypath, install_path, log_file_format, log_path
+from easybuild.tools.config import source_paths
 from easybuild.tools.config import update_build_option, update_build_options
 from easybuild.tools.config import DEFAULT_PATH_SUBDIRS, init_build_options
 from easybuild.tools.filetools import copy_dir, mkdir, write_file
@@ -340,6 +341,7 @@ class EasyBuildConfigTest(EnhancedTestCase):
         """Test usage of BuildOptions."""
         # delete instance of BuildOptions
         BuildOptions.__class__._instances.clear()
+        self.assertFalse(build_options_initialized())
 
         # make sure BuildOptions is a singleton class
         bo1 = BuildOptions()
@@ -354,6 +356,7 @@ class EasyBuildConfigTest(EnhancedTestCase):
             'debug': False,
             'force': True
         })
+        self.assertTrue(build_options_initialized())
         self.assertFalse(bo['debug'])
         self.assertTrue(bo['force'])
 
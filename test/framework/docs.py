@@ -25,6 +25,8 @@
 """
 Unit tests for docs.py.
 """
+import glob
+import json
 import os
 import re
 import sys
@@ -32,10 +34,11 @@ from unittest import TextTestRunner
 
 from easybuild.tools.config import module_classes
 from easybuild.tools.docs import avail_cfgfile_constants, avail_easyconfig_constants, avail_easyconfig_licenses
-from easybuild.tools.docs import avail_easyconfig_templates, avail_toolchain_opts
+from easybuild.tools.docs import LIST_SOFTWARE_CACHE_FILENAME, avail_easyconfig_templates, avail_toolchain_opts
 from easybuild.tools.docs import get_easyblock_classes, gen_easyblocks_overview_md, gen_easyblocks_overview_rst
 from easybuild.tools.docs import list_easyblocks, list_software, list_toolchains
 from easybuild.tools.docs import md_title_and_table, rst_title_and_table
+from easybuild.tools.filetools import copy_dir, read_file, write_file
 from easybuild.tools.options import EasyBuildOptions
 from easybuild.tools.utilities import mk_md_table, mk_rst_table
 from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered, init_config
@@ -889,6 +892,38 @@ class DocsTest(EnhancedTestCase):
         # expect NotImplementedError for JSON output
         self.assertRaises(NotImplementedError, list_easyblocks, output_format='json')
 
+    def test_list_software_cache(self):
+        """Test caching of information on software for list_software."""
+        test_ecs = os.path.join(self.test_prefix, 'test_ecs')
+        copy_dir(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'easyconfigs', 'v1.0'), test_ecs)
+        cache_dir = os.path.join(self.test_prefix, 'cache')
+        build_options = {
+            'list_software_cache_dir': cache_dir,
+            'robot_path': [test_ecs],
+            'silent': True,
+            'valid_module_classes': module_classes(),
+        }
+        init_config(build_options=build_options)
+
+        self.assertEqual(list_software(output_format='txt', detailed=True), LIST_SOFTWARE_DETAILED_TXT)
+        cache_path = os.path.join(cache_dir, LIST_SOFTWARE_CACHE_FILENAME)
+        self.assertExists(cache_path)
+        cache = json.loads(read_file(cache_path))
+        self.assertEqual(sorted(cache['entries']['all'].keys()),
+                         sorted(glob.glob(os.path.join(test_ecs, '*', '*', '*.eb'))))
+
+        # cached information is used for easyconfig files that were not changed
+        gcc_ec = os.path.join(test_ecs, 'g', 'GCC', 'GCC-4.6.3.eb')
+        cache['entries']['all'][gcc_ec][3]['description'] = 'cached description'
+        write_file(cache_path, json.dumps(cache))
+        self.assertIn('cached description', list_software(output_format='txt', detailed=True))
+
+        # changed easyconfig files are parsed again
+        write_file(gcc_ec, "\n# changed", append=True)
+        self.assertEqual(list_software(output_format='txt', detailed=True), LIST_SOFTWARE_DETAILED_TXT)
+        cache = json.loads(read_file(cache_path))
+        self.assertNotEqual(cache['entries']['all'][gcc_ec][3]['description'], 'cached description')
+
     def test_list_software(self):
         """Test list_software* functions."""
         build_options = {
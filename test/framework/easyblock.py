@@ -37,23 +37,26 @@ import shutil
 import sys
 import tempfile
 import textwrap
+import time
 from inspect import cleandoc
 from test.framework.github import requires_github_access
 from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered, init_config
 from unittest import TextTestRunner
 
+import easybuild.framework.easyblock as easyblock_module
 import easybuild.tools.systemtools as st
 from easybuild.base import fancylogger
-from easybuild.framework.easyblock import EasyBlock, get_easyblock_instance, BUILD_STEP
+from easybuild.framework.easyblock import EasyBlock, get_easyblock_instance, inject_checksums, BUILD_STEP
 from easybuild.framework.easyconfig import CUSTOM
 from easybuild.framework.easyconfig.easyconfig import EasyConfig, ITERATE_OPTIONS
+from easybuild.framework.easyconfig.parser import EasyConfigParser
 from easybuild.framework.easyconfig.tools import avail_easyblocks, process_easyconfig
 from easybuild.framework.extensioneasyblock import ExtensionEasyBlock
 from easybuild.tools import LooseVersion, config
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.config import get_module_syntax, update_build_option
 from easybuild.tools.filetools import change_dir, copy_dir, copy_file, mkdir, read_file, remove_dir, remove_file
-from easybuild.tools.filetools import symlink, verify_checksum, write_file
+from easybuild.tools.filetools import compute_checksum, symlink, verify_checksum, write_file
 from easybuild.tools.module_generator import module_generator
 from easybuild.tools.modules import EnvironmentModules, Lmod, reset_module_caches
 from easybuild.tools.version import get_git_revision, this_is_easybuild
@@ -2179,6 +2182,158 @@ class EasyBlockTest(EnhancedTestCase):
         ]
         self.assertRaises(EasyBuildError, eb.fetch_patches, patch_specs=patches)
 
+    def test_inject_checksums_concurrent(self):
+        """Test injecting checksums into a batch of easyconfigs, with concurrent fetching & hashing of files."""
+        sources_dir = os.path.join(self.test_prefix, 'remote')
+        ecs_dir = os.path.join(self.test_prefix, 'ecs')
+
+        # patch file is shared across all easyconfigs
+        write_file(os.path.join(sources_dir, 'shared.patch'), "this is a patch\n")
+        shared_patch_sha256 = compute_checksum(os.path.join(sources_dir, 'shared.patch'), 'sha256')
+
+        ec_tmpl = '\n'.join([
+            "easyblock = 'ConfigureMake'",
+            "name = 'test%(idx)d'",
+            "version = '1.0'",
+            "homepage = 'https://example.com'",
+            "description = 'test'",
+            "toolchain = SYSTEM",
+            "source_urls = ['file://%(sources_dir)s']",
+            "sources = ['%%(name)s-%%(version)s.tar.gz']",
+            "patches = ['shared.patch']",
+        ])
+
+        cnt = 12
+        ecs, expected_checksums = [], []
+        for idx in range(cnt):
+            src = os.path.join(sources_dir, 'test%d-1.0.tar.gz' % idx)
+            write_file(src, "source tarball #%d\n" % idx * (idx + 1))
+            expected_checksums.append(compute_checksum(src, 'sha256'))
+
+            ec_path = os.path.join(ecs_dir, 'test%d-1.0.eb' % idx)
+            write_file(ec_path, ec_tmpl % {'idx': idx, 'sources_dir': sources_dir})
+            ecs.append({'spec': ec_path, 'ec': EasyConfig(ec_path)})
+
+        os.environ['EASYBUILD_SOURCEPATH'] = os.path.join(self.test_prefix, 'sources')
+        init_config(build_options={'parallel': 4, 'pre_create_installdir': False, 'silent': False})
+
+        with self.mocked_stdout_stderr():
+            inject_checksums(ecs, 'sha256')
+            stdout = self.get_stdout()
+
+        # sources were downloaded into source path
+        for idx in range(cnt):
+            self.assertExists(os.path.join(self.test_prefix, 'sources', 't', 'test%d' % idx, 'test%d-1.0.tar.gz' % idx))
+
+        # checksums were injected in all easyconfig files
+        for idx, ec in enumerate(ecs):
+            ec_dict = EasyConfigParser(ec['spec']).get_config_dict()
+            expected = [{'test%d-1.0.tar.gz' % idx: expected_checksums[idx]}, {'shared.patch': shared_patch_sha256}]
+            self.assertEqual(ec_dict['checksums'], expected)
+
+        # output is produced serially, in order of easyconfigs
+        regex = re.compile(r"^== injecting sha256 checksums in .*/(test[0-9]+)-1.0.eb$", re.M)
+        self.assertEqual(regex.findall(stdout), ['test%d' % idx for idx in range(cnt)])
+        regex = re.compile(r"^== \* (test[0-9]+)-1.0.tar.gz: ([0-9a-f]+)$", re.M)
+        self.assertEqual(regex.findall(stdout), [('test%d' % idx, expected_checksums[idx]) for idx in range(cnt)])
+
+        # easyconfigs are processed serially in order, so earlier easyconfigs are updated when error occurs
+        for idx, ec in enumerate(ecs):
+            write_file(ec['spec'], ec_tmpl % {'idx': idx, 'sources_dir': sources_dir})
+            if idx == 5:
+                write_file(ec['spec'], "\nchecksums = ['%s']" % expected_checksums[idx], append=True)
+            ecs[idx] = {'spec': ec['spec'], 'ec': EasyConfig(ec['spec'])}
+
+        error_pattern = "Found existing checksums, use --force to overwrite them"
+        with self.mocked_stdout_stderr():
+            self.assertErrorRegex(EasyBuildError, error_pattern, inject_checksums, ecs, 'sha256')
+        for idx, ec in enumerate(ecs):
+            ec_dict = EasyConfigParser(ec['spec']).get_config_dict()
+            if idx < 5:
+                self.assertEqual(len(ec_dict['checksums']), 2)
+            elif idx > 5:
+                self.assertNotIn('checksums', ec_dict)
+
+    def test_inject_checksums_concurrent_shared_sources(self):
+        """Test injecting checksums concurrently into easyconfigs that share source files."""
+        sources_dir = os.path.join(self.test_prefix, 'remote')
+        ecs_dir = os.path.join(self.test_prefix, 'ecs')
+
+        # source tarball and patch are shared across all easyconfigs
+        write_file(os.path.join(sources_dir, 'test-1.0.tar.gz'), "source tarball\n" * 1000)
+        src_sha256 = compute_checksum(os.path.join(sources_dir, 'test-1.0.tar.gz'), 'sha256')
+        write_file(os.path.join(sources_dir, 'shared.patch'), "this is a patch\n")
+        patch_sha256 = compute_checksum(os.path.join(sources_dir, 'shared.patch'), 'sha256')
+
+        ec_tmpl = '\n'.join([
+            "easyblock = 'ConfigureMake'",
+            "name = 'test'",
+            "version = '1.0'",
+            "versionsuffix = '-%(idx)d'",
+            "homepage = 'https://example.com'",
+            "description = 'test'",
+            "toolchain = SYSTEM",
+            "source_urls = ['file://%(sources_dir)s']",
+            "sources = [SOURCE_TAR_GZ]",
+            "patches = ['shared.patch']",
+        ])
+
+        cnt = 8
+        ecs = []
+        for idx in range(cnt):
+            ec_path = os.path.join(ecs_dir, 'test-1.0-%d.eb' % idx)
+            write_file(ec_path, ec_tmpl % {'idx': idx, 'sources_dir': sources_dir})
+            ecs.append({'spec': ec_path, 'ec': EasyConfig(ec_path)})
+
+        # keep track of downloads & computed checksums;
+        # slow down downloads, so the same file would be downloaded multiple times at once without serialization
+        downloads, hashed = [], []
+        orig_download_file = easyblock_module.download_file
+        orig_compute_checksum = easyblock_module.compute_checksum
+
+        def mocked_download_file(filename, url, path, *args, **kwargs):
+            downloads.append(filename)
+            time.sleep(0.2)
+            return orig_download_file(filename, url, path, *args, **kwargs)
+
+        def mocked_compute_checksum(path, *args, **kwargs):
+            hashed.append(path)
+            return orig_compute_checksum(path, *args, **kwargs)
+
+        os.environ['EASYBUILD_SOURCEPATH'] = os.path.join(self.test_prefix, 'sources')
+        init_config(build_options={'parallel': 4, 'pre_create_installdir': False, 'silent': False, 'trace': True})
+
+        easyblock_module.download_file = mocked_download_file
+        easyblock_module.compute_checksum = mocked_compute_checksum
+        try:
+            with self.mocked_stdout_stderr():
+                inject_checksums(ecs, 'sha256')
+                stdout = self.get_stdout()
+        finally:
+            easyblock_module.download_file = orig_download_file
+            easyblock_module.compute_checksum = orig_compute_checksum
+
+        # shared source tarball and patch are downloaded and hashed only once
+        src_path = os.path.join(self.test_prefix, 'sources', 't', 'test', 'test-1.0.tar.gz')
+        patch_path = os.path.join(self.test_prefix, 'sources', 't', 'test', 'shared.patch')
+        self.assertEqual(sorted(downloads), ['shared.patch', 'test-1.0.tar.gz'])
+        self.assertEqual(sorted(hashed), sorted([src_path, patch_path]))
+        # no leftovers of temporary download locations or locks
+        self.assertEqual(sorted(os.listdir(os.path.dirname(src_path))), ['shared.patch', 'test-1.0.tar.gz'])
+        self.assertEqual(easyblock_module._DOWNLOAD_LOCKS, {})
+
+        # output produced while fetching files concurrently is printed serially, in order of easyconfigs
+        ec_outputs = stdout.split('== injecting sha256 checksums in ')[1:]
+        self.assertEqual(len(ec_outputs), cnt)
+        for idx, ec_output in enumerate(ec_outputs):
+            self.assertTrue(ec_output.startswith(ecs[idx]['spec']))
+            self.assertEqual(ec_output.count('  >> sources:\n  >> %s\n' % src_path), 1, ec_output)
+            self.assertEqual(ec_output.count('  >> patches:\n  >> %s\n' % patch_path), 1, ec_output)
+
+        for ec in ecs:
+            ec_dict = EasyConfigParser(ec['spec']).get_config_dict()
+            self.assertEqual(ec_dict['checksums'], [{'test-1.0.tar.gz': src_sha256}, {'shared.patch': patch_sha256}])
+
     def test_obtain_file(self):
         """Test obtain_file method."""
         toy_tarball = 'toy-0.0.tar.gz'
@@ -2617,6 +2772,151 @@ class EasyBlockTest(EnhancedTestCase):
         with self.mocked_stdout_stderr(), self.saved_env():
             eb.run_all_steps(True)
 
+    def test_sanity_check_commands_parallel(self):
+        """Test running sanity check commands concurrently."""
+        init_config(build_options={'silent': True, 'trace': True})
+
+        test_ecs_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'easyconfigs', 'test_ecs')
+        toy_ec = EasyConfig(os.path.join(test_ecs_dir, 't', 'toy', 'toy-0.0.eb'))
+        toy_ec['sanity_check_paths'] = {'files': ['bin/toy'], 'dirs': []}
+        eb = EasyBlock(toy_ec)
+        eb.silent = True
+        eb.cfg.parallel = 4
+        eb.installdir = os.path.join(self.test_prefix, 'install')
+        write_file(os.path.join(eb.installdir, 'bin', 'toy'), '')
+        eb.sanity_check_module_loaded = True
+
+        # by default, sanity check commands are run one after the other, in a shared work directory
+        commands = [
+            "sleep 1 && echo one > test.txt",
+            "echo two >> test.txt",
+            "test $(head -1 test.txt) = one && test $(tail -1 test.txt) = two",
+        ]
+        with self.mocked_stdout_stderr():
+            eb._sanity_check_step(custom_commands=commands, extension=True)
+            stdout = self.get_stdout()
+        self.assertEqual(eb.sanity_check_fail_msgs, [])
+        regex = re.compile(r">> (running|result for) command '(.*)'")
+        expected = [(typ, cmd) for cmd in commands for typ in ('running', 'result for')]
+        self.assertEqual(regex.findall(stdout), expected)
+
+        # sanity check commands can be run concurrently, if requested
+        eb.cfg['sanity_check_commands_parallel'] = True
+
+        flag = os.path.join(self.test_prefix, 'flag')
+        commands = [
+            # only passes if next command is run concurrently
+            "for i in $(seq 100); do test -f %s && break; sleep 0.1; done; test -f %s" % (flag, flag),
+            "touch %s" % flag,
+            # each command is run in a dedicated (empty) work directory
+            "touch cmd2 && sleep 1 && test $(ls | wc -l) -eq 1",
+            "touch cmd3 && sleep 1 && test $(ls | wc -l) -eq 1",
+            # failing commands are reported in original order
+            "sleep 1 && echo slow_failure && exit 2",
+            "echo fast_failure && exit 3",
+        ]
+        with self.mocked_stdout_stderr():
+            self.assertErrorRegex(EasyBuildError, "Sanity check failed: sanity check command", eb._sanity_check_step,
+                                  custom_commands=commands, extension=True)
+            stdout = self.get_stdout()
+
+        self.assertEqual(len(eb.sanity_check_fail_msgs), 2)
+        regex = re.compile(r"^sanity check command sleep 1 && echo slow_failure .* exit code 2 .*slow_failure")
+        self.assertTrue(regex.search(eb.sanity_check_fail_msgs[0]), eb.sanity_check_fail_msgs[0])
+        regex = re.compile(r"^sanity check command echo fast_failure .* exit code 3 .*fast_failure")
+        self.assertTrue(regex.search(eb.sanity_check_fail_msgs[1]), eb.sanity_check_fail_msgs[1])
+
+        # all commands are reported as running before their results are reported, results are in original order
+        running = [line for line in stdout.splitlines() if line.strip().startswith('>> running command')]
+        self.assertEqual(len(running), len(commands))
+        results = re.findall(r">> result for command '(.*)': (OK|FAILED)", stdout)
+        self.assertEqual(results, [(cmd, res) for (cmd, res) in zip(commands, ['OK'] * 4 + ['FAILED'] * 2)])
+        self.assertTrue(stdout.index(running[-1]) < stdout.index('>> result for command'))
+
+    def test_extensions_sanity_check_batched(self):
+        """Test batched sanity check for extensions that support it."""
+        init_config(build_options={'silent': True})
+
+        test_ecs_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'easyconfigs', 'test_ecs')
+        toy_ec = EasyConfig(os.path.join(test_ecs_dir, 't', 'toy', 'toy-0.0.eb'))
+        eb = EasyBlock(toy_ec)
+        eb.silent = True
+
+        checked_individually = []
+
+        class BatchedExtension:
+            """Fake extension class that supports batched sanity check."""
+            def __init__(self, name, modname):
+                self.name = name
+                self.modname = modname
+
+            def sanity_check_import_batch(self):
+                return (sys.executable, self.modname)
+
+            def sanity_check_step(self):
+                checked_individually.append(self.name)
+                return (self.modname != 'nosuchmodule', "import failed")
+
+        eb.ext_instances = [
+            BatchedExtension('ext-os', 'os'),
+            BatchedExtension('ext-json', 'json'),
+            BatchedExtension('ext-broken', 'nosuchmodule'),
+            BatchedExtension('ext-textwrap', 'textwrap'),
+        ]
+        with self.mocked_stdout_stderr():
+            eb._sanity_check_step_extensions()
+
+        # only extension that failed batched import check is checked individually
+        self.assertEqual(checked_individually, ['ext-broken'])
+        self.assertEqual(eb.sanity_check_fail_msgs, [
+            "extensions sanity check failed for 1 extensions: ext-broken",
+            "failing sanity check for 'ext-broken' extension: import failed",
+        ])
+
+        # extensions that use default sanity check with a Python import check as extension filter are batched
+        init_config(build_options={'silent': True, 'trace': True})
+        toy_ec = EasyConfig(os.path.join(test_ecs_dir, 't', 'toy', 'toy-0.0.eb'))
+        toy_ec['exts_defaultclass'] = 'DummyExtension'
+        exts_filter = ("%s -c 'import %%(ext_name)s'" % sys.executable, '')
+        toy_ec['exts_filter'] = exts_filter
+        toy_ec['exts_list'] = [
+            ('os', '1.0'),
+            ('json', '1.0'),
+            ('nosuchmodule', '1.0'),
+            ('textwrap', '1.0', {'modulename': False}),
+            ('xml-etree', '1.0', {'modulename': 'xml.etree'}),
+        ]
+        eb = EasyBlock(toy_ec)
+        eb.silent = True
+        eb.installdir = self.test_prefix
+        eb.init_ext_instances()
+
+        batch_specs = [ext.sanity_check_import_batch() for ext in eb.ext_instances]
+        self.assertEqual(batch_specs, [
+            (sys.executable, 'os'),
+            (sys.executable, 'json'),
+            (sys.executable, 'nosuchmodule'),
+            None,
+            (sys.executable, 'xml.etree'),
+        ])
+
+        # no batching if extension filter is not a Python import check
+        eb.ext_instances[0].cfg['exts_filter'] = ("%s -c 'import os; print(os.getcwd())'" % sys.executable, '')
+        self.assertEqual(eb.ext_instances[0].sanity_check_import_batch(), None)
+        eb.ext_instances[0].cfg['exts_filter'] = exts_filter
+
+        with self.mocked_stdout_stderr():
+            eb._sanity_check_step_extensions()
+            stdout = self.get_stdout()
+
+        self.assertIn("batched import check with '%s' for 4 extensions: 3 OK" % sys.executable, stdout)
+        # only extension that failed batched import check is checked individually
+        regex = re.compile(r"Extension sanity check command '.*'import nosuchmodule'': FAIL")
+        self.assertTrue(regex.search(stdout), "Pattern '%s' should be found in: %s" % (regex.pattern, stdout))
+        self.assertEqual(len(re.findall("Extension sanity check command", stdout)), 1)
+        self.assertEqual(len(eb.sanity_check_fail_msgs), 2)
+        self.assertEqual(eb.sanity_check_fail_msgs[0], "extensions sanity check failed for 1 extensions: nosuchmodule")
+
     def test_parallel(self):
         """Test defining of parallelism."""
         topdir = os.path.abspath(os.path.dirname(__file__))
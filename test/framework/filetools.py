@@ -34,16 +34,23 @@ Unit tests for filetools.py
 import datetime
 import filecmp
 import glob
+import io
+import json
 import logging
 import os
 import re
 import shutil
+import socket
 import stat
+import subprocess
 import sys
+import tarfile
 import tempfile
 import textwrap
+import threading
 import time
 import types
+import zipfile
 from io import StringIO
 from test.framework.github import requires_github_access
 from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered, init_config
@@ -53,7 +60,7 @@ import easybuild.tools.filetools as ft
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.config import IGNORE, ERROR, WARN, build_option, update_build_option
 from easybuild.tools.multidiff import multidiff
-from easybuild.tools.run import run_shell_cmd
+from easybuild.tools.run import RunShellCmdError, run_shell_cmd
 from easybuild.tools.systemtools import LINUX, get_os_type
 
 
@@ -2554,6 +2561,192 @@ class FileToolsTest(EnhancedTestCase):
         self.assertFalse(stderr)
         self.assertFalse(stdout)
 
+    def test_extract_file_in_process(self):
+        """Test extract_file and extract_files using in-process extraction engine."""
+        cwd = os.getcwd()
+
+        init_config(build_options={'extract_in_process': True, 'silent': True})
+
+        # create test archives: tarballs using different compression methods + zip file
+        srcdir = os.path.join(self.test_prefix, 'src')
+        ft.write_file(os.path.join(srcdir, 'foo-1.0', 'sub', 'foo.sh'), '#!/bin/bash\necho foo')
+        ft.adjust_permissions(os.path.join(srcdir, 'foo-1.0', 'sub', 'foo.sh'), stat.S_IXUSR, add=True)
+        ft.symlink('sub/foo.sh', os.path.join(srcdir, 'foo-1.0', 'foo_link'), use_abspath_source=False)
+        ft.write_file(os.path.join(srcdir, 'bar-2.0', 'bar.txt'), 'bar')
+
+        archives_dir = os.path.join(self.test_prefix, 'archives')
+        ft.mkdir(archives_dir)
+        foo_tgz = os.path.join(archives_dir, 'foo-1.0.tar.gz')
+        foo_tbz2 = os.path.join(archives_dir, 'foo-1.0.tar.bz2')
+        bar_txz = os.path.join(archives_dir, 'bar-2.0.tar.xz')
+        for path, mode, subdir in [(foo_tgz, 'w:gz', 'foo-1.0'), (foo_tbz2, 'w:bz2', 'foo-1.0'),
+                                   (bar_txz, 'w:xz', 'bar-2.0')]:
+            with tarfile.open(path, mode) as tar:
+                tar.add(os.path.join(srcdir, subdir), arcname=subdir)
+
+        foo_zip = os.path.join(archives_dir, 'foo-1.0.zip')
+        with zipfile.ZipFile(foo_zip, 'w') as zip_file:
+            for subpath in ['foo-1.0/', 'foo-1.0/sub/', 'foo-1.0/sub/foo.sh', 'foo-1.0/foo_link']:
+                path = os.path.join(srcdir, subpath)
+                info = zipfile.ZipInfo.from_file(path, subpath)
+                info.external_attr = os.lstat(path).st_mode << 16
+                if os.path.islink(path):
+                    zip_file.writestr(info, os.readlink(path))
+                elif os.path.isdir(path):
+                    zip_file.writestr(info, '')
+                else:
+                    zip_file.writestr(info, ft.read_file(path))
+
+        for archive, subdir in [(foo_tgz, 'foo-1.0'), (foo_tbz2, 'foo-1.0'), (bar_txz, 'bar-2.0'),
+                                (foo_zip, 'foo-1.0')]:
+            target_dir = os.path.join(self.test_prefix, 'extract_' + os.path.basename(archive))
+            path = ft.extract_file(archive, target_dir, change_into_dir=False)
+            self.assertEqual(path, os.path.join(target_dir, subdir))
+            self.assertTrue(os.path.samefile(os.getcwd(), cwd))
+            if subdir == 'foo-1.0':
+                foo_sh = os.path.join(path, 'sub', 'foo.sh')
+                self.assertEqual(ft.read_file(foo_sh), '#!/bin/bash\necho foo')
+                self.assertTrue(os.stat(foo_sh).st_mode & stat.S_IXUSR)
+                self.assertEqual(os.readlink(os.path.join(path, 'foo_link')), 'sub/foo.sh')
+            else:
+                self.assertEqual(ft.read_file(os.path.join(path, 'bar.txt')), 'bar')
+
+        # base directory is determined in the same way as find_base_dir, also when extracting multiple archives
+        target_dir = os.path.join(self.test_prefix, 'extract_multi')
+        paths = ft.extract_files([foo_tgz, bar_txz, foo_tbz2], target_dir)
+        self.assertEqual(paths, [os.path.join(target_dir, 'foo-1.0'), target_dir, target_dir])
+        self.assertEqual(sorted(os.listdir(target_dir)), ['bar-2.0', 'foo-1.0'])
+
+        target_dir = os.path.join(self.test_prefix, 'extract_multi_same')
+        paths = ft.extract_files([foo_tgz, foo_tbz2], target_dir)
+        self.assertEqual(paths, [os.path.join(target_dir, 'foo-1.0')] * 2)
+
+        # concurrent extraction is not possible in non-empty directory
+        self.assertEqual(ft.extract_files([foo_tgz, foo_tbz2], target_dir), None)
+
+        # archive members that would end up outside of target directory are not extracted
+        evil_tar = os.path.join(archives_dir, 'evil.tar')
+        with tarfile.open(evil_tar, 'w') as tar:
+            tar.add(os.path.join(srcdir, 'bar-2.0', 'bar.txt'), arcname='../evil.txt')
+        error_pattern = r"Refusing to extract archive member \.\./evil.txt"
+        self.assertErrorRegex(EasyBuildError, error_pattern, ft.extract_file, evil_tar,
+                              os.path.join(self.test_prefix, 'evil'), change_into_dir=False)
+        self.assertNotExists(os.path.join(self.test_prefix, 'evil.txt'))
+
+        # existing files are not overwritten via a symbolic link that points outside of target directory
+        outside_dir = os.path.join(self.test_prefix, 'outside')
+        outside_txt = os.path.join(outside_dir, 'outside.txt')
+        ft.write_file(outside_txt, 'outside')
+        evil_tar = os.path.join(archives_dir, 'evil_symlink.tar')
+        with tarfile.open(evil_tar, 'w') as tar:
+            for name, target in [('pkg/a', outside_txt), ('pkg/d', outside_dir)]:
+                info = tarfile.TarInfo(name)
+                info.type = tarfile.SYMTYPE
+                info.linkname = target
+                tar.addfile(info)
+            info = tarfile.TarInfo('pkg/a')
+            info.size = len(b'inside')
+            tar.addfile(info, io.BytesIO(b'inside'))
+            info = tarfile.TarInfo('pkg/d')
+            info.type = tarfile.DIRTYPE
+            info.mode = 0o700
+            tar.addfile(info)
+        target_dir = os.path.join(self.test_prefix, 'evil_symlink')
+        self.assertEqual(ft.extract_archive(evil_tar, target_dir), ['pkg/a', 'pkg/d', 'pkg/a', 'pkg/d'])
+        self.assertEqual(ft.read_file(outside_txt), 'outside')
+        self.assertFalse(os.path.islink(os.path.join(target_dir, 'pkg', 'a')))
+        self.assertEqual(ft.read_file(os.path.join(target_dir, 'pkg', 'a')), 'inside')
+        self.assertFalse(os.path.islink(os.path.join(target_dir, 'pkg', 'd')))
+        self.assertNotEqual(stat.S_IMODE(os.stat(outside_dir).st_mode), 0o700)
+
+        # hard links to a file outside of target directory (via a symbolic link) are not extracted
+        evil_tar = os.path.join(archives_dir, 'evil_hardlink.tar')
+        with tarfile.open(evil_tar, 'w') as tar:
+            info = tarfile.TarInfo('pkg/a')
+            info.type = tarfile.SYMTYPE
+            info.linkname = outside_txt
+            tar.addfile(info)
+            info = tarfile.TarInfo('pkg/b')
+            info.type = tarfile.LNKTYPE
+            info.linkname = 'pkg/a'
+            tar.addfile(info)
+        error_pattern = "Refusing to extract hard link pkg/b, since its target pkg/a is located outside of"
+        self.assertErrorRegex(EasyBuildError, error_pattern, ft.extract_archive, evil_tar,
+                              os.path.join(self.test_prefix, 'evil_hardlink'))
+        self.assertNotExists(os.path.join(self.test_prefix, 'evil_hardlink', 'pkg', 'b'))
+        ft.change_dir(cwd)
+
+    def test_extract_file_cached(self):
+        """Test extract_file using cache of extracted sources."""
+        cwd = os.getcwd()
+
+        cache_dir = os.path.join(self.test_prefix, 'extracted_sources_cache')
+        init_config(build_options={'extracted_sources_cache_dir': cache_dir, 'silent': True})
+
+        srcdir = os.path.join(self.test_prefix, 'src')
+        ft.write_file(os.path.join(srcdir, 'foo-1.0', 'sub', 'foo.txt'), 'foo')
+        ft.symlink('sub/foo.txt', os.path.join(srcdir, 'foo-1.0', 'foo_link'), use_abspath_source=False)
+        foo_tgz = os.path.join(self.test_prefix, 'archives', 'foo-1.0.tar.gz')
+        ft.mkdir(os.path.dirname(foo_tgz))
+        with tarfile.open(foo_tgz, 'w:gz') as tar:
+            tar.add(os.path.join(srcdir, 'foo-1.0'), arcname='foo-1.0')
+
+        target_dir = os.path.join(self.test_prefix, 'extract1')
+        path = ft.extract_file(foo_tgz, target_dir, change_into_dir=False)
+        self.assertEqual(path, os.path.join(target_dir, 'foo-1.0'))
+        self.assertTrue(os.path.samefile(os.getcwd(), cwd))
+        entries = os.listdir(cache_dir)
+        self.assertEqual(len(entries), 1)
+        meta = json.loads(ft.read_file(os.path.join(cache_dir, entries[0], 'meta.json')))
+        self.assertEqual(meta['source'], 'foo-1.0.tar.gz')
+        self.assertEqual(meta['size'], ft.det_size(path))
+
+        # changes made to extracted sources (for example by applying patches) don't affect cached source tree
+        ft.write_file(os.path.join(path, 'sub', 'foo.txt'), 'patched')
+
+        # cached source tree is used regardless of location of source file
+        foo_tgz_copy = os.path.join(self.test_prefix, 'copy', 'foo-1.0.tar.gz')
+        ft.copy_file(foo_tgz, foo_tgz_copy)
+        os.remove(foo_tgz)
+        target_dir = os.path.join(self.test_prefix, 'extract2')
+        path = ft.extract_file(foo_tgz_copy, target_dir, change_into_dir=False)
+        self.assertEqual(path, os.path.join(target_dir, 'foo-1.0'))
+        self.assertEqual(ft.read_file(os.path.join(path, 'sub', 'foo.txt')), 'foo')
+        self.assertEqual(os.readlink(os.path.join(path, 'foo_link')), 'sub/foo.txt')
+        self.assertEqual(os.listdir(cache_dir), entries)
+
+        # different extract command results in a different cache entry
+        target_dir = os.path.join(self.test_prefix, 'extract3')
+        path = ft.extract_file(foo_tgz_copy, target_dir, extra_options='--exclude=foo_link', change_into_dir=False)
+        self.assertNotExists(os.path.join(path, 'foo_link'))
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+        # least recently used entries are removed when maximum cache size is exceeded
+        os.utime(os.path.join(cache_dir, entries[0], 'meta.json'), (0, 0))
+        self.assertEqual(ft.evict_extracted_sources_cache(cache_dir, 5), entries)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertEqual(ft.evict_extracted_sources_cache(cache_dir, 0, keep=os.listdir(cache_dir)[0]), [])
+
+        # no (temporary) cache entry is left behind when extraction fails
+        entries = os.listdir(cache_dir)
+        corrupt_tgz = os.path.join(self.test_prefix, 'archives', 'corrupt-1.0.tar.gz')
+        ft.write_file(corrupt_tgz, 'this is not a tarball')
+        target_dir = os.path.join(self.test_prefix, 'extract4')
+        for in_process in (False, True):
+            cmd = "tar xzf %s" % corrupt_tgz
+            with self.mocked_stdout_stderr():
+                self.assertRaises((EasyBuildError, RunShellCmdError), ft.extract_file_cached, corrupt_tgz, target_dir,
+                                  cmd, cache_dir, in_process=in_process, trace=False)
+            self.assertEqual(os.listdir(cache_dir), entries)
+
+        # fallback for when reflink copy is not supported: concurrent copy
+        target_dir = os.path.join(self.test_prefix, 'copy_tree')
+        ft._copy_tree_parallel(srcdir, target_dir)
+        self.assertEqual(ft.read_file(os.path.join(target_dir, 'foo-1.0', 'sub', 'foo.txt')), 'foo')
+        self.assertEqual(os.readlink(os.path.join(target_dir, 'foo-1.0', 'foo_link')), 'sub/foo.txt')
+
+        ft.change_dir(cwd)
+
     def test_empty_dir(self):
         """Test empty_dir function"""
         test_dir = os.path.join(self.test_prefix, 'test123')
@@ -3109,6 +3302,18 @@ class FileToolsTest(EnhancedTestCase):
         ]).format(**string_args, repo_name='testrepository')
         run_check()
 
+        # only requested tag is fetched with --git-shallow-clone
+        update_build_option('git_shallow_clone', True)
+        expected = '\n'.join([
+            r'  running shell command "{git_clone_cmd} --depth 1 --branch tag_for_tests {git_repo}"',
+            r"  \(in .*/tmp.*\)",
+            r'  running shell command "git checkout refs/tags/tag_for_tests"',
+            r"  \(in .*/{repo_name}\)",
+            r"Archiving '.*/{repo_name}' into '{test_prefix}/target/test.tar.xz'...",
+        ]).format(**string_args, repo_name='testrepository')
+        run_check()
+        update_build_option('git_shallow_clone', False)
+
         git_config['clone_into'] = 'test123'
         expected = '\n'.join([
             r'  running shell command "{git_clone_cmd} {git_repo} test123"',
@@ -3368,6 +3573,75 @@ class FileToolsTest(EnhancedTestCase):
         self.assertErrorRegex(EasyBuildError, error_pattern, ft.get_source_tarball_from_git, *args)
         del git_config['unknown']
 
+    def test_get_source_tarball_from_git_local(self):
+        """Test get_source_tarball_from_git function with local git repositories, incl. shallow clones and mirrors."""
+        git_cmd = "git -c user.name=easybuild -c user.email=easybuild@example.com -c init.defaultBranch=main"
+        repos_dir = os.path.join(self.test_prefix, 'repos')
+
+        # create git repository to use as submodule
+        sub_dir = os.path.join(self.test_prefix, 'sub')
+        ft.write_file(os.path.join(sub_dir, 'subfile.txt'), 'submodule')
+        run_shell_cmd(f"{git_cmd} init && {git_cmd} add -A && {git_cmd} commit -m sub", work_dir=sub_dir)
+        run_shell_cmd(f"git clone --bare {sub_dir} {repos_dir}/sub.git")
+
+        # create git repository with two tagged commits, and a submodule in the 2nd commit
+        work_dir = os.path.join(self.test_prefix, 'work')
+        ft.write_file(os.path.join(work_dir, 'test.txt'), 'one')
+        run_shell_cmd(f"{git_cmd} init && {git_cmd} add -A && {git_cmd} commit -m one && {git_cmd} tag v1.0",
+                      work_dir=work_dir)
+        commit = run_shell_cmd("git rev-parse --short HEAD", work_dir=work_dir).output.strip()
+        ft.write_file(os.path.join(work_dir, 'test.txt'), 'two')
+        run_shell_cmd(f"{git_cmd} -c protocol.file.allow=always submodule add file://{repos_dir}/sub.git sub && "
+                      f"{git_cmd} add -A && {git_cmd} commit -m two && {git_cmd} tag v2.0", work_dir=work_dir)
+        run_shell_cmd(f"git clone --bare {work_dir} {repos_dir}/test.git")
+
+        target_dir = os.path.join(self.test_prefix, 'target')
+
+        def get_tarball_checksum(filename, **kwargs):
+            """Create tarball from local git repository, return checksum."""
+            git_config = {
+                'url': 'file://' + repos_dir,
+                'repo_name': 'test',
+                'extra_config_params': ['protocol.file.allow=always'],
+            }
+            git_config.update(kwargs)
+            res = ft.get_source_tarball_from_git(filename, target_dir, git_config)
+            return ft.compute_checksum(res, checksum_type='sha256')
+
+        ref_checksums = {
+            'tag': get_tarball_checksum('tag.tar.xz', tag='v1.0'),
+            'commit': get_tarball_checksum('commit.tar.xz', commit=commit),
+            'recursive': get_tarball_checksum('recursive.tar.xz', tag='v2.0', recursive=True),
+        }
+        self.assertNotEqual(ref_checksums['tag'], ref_checksums['recursive'])
+
+        def check_tarballs(prefix):
+            """Check whether tarballs are identical to reference tarballs."""
+            self.assertEqual(get_tarball_checksum(prefix + '_tag.tar.xz', tag='v1.0'), ref_checksums['tag'])
+            self.assertEqual(get_tarball_checksum(prefix + '_commit.tar.xz', commit=commit), ref_checksums['commit'])
+            self.assertEqual(get_tarball_checksum(prefix + '_recursive.tar.xz', tag='v2.0', recursive=True),
+                             ref_checksums['recursive'])
+
+        # tarballs created from shallow/partial clones are identical
+        update_build_option('git_shallow_clone', True)
+        check_tarballs('shallow')
+
+        # same when using mirror of git repository
+        mirror_cache_dir = os.path.join(self.test_prefix, 'mirrors')
+        update_build_option('git_mirror_cache_dir', mirror_cache_dir)
+        check_tarballs('shallow_mirror')
+        mirrors = os.listdir(mirror_cache_dir)
+        self.assertEqual(len(mirrors), 1)
+        self.assertTrue(re.match('^test-[0-9a-f]{16}.git$', mirrors[0]))
+
+        # mirror is updated when it is used again
+        run_shell_cmd(f"{git_cmd} commit --allow-empty -m three && {git_cmd} tag v3.0 && "
+                      f"git push {repos_dir}/test.git main v3.0", work_dir=work_dir)
+        update_build_option('git_shallow_clone', False)
+        check_tarballs('mirror')
+        tags = run_shell_cmd("git tag", work_dir=os.path.join(mirror_cache_dir, mirrors[0])).output.split()
+        self.assertEqual(tags, ['v1.0', 'v2.0', 'v3.0'])
+
     def test_make_archive(self):
         """Test for make_archive method"""
         # create fake directories and files to be archived
@@ -3792,6 +4066,146 @@ class FileToolsTest(EnhancedTestCase):
         self.assertNotExists(lock_path)
         self.assertEqual(os.listdir(locks_dir), [])
 
+    def test_lock_owner_and_stale_locks(self):
+        """Test recording of owner of locks, and reclaiming of stale locks."""
+
+        init_config(build_options={'silent': True})
+
+        lock_name = 'test123'
+        lock_path = ft.det_lock_path(lock_name)
+
+        ft.create_lock(lock_name)
+        owner = ft.read_lock_owner(lock_path)
+        self.assertEqual(sorted(owner), ['boot_id', 'host', 'lock_time', 'pid', 'pid_ns', 'start_time'])
+        self.assertEqual(owner['host'], socket.gethostname())
+        self.assertEqual(owner['pid'], os.getpid())
+        if os.path.exists('/proc/self/stat'):
+            self.assertTrue(isinstance(owner['start_time'], int))
+        boot_id, pid_ns = ft.det_boot_id(), ft.det_pid_namespace()
+        self.assertEqual((owner['boot_id'], owner['pid_ns']), (boot_id, pid_ns))
+        if os.path.exists('/proc/self/ns/pid'):
+            self.assertTrue(isinstance(pid_ns, int))
+            self.assertTrue(boot_id)
+
+        # lock created by a running process is not stale
+        self.assertFalse(ft.is_stale_lock(lock_path))
+        self.assertErrorRegex(EasyBuildError, "Lock .* already exists", ft.check_lock, lock_name)
+        ft.remove_lock(lock_name)
+
+        # determine PID of a process that is no longer running
+        proc = subprocess.Popen(['true'])
+        proc.wait()
+        dead_owner = {
+            'host': socket.gethostname(),
+            'boot_id': boot_id,
+            'pid_ns': pid_ns,
+            'pid': proc.pid,
+            'start_time': None,
+            'lock_time': time.time(),
+        }
+
+        # locks without (valid) owner information, or created on another host, are never considered stale;
+        # same for locks created in another boot of the system, or in another PID namespace (like another container
+        # that shares the hostname), or without information on those (created by older EasyBuild versions)
+        ft.mkdir(lock_path, parents=True)
+        self.assertFalse(ft.is_stale_lock(lock_path))
+        owner_path = os.path.join(lock_path, ft.LOCK_OWNER_FILENAME)
+        ft.write_file(owner_path, 'this is not JSON')
+        self.assertFalse(ft.is_stale_lock(lock_path))
+        other_owners = [
+            dict(dead_owner, host='not-' + socket.gethostname()),
+            dict(dead_owner, boot_id='not-%s' % boot_id),
+            dict(dead_owner, pid_ns=(pid_ns or 0) + 1),
+            dict((key, value) for (key, value) in dead_owner.items() if key not in ('boot_id', 'pid_ns')),
+        ]
+        for other_owner in other_owners:
+            ft.write_file(owner_path, json.dumps(other_owner))
+            self.assertFalse(ft.is_stale_lock(lock_path))
+            self.assertErrorRegex(EasyBuildError, "Lock .* already exists", ft.check_lock, lock_name)
+
+        # stale locks can only be detected if boot ID and PID namespace can be determined
+        if boot_id is None or pid_ns is None:
+            ft.write_file(owner_path, json.dumps(dead_owner))
+            self.assertFalse(ft.is_stale_lock(lock_path))
+            return
+
+        # stale lock is not reclaimed if it is already being reclaimed by another process
+        ft.write_file(owner_path, json.dumps(dead_owner))
+        self.assertTrue(ft.is_stale_lock(lock_path))
+        reclaim_path = os.path.join(lock_path, ft.LOCK_RECLAIM_DIRNAME)
+        ft.mkdir(reclaim_path)
+        self.assertFalse(ft.reclaim_stale_lock(lock_path))
+        self.assertEqual(ft.read_lock_owner(lock_path), dead_owner)
+        ft.remove_dir(reclaim_path)
+
+        # stale lock is reclaimed by check_lock, and replaced right away by a lock owned by this process
+        ft.check_lock(lock_name)
+        self.assertExists(lock_path)
+        self.assertEqual(os.listdir(lock_path), [ft.LOCK_OWNER_FILENAME])
+        self.assertEqual(ft.read_lock_owner(lock_path)['pid'], os.getpid())
+        self.assertEqual(ft.global_lock_names, {lock_name})
+        self.assertEqual(os.listdir(os.path.dirname(lock_path)), [os.path.basename(lock_path)])
+        # lock doesn't need to be created anymore
+        ft.create_lock(lock_name)
+        self.assertEqual(ft.read_lock_owner(lock_path)['pid'], os.getpid())
+        ft.remove_lock(lock_name)
+        self.assertEqual(os.listdir(os.path.dirname(lock_path)), [])
+
+        # reclaiming stale lock fails if another process creates the lock right after the stale lock was removed,
+        # the lock that was created by the other process is left untouched
+        ft.mkdir(lock_path)
+        ft.write_file(owner_path, json.dumps(dead_owner))
+
+        orig_remove_dir = ft.remove_dir
+
+        def remove_dir_and_recreate(path):
+            """Remove specified directory, and recreate it like another process creating the lock would."""
+            orig_remove_dir(path)
+            os.mkdir(path)
+
+        ft.remove_dir = remove_dir_and_recreate
+        try:
+            error_pattern = "Failed to create lock .* after reclaiming stale lock"
+            self.assertErrorRegex(EasyBuildError, error_pattern, ft.check_lock, lock_name)
+        finally:
+            ft.remove_dir = orig_remove_dir
+        self.assertExists(lock_path)
+        self.assertEqual(os.listdir(lock_path), [])
+        self.assertFalse(ft.global_lock_names)
+        ft.remove_dir(lock_path)
+
+        # lock is also stale if PID was reused by another process
+        ft.create_lock(lock_name)
+        owner = ft.read_lock_owner(lock_path)
+        if owner['start_time'] is not None:
+            ft.write_file(owner_path, json.dumps(dict(owner, start_time=owner['start_time'] + 1)))
+            self.assertTrue(ft.is_stale_lock(lock_path))
+        ft.remove_lock(lock_name)
+
+        # waiting for lock to be released stops (pretty much) immediately when lock is removed
+        ft.create_lock(lock_name)
+        self.assertFalse(ft.wait_for_lock_release(lock_path, 0.1))
+
+        init_config(build_options={'silent': True, 'wait_on_lock_interval': 60, 'wait_on_lock_limit': -1})
+        timer = threading.Timer(0.5, ft.remove_lock, args=(lock_name,))
+        timer.start()
+        start = time.time()
+        try:
+            ft.check_lock(lock_name)
+        finally:
+            timer.cancel()
+        self.assertNotExists(lock_path)
+        self.assertTrue(time.time() - start < 30)
+
+        # stale lock is reclaimed without waiting, even if waiting for locks is enabled
+        ft.mkdir(lock_path, parents=True)
+        ft.write_file(owner_path, json.dumps(dead_owner))
+        init_config(build_options={'silent': True, 'wait_on_lock_interval': 1, 'wait_on_lock_limit': 10})
+        ft.check_lock(lock_name)
+        self.assertEqual(ft.read_lock_owner(lock_path)['pid'], os.getpid())
+        ft.remove_lock(lock_name)
+        self.assertNotExists(lock_path)
+
     def test_locate_files(self):
         """Test locate_files function."""
 
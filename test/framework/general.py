@@ -27,8 +27,10 @@ Unit tests for general aspects of the EasyBuild framework
 
 @author: Kenneth hoste (Ghent University)
 """
+import json
 import os
 import re
+import subprocess
 import sys
 from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered
 from unittest import TextTestRunner
@@ -194,6 +196,48 @@ class GeneralTest(EnhancedTestCase):
         res_parsed = tomllib.loads(res_str)
         self.assertEqual(res_parsed, res)
 
+    def test_startup_imports(self):
+        """Benchmark cold-start time & imported modules for common entry points of the 'eb' command."""
+        easybuild_loc = os.path.dirname(os.path.dirname(os.path.abspath(easybuild.framework.__file__)))
+
+        bench_script = '\n'.join([
+            "import json, sys, time",
+            "start = time.time()",
+            "import %s",
+            "res = {",
+            "    'time': time.time() - start,",
+            "    'modules': sorted(sys.modules),",
+            "}",
+            "print(json.dumps(res))",
+        ])
+
+        res = {}
+        for entry_point in ('easybuild.tools.options', 'easybuild.main'):
+            cmd = [sys.executable, '-c', bench_script % entry_point]
+            env = dict(os.environ, PYTHONPATH=os.pathsep.join([easybuild_loc, os.getenv('PYTHONPATH', '')]))
+            out = subprocess.check_output(cmd, env=env, stderr=subprocess.STDOUT, universal_newlines=True)
+            res[entry_point] = json.loads(out.strip().split('\n')[-1])
+
+        # subsystems that are only required for specific options should not be imported at startup
+        lazy_modules = [
+            'easybuild.framework.easystack',
+            'easybuild.tools.containers.common',
+            'easybuild.tools.job.slurm',
+            'easybuild.tools.parallelbuild',
+            'yaml',
+        ]
+        for entry_point, entry_res in res.items():
+            for mod in lazy_modules:
+                self.assertNotIn(mod, entry_res['modules'], "%s should not be imported by %s" % (mod, entry_point))
+
+        # importing easybuild.main should only add a couple of modules on top of what's required for option parsing
+        opts_mods = [m for m in res['easybuild.tools.options']['modules'] if m.startswith('easybuild')]
+        main_mods = [m for m in res['easybuild.main']['modules'] if m.startswith('easybuild')]
+        extra_mods = sorted(set(main_mods) - set(opts_mods))
+        msg = "Importing easybuild.main (%.3fs, %d modules) should only import a handful of extra modules: %s"
+        msg = msg % (res['easybuild.main']['time'], len(res['easybuild.main']['modules']), extra_mods)
+        self.assertTrue(len(extra_mods) <= 5, msg)
+
 
 def suite(loader=None):
     """ returns all the testcases in this module """
@@ -30,6 +30,7 @@ Unit tests for talking to GitHub.
 """
 import base64
 import functools
+import glob
 import os
 import random
 import re
@@ -49,7 +50,7 @@ from easybuild.framework.easyconfig.tools import categorize_files_by_type
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.config import build_option, module_classes, update_build_option
 from easybuild.tools.configobj import ConfigObj
-from easybuild.tools.filetools import read_file, write_file
+from easybuild.tools.filetools import copy_dir, read_file, write_file
 from easybuild.tools.github import GITHUB_EASYCONFIGS_REPO, GITHUB_EASYBLOCKS_REPO, GITHUB_MERGEABLE_STATE_CLEAN
 from easybuild.tools.github import VALID_CLOSE_PR_REASONS
 from easybuild.tools.github import det_pr_title, fetch_easyconfigs_from_commit, fetch_files_from_commit
@@ -765,8 +766,57 @@ class GithubTest(EnhancedTestCase):
         self.mock_stdout(False)
 
         self.assertEqual(ec, 'toy')
+        # software name is found via index of patch files, no need to process all easyconfigs
         reg = re.compile(r'[1-9]+ of [1-9]+ easyconfigs checked')
+        self.assertFalse(re.search(reg, txt))
+
+        # index of patch files is persisted if --patch-index-dir is used, and is updated incrementally
+        test_ecs = os.path.join(self.test_prefix, 'test_ecs')
+        copy_dir(os.path.join(ec_path, 'test_ecs', 't', 'toy'), test_ecs)
+        patch_index_dir = os.path.join(self.test_prefix, 'patch_index')
+        update_build_option('patch_index_dir', patch_index_dir)
+
+        self.mock_stdout(True)
+        ec = gh.find_software_name_for_patch('toy-0.0_fix-silly-typo-in-printf-statement.patch', [test_ecs])
+        self.mock_stdout(False)
+        self.assertEqual(ec, 'toy')
+        index_files = os.listdir(patch_index_dir)
+        self.assertEqual(len(index_files), 1)
+        self.assertTrue(index_files[0].startswith(gh.PATCH_INDEX_FILENAME_PREFIX))
+
+        gh._patch_indices.clear()
+        index = gh.get_patch_index(test_ecs)
+        toy_ec = os.path.join(test_ecs, 'toy-0.0.eb')
+        self.assertEqual(index[toy_ec][1], 'toy')
+        self.assertIn('toy-0.0_fix-silly-typo-in-printf-statement.patch', index[toy_ec][2])
+
+        # templates for name & version are resolved, also for extensions
+        test_ec = os.path.join(test_ecs, 'test-1.0.eb')
+        write_file(test_ec, '\n'.join([
+            "name = 'test'",
+            "version = '1.0'",
+            "patches = ['%(name)s-%(version)s_fix.patch', ('%(namelower)s-extra.patch', 1)]",
+            "exts_list = [('ext1', '2.0', {'patches': ['%(name)s-%(version)s_ext.patch']})]",
+        ]))
+        index = gh.get_patch_index(test_ecs)
+        expected = ['test-1.0_fix.patch', 'test-extra.patch', 'ext1-2.0_ext.patch']
+        self.assertEqual(index[test_ec][1:], ('test', expected))
+        self.mock_stdout(True)
+        self.assertEqual(gh.find_software_name_for_patch('ext1-2.0_ext.patch', [test_ecs]), 'test')
+        self.mock_stdout(False)
+
+        # falls back to processing all easyconfigs if patch is not found in index,
+        # for example for templates that can not be resolved via shallow parse
+        for toy_ec in glob.glob(os.path.join(test_ecs, 'toy-*.eb')):
+            toy_txt = read_file(toy_ec).replace('toy-0.0_fix-silly', '%(name)s-%(version_major)s.0_fix-silly')
+            write_file(toy_ec, toy_txt)
+        self.mock_stdout(True)
+        ec = gh.find_software_name_for_patch('toy-0.0_fix-silly-typo-in-printf-statement.patch', [test_ecs])
+        txt = self.get_stdout()
+        self.mock_stdout(False)
+        self.assertEqual(ec, 'toy')
         self.assertTrue(re.search(reg, txt))
+        update_build_option('patch_index_dir', None)
 
         self.mock_stdout(True)
         self.assertEqual(gh.find_software_name_for_patch('test.patch', []), None)
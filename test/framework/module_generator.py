@@ -1409,6 +1409,24 @@ class ModuleGeneratorTest(EnhancedTestCase):
         }
         self.assertEqual('foo/1.2.3-t00ls-6.6.6-bar', ActiveMNS().det_full_module_name(non_parsed))
 
+        # module names are cached, using only the relevant easyconfig parameters as key
+        ActiveMNS().clear_cache()
+        self.assertEqual(ActiveMNS().cache_stats, {'hits': 0, 'misses': 0})
+        self.assertEqual('foo/1.2.3-t00ls-6.6.6-bar', ActiveMNS().det_full_module_name(non_parsed))
+        self.assertEqual(ActiveMNS().cache_stats, {'hits': 0, 'misses': 1})
+        non_parsed_copy = dict(non_parsed, short_mod_name='irrelevant', toolchain=dict(non_parsed['toolchain']))
+        self.assertEqual('foo/1.2.3-t00ls-6.6.6-bar', ActiveMNS().det_full_module_name(non_parsed_copy))
+        self.assertEqual('foo/1.2.3-t00ls-6.6.6-bar', ActiveMNS().det_full_module_name(non_parsed))
+        self.assertEqual(ActiveMNS().cache_stats, {'hits': 2, 'misses': 1})
+        # different values for relevant parameters result in a cache miss
+        non_parsed_copy['versionsuffix'] = ''
+        self.assertEqual('foo/1.2.3-t00ls-6.6.6', ActiveMNS().det_full_module_name(non_parsed_copy))
+        hidden_modname = ActiveMNS().det_full_module_name(dict(non_parsed, hidden=True))
+        self.assertEqual(hidden_modname, 'foo/.1.2.3-t00ls-6.6.6-bar')
+        self.assertEqual(ActiveMNS().det_short_module_name(non_parsed), 'foo/1.2.3-t00ls-6.6.6-bar')
+        self.assertEqual(ActiveMNS().det_module_subdir(non_parsed), '')
+        self.assertEqual(ActiveMNS().cache_stats, {'hits': 2, 'misses': 5})
+
         # make sure test module naming schemes are available
         mns_mods = ['broken_module_naming_scheme', 'test_module_naming_scheme', 'test_module_naming_scheme_more']
         for test_mns_mod in mns_mods:
@@ -1755,6 +1773,61 @@ class ModuleGeneratorTest(EnhancedTestCase):
             ]
             self.assertEqual(dependencies_for('test/1.2.3', self.modtool), expected)
 
+    def test_dependencies_for_layered_tree(self):
+        """Benchmark dependencies_for on a synthetic layered module tree, with diamond-shaped dependencies."""
+        width = 3
+        modfile_ext = '.lua' if self.MODULE_GENERATOR_CLASS == ModuleGeneratorLua else ''
+
+        def create_layered_tree(depth):
+            """Create module tree with specified number of layers, each module loads all modules in next layer."""
+            moddir = os.path.join(self.test_prefix, 'layered-%d' % depth)
+            layers = [['top-%d/1.0' % depth]] + [['d%d-l%d-m%d/1.0' % (depth, i, j) for j in range(width)]
+                                                 for i in range(1, depth + 1)]
+            for layer, next_layer in zip(layers, layers[1:] + [[]]):
+                modtxt = '\n'.join([self.modgen.MODULE_SHEBANG] +
+                                   [self.modgen.LOAD_TEMPLATE % {'mod_name': m} for m in next_layer])
+                for mod_name in layer:
+                    write_file(os.path.join(moddir, mod_name + modfile_ext), modtxt)
+            self.modtool.use(moddir)
+            return layers
+
+        orig_modulefile_path = self.modtool.modulefile_path
+        calls = []
+
+        def counting_modulefile_path(mod_name, *args, **kwargs):
+            calls.append(mod_name)
+            return orig_modulefile_path(mod_name, *args, **kwargs)
+
+        self.modtool.modulefile_path = counting_modulefile_path
+
+        for depth in (3, 6):
+            layers = create_layered_tree(depth)
+            mod_names = [m for layer in layers for m in layer]
+
+            calls[:] = []
+            res = dependencies_for(layers[0][0], self.modtool)
+            self.assertEqual(res, mod_names[1:])
+            # each module is visited only once, so number of calls grows linearly with number of modules
+            # (rather than exponentially with the number of layers)
+            self.assertEqual(sorted(calls), sorted(mod_names))
+
+            # depth limit is still taken into account
+            res = dependencies_for(layers[0][0], self.modtool, depth=1)
+            self.assertEqual(res, layers[1] + layers[2])
+
+            # module file paths and direct dependencies are cached across calls
+            calls[:] = []
+            self.assertEqual(dependencies_for(layers[0][0], self.modtool), mod_names[1:])
+            self.assertEqual(calls, [])
+
+        # cyclic dependencies are ignored
+        cycle_mod = os.path.join(self.test_prefix, 'layered-6', 'd6-l6-m0', '1.0' + modfile_ext)
+        write_file(cycle_mod, '\n' + self.modgen.LOAD_TEMPLATE % {'mod_name': 'top-6/1.0'}, append=True)
+        res = dependencies_for('top-6/1.0', self.modtool)
+        self.assertEqual(res, mod_names[1:] + ['top-6/1.0'])
+
+        self.modtool.modulefile_path = orig_modulefile_path
+
     def test_det_installdir(self):
         """Test det_installdir method."""
 
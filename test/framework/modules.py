@@ -1017,6 +1017,52 @@ class ModulesTest(EnhancedTestCase):
 
             self.assertEqual(self.modtool.modpath_extensions_for([test_mod]), expected)
 
+    def test_modpath_extensions_graph(self):
+        """Test static determination of $MODULEPATH extensions (without loading modules)."""
+        self.setup_hierarchical_modules()
+
+        mod_dir = os.path.join(self.test_installpath, 'modules', 'all')
+        gcc_mod_dir = os.path.join(mod_dir, 'Compiler', 'GCC', '6.4.0-2.28')
+        mpi_mod_dir = os.path.join(mod_dir, 'MPI', 'GCC', '6.4.0-2.28', 'OpenMPI', '2.1.2')
+
+        # module files should be located and parsed without running the modules tool
+        def no_module_cmds(*args, **kwargs):
+            raise AssertionError("Module command should not be run: %s" % str(args))
+
+        orig_run_module = self.modtool.run_module
+        self.modtool.run_module = no_module_cmds
+
+        # OpenMPI and FFTW modules are only available after GCC and OpenMPI modules extend $MODULEPATH
+        res = self.modtool.modpath_extensions_graph(['GCC/6.4.0-2.28', 'OpenMPI/2.1.2', 'FFTW/3.3.7'])
+        expected = {
+            'GCC/6.4.0-2.28': (os.path.join(mod_dir, 'Core'), [gcc_mod_dir]),
+            'OpenMPI/2.1.2': (gcc_mod_dir, [mpi_mod_dir]),
+            'FFTW/3.3.7': (mpi_mod_dir, []),
+        }
+        self.assertEqual(res, expected)
+
+        # $MODULEPATH is not touched
+        self.assertFalse(any(os.path.samefile(p, gcc_mod_dir) for p in curr_module_paths()))
+
+        full_mod_subdir = mpi_mod_dir
+        deps = ['GCC/6.4.0-2.28', 'OpenMPI/2.1.2']
+        path = self.modtool.path_to_top_of_module_tree([os.path.join(mod_dir, 'Core')], 'FFTW/3.3.7',
+                                                       full_mod_subdir, deps)
+        self.assertEqual(path, ['OpenMPI/2.1.2', 'GCC/6.4.0-2.28'])
+
+        # module files that can not be located statically result in None
+        self.assertEqual(self.modtool.modpath_extensions_graph(['FFTW/3.3.7']), None)
+        self.assertEqual(self.modtool.modpath_extensions_graph(['nosuchmodule/1.2']), None)
+
+        # raw $MODULEPATH extensions are cached, and only determined again when module file is changed
+        gcc_modfile = os.path.join(mod_dir, 'Core', 'GCC', '6.4.0-2.28')
+        self.assertIn(gcc_modfile, mod.MODPATH_EXTS_CACHE)
+        write_file(gcc_modfile, 'module use %s\n' % os.path.join(self.test_prefix, 'test'), append=True)
+        exts = self.modtool.modpath_extensions_in_file(gcc_modfile)
+        self.assertEqual(exts, [gcc_mod_dir, os.path.join(self.test_prefix, 'test')])
+
+        self.modtool.run_module = orig_run_module
+
     def test_path_to_top_of_module_tree_categorized_hmns(self):
         """
         Test function to determine path to top of the module tree for a categorized hierarchical module naming
@@ -1202,6 +1248,43 @@ class ModulesTest(EnhancedTestCase):
         self.assertEqual(mod.MODULE_AVAIL_CACHE, {})
         self.assertEqual(mod.MODULE_SHOW_CACHE, {})
 
+    def test_invalidate_module_file_caches(self):
+        """Test invalidating cached module file paths and loaded modules via invalidate_module_caches_for."""
+        mods_path1 = os.path.join(self.test_prefix, 'modules1')
+        mods_path2 = os.path.join(self.test_prefix, 'modules2')
+        other_mods_path = os.path.join(self.test_prefix, 'other')
+        unrelated_path = os.path.join(self.test_prefix, 'modules')
+        for path in (mods_path1, mods_path2, other_mods_path, unrelated_path):
+            mkdir(path)
+        gcc_modfile = os.path.join(mods_path2, 'GCC', '6.4.0-2.28')
+        fftw_modfile = os.path.join(other_mods_path, 'FFTW', '3.3.7')
+
+        modulepath = os.pathsep.join([mods_path1, mods_path2])
+        mod.MODULE_FILE_PATH_CACHE.update({
+            (modulepath, 'GCC/6.4.0-2.28'): gcc_modfile,
+            (other_mods_path, 'FFTW/3.3.7'): fftw_modfile,
+        })
+        mod.MODULE_LOADS_CACHE.update({
+            gcc_modfile: ((0, 0), []),
+            fftw_modfile: ((0, 0), ['GCC/6.4.0-2.28']),
+        })
+
+        # entries for unrelated paths are retained
+        invalidate_module_caches_for(unrelated_path)
+        self.assertEqual(len(mod.MODULE_FILE_PATH_CACHE), 2)
+        self.assertEqual(len(mod.MODULE_LOADS_CACHE), 2)
+
+        # cached path to module file is evicted when a module is installed in a path that is part of $MODULEPATH
+        # it was determined for, since it may be shadowed now; same for modules that are loaded by that module file
+        invalidate_module_caches_for(mods_path1)
+        self.assertEqual(mod.MODULE_FILE_PATH_CACHE, {(other_mods_path, 'FFTW/3.3.7'): fftw_modfile})
+        self.assertEqual(mod.MODULE_LOADS_CACHE, {fftw_modfile: ((0, 0), ['GCC/6.4.0-2.28'])})
+
+        # entries for module files located in specified path are evicted
+        invalidate_module_caches_for(other_mods_path)
+        self.assertEqual(mod.MODULE_FILE_PATH_CACHE, {})
+        self.assertEqual(mod.MODULE_LOADS_CACHE, {})
+
     def test_module_use_unuse(self):
         """Test 'module use' and 'module unuse'."""
         test_dir1 = os.path.join(self.test_prefix, 'one')
@@ -1441,6 +1524,42 @@ class ModulesTest(EnhancedTestCase):
             error_pattern = "Unable to locate a modulefile for 'nosuchmoduleavailableanywhere'"
         self.assertErrorRegex(EasyBuildError, error_pattern, self.modtool.load, ['nosuchmoduleavailableanywhere'])
 
+    def test_loaded_module_files(self):
+        """Test loaded_module_files method."""
+        self.modtool.purge()
+        self.assertEqual(self.modtool.loaded_module_files([]), {})
+
+        # load OpenMPI module, which also loads GCC & hwloc
+        self.modtool.load(['OpenMPI/2.1.2-GCC-6.4.0-2.28'])
+        loaded_modules = self.modtool.loaded_modules()
+        res = self.modtool.loaded_module_files(loaded_modules)
+        self.assertEqual(sorted(res.keys()), sorted(loaded_modules))
+        for mod_name in loaded_modules:
+            self.assertTrue(os.path.samefile(res[mod_name], self.modtool.modulefile_path(mod_name)))
+
+        # module files of loaded modules are scanned directly, so no 'module show' is required
+        orig_show = self.modtool.show
+
+        def no_show(mod_name):
+            raise AssertionError("'module show' should not be used for %s" % mod_name)
+
+        self.modtool.show = no_show
+        self.mock_stderr(True)
+        self.modtool.check_loaded_modules()
+        stderr = self.get_stderr()
+        self.mock_stderr(False)
+        self.assertIn("* OpenMPI/2.1.2-GCC-6.4.0-2.28", stderr)
+        self.modtool.show = orig_show
+
+        # if module files can not be located via $_LMFILES_, None is returned (and 'module show' is used instead)
+        os.environ['_LMFILES_'] = os.environ['_LMFILES_'].split(os.pathsep)[0]
+        self.assertEqual(self.modtool.loaded_module_files(loaded_modules), None)
+        self.mock_stderr(True)
+        self.modtool.check_loaded_modules()
+        stderr = self.get_stderr()
+        self.mock_stderr(False)
+        self.assertIn("* OpenMPI/2.1.2-GCC-6.4.0-2.28", stderr)
+
     def test_check_loaded_modules(self):
         """Test check_loaded_modules method."""
         # try and make sure we start with a clean slate
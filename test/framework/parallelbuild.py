@@ -27,6 +27,7 @@ Unit tests for parallelbuild.py
 
 @author: Kenneth Hoste (Ghent University)
 """
+import glob
 import os
 import re
 import stat
@@ -35,7 +36,8 @@ from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered, init_
 from unittest import TextTestRunner
 
 from easybuild.framework.easyconfig.tools import process_easyconfig
-from easybuild.tools import config
+from easybuild.tools import config, parallelbuild
+from easybuild.tools.build_details import open_build_history_db
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.config import get_module_syntax, update_build_option
 from easybuild.tools.filetools import adjust_permissions, mkdir, read_file, remove_dir, which, write_file
@@ -44,6 +46,7 @@ from easybuild.tools.job.pbs_python import PbsPython
 from easybuild.tools.options import parse_options
 from easybuild.tools.parallelbuild import build_easyconfigs_in_parallel, submit_jobs
 from easybuild.tools.robot import resolve_dependencies
+from easybuild.tools.run import run_shell_cmd
 
 
 # test GC3Pie configuration with large resource specs
@@ -388,6 +391,237 @@ class ParallelBuildTest(EnhancedTestCase):
         }
         self.assertEqual(jobs[1].job_specs, expected)
 
+    def test_build_easyconfigs_in_parallel_slurm_job_array(self):
+        """Test build_easyconfigs_in_parallel(), using (mocked) Slurm as backend for --job, with --job-array."""
+
+        # install mocked versions of 'sbatch' and 'scontrol' commands, which keep track of how they were called;
+        # job IDs are determined by number of 'sbatch' calls so far (rather than being random), to make them unique
+        sbatch_log = os.path.join(self.test_prefix, 'sbatch.log')
+        sbatch = os.path.join(self.test_prefix, 'bin', 'sbatch')
+        submit_cmds = '\n'.join([
+            'echo "$@" >> %s' % sbatch_log,
+            '    echo "Submitted batch job $(( $(wc -l < %s) ))"' % sbatch_log,
+        ])
+        write_file(sbatch, MOCKED_SBATCH.replace('echo "Submitted batch job $RANDOM"', submit_cmds))
+        adjust_permissions(sbatch, stat.S_IXUSR, add=True)
+
+        scontrol = os.path.join(self.test_prefix, 'bin', 'scontrol')
+        write_file(scontrol, MOCKED_SCONTROL)
+        adjust_permissions(scontrol, stat.S_IXUSR, add=True)
+
+        os.environ['PATH'] = os.path.pathsep.join([os.path.join(self.test_prefix, 'bin'), os.getenv('PATH')])
+
+        topdir = os.path.dirname(os.path.abspath(__file__))
+        test_ec = os.path.join(topdir, 'easyconfigs', 'test_ecs', 'g', 'gzip', 'gzip-1.5-foss-2018a.eb')
+        foss_ec = os.path.join(topdir, 'easyconfigs', 'test_ecs', 'f', 'foss', 'foss-2018a.eb')
+        toy_ec = os.path.join(topdir, 'easyconfigs', 'test_ecs', 't', 'toy', 'toy-0.0.eb')
+
+        job_output_dir = os.path.join(self.test_prefix, 'jobs')
+        build_options = {
+            'external_modules_metadata': {},
+            'robot_path': os.path.join(topdir, 'easyconfigs', 'test_ecs'),
+            'valid_module_classes': config.module_classes(),
+            'validate': False,
+            'job_array': True,
+            'job_cores': 3,
+            'job_max_walltime': 5,
+            'job_output_dir': job_output_dir,
+            'force': True,
+        }
+        init_config(args=['--job-backend=Slurm'], build_options=build_options)
+
+        easyconfigs = process_easyconfig(test_ec) + process_easyconfig(foss_ec) + process_easyconfig(toy_ec)
+        ordered_ecs = resolve_dependencies(easyconfigs, self.modtool)
+        self.mock_stdout(True)
+        jobs = build_easyconfigs_in_parallel("echo '%(spec)s'", ordered_ecs, prepare_first=False)
+        self.mock_stdout(False)
+
+        self.assertEqual(sorted(job.name for job in jobs), ['foss-2018a', 'gzip-1.5-foss-2018a', 'toy-0.0'])
+        jobs = {job.name: job for job in jobs}
+
+        # foss & toy have no dependencies, so they're part of the first job array;
+        # gzip depends on foss, so it's part of a second job array
+        sbatch_calls = read_file(sbatch_log).strip().split('\n')
+        self.assertEqual(len(sbatch_calls), 2)
+
+        foss_array_id, foss_idx = jobs['foss-2018a'].jobid.split('_')
+        toy_array_id, toy_idx = jobs['toy-0.0'].jobid.split('_')
+        gzip_array_id, gzip_idx = jobs['gzip-1.5-foss-2018a'].jobid.split('_')
+        self.assertEqual((foss_array_id, toy_array_id), ('1', '1'))
+        self.assertEqual(sorted([foss_idx, toy_idx]), ['0', '1'])
+        self.assertEqual((gzip_array_id, gzip_idx), ('2', '0'))
+
+        self.assertTrue(re.search('--array 0-1 .*--hold ', sbatch_calls[0]), sbatch_calls[0])
+        self.assertNotIn('--dependency', sbatch_calls[0])
+        self.assertIn('--array 0-0 ', sbatch_calls[1])
+        self.assertIn('--ntasks 3 ', sbatch_calls[1])
+        self.assertIn('--time 300 ', sbatch_calls[1])
+        # gzip job depends only on foss job; dependency is specified at the level of individual array tasks,
+        # unless each task depends on the corresponding task of another job array
+        if foss_idx == '0':
+            expected_dep = '--dependency aftercorr:%s ' % foss_array_id
+        else:
+            expected_dep = '--dependency afterok:%s_%s ' % (foss_array_id, foss_idx)
+        self.assertIn(expected_dep, sbatch_calls[1])
+
+        # task tables specify name & command for each array task
+        task_tables = sorted(glob.glob(os.path.join(job_output_dir, 'eb-job-arrays-*', '*.tasks')))
+        self.assertEqual([os.path.basename(x) for x in task_tables], ['layer0-0.tasks', 'layer1-0.tasks'])
+        self.assertEqual(read_file(task_tables[1]), "0\tgzip-1.5-foss-2018a\techo '%s'\n" % test_ec)
+        layer0_tasks = read_file(task_tables[0])
+        self.assertIn("%s\tfoss-2018a\techo '%s'\n" % (foss_idx, foss_ec), layer0_tasks)
+        self.assertIn("%s\ttoy-0.0\techo '%s'\n" % (toy_idx, toy_ec), layer0_tasks)
+
+        # job array script picks command from task table, based on array task index
+        array_script = task_tables[1].replace('.tasks', '.sh')
+        res = run_shell_cmd("SLURM_ARRAY_TASK_ID=0 %s" % array_script, hidden=True)
+        self.assertEqual(res.output.strip(), test_ec)
+
+    def test_pack_easyconfigs(self):
+        """Test packing of short builds in a single job, using (mocked) Slurm as backend for --job."""
+
+        # install mocked versions of 'sbatch' and 'scontrol' commands
+        sbatch = os.path.join(self.test_prefix, 'bin', 'sbatch')
+        write_file(sbatch, MOCKED_SBATCH)
+        adjust_permissions(sbatch, stat.S_IXUSR, add=True)
+
+        scontrol = os.path.join(self.test_prefix, 'bin', 'scontrol')
+        write_file(scontrol, MOCKED_SCONTROL)
+        adjust_permissions(scontrol, stat.S_IXUSR, add=True)
+
+        os.environ['PATH'] = os.path.pathsep.join([os.path.join(self.test_prefix, 'bin'), os.getenv('PATH')])
+
+        topdir = os.path.dirname(os.path.abspath(__file__))
+        test_ec = os.path.join(topdir, 'easyconfigs', 'test_ecs', 'g', 'gzip', 'gzip-1.5-foss-2018a.eb')
+        foss_ec = os.path.join(topdir, 'easyconfigs', 'test_ecs', 'f', 'foss', 'foss-2018a.eb')
+        toy_ec = os.path.join(topdir, 'easyconfigs', 'test_ecs', 't', 'toy', 'toy-0.0.eb')
+
+        build_options = {
+            'external_modules_metadata': {},
+            'robot_path': os.path.join(topdir, 'easyconfigs', 'test_ecs'),
+            'valid_module_classes': config.module_classes(),
+            'validate': False,
+            'job_cores': 3,
+            'job_max_walltime': 5,
+            'job_pack_walltime': 1,
+            'force': True,
+        }
+        init_config(args=['--job-backend=Slurm'], build_options=build_options)
+
+        easyconfigs = process_easyconfig(foss_ec) + process_easyconfig(test_ec) + process_easyconfig(toy_ec)
+        ordered_ecs = resolve_dependencies(easyconfigs, self.modtool)
+
+        # no build stats are available for these easyconfigs,
+        # only the easyblock used for foss (Toolchain) is known to be quick, so nothing gets packed
+        estimates = {ec['ec']['name']: parallelbuild.estimate_build_time(ec) for ec in ordered_ecs}
+        self.assertEqual(estimates, {'foss': 10, 'gzip': None, 'toy': None})
+        groups, build_times = parallelbuild.pack_easyconfigs(ordered_ecs, 1)
+        self.assertEqual([len(group) for group in groups], [1, 1, 1])
+        self.assertEqual(build_times, [10, None, None])
+
+        # use mocked build time estimates: 10min for foss & gzip, no estimate for toy
+        mocked_build_times = {'foss': 600, 'gzip': 600}
+        estimated = []
+
+        def mocked_estimate_build_time(ec):
+            estimated.append(ec['ec']['name'])
+            return mocked_build_times.get(ec['ec']['name'])
+
+        orig_estimate_build_time = parallelbuild.estimate_build_time
+        parallelbuild.estimate_build_time = mocked_estimate_build_time
+
+        try:
+            # gzip depends on foss, so it can be packed together with it (2 * 2 * 10min fits in 1 hour);
+            # toy is not packed
+            groups, build_times = parallelbuild.pack_easyconfigs(ordered_ecs, 1)
+            self.assertEqual(sorted([ec['ec']['name'] for ec in group] for group in groups),
+                             [['foss', 'gzip'], ['toy']])
+            self.assertEqual(sorted(build_times, key=str), [1200, None])
+
+            # with a too small walltime for packed jobs, nothing gets packed
+            groups, build_times = parallelbuild.pack_easyconfigs(ordered_ecs, 0.5)
+            self.assertEqual([len(group) for group in groups], [1, 1, 1])
+
+            # build time is estimated only once per easyconfig when creating packed jobs
+            estimated[:] = []
+            self.mock_stdout(True)
+            jobs = build_easyconfigs_in_parallel("echo '%(spec)s'", ordered_ecs, prepare_first=False)
+            self.mock_stdout(False)
+        finally:
+            parallelbuild.estimate_build_time = orig_estimate_build_time
+
+        self.assertEqual(sorted(estimated), ['foss', 'gzip', 'toy'])
+        self.assertEqual(len(jobs), 2)
+        packed_job = [job for job in jobs if job.name != 'toy-0.0'][0]
+        self.assertEqual(packed_job.name, 'foss-2018a-pack-2')
+        self.assertEqual(packed_job.module, 'foss/2018a,gzip/1.5-foss-2018a')
+        # builds are done in order, and job stops at first failing build
+        self.assertEqual(packed_job.script, "(echo '%s') && (echo '%s')" % (foss_ec, test_ec))
+        # walltime is determined based on estimated build times (with safety factor), rounded up to hours
+        self.assertEqual(packed_job.job_specs['time'], 60)
+        self.assertNotIn('dependency', packed_job.job_specs)
+
+    def test_estimate_build_time(self):
+        """Test estimating build time for easyconfigs."""
+        topdir = os.path.dirname(os.path.abspath(__file__))
+        toy_ec = os.path.join(topdir, 'easyconfigs', 'test_ecs', 't', 'toy', 'toy-0.0.eb')
+        init_config(build_options={'robot_path': os.path.join(topdir, 'easyconfigs', 'test_ecs'), 'validate': False})
+        toy = process_easyconfig(toy_ec)[0]
+
+        self.assertEqual(parallelbuild.estimate_build_time(toy), None)
+
+        class MockedJobBackend:
+            """Mocked job backend, which just keeps track of how make_job was called."""
+            def make_job(self, script, name, **kwargs):
+                return MockedJob(kwargs)
+
+        class MockedJob:
+            """Mocked job."""
+            def __init__(self, specs):
+                self.specs = specs
+
+        # rough estimate based on easyblock is only used for packing easyconfigs,
+        # not to determine walltime for job for a single easyconfig
+        orig_easyblock = toy['ec']['easyblock']
+        toy['ec']['easyblock'] = 'Tarball'
+        self.assertEqual(parallelbuild.estimate_build_time(toy), 60)
+        self.assertEqual(parallelbuild.det_measured_build_time(toy), None)
+        job = parallelbuild.create_job(MockedJobBackend(), "echo %(spec)s", toy)
+        self.assertEqual(job.specs, {})
+        toy['ec']['easyblock'] = orig_easyblock
+
+        # estimate is based on median of most recent builds in build history
+        build_history_db = os.path.join(self.test_prefix, 'build_history.sqlite')
+        update_build_option('build_history_db', build_history_db)
+        conn = open_build_history_db()
+        with conn:
+            for timestamp, build_time in [(1, 1000), (2, 30), (3, 20), (4, 25)]:
+                conn.execute("INSERT INTO builds (name, version, timestamp, build_time) VALUES (?, ?, ?, ?)",
+                             ('toy', '0.0', timestamp, build_time))
+        conn.close()
+        self.assertEqual(parallelbuild.estimate_build_time(toy), 27.5)
+
+        # only most recent builds are taken into account
+        conn = open_build_history_db()
+        with conn:
+            for timestamp in range(5, 10):
+                conn.execute("INSERT INTO builds (name, version, timestamp, build_time) VALUES (?, ?, ?, ?)",
+                             ('toy', '0.0', timestamp, 60))
+        conn.close()
+        self.assertEqual(parallelbuild.estimate_build_time(toy), 60)
+
+        # walltime of jobs is determined based on estimated build time (in seconds), with safety margin
+        conn = open_build_history_db()
+        with conn:
+            for timestamp in range(10, 15):
+                conn.execute("INSERT INTO builds (name, version, timestamp, build_time) VALUES (?, ?, ?, ?)",
+                             ('toy', '0.0', timestamp, 5400))
+        conn.close()
+        job = parallelbuild.create_job(MockedJobBackend(), "echo %(spec)s", toy)
+        self.assertEqual(job.specs, {'hours': 3})
+        job = parallelbuild.create_packed_job(MockedJobBackend(), "echo %(spec)s", [toy, toy])
+        self.assertEqual(job.specs, {'hours': 6})
+
 
 def suite(loader=None):
     """ returns all the testcases in this module """
@@ -32,6 +32,7 @@ Unit tests for run.py
 """
 import contextlib
 import glob
+import json
 import os
 import re
 import signal
@@ -53,6 +54,8 @@ from easybuild.tools.build_log import EasyBuildError, init_logging, stop_logging
 from easybuild.tools.config import update_build_option
 from easybuild.tools.filetools import adjust_permissions, change_dir, mkdir, read_file, remove_dir, write_file
 from easybuild.tools.modules import EnvironmentModules, Lmod
+from easybuild.tools.resource_usage import RESOURCE_USAGE_CAT_STEP, ResourceUsageRecorder, get_resource_usage_recorder
+from easybuild.tools.resource_usage import record_resource_usage, set_resource_usage_recorder
 from easybuild.tools.run import RunShellCmdResult, RunShellCmdError, check_async_cmd, check_log_for_errors
 from easybuild.tools.run import complete_cmd, fileprefix_from_cmd, get_output_from_process, parse_log_for_error
 from easybuild.tools.run import run_cmd, run_cmd_qa, run_shell_cmd, subprocess_terminate
@@ -266,6 +269,87 @@ class RunTest(EnhancedTestCase):
             self.assertTrue(isinstance(res.output, str))
             self.assertTrue(res.work_dir and isinstance(res.work_dir, str))
 
+    def test_run_shell_cmd_resource_usage(self):
+        """Test recording of resource usage of shell commands run via run_shell_cmd."""
+        # no resource usage is recorded by default, and process is not waited for via os.wait4 in that case
+        def fail_wait4(*args, **kwargs):
+            raise AssertionError("os.wait4 should not be used when resource usage is not recorded")
+
+        orig_wait4 = os.wait4
+        os.wait4 = fail_wait4
+        try:
+            with self.mocked_stdout_stderr():
+                res = run_shell_cmd("echo hello")
+                res_stream = run_shell_cmd("echo hello", stream_output=True)
+        finally:
+            os.wait4 = orig_wait4
+        self.assertEqual(get_resource_usage_recorder(), None)
+        self.assertEqual((res.exit_code, res.output), (0, 'hello\n'))
+        self.assertEqual((res_stream.exit_code, res_stream.output), (0, 'hello\n'))
+
+        recorder = ResourceUsageRecorder()
+        set_resource_usage_recorder(recorder)
+        try:
+            with record_resource_usage('build', RESOURCE_USAGE_CAT_STEP):
+                with self.mocked_stdout_stderr():
+                    run_shell_cmd("python -c 'sum(range(10**6))'")
+                    run_shell_cmd("exit 1", fail_on_error=False)
+        finally:
+            set_resource_usage_recorder(None)
+
+        self.assertEqual([(e['name'], e['category']) for e in recorder.events],
+                         [('python', 'shell_cmd'), ('exit', 'shell_cmd'), ('build', 'step')])
+        cmd_event, fail_event, step_event = recorder.events
+        self.assertEqual(cmd_event['args']['exit_code'], 0)
+        self.assertEqual(fail_event['args']['exit_code'], 1)
+        self.assertTrue(cmd_event['max_rss'] > 0)
+        self.assertTrue(step_event['wall_time'] >= cmd_event['wall_time'] + fail_event['wall_time'])
+        self.assertTrue(step_event['cpu_user'] >= cmd_event['cpu_user'])
+
+        summary = recorder.summary()
+        self.assertEqual(list(summary), ['build'])
+        self.assertEqual(summary['build']['count'], 1)
+
+        logfile = os.path.join(self.test_prefix, 'easybuild-toy-0.0-20250101.000000.log')
+        paths = recorder.export(logfile)
+        expected_paths = [os.path.join(self.test_prefix, 'easybuild-toy-0.0-20250101.000000' + suffix)
+                          for suffix in ('_resource_usage.json', '_trace.json')]
+        self.assertEqual(paths, expected_paths)
+        self.assertEqual(json.loads(read_file(paths[0]))['steps']['build']['count'], 1)
+        trace_events = json.loads(read_file(paths[1]))['traceEvents']
+        self.assertEqual([(e['name'], e['ph']) for e in trace_events], [('python', 'X'), ('exit', 'X'), ('build', 'X')])
+        self.assertTrue(all(e['dur'] >= 0 and e['ts'] >= 0 for e in trace_events))
+
+        # peak memory usage is determined per shell command, and aggregated per step
+        recorder = ResourceUsageRecorder()
+        set_resource_usage_recorder(recorder)
+        alloc_cmd = "python -c 'x = bytearray(200 * 1024 * 1024); x[::4096] = b\"x\" * len(x[::4096])'"
+        try:
+            with record_resource_usage('build', RESOURCE_USAGE_CAT_STEP):
+                with self.mocked_stdout_stderr():
+                    run_shell_cmd(alloc_cmd)
+                    run_shell_cmd("echo small")
+                    # input is still passed to command when resource usage is recorded
+                    cat_res = run_shell_cmd("cat", stdin="foo bar")
+            with record_resource_usage('install', RESOURCE_USAGE_CAT_STEP):
+                with self.mocked_stdout_stderr():
+                    # also when output is streamed
+                    run_shell_cmd("echo small", stream_output=True)
+                    res = run_shell_cmd("kill -9 $$", fail_on_error=False)
+        finally:
+            set_resource_usage_recorder(None)
+
+        self.assertEqual(res.exit_code, -9)
+        alloc_event, small_event, cat_event, build_event, small_event2, kill_event, install_event = recorder.events
+        self.assertEqual(cat_event['args']['exit_code'], 0)
+        self.assertEqual(cat_res.output, 'foo bar')
+        self.assertTrue(cat_event['max_rss'] > 0)
+        self.assertTrue(alloc_event['max_rss'] > 200 * 1024 * 1024)
+        self.assertTrue(small_event['max_rss'] < 100 * 1024 * 1024)
+        self.assertTrue(small_event2['max_rss'] < 100 * 1024 * 1024)
+        self.assertEqual(build_event['max_rss'], alloc_event['max_rss'])
+        self.assertEqual(install_event['max_rss'], max(small_event2['max_rss'], kill_event['max_rss']))
+
     def test_run_shell_cmd_perl(self):
         """
         Test running of Perl script via run_shell_cmd that detects type of shell
@@ -1747,6 +1831,35 @@ class RunTest(EnhancedTestCase):
         for line in expected:
             self.assertIn(line, stdout)
 
+    def test_run_shell_cmd_stream_large_output(self):
+        """Test use of run_shell_cmd with streaming output for commands that produce a lot of output."""
+
+        # command producing a lot of output (more than what is retained to check question patterns against),
+        # before asking a question
+        cmd = 'for x in $(seq 100000); do echo "line $x of output"; done; '
+        cmd += 'echo "Pick a number: "; read number; echo "Picked number: $number"'
+        with self.mocked_stdout_stderr():
+            res = run_shell_cmd(cmd, qa_patterns=[('Pick a number: ', '42')], qa_timeout=10)
+
+        self.assertEqual(res.exit_code, 0)
+        lines = res.output.splitlines()
+        self.assertEqual(len(lines), 100002)
+        self.assertEqual(lines[0], "line 1 of output")
+        self.assertEqual(lines[-2:], ["Pick a number: ", "Picked number: 42"])
+        # full output is written to output file
+        self.assertEqual(read_file(res.out_file), res.output)
+
+        # stdout and stderr are collected separately
+        cmd = 'for x in $(seq 10000); do echo "out $x"; echo "err $x" >&2; done'
+        with self.mocked_stdout_stderr():
+            res = run_shell_cmd(cmd, stream_output=True, split_stderr=True)
+
+        self.assertEqual(res.exit_code, 0)
+        self.assertEqual(res.output, ''.join('out %d\n' % x for x in range(1, 10001)))
+        self.assertEqual(res.stderr, ''.join('err %d\n' % x for x in range(1, 10001)))
+        self.assertEqual(read_file(res.out_file), res.output)
+        self.assertEqual(read_file(res.err_file), res.stderr)
+
     def test_run_shell_cmd_eof_stdin(self):
         """Test use of run_shell_cmd with streaming output and blocking stdin read."""
         cmd = 'timeout 1 cat -'
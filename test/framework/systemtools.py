@@ -573,6 +573,7 @@ class SystemToolsTest(EnhancedTestCase):
         super().setUp()
         self.orig_get_cpu_architecture = st.get_cpu_architecture
         self.orig_get_cpu_family = st.get_cpu_family
+        self.orig_get_cpu_model = st.get_cpu_model
         self.orig_get_os_name = st.get_os_name
         self.orig_get_os_type = st.get_os_type
         self.orig_is_readable = st.is_readable
@@ -593,6 +594,7 @@ class SystemToolsTest(EnhancedTestCase):
         st.read_file = self.orig_read_file
         st.get_cpu_architecture = self.orig_get_cpu_architecture
         st.get_cpu_family = self.orig_get_cpu_family
+        st.get_cpu_model = self.orig_get_cpu_model
         st.get_os_name = self.orig_get_os_name
         st.get_os_type = self.orig_get_os_type
         st.run_shell_cmd = self.orig_run_shell_cmd
@@ -1069,6 +1071,69 @@ class SystemToolsTest(EnhancedTestCase):
         system_info = get_system_info()
         self.assertIsInstance(system_info, dict)
 
+    def test_system_info_snapshot(self):
+        """Test snapshot of system information."""
+        probed = []
+
+        def mocked_get_cpu_model():
+            probed.append('cpu_model')
+            return 'Mocked CPU model'
+
+        def mocked_get_avail_core_count():
+            probed.append('core_count')
+            return 4
+
+        orig_get_avail_core_count = st.get_avail_core_count
+        st.get_cpu_model = mocked_get_cpu_model
+        st.get_avail_core_count = mocked_get_avail_core_count
+        st._system_info_snapshot = None
+
+        boot_id_fp = os.path.join(self.test_prefix, 'boot_id')
+        write_file(boot_id_fp, 'boot-1\n')
+        orig_boot_id_fp = st.BOOT_ID_FP
+        st.BOOT_ID_FP = boot_id_fp
+        cache_dir = os.path.join(self.test_prefix, 'cache')
+        init_config(build_options={'sysinfo_cache_dir': cache_dir})
+        try:
+            # facts are only probed once per session, except for volatile facts which depend on the environment
+            for _ in range(3):
+                system_info = get_system_info()
+                self.assertEqual(system_info['cpu_model'], 'Mocked CPU model')
+                self.assertEqual(system_info['core_count'], 4)
+            self.assertEqual(sorted(probed), ['core_count'] * 3 + ['cpu_model'])
+
+            # location of gcc is determined again every time
+            gcc = os.path.join(self.test_prefix, 'bin', 'gcc')
+            write_file(gcc, '#!/bin/bash\necho gcc')
+            adjust_permissions(gcc, stat.S_IXUSR)
+            self.assertNotEqual(get_system_info()['system_gcc_path'], gcc)
+            os.environ['PATH'] = os.pathsep.join([os.path.dirname(gcc), os.getenv('PATH')])
+            self.assertEqual(get_system_info()['system_gcc_path'], gcc)
+            probed[:] = ['cpu_model']
+
+            snapshot = st.get_system_info_snapshot()
+            self.assertEqual(snapshot.get('cpu_features'), st.get_cpu_features())
+            self.assertErrorRegex(EasyBuildError, "Unknown system fact", snapshot.get, 'nosuchfact')
+
+            # facts are persisted per host, and reused in next session as long as boot ID is unchanged
+            cache_fp = os.path.join(cache_dir, 'sysinfo-%s.json' % st.gethostname())
+            self.assertExists(cache_fp)
+            self.assertNotIn('python_version', read_file(cache_fp))
+            self.assertNotIn('core_count', read_file(cache_fp))
+
+            st._system_info_snapshot = None
+            self.assertEqual(get_system_info()['cpu_model'], 'Mocked CPU model')
+            self.assertEqual(probed, ['cpu_model', 'core_count'])
+
+            st._system_info_snapshot = None
+            probed[:] = ['cpu_model']
+            write_file(boot_id_fp, 'boot-2\n')
+            self.assertEqual(get_system_info()['cpu_model'], 'Mocked CPU model')
+            self.assertEqual(sorted(probed), ['core_count', 'cpu_model', 'cpu_model'])
+        finally:
+            st.BOOT_ID_FP = orig_boot_id_fp
+            st.get_avail_core_count = orig_get_avail_core_count
+
     def test_det_parallelism_native(self):
         """Test det_parallelism function (native calls)."""
         self.assertTrue(det_parallelism() > 0)
@@ -1236,6 +1301,12 @@ class SystemToolsTest(EnhancedTestCase):
         rpm_txt = '\n'.join([
             "#!/bin/bash",
             "if [[ -z $LD_LIBRARY_PATH ]]; then",
+            '    if [[ $1 == "-qa" ]]; then',
+            '        echo "foo 1.2.3 4.el8 x86_64"',
+            '        echo "bar 0.1 1.el8 noarch"',
+            '        echo "$@" >> %s' % os.path.join(self.test_prefix, 'rpm.log'),
+            '        exit 0',
+            '    fi',
             '    echo "OK: $@ (LD_LIBRARY_PATH: $LD_LIBRARY_PATH)"',
             "    exit 0",
             "else",
@@ -1265,9 +1336,65 @@ class SystemToolsTest(EnhancedTestCase):
         self.assertTrue(check_os_dependency('foo'))
 
         # still works fine if $LD_LIBRARY_PATH is set
+        st._os_pkgs_inventory.clear()
         write_file(bash_profile, 'export LD_LIBRARY_PATH=%s' % self.test_prefix)
         self.assertTrue(check_os_dependency('bar'))
 
+        # inventory of installed packages is only determined once, and also covers other variants of package names
+        for dep in ('foo-1.2.3', 'foo-1.2.3-4.el8.x86_64', 'bar.noarch'):
+            self.assertTrue(check_os_dependency(dep))
+        self.assertFalse(check_os_dependency('nosuchpackage'))
+        self.assertEqual(len(read_file(os.path.join(self.test_prefix, 'rpm.log')).splitlines()), 2)
+
+    def test_os_pkgs_inventory(self):
+        """Test determining inventory of installed OS packages."""
+        dpkg_status = '\n'.join([
+            "Package: libssl-dev",
+            "Status: install ok installed",
+            "Architecture: amd64",
+            "Version: 3.0.2-0ubuntu1",
+            "Description: Secure Sockets Layer toolkit",
+            " Package: this is not a package",
+            "",
+            "Package: libfoo1",
+            "Status: deinstall ok config-files",
+            "Architecture: amd64",
+            "",
+            "Package: zlib1g-dev",
+            "Status: install ok installed",
+            "",
+        ])
+        self.assertEqual(st.parse_dpkg_status(dpkg_status), {'libssl-dev', 'libssl-dev:amd64', 'zlib1g-dev'})
+
+        status_fp = os.path.join(self.test_prefix, 'dpkg_status')
+        write_file(status_fp, dpkg_status)
+        orig_dpkg_status_fp = st.DPKG_STATUS_FP
+        st.DPKG_STATUS_FP = status_fp
+        st.get_os_name = lambda: 'ubuntu'
+
+        cache_dir = os.path.join(self.test_prefix, 'cache')
+        init_config(build_options={'sysinfo_cache_dir': cache_dir})
+        try:
+            self.assertTrue(check_os_dependency('libssl-dev'))
+            self.assertFalse(check_os_dependency('libfoo1'))
+
+            # inventory is persisted, and reused as long as dpkg status file is not changed
+            cache_fps = os.listdir(cache_dir)
+            self.assertEqual(len(cache_fps), 1)
+            self.assertTrue(cache_fps[0].startswith('os-pkgs-dpkg-'))
+
+            st._os_pkgs_inventory.clear()
+            write_file(os.path.join(cache_dir, cache_fps[0]), read_file(os.path.join(cache_dir, cache_fps[0])).replace(
+                'zlib1g-dev', 'cached-pkg'))
+            self.assertIn('cached-pkg', st.get_os_pkgs_inventory(st.DPKG))
+
+            st._os_pkgs_inventory.clear()
+            write_file(status_fp, "Package: bar\nStatus: install ok installed\n")
+            os.utime(status_fp, (0, 0))
+            self.assertEqual(st.get_os_pkgs_inventory(st.DPKG), {'bar'})
+        finally:
+            st.DPKG_STATUS_FP = orig_dpkg_status_fp
+
     def test_check_linked_shared_libs(self):
         """Test for check_linked_shared_libs function."""
 
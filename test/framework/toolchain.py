@@ -49,11 +49,12 @@ from easybuild.tools import systemtools as st
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.environment import setvar
 from easybuild.tools.filetools import adjust_permissions, copy_dir, find_eb_script, mkdir
-from easybuild.tools.filetools import read_file, symlink, write_file, which
+from easybuild.tools.filetools import read_file, remove_file, symlink, write_file, which
 from easybuild.tools.modules import EnvironmentModules
 from easybuild.tools.run import run_shell_cmd
 from easybuild.tools.systemtools import get_shared_lib_ext
 from easybuild.tools.toolchain.mpi import get_mpi_cmd_template
+from easybuild.tools.toolchain.toolchain import RPATH_WRAPPERS_CACHE_DIR_PREFIX, RPATH_WRAPPERS_COMPLETE_MARKER
 from easybuild.tools.toolchain.toolchain import env_vars_external_module, RPATH_WRAPPERS_SUBDIR
 from easybuild.tools.toolchain.utilities import get_toolchain, search_toolchain
 from easybuild.toolchains.compiler.clang import Clang
@@ -1008,6 +1009,71 @@ class ToolchainTest(EnhancedTestCase):
             self.assertErrorRegex(EasyBuildError, error_pattern, tc.prepare)
         self.modtool.purge()
 
+    def test_add_dependency_cpp_headers(self):
+        """Test determining subdirectories with header files of dependencies via index of $*PATH entries."""
+        init_config(build_options={'search_path_cpp_headers': 'cpath', 'silent': True})
+        tc = self.get_toolchain('foss', version='2018a')
+        tc.set_options({})
+        tc._validate_search_path()
+
+        foo_root = os.path.join(self.test_prefix, 'software', 'foo')
+        bar_root = os.path.join(self.test_prefix, 'software', 'bar')
+        os.environ['CPATH'] = ':'.join([
+            os.path.join(foo_root, 'include', 'foo'),
+            os.path.join(bar_root, 'include'),
+            '/other/include',
+            os.path.join(foo_root, 'include'),
+        ])
+        os.environ['C_INCLUDE_PATH'] = os.path.join(foo_root, 'extra', 'include')
+        for key in ['CPLUS_INCLUDE_PATH', 'OBJC_INCLUDE_PATH']:
+            if key in os.environ:
+                del os.environ[key]
+
+        for subdir in ['include/foo', 'extra/include', 'inc']:
+            mkdir(os.path.join(foo_root, subdir), parents=True)
+        mkdir(os.path.join(bar_root, 'include'), parents=True)
+
+        tc._add_dependency_cpp_headers(foo_root, extra_dirs=['include', 'inc'])
+        tc._add_dependency_cpp_headers(bar_root)
+        # order in which paths are listed in $*PATH environment variables is retained (per dependency)
+        expected = [os.path.join(bar_root, 'include')]
+        expected.extend(os.path.join(foo_root, x) for x in ['include/foo', 'include', 'extra/include', 'inc'])
+        self.assertEqual(str(tc.variables['CPATH']), ':'.join(expected))
+
+        # index is only recreated when relevant environment variables change
+        index = tc.cpp_headers_path_index
+        self.assertEqual(len(index[1]), 5)
+        tc._add_dependency_cpp_headers(bar_root)
+        self.assertIs(tc.cpp_headers_path_index, index)
+        os.environ['CPLUS_INCLUDE_PATH'] = os.path.join(bar_root, 'include', 'c++')
+        tc._add_dependency_cpp_headers(bar_root)
+        self.assertIsNot(tc.cpp_headers_path_index, index)
+        self.assertEqual(len(tc.cpp_headers_path_index[1]), 6)
+
+        # environment variables are not set again if they already have the same value
+        tc.vars = {'CFLAGS': '-O2', 'CXXFLAGS': '-O3'}
+        tc._setenv_variables()
+        self.assertEqual(os.getenv('CFLAGS'), '-O2')
+        self.assertEqual(os.getenv('EBVARCXXFLAGS'), '-O3')
+
+        import easybuild.tools.toolchain.toolchain as tc_module
+        orig_setvar = tc_module.setvar
+        set_vars = []
+
+        def mocked_setvar(key, val, **kwargs):
+            set_vars.append(key)
+            orig_setvar(key, val, **kwargs)
+
+        tc_module.setvar = mocked_setvar
+        try:
+            tc.vars['CXXFLAGS'] = '-O1'
+            tc._setenv_variables()
+        finally:
+            tc_module.setvar = orig_setvar
+        self.assertEqual(set_vars, ['CXXFLAGS', 'EBVARCXXFLAGS'])
+        self.assertEqual(os.getenv('CXXFLAGS'), '-O1')
+        self.assertEqual(os.getenv('CFLAGS'), '-O2')
+
     def test_search_path_linker(self):
         """Test functionality behind search-path-linker option"""
         linker_mode = {
@@ -3274,6 +3340,65 @@ class ToolchainTest(EnhancedTestCase):
         # Make sure it wraps our fake 'g++'
         self.assertTrue(fake_gxx.encode(encoding="utf-8") in read_file(target_wrapper, mode='rb'))
 
+    def test_prepare_rpath_wrappers_reuse(self):
+        """Test reusing of RPATH wrappers when preparing toolchain again."""
+
+        # put fake 'clang' command in place that just echos its arguments
+        fake_clang = os.path.join(self.test_prefix, 'fake', 'clang')
+        write_file(fake_clang, '#!/bin/bash\necho "$@"')
+        adjust_permissions(fake_clang, stat.S_IXUSR)
+        orig_path = '%s:%s' % (os.path.join(self.test_prefix, 'fake'), os.getenv('PATH', ''))
+        os.environ['PATH'] = orig_path
+
+        init_config(build_options={'rpath': True, 'silent': True})
+        tc = Clang(name='Clang', version='1')
+
+        tc.prepare_rpath_wrappers(rpath_filter_dirs=['/foo'])
+        clang_wrapper = which('clang')
+        self.assertTrue(tc.is_rpath_wrapper(clang_wrapper))
+        wrapper_dir = os.path.dirname(clang_wrapper)
+        wrappers_topdir = os.path.dirname(os.path.dirname(wrapper_dir))
+        self.assertTrue(os.path.basename(wrappers_topdir).startswith(RPATH_WRAPPERS_CACHE_DIR_PREFIX))
+        clang_wrapper_stat = os.stat(clang_wrapper)
+
+        # preparing RPATH wrappers again in same environment doesn't wrap RPATH wrappers, and doesn't change $PATH
+        path = os.getenv('PATH')
+        tc.prepare_rpath_wrappers(rpath_filter_dirs=['/foo'])
+        self.assertEqual(os.getenv('PATH'), path)
+        self.assertEqual(which('clang'), clang_wrapper)
+
+        # when preparing RPATH wrappers again after environment was reset, existing RPATH wrappers are reused
+        os.environ['PATH'] = orig_path
+        tc.prepare_rpath_wrappers(rpath_filter_dirs=['/foo'])
+        self.assertEqual(which('clang'), clang_wrapper)
+        self.assertEqual(os.stat(clang_wrapper).st_mtime_ns, clang_wrapper_stat.st_mtime_ns)
+        self.assertEqual(os.stat(clang_wrapper).st_ino, clang_wrapper_stat.st_ino)
+
+        # directory for RPATH wrapper is never included twice in $PATH
+        os.environ['PATH'] = '%s:%s' % (orig_path, wrapper_dir)
+        tc.prepare_rpath_wrappers(rpath_filter_dirs=['/foo'])
+        path = os.getenv('PATH').split(os.pathsep)
+        self.assertEqual(path.count(wrapper_dir), 1)
+        self.assertTrue(path.index(wrapper_dir) < path.index(os.path.dirname(fake_clang)))
+
+        # different RPATH wrappers are used when inputs for RPATH wrappers are different
+        os.environ['PATH'] = orig_path
+        tc.prepare_rpath_wrappers(rpath_filter_dirs=['/bar'])
+        other_clang_wrapper = which('clang')
+        self.assertTrue(tc.is_rpath_wrapper(other_clang_wrapper))
+        self.assertNotEqual(other_clang_wrapper, clang_wrapper)
+        self.assertIn('/bar.*', read_file(other_clang_wrapper))
+        self.assertNotIn('/bar.*', read_file(clang_wrapper))
+
+        # incomplete directory with RPATH wrappers is not reused
+        remove_file(os.path.join(wrappers_topdir, RPATH_WRAPPERS_COMPLETE_MARKER))
+        write_file(clang_wrapper, 'broken')
+        os.environ['PATH'] = orig_path
+        tc.prepare_rpath_wrappers(rpath_filter_dirs=['/foo'])
+        self.assertEqual(which('clang'), clang_wrapper)
+        self.assertTrue(tc.is_rpath_wrapper(clang_wrapper))
+        self.assertExists(os.path.join(wrappers_topdir, RPATH_WRAPPERS_COMPLETE_MARKER))
+
     def test_prepare_openmpi_tmpdir(self):
         """Test handling of long $TMPDIR path for OpenMPI 2.x"""
 
@@ -31,7 +31,9 @@ Toy build unit test
 """
 import glob
 import grp
+import json
 import os
+import pstats
 import re
 import shutil
 import signal
@@ -51,6 +53,8 @@ import easybuild.tools.module_naming_scheme  # required to dynamically load test
 from easybuild.framework.easyconfig.easyconfig import EasyConfig
 from easybuild.framework.easyconfig.parser import EasyConfigParser
 from easybuild.main import main_with_hooks
+from easybuild.tools.binary_cache import binary_cache_paths, find_in_binary_cache
+from easybuild.tools.build_details import estimate_build_duration, estimate_step_durations, get_build_history
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.config import get_module_syntax, get_repositorypath, update_build_option
 from easybuild.tools.environment import setvar
@@ -58,6 +62,7 @@ from easybuild.tools.filetools import adjust_permissions, change_dir, copy_file,
 from easybuild.tools.filetools import read_file, remove_dir, remove_file, which, write_file
 from easybuild.tools.module_generator import ModuleGeneratorTcl
 from easybuild.tools.modules import EnvironmentModules, Lmod
+from easybuild.tools.profiling import init_framework_profiling
 from easybuild.tools.run import run_shell_cmd
 from easybuild.tools.utilities import nub
 from easybuild.tools.systemtools import get_shared_lib_ext
@@ -592,6 +597,142 @@ class ToyBuildTest(EnhancedTestCase):
 
         shutil.rmtree(tmpdir)
 
+    def test_toy_binary_cache(self):
+        """Test use of binary cache of installations."""
+        cache_dir = os.path.join(self.test_prefix, 'binary_cache')
+        toy_installdir = os.path.join(self.test_installpath, 'software', 'toy', '0.0')
+        args = ['--binary-cache-dir=%s' % cache_dir]
+
+        # installation is added to binary cache after successful build
+        self.run_test_toy_build_with_output(extra_args=args)
+        input_hash_file = os.path.join(toy_installdir, 'easybuild', 'install-input-hash.json')
+        input_hash = json.loads(read_file(input_hash_file))['input_hash']
+        tarball = os.path.join(cache_dir, input_hash[:2], input_hash + '.tar.xz')
+        self.assertExists(tarball)
+        meta = json.loads(read_file(os.path.join(cache_dir, input_hash[:2], input_hash + '.json')))
+        self.assertEqual(meta['installdir'], toy_installdir)
+        self.assertEqual(meta['inputs']['dependencies'], [])
+        self.assertIn('toy', meta['module_file'])
+
+        # installation is restored from binary cache rather than being built again
+        remove_dir(toy_installdir)
+        stdout, _ = self.run_test_toy_build_with_output(extra_args=args)
+        self.assertIn("restoring installation from binary cache", stdout)
+        self.assertIn("building [skipped]", stdout)
+        self.assertEqual(json.loads(read_file(input_hash_file))['input_hash'], input_hash)
+
+        # binary cache is not considered when a rebuild is requested
+        stdout, _ = self.run_test_toy_build_with_output(extra_args=args + ['--rebuild'])
+        self.assertNotIn("restoring installation from binary cache", stdout)
+        self.assertNotIn("building [skipped]", stdout)
+
+        # any change in inputs results in a different hash
+        test_ec = os.path.join(self.test_prefix, 'test.eb')
+        toy_ec = os.path.join(os.path.dirname(__file__), 'easyconfigs', 'test_ecs', 't', 'toy', 'toy-0.0.eb')
+        write_file(test_ec, read_file(toy_ec) + "\ndescription = 'Toy C program, modified'\n")
+        stdout, _ = self.run_test_toy_build_with_output(ec_file=test_ec, extra_args=args)
+        self.assertNotIn("restoring installation from binary cache", stdout)
+        self.assertNotEqual(json.loads(read_file(input_hash_file))['input_hash'], input_hash)
+        self.assertEqual(len(glob.glob(os.path.join(cache_dir, '*', '*.tar.xz'))), 2)
+
+        # installation that includes a reference to installation prefix (for example to installation directory
+        # of a dependency) is not relocatable
+        dep_libdir = os.path.join(self.test_installpath, 'software', 'GCC', '4.6.3', 'lib')
+        write_file(test_ec, read_file(toy_ec) + '\n'.join([
+            '',
+            "description = 'Toy C program, with reference to dependency'",
+            "postinstallcmds = ['echo %s > %%(installdir)s/dep_ref.txt']" % dep_libdir,
+        ]))
+        self.run_test_toy_build_with_output(ec_file=test_ec, extra_args=args)
+        input_hash = json.loads(read_file(input_hash_file))['input_hash']
+        tarball, meta_path = binary_cache_paths(cache_dir, input_hash)
+        meta = json.loads(read_file(meta_path))
+        self.assertEqual(meta['install_prefix'], os.path.join(self.test_installpath, 'software'))
+        self.assertFalse(meta['relocatable'])
+        self.assertEqual(meta['prefix_reference'], os.path.join(toy_installdir, 'dep_ref.txt'))
+        other_installdir = os.path.join(self.test_prefix, 'other', 'software', 'toy', '0.0')
+        self.assertEqual(find_in_binary_cache(cache_dir, input_hash, other_installdir), None)
+        self.assertEqual(find_in_binary_cache(cache_dir, input_hash, toy_installdir), tarball)
+
+    def test_toy_resource_usage(self):
+        """Test recording of resource usage during toy installation."""
+        test_report = os.path.join(self.test_prefix, 'test_report.md')
+        self.run_test_toy_build_with_output(extra_args=['--record-resource-usage'], test_report=test_report)
+
+        log_dir = os.path.join(self.test_installpath, 'software', 'toy', '0.0', 'easybuild')
+        resource_usage_files = glob.glob(os.path.join(log_dir, 'easybuild-toy-0.0*_resource_usage.json'))
+        self.assertEqual(len(resource_usage_files), 1)
+        resource_usage = json.loads(read_file(resource_usage_files[0]))
+        for step in ('fetch', 'build', 'install', 'sanitycheck', 'module'):
+            self.assertIn(step, resource_usage['steps'])
+        # gcc command used by toy easyblock to build toy binary is included
+        shell_cmds = [e['args']['cmd'] for e in resource_usage['events'] if e['category'] == 'shell_cmd']
+        self.assertTrue(any('gcc toy.c' in cmd for cmd in shell_cmds), shell_cmds)
+
+        trace_files = glob.glob(os.path.join(log_dir, 'easybuild-toy-0.0*_trace.json'))
+        self.assertEqual(len(trace_files), 1)
+        trace_events = json.loads(read_file(trace_files[0]))['traceEvents']
+        self.assertEqual(len(trace_events), len(resource_usage['events']))
+
+        regex = re.compile(r"^#### Resource usage per step\n.*\n.*\nfetch \| 1 \|", re.M)
+        test_report_txt = read_file(test_report)
+        self.assertTrue(regex.search(test_report_txt), "Pattern %s found in %s" % (regex.pattern, test_report_txt))
+
+    def test_toy_profile_framework(self):
+        """Test profiling of framework during toy installation."""
+        try:
+            self.run_test_toy_build_with_output(extra_args=['--profile-framework=all'])
+        finally:
+            # make sure profiling is disabled again
+            init_framework_profiling(None, None)
+
+        profile_dir = '.'.join(self.logfile.split('.')[:-1]) + '_profile'
+        self.assertTrue(os.path.isdir(profile_dir))
+        reports = sorted(os.listdir(profile_dir))
+
+        for phase in ('option_parsing', 'parse_easyconfigs', 'toy-0.0_build_step', 'toy-0.0_sanitycheck_step',
+                      'toy-0.0_module_step'):
+            regex = re.compile(r'^[0-9]{3}_%s\.pstats$' % phase)
+            self.assertTrue(any(regex.match(x) for x in reports), "Report for %s found in %s" % (phase, reports))
+            regex = re.compile(r'^[0-9]{3}_%s_memory\.txt$' % phase)
+            self.assertTrue(any(regex.match(x) for x in reports), "Report for %s found in %s" % (phase, reports))
+
+        # reports are numbered in order of phases
+        self.assertTrue(reports[0].startswith('001_option_parsing'))
+        build_step_pstats = [x for x in reports if x.endswith('_build_step.pstats')][0]
+        stats = pstats.Stats(os.path.join(profile_dir, build_step_pstats))
+        self.assertTrue(stats.total_calls > 0)
+
+        memory_report = [x for x in reports if x.endswith('parse_easyconfigs_memory.txt')][0]
+        memory_report_txt = read_file(os.path.join(profile_dir, memory_report))
+        self.assertTrue(memory_report_txt.startswith("Memory allocations during phase 'parse_easyconfigs'"))
+
+    def test_toy_build_history(self):
+        """Test recording of toy installations in build history database."""
+        build_history_db = os.path.join(self.test_prefix, 'build_history.sqlite')
+        args = ['--build-history-db=%s' % build_history_db]
+        self.run_test_toy_build_with_output(extra_args=args)
+        self.run_test_toy_build_with_output(extra_args=args)
+
+        builds = get_build_history(path=build_history_db)
+        self.assertEqual(len(builds), 2)
+        for build in builds:
+            self.assertEqual((build['name'], build['version'], build['full_mod_name']), ('toy', '0.0', 'toy/0.0'))
+            self.assertTrue(build['install_size'] > 0)
+            self.assertTrue(build['core_count'] > 0)
+            for step in ('fetch', 'build', 'install', 'sanitycheck', 'module'):
+                self.assertIn(step, build['steps'])
+
+        self.assertTrue(estimate_build_duration('toy', '0.0', path=build_history_db) >= 0)
+        self.assertIn('build', estimate_step_durations('toy', '0.0', path=build_history_db))
+
+        with self.mocked_stdout_stderr():
+            self.eb_main(args + ['--build-history=1'], raise_error=True)
+            stdout = self.get_stdout()
+        regex = re.compile(r"^date\s+module\s+build time.*\n-+.*\n[0-9-]+ [0-9:]+\s+toy/0.0\s+", re.M)
+        self.assertTrue(regex.search(stdout), "Pattern '%s' should be found in: %s" % (regex.pattern, stdout))
+        self.assertEqual(len(stdout.strip().split('\n')), 3)
+
     def test_toy_permissions(self):
         """Test toy build with custom umask settings."""
         toy_ec_file = os.path.join(os.path.dirname(__file__), 'easyconfigs', 'test_ecs', 't', 'toy', 'toy-0.0.eb')
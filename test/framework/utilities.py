@@ -43,6 +43,7 @@ from easybuild.base import fancylogger
 from easybuild.base.testing import TestCase
 import easybuild.tools.build_log as eb_build_log
 import easybuild.tools.options as eboptions
+import easybuild.tools.systemtools as systemtools
 import easybuild.tools.toolchain.utilities as tc_utils
 import easybuild.tools.module_naming_scheme.toolchain as mns_toolchain
 from easybuild.framework.easyconfig import easyconfig
@@ -497,6 +498,9 @@ def cleanup(clear_caches=True):
         easyconfig._easyconfig_files_cache.clear()
         easyconfig.get_toolchain_hierarchy.clear()
         mns_toolchain._toolchain_details_cache.clear()
+        systemtools._os_dependency_cache.clear()
+        systemtools._os_pkgs_inventory.clear()
+        systemtools._system_info_snapshot = None
 
     # reset to make sure tempfile picks up new temporary directory to use
     tempfile.tempdir = None
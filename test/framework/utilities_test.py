@@ -31,15 +31,18 @@ Unit tests for utilities.py
 """
 import os
 import random
+import re
 import sys
 import tempfile
+import time
 from datetime import datetime
 from unittest import TextTestRunner
 
 import easybuild.tools.utilities as tu
 from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered
-from easybuild.tools import LooseVersion
+from easybuild.tools import LooseVersion, version_sort_key
 from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.filetools import read_file
 
 
 class UtilitiesTest(EnhancedTestCase):
@@ -209,6 +212,63 @@ class UtilitiesTest(EnhancedTestCase):
         self.assertEqual(LooseVersion('2.a').version, [2, 'a'])
         self.assertEqual(LooseVersion('2.a5').version, [2, 'a', 5])
 
+    def test_version_sort_key(self):
+        """Test version_sort_key function."""
+        versions = ['1.5.1', '1.5.2b2', '161', '3.10a', '8.02', '3.4j', '1996.07.12', '3.2.pl0', '3.1.1.6', '2g6',
+                    '11g', '0.960923', '2.2beta29', '1.13++', '5.5.kw', '1.0', '1', '1.', '1.a', '4.0.0-beta', '4.0.0',
+                    'v1.0', 'w0.1', '1000', '9.0', '9.0a', '9.2', '9.10', '2023a', '2023b', '2023.06', '1.2.3-rc1']
+
+        # keys are ordered like the corresponding LooseVersion instances
+        for v1 in versions:
+            for v2 in versions:
+                key1, key2 = version_sort_key(v1), version_sort_key(v2)
+                res = LooseVersion(v1)._cmp(v2)
+                self.assertEqual((key1 > key2) - (key1 < key2), res, "%s vs %s: %s" % (v1, v2, res))
+                self.assertEqual(version_sort_key(LooseVersion(v1)), key1)
+
+        # keys (and LooseVersion instances) of equal versions are equal, and have the same hash
+        self.assertEqual(version_sort_key('1.0'), version_sort_key('1'))
+        self.assertEqual(hash(LooseVersion('1.0')), hash(LooseVersion('1')))
+        self.assertEqual(len({LooseVersion('1.0'), LooseVersion('1'), LooseVersion('1.')}), 1)
+
+        # comparing versions that only differ in trailing zeros vs a non-numeric component that sorts before digits
+        # is not transitive for LooseVersion instances; keys consider trailing zeros to be absent
+        self.assertEqual(LooseVersion('1.0'), '1')
+        self.assertLess(LooseVersion('1'), '1-1')
+        self.assertGreater(LooseVersion('1.0'), '1-1')
+        self.assertLess(version_sort_key('1.0'), version_sort_key('1-1'))
+
+    def test_version_sort_key_benchmark(self):
+        """Micro-benchmark for sorting versions via version_sort_key rather than via LooseVersion instances."""
+        version_regex = re.compile(r"^version\s*=\s*['\"]([^'\"]+)['\"]", re.M)
+        topdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'easyconfigs')
+        versions = []
+        for dirpath, _, filenames in os.walk(topdir):
+            for filename in filenames:
+                if filename.endswith('.eb'):
+                    versions.extend(version_regex.findall(read_file(os.path.join(dirpath, filename))))
+        self.assertTrue(len(versions) > 100)
+
+        # make list of versions sufficiently large, and shuffle it
+        versions = versions * 20
+        random.shuffle(versions)
+
+        res = sorted(versions, key=version_sort_key)
+        self.assertEqual(res, sorted(versions, key=LooseVersion))
+
+        def timed_sort(key):
+            """Return time required to sort versions using specified key function (best of 3)."""
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                sorted(versions, key=key)
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        time_loose_version = timed_sort(LooseVersion)
+        time_sort_key = timed_sort(version_sort_key)
+        self.assertLess(time_sort_key, time_loose_version)
+
     def test_unique_ordered_extend(self):
         """Test unique_ordered_list_append method"""
         base = ["potato", "tomato", "orange"]